@@ -2,17 +2,39 @@ import json
 from backend.storage.models import Lead
 from backend.core.llm_client import LLMClient
 from backend.utils.logger import setup_logger
-from backend.storage.db import LeadStore
+from backend.storage.base import BaseLeadStore
+from backend.storage.lead_events import draft_payload
 
 logger = setup_logger("EmailGeneratorAgent")
 
+# Lead fields a campaign email_template may reference, plus {first_name}
+TEMPLATE_FIELDS = ("name", "company_name", "title", "email", "source", "company_summary", "product_summary")
+
+
+class _TemplateValues(dict):
+    # Unknown placeholders render empty instead of failing the whole campaign
+    def __missing__(self, key):
+        return ""
+
+
+def render_template(template: str, lead: Lead) -> str:
+    """
+    Fills a campaign template ("Hi {first_name}, ... {company_name} ...") from the lead, no LLM call.
+    Raises ValueError for a malformed template (unbalanced braces).
+    """
+    values = _TemplateValues((name, getattr(lead, name) or "") for name in TEMPLATE_FIELDS)
+    values["first_name"] = (lead.name or "").split(" ")[0]
+    return template.format_map(values)
+
 class EmailGeneratorAgent:
-    def __init__(self, db: LeadStore = None):
-        self.llm = LLMClient()
+    def __init__(self, db: BaseLeadStore = None, llm: LLMClient = None, campaigns=None):
+        self.llm = llm or LLMClient()
         self.db = db
+        # CampaignRegistry: per-campaign product pitch and email template
+        self.campaigns = campaigns
 
     def generate_email(self, lead: Lead):
-        logger.info(f"Generating email for lead: {lead.id}")
+        logger.info("Generating email for lead: %s", lead.id)
         
         prompt = f"""
         Draft a cold email to {lead.name} at {lead.company_name}.
@@ -21,9 +43,14 @@ class EmailGeneratorAgent:
         
         Output strictly valid JSON with keys: 'subject', 'body'.
         """
+        campaign = self.campaigns.get(lead.campaign_id) if self.campaigns else None
+        if campaign and campaign.product_description:
+            prompt += f"\nWe sell: {campaign.product_description}"
+        if campaign and campaign.email_template:
+            prompt += f"\nFollow this template and tone:\n{campaign.email_template}"
         
         try:
-            generated_text = self.llm.generate(prompt, system_prompt="You are a world-class Copywriter.")
+            generated_text = self.llm.generate(prompt, system_prompt="You are a world-class Copywriter.", task="draft")
             # Cleanup
             cleaned_text = generated_text.replace("```json", "").replace("```", "").strip()
             
@@ -33,19 +60,20 @@ class EmailGeneratorAgent:
             lead.generated_email_body = data.get("body", "Hi, I'd like to connect.")
             lead.status = "processed" 
             
-            if self.db: self.db.log_event(lead.id, "GEN_OK", "Email Draft Prepared")
-            logger.info(f"Email generated for {lead.id}")
+            if self.db: self.db.log_event(lead.id, "GEN_OK", "Email Draft Prepared", draft_payload(lead))
+            logger.info("Email generated for %s", lead.id)
             
         except json.JSONDecodeError:
             # Fallback
-            logger.warning(f"Email Gen JSON Parse Fail {lead.id}. Using fallback.")
+            logger.warning("Email Gen JSON Parse Fail %s. Using fallback.", lead.id)
             lead.generated_email_subject = f"Question for {lead.name}"
             lead.generated_email_body = f"Hi {lead.name}, I reviewed {lead.company_name} and think we can help."
             lead.status = "processed"
-            if self.db: self.db.log_event(lead.id, "GEN_WARN", "JSON Parse Failed, used Template Fallback")
+            if self.db: self.db.log_event(lead.id, "GEN_WARN", "JSON Parse Failed, used Template Fallback",
+                                          draft_payload(lead))
             
         except Exception as e:
-            logger.error(f"Email Gen Error: {e}")
+            logger.error("Email Gen Error: %s", e)
             if self.db: self.db.log_event(lead.id, "GEN_ERR", str(e))
             # Don't change status to processed if critical error? 
             # Allow fallback if possible, else fail.
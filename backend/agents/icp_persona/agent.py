@@ -1,48 +1,128 @@
-from typing import Dict
+from typing import Dict, Optional
 import json
 from backend.storage.models import Lead
+from backend.core.config import config
 from backend.core.llm_client import LLMClient
 from backend.utils.logger import setup_logger
-from backend.storage.db import LeadStore
+from backend.utils.metrics import CACHE_REQUESTS_TOTAL
+from backend.storage.base import BaseLeadStore
+from backend.storage.lead_events import enrichment_payload
 
 logger = setup_logger("ICPPersonaAgent")
 
+
+def parse_fit_score(value) -> Optional[float]:
+    # Models answer 0-100, "85", or sometimes a 0-1 fraction; anything else is unscored
+    try:
+        score = float(value)
+    except (TypeError, ValueError):
+        return None
+    if 0 < score < 1:
+        score *= 100
+    return min(max(score, 0.0), 100.0)
+
+
 class ICPPersonaAgent:
-    def __init__(self, db: LeadStore = None):
-        self.llm = LLMClient()
+    def __init__(self, db: BaseLeadStore = None, llm: LLMClient = None, similar=None, campaigns=None):
+        self.llm = llm or LLMClient()
         self.db = db # Pass DB to log events
+        # EmbeddingIndex of analysed accounts: near-identical companies reuse an analysis
+        self.similar = similar
+        # CampaignRegistry: the lead's campaign supplies the product and ICP the fit is scored against
+        self.campaigns = campaigns
 
-    def analyze_lead(self, lead: Lead):
-        logger.info(f"Analyzing lead: {lead.id} ({lead.company_name})")
-        
-        prompt = (f"Analyze the company '{lead.company_name}' for fit with 'AI GTM Agent'. "
-                  f"Output strictly valid JSON with keys: 'company_summary', 'product_summary', 'fit_score'. "
-                  f"No markdown.")
+    def analyze_lead(self, lead: Lead, reuse: bool = True):
+        # reuse=False always asks the LLM (re-enrichment), even when the account was analysed before
+        logger.info("Analyzing lead: %s (%s)", lead.id, lead.company_name)
+
+        # Another lead of the same account was already enriched: reuse it, no LLM call
+        account = self.db.get_account(lead.account_id) if reuse and self.db and lead.account_id else None
+        if account and account.company_summary:
+            lead.company_summary = account.company_summary
+            lead.product_summary = account.product_summary
+            lead.fit_score = account.fit_score
+            lead.status = "enriched"
+            self.db.log_event(lead.id, "ENRICH_REUSED", f"Account {account.id}", enrichment_payload(lead))
+            return lead
+        if reuse and self._reuse_similar(lead):
+            return lead
         
+        prompt = self._build_prompt(lead)
+
         try:
-            response_text = self.llm.generate(prompt)
+            response_text = self.llm.generate(prompt, task="analyze")
             # Cleanup
             cleaned_text = response_text.replace("```json", "").replace("```", "").strip()
             
             data = json.loads(cleaned_text)
             lead.company_summary = data.get("company_summary", response_text)
             lead.product_summary = data.get("product_summary", "Auto-generated")
+            lead.fit_score = parse_fit_score(data.get("fit_score"))
             lead.status = "enriched"
             
             if self.db: 
-                self.db.log_event(lead.id, "ENRICH_OK", "Analysis Successful")
+                self.db.log_event(lead.id, "ENRICH_OK", "Analysis Successful", enrichment_payload(lead))
+                if lead.account_id:
+                    self.db.update_account_enrichment(lead.account_id, lead.company_summary, lead.product_summary,
+                                                      lead.fit_score)
+            self._index_account(lead)
                 
         except json.JSONDecodeError:
-             logger.warning(f"ICP Parse Fail {lead.id}. Using fallback.")
+             logger.warning("ICP Parse Fail %s. Using fallback.", lead.id)
              lead.company_summary = response_text
              lead.product_summary = "Fallback summary"
              lead.status = "enriched"
-             if self.db: self.db.log_event(lead.id, "ENRICH_WARN", "JSON Parse Failed")
+             if self.db: self.db.log_event(lead.id, "ENRICH_WARN", "JSON Parse Failed", enrichment_payload(lead))
              
         except Exception as e:
-             logger.error(f"ICP Error: {e}")
+             logger.error("ICP Error: %s", e)
              if self.db: self.db.log_event(lead.id, "ENRICH_ERR", str(e))
              lead.status = "new" # Do not progress
              
-        logger.info(f"Lead enriched: {lead.id}")
+        logger.info("Lead enriched: %s", lead.id)
         return lead
+
+    def _build_prompt(self, lead: Lead) -> str:
+        campaign = self.campaigns.get(lead.campaign_id) if self.campaigns else None
+        product = (campaign.product_description if campaign else None) or "AI GTM Agent"
+        prompt = f"Analyze the company '{lead.company_name}' for fit with '{product}'. "
+        if campaign and campaign.icp_description:
+            prompt += f"Our ideal customer profile: {campaign.icp_description} "
+        return prompt + ("Output strictly valid JSON with keys: 'company_summary', 'product_summary', "
+                         "'fit_score' (integer 0-100). "
+                         "No markdown.")
+
+    def _profile_text(self, lead: Lead) -> Optional[str]:
+        # Company description from the lead source (CRM / CSV), if it came with one
+        return (lead.metadata or {}).get("company_description")
+
+    def _reuse_similar(self, lead: Lead) -> bool:
+        if self.similar is None or not self.db or not lead.account_id:
+            return False
+        description = self._profile_text(lead)
+        if not description:
+            return False
+        match = self.similar.nearest(description, min_score=config.ENRICH_REUSE_SIMILARITY)
+        account = self.db.get_account(match.id) if match and match.id != lead.account_id else None
+        if not account or not account.company_summary:
+            CACHE_REQUESTS_TOTAL.labels("similar_company", "miss").inc()
+            return False
+        CACHE_REQUESTS_TOTAL.labels("similar_company", "hit").inc()
+        lead.company_summary = account.company_summary
+        lead.product_summary = account.product_summary
+        lead.fit_score = account.fit_score
+        lead.status = "enriched"
+        # Later leads of this account then take the exact-account path
+        self.db.update_account_enrichment(lead.account_id, lead.company_summary, lead.product_summary, lead.fit_score)
+        self.db.log_event(lead.id, "ENRICH_REUSED", f"Similar account {account.id} ({match.score:.2f})",
+                          enrichment_payload(lead))
+        return True
+
+    def _index_account(self, lead: Lead):
+        # Indexed by the text later leads are matched with; the LLM summary when the source had none
+        if self.similar is None or not lead.account_id:
+            return
+        try:
+            self.similar.upsert([lead.account_id], [self._profile_text(lead) or lead.company_summary])
+        except Exception as e:
+            logger.warning("Could not index account %s: %s", lead.account_id, e)
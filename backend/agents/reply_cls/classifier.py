@@ -1,24 +1,36 @@
 from backend.storage.models import Reply
-from backend.storage.db import LeadStore
+from backend.storage.base import BaseLeadStore
+from backend.core.config import config
 from backend.core.llm_client import LLMClient
-from backend.utils.logger import setup_logger
+from backend.utils.logger import setup_logger, log_context
+from backend.utils.metrics import CACHE_REQUESTS_TOTAL
+from backend.services.embeddings.embedding_index import text_key
 
 logger = setup_logger("ReplyClassifierAgent")
 
 class ReplyClassifierAgent:
-    def __init__(self, db: LeadStore):
+    def __init__(self, db: BaseLeadStore, llm: LLMClient = None, known_replies=None):
         self.db = db
-        self.llm = LLMClient()
+        self.llm = llm or LLMClient()
+        # EmbeddingIndex of classified replies: a near-duplicate of one skips the LLM call
+        self.known_replies = known_replies
 
     def classify_reply(self, reply: Reply):
-        logger.info(f"Classifying reply from lead {reply.lead_id}...")
+        with log_context(lead_id=reply.lead_id):
+            return self._classify_reply(reply)
+
+    def _classify_reply(self, reply: Reply):
+        logger.info("Classifying reply from lead %s...", reply.lead_id)
         
         # 1. Classification
-        prompt = f"Classify this email reply: '{reply.content}'. Categories: interested, not_interested, out_of_office, bounce, unsubscribe, maybe."
-        classification = self.llm.generate(prompt).strip().lower()
+        classification = self._known_classification(reply.content)
+        if classification is None:
+            prompt = f"Classify this email reply: '{reply.content}'. Categories: interested, not_interested, out_of_office, bounce, unsubscribe, maybe."
+            classification = self.llm.generate(prompt, task="classify").strip().lower()
+            self._remember(reply.content, classification)
             
         reply.classification = classification
-        logger.info(f"Reply classified as: {classification}")
+        logger.info("Reply classified as: %s", classification)
         
         # 2. State Machine Transition (Stop Followups)
         # Any reply (except maybe OOO soft bounce) should likely stop the sequence.
@@ -37,8 +49,29 @@ class ReplyClassifierAgent:
         else:
              self.db.increment_metric("reply_count")
         
-        # Update DB
-        self.db.update_lead_status(reply.lead_id, new_status)
-        logger.info(f"Lead {reply.lead_id} status updated to {new_status} (Follow-ups Stopped)")
+        # Update DB (compare-and-set: a lead stopped meanwhile, e.g. by a bounce webhook, stays stopped)
+        if self.db.transition_lead(reply.lead_id, new_status, reason="reply"):
+            logger.info("Lead %s status updated to %s (Follow-ups Stopped)", reply.lead_id, new_status)
+        else:
+            logger.warning("Lead %s not moved to %s: not allowed from its current status", reply.lead_id, new_status)
             
         return reply
+
+    def _known_classification(self, content: str):
+        if self.known_replies is None or not content or not content.strip():
+            return None
+        match = self.known_replies.nearest(content, min_score=config.REPLY_REUSE_SIMILARITY)
+        if match is None or not match.label:
+            CACHE_REQUESTS_TOTAL.labels("similar_reply", "miss").inc()
+            return None
+        CACHE_REQUESTS_TOTAL.labels("similar_reply", "hit").inc()
+        logger.info("Reply matches a labelled reply (%.2f): %s", match.score, match.label)
+        return match.label
+
+    def _remember(self, content: str, classification: str):
+        if self.known_replies is None or not content or not content.strip() or not classification:
+            return
+        try:
+            self.known_replies.upsert([text_key(content)], [content], labels=[classification])
+        except Exception as e:
+            logger.warning("Could not index reply: %s", e)
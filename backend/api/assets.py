@@ -0,0 +1,88 @@
+import gzip
+import hashlib
+import os
+import re
+from typing import Dict, NamedTuple, Optional, Sequence, Tuple
+from starlette.requests import Request
+from starlette.responses import Response
+from backend.api.caching import accepts_gzip, if_none_match, not_modified
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+MEDIA_TYPES = {
+    ".js": "application/javascript; charset=utf-8",
+    ".css": "text/css; charset=utf-8",
+    ".html": "text/html; charset=utf-8",
+}
+
+
+class _Asset(NamedTuple):
+    body: bytes
+    gzipped: bytes
+    digest: str
+    media_type: str
+
+
+def _asset(body: bytes, ext: str) -> _Asset:
+    # Compressed once here at the highest level; GZipMiddleware leaves Content-Encoding responses alone
+    return _Asset(body, gzip.compress(body, 9, mtime=0), hashlib.blake2b(body, digest_size=12).hexdigest(),
+                  MEDIA_TYPES.get(ext, "application/octet-stream"))
+
+
+def _serve(request: Request, asset: _Asset, cache_control: str) -> Response:
+    compressed = accepts_gzip(request)
+    etag = f'"{asset.digest}-gz"' if compressed else f'"{asset.digest}"'
+    if if_none_match(request, etag):
+        return not_modified(etag, cache_control)
+    headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+    if compressed:
+        headers["Content-Encoding"] = "gzip"
+    return Response(asset.gzipped if compressed else asset.body, media_type=asset.media_type, headers=headers)
+
+
+class StaticAssets:
+    """
+    The dashboard shell. Scripts and stylesheets are served as /assets/<name>.<content hash>.<ext>
+    with a one-year immutable Cache-Control, and index.html (always revalidated by ETag) is
+    rewritten to reference them, so a new build changes the URLs instead of waiting for browser
+    caches to expire. Files are gzipped once when loaded and re-read when their mtime changes.
+    """
+    def __init__(self, directory: str, names: Sequence[str] = ("app.js", "style.css"),
+                 index: str = "index.html", prefix: str = "/assets/"):
+        self.directory = directory
+        self.names = tuple(names)
+        self.index_name = index
+        self.prefix = prefix
+        self.urls: Dict[str, str] = {}
+        self._assets: Dict[str, _Asset] = {}
+        self._index: Optional[_Asset] = None
+        self._mtimes: Optional[Tuple[int, ...]] = None
+
+    def _load(self):
+        paths = [os.path.join(self.directory, name) for name in (self.index_name,) + self.names]
+        mtimes = tuple(os.stat(path).st_mtime_ns for path in paths)
+        if mtimes == self._mtimes:
+            return
+        # Earlier builds stay servable for pages still holding their URLs
+        assets, urls = dict(self._assets), {}
+        for name, path in zip(self.names, paths[1:]):
+            with open(path, "rb") as f:
+                body = f.read()
+            stem, ext = os.path.splitext(name)
+            hashed = f"{stem}.{hashlib.blake2b(body, digest_size=6).hexdigest()}{ext}"
+            assets[hashed] = _asset(body, ext)
+            urls[name] = self.prefix + hashed
+        with open(paths[0], encoding="utf-8") as f:
+            html = re.sub(r'\b(href|src)="([^"]+)"',
+                          lambda m: f'{m.group(1)}="{urls.get(m.group(2), m.group(2))}"', f.read())
+        self._assets, self.urls, self._index, self._mtimes = assets, urls, _asset(html.encode("utf-8"), ".html"), mtimes
+
+    def index(self, request: Request) -> Response:
+        self._load()
+        return _serve(request, self._index, "no-cache")
+
+    def asset(self, request: Request, name: str) -> Response:
+        self._load()
+        asset = self._assets.get(name)
+        if asset is None:
+            return Response(status_code=404)
+        return _serve(request, asset, IMMUTABLE)
@@ -0,0 +1,91 @@
+import hashlib
+import time
+from typing import Awaitable, Callable, Dict
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+from backend.utils.metrics import CACHE_REQUESTS_TOTAL
+
+# API responses may be stored by the browser but are revalidated (If-None-Match) on every use
+REVALIDATE = "no-cache"
+
+
+def accepts_gzip(request: Request) -> bool:
+    return "gzip" in request.headers.get("accept-encoding", "")
+
+
+def strong_etag(*parts) -> str:
+    return '"%s"' % hashlib.blake2b("|".join(map(str, parts)).encode(), digest_size=12).hexdigest()
+
+
+def if_none_match(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    # Weak comparison (RFC 9110 13.1.2), as If-None-Match requires: W/ prefixes are ignored
+    return any(tag.strip() in ("*", etag, "W/" + etag) for tag in header.split(","))
+
+
+def not_modified(etag: str, cache_control: str = REVALIDATE) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+
+class _Entry:
+    __slots__ = ("etag", "body", "media_type", "expires")
+
+    def __init__(self, etag: str, body: bytes, media_type: str, expires: float):
+        self.etag, self.body, self.media_type, self.expires = etag, body, media_type, expires
+
+    def serve(self, request: Request) -> Response:
+        if if_none_match(request, self.etag):
+            return not_modified(self.etag)
+        return Response(self.body, media_type=self.media_type,
+                        headers={"ETag": self.etag, "Cache-Control": REVALIDATE, "Vary": "Accept"})
+
+
+class ResponseCache:
+    """
+    Conditional GET for read endpoints over the lead store. Each response carries a strong ETag
+    built from the store's change version (BaseLeadStore.get_change_version) and the negotiated
+    representation (URL, Accept, gzip), so a poll with a matching If-None-Match costs one version
+    check and gets a bodyless 304.
+
+    With `ttl`, the last body is also kept in memory: for `ttl` seconds it is served without
+    touching the store at all, then a single version check either renews it or rebuilds it.
+    Streamed responses are never kept.
+    """
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: Dict[str, _Entry] = {}
+
+    async def respond(self, request: Request, store, build: Callable[[], Awaitable[Response]],
+                      *key_parts, ttl: float = 0) -> Response:
+        key = "|".join(map(str, (request.url.path, request.url.query, request.headers.get("accept", ""),
+                                 accepts_gzip(request)) + key_parts))
+        now = time.monotonic()
+        entry = self._entries.get(key) if ttl > 0 else None
+        if entry is not None and now < entry.expires:
+            CACHE_REQUESTS_TOTAL.labels("http_response", "hit").inc()
+            return entry.serve(request)
+
+        etag = strong_etag(await store.get_change_version(), key)
+        if entry is not None and entry.etag == etag:
+            entry.expires = now + ttl
+            CACHE_REQUESTS_TOTAL.labels("http_response", "hit").inc()
+            return entry.serve(request)
+        if if_none_match(request, etag):
+            CACHE_REQUESTS_TOTAL.labels("http_etag", "hit").inc()
+            return not_modified(etag)
+        CACHE_REQUESTS_TOTAL.labels("http_etag", "miss").inc()
+
+        response = await build()
+        if response.status_code != 200:
+            return response
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = REVALIDATE
+        response.headers["Vary"] = "Accept"
+        if ttl > 0 and not isinstance(response, StreamingResponse):
+            self._entries.pop(key, None)
+            while len(self._entries) >= self.max_entries:
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = _Entry(etag, response.body, response.media_type, now + ttl)
+        return response
@@ -1,18 +1,49 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
+import json
 import os
-from backend.storage.db import LeadStore
-from backend.services.lead_ingest.ingest import LeadIngestionService
-from backend.services.sender.orchestrator import SendOrchestrator
-from backend.agents.icp_persona.agent import ICPPersonaAgent
-from backend.agents.email_gen.generator import EmailGeneratorAgent
+from dataclasses import asdict
+from datetime import datetime
+from starlette.concurrency import run_in_threadpool
+from backend.core.config import config
+from backend.core.container import AppContainer, get_container, reset_container
+from backend.api.assets import StaticAssets
+from backend.api.caching import ResponseCache
+from backend.api.streaming import stream_json, stream_responses
+from backend.services.campaigns.registry import CampaignConflict
+from backend.services.pipeline.scheduler import OUTREACH
+from backend.storage.base import LeadConflict
 from backend.utils.logger import setup_logger
+from backend.utils.metrics import registry as metrics_registry
 
-app = FastAPI(title="AI GTM Agent API")
+logger = setup_logger("API")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open the shared store up front; SDK clients stay lazy until first real use
+    container = get_container()
+    container.db
+    # Leads a crashed or stopped worker left mid-enrichment go back on the outreach queue
+    container.lead_pipeline.recover(container.scheduler)
+    if config.OUTBOX_RELAY_ENABLED:
+        # Delivers outbox messages left behind by crashed or retried sends
+        container.outbox_relay.start()
+    # Periodic full rescore (SCORING_RESCORE_SECONDS); new and enriched leads are scored inline
+    container.lead_scorer.start()
+    yield
+    await get_container().aclose()
+    reset_container()
+
+
+app = FastAPI(title="AI GTM Agent API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -21,12 +52,15 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-
-logger = setup_logger("API")
-db = LeadStore("gtm_agent.db")
+# Negotiated with Accept-Encoding; also compresses streamed responses chunk by chunk
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
 
 # Path to frontend directory
 FRONTEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "frontend")
+assets = StaticAssets(FRONTEND_DIR)
+
+# ETag / 304 for the read endpoints the dashboard polls after every action
+http_cache = ResponseCache()
 
 
 # Schemas
@@ -35,6 +69,9 @@ class LeadCreate(BaseModel):
     company: str
     email: Optional[str] = None
     linkedin: Optional[str] = None
+    title: Optional[str] = None
+    company_description: Optional[str] = None
+    campaign_id: Optional[str] = None  # None = "default"
     source: str = "API"
 
 class LeadResponse(BaseModel):
@@ -44,85 +81,279 @@ class LeadResponse(BaseModel):
     status: str
     subject: Optional[str] = None
     body: Optional[str] = None
+    priority: Optional[float] = None
+    fit_score: Optional[float] = None
+
+class CampaignCreate(BaseModel):
+    id: Optional[str] = None  # generated when omitted
+    name: str
+    icp_description: str = ""
+    product_description: Optional[str] = None
+    email_template: str = ""
+    blacklist_domains: List[str] = []
+    daily_limit: int = config.DEFAULT_DAILY_LIMIT
+    pipeline_workers: int = 0  # max pipeline threads for this campaign; 0 = no cap
+    weight: int = 1  # share of pipeline capacity relative to other busy campaigns
+    status: str = "active"
+
+class CampaignUpdate(BaseModel):
+    # Only the fields sent are changed; `version` (from the last read) makes the update a compare-and-set
+    version: Optional[int] = None
+    name: Optional[str] = None
+    icp_description: Optional[str] = None
+    product_description: Optional[str] = None
+    email_template: Optional[str] = None
+    blacklist_domains: Optional[List[str]] = None
+    daily_limit: Optional[int] = None
+    pipeline_workers: Optional[int] = None
+    weight: Optional[int] = None
+    status: Optional[str] = None
+
+class FollowUpRequest(BaseModel):
+    # Edited text for the next step; without it the current draft must differ from the last send
+    subject: Optional[str] = None
+    body: Optional[str] = None
 
 # Background Tasks
 def process_lead_pipeline(lead_id: str):
-    logger.info(f"Background processing for lead {lead_id}")
-    lead = db.get_lead(lead_id)
-    if not lead: return
-
-    # 1. Enrichment
-    icp = ICPPersonaAgent(db)
-    lead = icp.analyze_lead(lead)
-    
-    # 2. Generation
-    # Ensure downstream agent uses the potentially updated status/content
-    gen = EmailGeneratorAgent(db)
-    lead = gen.generate_email(lead)
-    
-    # Update full lead in DB
-    db.update_lead(lead)
-    logger.info(f"Pipeline complete for {lead_id}")
+    # Enrich + draft one lead inline (scripts); the API submits it to container.scheduler instead
+    get_container().lead_pipeline.process(lead_id)
 
+# Route handlers are async: SQLite work runs on the store executor (container.async_db)
+# and SendGrid calls go over async HTTP, so no request holds a threadpool worker.
 @app.get("/metrics")
-def get_metrics():
-    todays = db.get_todays_metrics()
+async def get_metrics(request: Request, container: AppContainer = Depends(get_container)):
+    async def build():
+        todays = await container.async_db.get_todays_metrics()
+        return JSONResponse({
+            "date": todays.date,
+            "sent": todays.sent_count,
+            "replied": todays.reply_count,
+            "positive": todays.positive_count,
+            "bounced": todays.bounce_count
+        })
+    # The day rolls over without a write, so the date is part of the cache key
+    today = datetime.now().strftime("%Y-%m-%d")
+    return await http_cache.respond(request, container.async_db, build, today, ttl=config.METRICS_CACHE_SECONDS)
+
+@app.get("/metrics/internal", response_class=PlainTextResponse)
+async def get_internal_metrics():
+    # Prometheus text exposition format
+    if not metrics_registry.enabled:
+        raise HTTPException(status_code=404, detail="Metrics disabled (METRICS_ENABLED=False)")
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/leads", responses=stream_responses(List[LeadResponse], {"$ref": "#/components/schemas/LeadResponse"}))
+async def get_leads(request: Request, container: AppContainer = Depends(get_container)):
+    # Streamed in keyset pages of projected rows (no Lead objects, no Pydantic): flat memory,
+    # first bytes after one page. JSON array, or NDJSON with Accept: application/x-ndjson
+    async def build():
+        pages = container.async_db.stream_lead_summaries(config.STREAM_CHUNK_ROWS)
+        return stream_json(request, ([_summary_dict(l) for l in page] async for page in pages))
+    return await http_cache.respond(request, container.async_db, build)
+
+@app.get("/leads/queue", response_model=List[LeadResponse])
+async def get_review_queue(request: Request, status: str = "processed", limit: int = 50,
+                           container: AppContainer = Depends(get_container)):
+    # Highest-priority leads first, read off the (status, priority) index
+    async def build():
+        leads = await container.async_db.get_review_queue(status=status, limit=min(max(limit, 1), 500))
+        return JSONResponse([_summary_dict(l) for l in leads])
+    return await http_cache.respond(request, container.async_db, build)
+
+def _summary_dict(l) -> Dict[str, Any]:
+    # LeadResponse fields, straight from a LeadSummary row
     return {
-        "date": todays.date,
-        "sent": todays.sent_count,
-        "replied": todays.reply_count,
-        "positive": todays.positive_count,
-        "bounced": todays.bounce_count
+        "id": l.id, "name": l.name, "company": l.company_name,
+        "status": l.status, "subject": l.generated_email_subject, "body": l.generated_email_body,
+        "priority": l.priority, "fit_score": l.fit_score
     }
 
-@app.get("/leads", response_model=List[LeadResponse])
-def get_leads():
-    leads = db.get_all_leads()
-    return [
-        LeadResponse(
-            id=l.id, name=l.name, company=l.company_name, 
-            status=l.status, subject=l.generated_email_subject, body=l.generated_email_body
-        ) 
-        for l in leads
-    ]
-
-@app.get("/leads/ids")
-def get_leads_ids():
-    leads = db.get_all_leads()
-    return [l.id for l in leads]
+@app.get("/analytics/funnel")
+async def get_funnel(by: Optional[str] = None, campaign_id: Optional[str] = None, source: Optional[str] = None,
+                     since: Optional[str] = None, until: Optional[str] = None):
+    # Served from the latest export (python -m backend.services.analytics.export), never the live store
+    from backend.services.analytics.snapshot import Snapshot
+
+    def query():
+        snapshot = Snapshot.latest()
+        if snapshot is None:
+            return None
+        filters = dict(campaign_id=campaign_id, source=source, since=since, until=until)
+        result = snapshot.funnel_by(by, **filters) if by else snapshot.funnel(**filters)
+        return {"snapshot_at": snapshot.manifest["created_at"], "funnel": result}
+
+    try:
+        response = await run_in_threadpool(query)
+    except (KeyError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if response is None:
+        raise HTTPException(status_code=404, detail="No analytics snapshot yet")
+    return response
+
+@app.get("/leads/ids", responses=stream_responses(List[str], {"type": "string"}))
+async def get_leads_ids(request: Request, container: AppContainer = Depends(get_container)):
+    async def build():
+        return stream_json(request, container.async_db.stream_lead_ids(config.STREAM_CHUNK_ROWS))
+    return await http_cache.respond(request, container.async_db, build)
 
 @app.post("/leads")
-def create_lead(lead: LeadCreate, background_tasks: BackgroundTasks):
-    ingestor = LeadIngestionService(db)
+async def create_lead(lead: LeadCreate, container: AppContainer = Depends(get_container)):
+    await _check_campaigns(container, [lead])
     raw_data = lead.dict()
-    lead_id = ingestor.ingest_lead(raw_data, source=lead.source)
+    lead_id = await container.async_db.run(container.ingestor.ingest_lead, raw_data, source=lead.source)
     
     if lead_id:
-        background_tasks.add_task(process_lead_pipeline, lead_id)
+        # Enriched on the campaign's outreach queue, after the response
+        container.scheduler.submit(lead.campaign_id, OUTREACH, container.lead_pipeline.process, lead_id)
         return {"id": lead_id, "status": "ingested"}
     else:
         raise HTTPException(status_code=400, detail="Ingestion Failed")
 
+@app.post("/leads/bulk")
+async def create_leads_bulk(leads: List[LeadCreate], container: AppContainer = Depends(get_container)):
+    # One bulk insert for the whole batch (COPY on Postgres); each lead keeps its own source
+    if not leads:
+        return {"ids": [], "status": "ingested"}
+    await _check_campaigns(container, leads)
+    lead_ids = await container.async_db.run(container.ingestor.ingest_leads, [lead.dict() for lead in leads])
+    # Every validated lead is ingested, in request order
+    for lead_id, lead in zip(lead_ids, leads):
+        container.scheduler.submit(lead.campaign_id, OUTREACH, container.lead_pipeline.process, lead_id)
+    return {"ids": lead_ids, "status": "ingested"}
+
+async def _check_campaigns(container: AppContainer, leads: List[LeadCreate]):
+    for campaign_id in {lead.campaign_id for lead in leads if lead.campaign_id}:
+        campaign = await container.async_db.run(container.campaigns.get, campaign_id)
+        if campaign is None or campaign.status == "archived":
+            raise HTTPException(status_code=400, detail=f"Unknown or archived campaign: {campaign_id}")
+
+# Campaigns
+@app.post("/campaigns", status_code=201)
+async def create_campaign(campaign: CampaignCreate, container: AppContainer = Depends(get_container)):
+    return await _campaign_call(container, container.campaigns.create, campaign.dict())
+
+@app.get("/campaigns")
+async def list_campaigns(include_archived: bool = False, container: AppContainer = Depends(get_container)):
+    campaigns = await container.async_db.run(container.campaigns.list, include_archived)
+    return [asdict(c) for c in campaigns]
+
+@app.get("/campaigns/{campaign_id}")
+async def get_campaign(campaign_id: str, container: AppContainer = Depends(get_container)):
+    campaign = await container.async_db.run(container.campaigns.get, campaign_id)
+    if campaign is None:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    return asdict(campaign)
+
+@app.put("/campaigns/{campaign_id}")
+async def update_campaign(campaign_id: str, changes: CampaignUpdate, container: AppContainer = Depends(get_container)):
+    fields = {key: value for key, value in changes.dict(exclude_unset=True).items() if key != "version"}
+    return await _campaign_call(container, container.campaigns.update, campaign_id, fields, changes.version)
+
+@app.delete("/campaigns/{campaign_id}")
+async def archive_campaign(campaign_id: str, version: Optional[int] = None, container: AppContainer = Depends(get_container)):
+    # Archived, not deleted: leads and analytics keep their campaign_id
+    return await _campaign_call(container, container.campaigns.archive, campaign_id, version)
+
+async def _campaign_call(container: AppContainer, fn, *args):
+    try:
+        campaign = await container.async_db.run(fn, *args)
+    except CampaignConflict as e:
+        # 409 with the current config, so the client can merge and retry with its version
+        raise HTTPException(status_code=409, detail={"error": str(e), "current": jsonable_encoder(asdict(e.campaign))})
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return asdict(campaign)
+
+@app.get("/pipeline")
+async def get_pipeline(container: AppContainer = Depends(get_container)):
+    # Queued tasks per priority class and campaign, running tasks per campaign
+    return container.scheduler.stats()
+
 @app.post("/leads/{lead_id}/approve")
-def approve_lead(lead_id: str):
-    sender = SendOrchestrator(db)
+async def approve_lead(lead_id: str, container: AppContainer = Depends(get_container)):
     # In a real app we might want to allow editing the body here before sending
     try:
-        sender.approve_and_send(lead_id)
-        return {"status": "sent"}
+        interaction = await container.sender.approve_and_send_async(lead_id)
+        return {"status": _send_status(interaction)}
+    except LeadConflict as e:
+        # The lead kept changing under every attempt; the client can simply retry
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _send_status(interaction) -> str:
+    # A message without a provider id is still in the outbox: the relay sends it once the send interval allows
+    return "queued" if interaction is not None and interaction.message_id is None else "sent"
+
+@app.post("/leads/{lead_id}/follow-up")
+async def follow_up_lead(lead_id: str, payload: Optional[FollowUpRequest] = None,
+                         container: AppContainer = Depends(get_container)):
+    # The next step for a lead already sent; a plain re-approve never sends it
+    from backend.services.sender.orchestrator import FollowUpNotDue
+    payload = payload or FollowUpRequest()
+    try:
+        interaction = await container.sender.send_follow_up_async(
+            lead_id, subject_override=payload.subject, body_override=payload.body
+        )
+        return {"status": _send_status(interaction)}
+    except (FollowUpNotDue, LeadConflict) as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Inbound webhooks
+@app.post("/webhooks/sendgrid")
+async def sendgrid_events_webhook(request: Request, container: AppContainer = Depends(get_container)):
+    # SendGrid Event Webhook: signed JSON array of events, applied in one transaction per batch
+    from backend.services.listener.sendgrid_events import SIGNATURE_HEADER, TIMESTAMP_HEADER
+    payload = await request.body()
+    processor = container.sendgrid_events
+    if not processor.verify(payload, request.headers.get(SIGNATURE_HEADER), request.headers.get(TIMESTAMP_HEADER)):
+        raise HTTPException(status_code=403, detail="Invalid signature")
+    try:
+        events = json.loads(payload)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON")
+    if isinstance(events, dict):
+        events = [events]
+    return await container.async_db.run(processor.apply, events)
+
+@app.post("/webhooks/gmail")
+async def gmail_push_webhook(request: Request, background_tasks: BackgroundTasks, token: Optional[str] = None,
+                             container: AppContainer = Depends(get_container)):
+    # Pub/Sub push for Gmail watch(); any 2xx acks the message, the history sync runs afterwards
+    handler = container.gmail_push
+    # OIDC verification may fetch Google certs, so keep it off the event loop
+    if not await run_in_threadpool(handler.verify, request.headers.get("Authorization"), token):
+        raise HTTPException(status_code=403, detail="Invalid push token")
+    try:
+        payload = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON")
+    notifications = handler.parse(payload)
+    for mailbox in handler.notify(notifications):
+        background_tasks.add_task(handler.sync, mailbox)
+    return {"accepted": len(notifications)}
+
 # Mount Static Files (Frontend)
 app.mount("/static", StaticFiles(directory=FRONTEND_DIR), name="static")
 
 @app.get("/")
-async def serve_index():
-    return FileResponse(os.path.join(FRONTEND_DIR, "index.html"))
+async def serve_index(request: Request):
+    # Points at the content-hashed /assets/ URLs below
+    return assets.index(request)
 
 @app.get("/index.html")
-async def serve_index_file():
-    return FileResponse(os.path.join(FRONTEND_DIR, "index.html"))
+async def serve_index_file(request: Request):
+    return assets.index(request)
+
+@app.get("/assets/{name}")
+async def serve_asset(name: str, request: Request):
+    # app.<hash>.js / style.<hash>.css: immutable, cached by browsers for a year
+    return assets.asset(request, name)
 
 @app.get("/style.css")
 async def serve_css():
@@ -133,31 +364,46 @@ async def serve_js():
     return FileResponse(os.path.join(FRONTEND_DIR, "app.js"))
 
 @app.post("/leads/batch-approve")
-def batch_approve(payload: Dict[str, Any]):
+async def batch_approve(payload: Dict[str, Any], container: AppContainer = Depends(get_container)):
     lead_ids = payload.get("lead_ids", [])
     overrides = payload.get("overrides", {}) # Map of lead_id -> {subject, body}
     
-    sender = SendOrchestrator(db)
-    results = {"success": [], "failed": []}
+    db = container.async_db
+    sender = container.sender
+    # queued: approved, but within the send interval; the outbox relay sends them one interval apart
+    results = {"success": [], "queued": [], "failed": []}
     
     for lid in lead_ids:
         try:
-            db.log_event(lid, "APPROVE_ATTEMPT", "Batch approval triggered")
+            await db.log_event(lid, "APPROVE_ATTEMPT", "Batch approval triggered")
             # Extract override if any
             ovr = overrides.get(lid, {})
-            sender.approve_and_send(lid, subject_override=ovr.get("subject"), body_override=ovr.get("body"))
-            results["success"].append(lid)
+            interaction = await sender.approve_and_send_async(lid, subject_override=ovr.get("subject"),
+                                                              body_override=ovr.get("body"))
+            results["success" if _send_status(interaction) == "sent" else "queued"].append(lid)
         except Exception as e:
-            logger.error(f"Failed to approve {lid}: {e}")
-            db.log_event(lid, "APPROVE_ERROR", str(e))
+            logger.error("Failed to approve %s: %s", lid, e)
+            await db.log_event(lid, "APPROVE_ERROR", str(e))
             results["failed"].append(lid)
             
     return results
 
 @app.get("/leads/{lead_id}/logs")
-def get_lead_logs(lead_id: str):
-    logs = db.get_lead_logs(lead_id)
-    return [{"event": l.event_type, "details": l.details, "time": l.timestamp} for l in logs]
+async def get_lead_logs(lead_id: str, request: Request, container: AppContainer = Depends(get_container)):
+    async def build():
+        logs = await container.async_db.get_lead_logs(lead_id)
+        return JSONResponse(jsonable_encoder([{"event": l.event_type, "details": l.details, "time": l.timestamp} for l in logs]))
+    return await http_cache.respond(request, container.async_db, build)
+
+@app.get("/leads/{lead_id}/transitions")
+async def get_lead_transitions(lead_id: str, request: Request, container: AppContainer = Depends(get_container)):
+    async def build():
+        transitions = await container.async_db.get_lead_transitions(lead_id)
+        return JSONResponse(jsonable_encoder([{
+            "from": t.from_state.label if t.from_state is not None else None, "to": t.to_state.label,
+            "status": t.status, "reason": t.reason, "time": t.created_at
+        } for t in transitions]))
+    return await http_cache.respond(request, container.async_db, build)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,61 @@
+import json
+from typing import Any, AsyncIterator, Dict, List
+from starlette.requests import Request
+from starlette.responses import StreamingResponse
+
+try:
+    import orjson
+except ImportError:  # optional speedup; plain json produces the same bytes, slower
+    orjson = None
+
+NDJSON = "application/x-ndjson"
+
+
+def dumps(value) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def wants_ndjson(request: Request) -> bool:
+    accept = request.headers.get("accept", "")
+    return NDJSON in accept or request.query_params.get("format") == "ndjson"
+
+
+async def _json_array(chunks: AsyncIterator[List]) -> AsyncIterator[bytes]:
+    # One dumps() per chunk; the chunk's own brackets are cut off and the items spliced in
+    yield b"["
+    first = True
+    async for items in chunks:
+        if not items:
+            continue
+        body = dumps(items)[1:-1]
+        yield body if first else b"," + body
+        first = False
+    yield b"]"
+
+
+async def _ndjson(chunks: AsyncIterator[List]) -> AsyncIterator[bytes]:
+    async for items in chunks:
+        if items:
+            yield b"\n".join(map(dumps, items)) + b"\n"
+
+
+def stream_json(request: Request, chunks: AsyncIterator[List]) -> StreamingResponse:
+    """
+    Streams lists of JSON-ready items as they are produced: one JSON array by default, or one
+    item per line with `Accept: application/x-ndjson` (or ?format=ndjson). Memory stays at one
+    chunk whatever the result size; gzip is negotiated by the GZip middleware.
+    """
+    if wants_ndjson(request):
+        return StreamingResponse(_ndjson(chunks), media_type=NDJSON)
+    return StreamingResponse(_json_array(chunks), media_type="application/json")
+
+
+def stream_responses(array_model, item_schema: Dict[str, Any]) -> Dict[int, Dict[str, Any]]:
+    """
+    OpenAPI `responses=` for a stream_json endpoint: the JSON array as `array_model`, NDJSON as one
+    `item_schema` object per line. Documentation only, the streamed items are not validated.
+    """
+    return {200: {"model": array_model, "content": {NDJSON: {"schema": item_schema}},
+                  "description": f"JSON array, or one item per line with Accept: {NDJSON}"}}
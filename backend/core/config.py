@@ -5,10 +5,101 @@ load_dotenv()
 
 class Config:
     DB_PATH = os.getenv("DB_PATH", "gtm_agent.db")
+    DATABASE_URL = os.getenv("DATABASE_URL", "")  # postgresql://... selects the Postgres store; empty = sqlite DB_PATH
+    DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+    DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+    LEAD_UPDATE_ATTEMPTS = int(os.getenv("LEAD_UPDATE_ATTEMPTS", "5"))  # read-modify-write tries on version conflicts (modify_lead)
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
     ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY", "")
     MOCK_LLM = os.getenv("MOCK_LLM", "True").lower() == "true"
+
+    # LLM Routing
+    LLM_PROVIDERS = os.getenv("LLM_PROVIDERS", "openai,anthropic,local")  # preference order
+    OPENAI_FAST_MODEL = os.getenv("OPENAI_FAST_MODEL", "gpt-4o-mini")
+    OPENAI_STRONG_MODEL = os.getenv("OPENAI_STRONG_MODEL", "gpt-4o")
+    ANTHROPIC_FAST_MODEL = os.getenv("ANTHROPIC_FAST_MODEL", "claude-3-5-haiku-latest")
+    ANTHROPIC_STRONG_MODEL = os.getenv("ANTHROPIC_STRONG_MODEL", "claude-3-5-sonnet-latest")
+    LOCAL_LLM_BASE_URL = os.getenv("LOCAL_LLM_BASE_URL", "")  # e.g. http://127.0.0.1:8100/v1 (llm_stub_server)
+    LOCAL_LLM_MODEL = os.getenv("LOCAL_LLM_MODEL", "local-stub")
+    LLM_TASK_TIERS = os.getenv("LLM_TASK_TIERS", "classify=fast,analyze=strong,draft=strong")
+    LLM_HEDGE_AFTER_SECONDS = float(os.getenv("LLM_HEDGE_AFTER_SECONDS", "0"))  # 0 = adaptive (primary p95)
+    LLM_REQUEST_TIMEOUT_SECONDS = float(os.getenv("LLM_REQUEST_TIMEOUT_SECONDS", "30"))
+
+    # Account resolution (ingest)
+    ACCOUNT_INDEX_ENABLED = os.getenv("ACCOUNT_INDEX_ENABLED", "True").lower() == "true"
+    ACCOUNT_MATCH_THRESHOLD = float(os.getenv("ACCOUNT_MATCH_THRESHOLD", "0.8"))  # min name similarity (0..1) for a fuzzy match
+
+    # Lead prioritization (review queue / claim order)
+    SCORING_WEIGHTS = os.getenv("SCORING_WEIGHTS", "fit=0.45,title=0.2,campaign=0.15,source=0.1,domain=0.1")
+    SCORING_RESCORE_SECONDS = float(os.getenv("SCORING_RESCORE_SECONDS", "300"))  # full-table rescore interval; 0 = off
+
+    # Local embeddings (similar-company enrichment reuse, labelled-reply short-circuit)
+    EMBEDDINGS_ENABLED = os.getenv("EMBEDDINGS_ENABLED", "True").lower() == "true"
+    EMBEDDING_DIR = os.getenv("EMBEDDING_DIR", "embeddings")  # memory-mapped index files
+    EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "")  # local sentence-transformers model dir; empty = hashed TF-IDF
+    EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "512"))  # hashed TF-IDF buckets
+    ENRICH_REUSE_SIMILARITY = float(os.getenv("ENRICH_REUSE_SIMILARITY", "0.85"))  # min cosine to reuse another account's analysis
+    REPLY_REUSE_SIMILARITY = float(os.getenv("REPLY_REUSE_SIMILARITY", "0.95"))  # min cosine to reuse a labelled reply's class
+
+    # Campaigns / enrichment pipeline
+    CAMPAIGN_REFRESH_SECONDS = float(os.getenv("CAMPAIGN_REFRESH_SECONDS", "5"))  # cached campaign configs re-read at most this often (edits from other processes)
+    PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", "8"))  # LLM worker threads shared by all campaigns and priority classes (FairScheduler)
+    PIPELINE_CLAIM_LEASE_SECONDS = float(os.getenv("PIPELINE_CLAIM_LEASE_SECONDS", "900"))  # a lead left 'enriching' longer than this is released back to 'new' at startup
+    BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "0"))  # worker processes of batch jobs (pipeline.batch_runner); 0 = one per CPU core
+    BATCH_CHUNK_LEADS = int(os.getenv("BATCH_CHUNK_LEADS", "500"))  # lead ids handed to a batch worker at a time
+    REPLAY_BATCH_LEADS = int(os.getenv("REPLAY_BATCH_LEADS", "1000"))  # leads per checkpointed replay batch (pipeline.replay)
+    REPLAY_MAX_LEADS_PER_SEC = float(os.getenv("REPLAY_MAX_LEADS_PER_SEC", "0"))  # replay throughput cap; 0 = unlimited
+
+    # API
+    STREAM_CHUNK_ROWS = int(os.getenv("STREAM_CHUNK_ROWS", "1000"))  # rows per page of streamed list endpoints (GET /leads)
+    METRICS_CACHE_SECONDS = float(os.getenv("METRICS_CACHE_SECONDS", "2"))  # GET /metrics served from memory this long, then one version check; 0 disables
+
+    # Analytics snapshots (python -m backend.services.analytics.export)
+    SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "snapshots")
+    SNAPSHOT_CHUNK_ROWS = int(os.getenv("SNAPSHOT_CHUNK_ROWS", "50000"))  # rows fetched and written per chunk
+    SNAPSHOT_KEEP = int(os.getenv("SNAPSHOT_KEEP", "3"))  # completed exports kept on disk
+
+    # Sending / Risk Control
+    SENDGRID_API_HOST = os.getenv("SENDGRID_API_HOST", "")  # override for local fakes; empty = api.sendgrid.com
+    SEND_MIN_INTERVAL_SECONDS = float(os.getenv("SEND_MIN_INTERVAL_SECONDS", "5"))
+    DEFAULT_DAILY_LIMIT = int(os.getenv("DEFAULT_DAILY_LIMIT", "50"))
+
+    # Outbox relay (transactional send path)
+    OUTBOX_RELAY_ENABLED = os.getenv("OUTBOX_RELAY_ENABLED", "True").lower() == "true"  # background relay in the API process
+    OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "2"))
+    OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "20"))
+    OUTBOX_WORKERS = int(os.getenv("OUTBOX_WORKERS", "4"))
+    OUTBOX_LEASE_SECONDS = float(os.getenv("OUTBOX_LEASE_SECONDS", "120"))
+    OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+    OUTBOX_RETRY_BACKOFF_SECONDS = float(os.getenv("OUTBOX_RETRY_BACKOFF_SECONDS", "30"))  # doubles per attempt
+    OUTBOX_RETRY_UNCONFIRMED = os.getenv("OUTBOX_RETRY_UNCONFIRMED", "False").lower() == "true"  # resend after a crash mid-send (may duplicate)
+
+    # Gmail listener (reply detection across sending mailboxes)
+    GMAIL_TOKEN_DIR = os.getenv("GMAIL_TOKEN_DIR", "")  # one authorized-user token per mailbox: <address>.json; empty = ./token.json
+    GMAIL_POLL_SECONDS = float(os.getenv("GMAIL_POLL_SECONDS", "60"))
+    GMAIL_LISTENER_WORKERS = int(os.getenv("GMAIL_LISTENER_WORKERS", "8"))  # mailboxes polled concurrently
+    GMAIL_MAX_BACKOFF_SECONDS = float(os.getenv("GMAIL_MAX_BACKOFF_SECONDS", "900"))
+    GMAIL_QUOTA_UNITS_PER_SECOND = float(os.getenv("GMAIL_QUOTA_UNITS_PER_SECOND", "250"))  # Gmail per-user limit
+    GMAIL_SHARD_INDEX = int(os.getenv("GMAIL_SHARD_INDEX", "0"))  # this listener process's shard
+    GMAIL_SHARD_COUNT = int(os.getenv("GMAIL_SHARD_COUNT", "1"))  # listener processes sharing the mailboxes
+    REPLY_MAX_CHARS = int(os.getenv("REPLY_MAX_CHARS", "4000"))  # cap on extracted reply text sent to the classifier
+
+    # Inbound webhooks
+    SENDGRID_WEBHOOK_PUBLIC_KEY = os.getenv("SENDGRID_WEBHOOK_PUBLIC_KEY", "")  # Signed Event Webhook verification key (base64)
+    GMAIL_PUSH_AUDIENCE = os.getenv("GMAIL_PUSH_AUDIENCE", "")  # Pub/Sub push OIDC audience; enables JWT verification
+    GMAIL_PUSH_SERVICE_ACCOUNT = os.getenv("GMAIL_PUSH_SERVICE_ACCOUNT", "")  # expected 'email' claim of the push token
+    GMAIL_PUSH_TOKEN = os.getenv("GMAIL_PUSH_TOKEN", "")  # shared ?token= secret, used when no OIDC audience is set
+    WEBHOOK_MAX_AGE_SECONDS = float(os.getenv("WEBHOOK_MAX_AGE_SECONDS", "600"))  # reject older signed timestamps (replays)
+    WEBHOOK_ALLOW_UNVERIFIED = os.getenv("WEBHOOK_ALLOW_UNVERIFIED", "False").lower() == "true"  # local dev only
     
+    # Observability
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()  # json | text
+    LOG_ASYNC = os.getenv("LOG_ASYNC", "True").lower() == "true"  # background QueueListener writer
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    LOG_SAMPLING = os.getenv("LOG_SAMPLING", "")  # per-logger INFO sampling, e.g. "LeadStore.events=0.1"
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True").lower() == "true"
+
     # LangSmith Configuration
     LANGCHAIN_TRACING_V2 = os.getenv("LANGCHAIN_TRACING_V2", "false").lower() == "true"
     LANGCHAIN_API_KEY = os.getenv("LANGCHAIN_API_KEY", "")
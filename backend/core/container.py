@@ -0,0 +1,213 @@
+import threading
+from typing import Callable, Dict, Optional
+from backend.core.config import config
+from backend.utils.logger import setup_logger
+
+logger = setup_logger("AppContainer")
+
+
+class AppContainer:
+    """
+    Process-wide service container.
+    Every component is built lazily on first use and then shared, so request handlers
+    and background tasks reuse one lead store, one LLMClient (and its SDK clients) and
+    one SendGrid client instead of constructing them per call.
+    """
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or config.DB_PATH
+        self._instances: Dict[str, object] = {}
+        self._lock = threading.RLock()
+
+    def _get(self, key: str, factory: Callable[[], object]):
+        instance = self._instances.get(key)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(key)
+                if instance is None:
+                    instance = factory()
+                    self._instances[key] = instance
+        return instance
+
+    @property
+    def db(self):
+        # sqlite at db_path unless DATABASE_URL points at Postgres
+        from backend.storage.base import open_lead_store
+        return self._get("db", lambda: open_lead_store(db_path=self.db_path))
+
+    @property
+    def async_db(self):
+        from backend.storage.async_db import AsyncLeadStore
+        return self._get("async_db", lambda: AsyncLeadStore(self.db, max_workers=self.db.max_concurrency))
+
+    @property
+    def llm(self):
+        from backend.core.llm_client import LLMClient
+        return self._get("llm", LLMClient)
+
+    @property
+    def account_index(self):
+        # Built from the accounts table on first use, then kept current by ingest
+        from backend.services.lead_ingest.account_index import AccountIndex
+
+        def build():
+            index = AccountIndex()
+            index.build(self.db.get_account_keys())
+            return index
+        return self._get("account_index", build)
+
+    @property
+    def lead_scorer(self):
+        from backend.services.scoring.lead_scorer import LeadScorer
+        return self._get("lead_scorer", lambda: LeadScorer(self.db))
+
+    @property
+    def company_embeddings(self):
+        # Enriched companies, keyed by account id
+        from backend.services.embeddings.embedding_index import EmbeddingIndex
+        return self._get("company_embeddings", lambda: EmbeddingIndex("companies"))
+
+    @property
+    def reply_embeddings(self):
+        # Classified reply texts, labelled with their classification
+        from backend.services.embeddings.embedding_index import EmbeddingIndex
+        return self._get("reply_embeddings", lambda: EmbeddingIndex("replies"))
+
+    @property
+    def campaigns(self):
+        # Campaign configs cached in memory; agents and the pipeline read them per lead
+        from backend.services.campaigns.registry import CampaignRegistry
+        return self._get("campaigns", lambda: CampaignRegistry(self.db))
+
+    @property
+    def ingestor(self):
+        from backend.services.lead_ingest.ingest import LeadIngestionService
+        return self._get("ingestor", lambda: LeadIngestionService(
+            self.db, accounts=self.account_index if config.ACCOUNT_INDEX_ENABLED else None, scorer=self.lead_scorer
+        ))
+
+    @property
+    def icp_agent(self):
+        from backend.agents.icp_persona.agent import ICPPersonaAgent
+        return self._get("icp_agent", lambda: ICPPersonaAgent(
+            self.db, llm=self.llm, similar=self.company_embeddings if config.EMBEDDINGS_ENABLED else None,
+            campaigns=self.campaigns
+        ))
+
+    @property
+    def email_agent(self):
+        from backend.agents.email_gen.generator import EmailGeneratorAgent
+        return self._get("email_agent", lambda: EmailGeneratorAgent(self.db, llm=self.llm, campaigns=self.campaigns))
+
+    @property
+    def classifier(self):
+        from backend.agents.reply_cls.classifier import ReplyClassifierAgent
+        return self._get("classifier", lambda: ReplyClassifierAgent(
+            self.db, llm=self.llm, known_replies=self.reply_embeddings if config.EMBEDDINGS_ENABLED else None
+        ))
+
+    @property
+    def risk_control(self):
+        from backend.services.sender.risk_control import RiskController
+        return self._get("risk_control", lambda: RiskController(self.db, campaigns=self.campaigns))
+
+    @property
+    def lead_pipeline(self):
+        from backend.services.pipeline.lead_pipeline import LeadPipeline
+        return self._get("lead_pipeline", lambda: LeadPipeline(
+            self.db, icp_agent=self.icp_agent, email_agent=self.email_agent, scorer=self.lead_scorer
+        ))
+
+    @property
+    def scheduler(self):
+        # PIPELINE_WORKERS threads shared by all campaigns: replies before new leads
+        from backend.services.pipeline.scheduler import FairScheduler
+        return self._get("scheduler", lambda: FairScheduler(self.campaigns))
+
+    @property
+    def email_provider(self):
+        from backend.services.sender.providers.sendgrid_adapter import SendGridEmailProvider
+        return self._get("email_provider", SendGridEmailProvider)
+
+    @property
+    def outbox_relay(self):
+        from backend.services.sender.outbox_relay import OutboxRelay
+        return self._get("outbox_relay", lambda: OutboxRelay(
+            self.db, provider=self.email_provider, risk_control=self.risk_control
+        ))
+
+    @property
+    def sender(self):
+        from backend.services.sender.orchestrator import SendOrchestrator
+        return self._get("sender", lambda: SendOrchestrator(
+            self.db, risk_control=self.risk_control, provider=self.email_provider,
+            async_db=self.async_db, relay=self.outbox_relay
+        ))
+
+    @property
+    def mailbox_listener(self):
+        # Every sending mailbox in this listener shard (GMAIL_TOKEN_DIR / GMAIL_SHARD_*)
+        from backend.services.listener.mailbox_listener import MailboxListenerService
+        return self._get("mailbox_listener", lambda: MailboxListenerService(
+            self.db, classifier=self.classifier, scheduler=self.scheduler
+        ))
+
+    @property
+    def gmail_push(self):
+        from backend.services.listener.gmail_push import GmailPushHandler
+        return self._get("gmail_push", lambda: GmailPushHandler(self.mailbox_listener))
+
+    @property
+    def sendgrid_events(self):
+        from backend.services.listener.sendgrid_events import SendGridEventProcessor
+        return self._get("sendgrid_events", lambda: SendGridEventProcessor(self.db))
+
+    async def aclose(self):
+        """
+        Releases async resources (HTTP connection pools) that must be closed on the event loop.
+        """
+        provider = self._instances.get("email_provider")
+        if provider is not None:
+            await provider.aclose()
+
+    def close(self):
+        with self._lock:
+            for key in ("scheduler", "outbox_relay", "mailbox_listener", "lead_scorer"):
+                service = self._instances.get(key)
+                if service is not None:
+                    service.stop()
+            for key in ("company_embeddings", "reply_embeddings"):
+                index = self._instances.get(key)
+                if index is not None:
+                    index.close()
+            async_db = self._instances.get("async_db")
+            if async_db is not None:
+                async_db.close()
+            db = self._instances.get("db")
+            if db is not None:
+                db.close()
+            self._instances.clear()
+        logger.info("Container closed.")
+
+
+_container: Optional[AppContainer] = None
+_container_lock = threading.Lock()
+
+
+def get_container() -> AppContainer:
+    global _container
+    if _container is None:
+        with _container_lock:
+            if _container is None:
+                _container = AppContainer()
+    return _container
+
+
+def reset_container(container: AppContainer = None):
+    """
+    Closes the current container and optionally installs a replacement (scripts, benchmarks).
+    """
+    global _container
+    with _container_lock:
+        if _container is not None:
+            _container.close()
+        _container = container
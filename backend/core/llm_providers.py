@@ -0,0 +1,209 @@
+import importlib.util
+import threading
+from typing import Dict, Optional, Set
+from backend.core.config import config
+from backend.utils.logger import setup_logger
+
+logger = setup_logger("LLMProviders")
+
+# Python package each provider's client needs (the local provider talks to the OpenAI-compatible API)
+PROVIDER_SDKS = {"openai": "openai", "anthropic": "anthropic", "local": "openai"}
+_missing_sdks: Set[str] = set()
+
+FAST = "fast"
+STRONG = "strong"
+
+
+class LLMProviderError(Exception):
+    pass
+
+
+class LLMProvider:
+    """
+    Base class for a chat-completion backend.
+    Each provider maps a model tier ("fast" / "strong") to a concrete model name.
+    """
+    name = "base"
+
+    def __init__(self, models: Dict[str, str]):
+        self.models = models
+
+    def model_for(self, tier: str) -> str:
+        return self.models.get(tier) or self.models[STRONG]
+
+    def complete(self, prompt: str, system_prompt: Optional[str] = None,
+                 tier: str = STRONG, timeout: Optional[float] = None) -> str:
+        raise NotImplementedError
+
+
+class OpenAIProvider(LLMProvider):
+    name = "openai"
+
+    def __init__(self, api_key: str, models: Dict[str, str], base_url: Optional[str] = None, name: str = None):
+        super().__init__(models)
+        self.api_key = api_key
+        self.base_url = base_url
+        if name:
+            self.name = name
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        # Created once, on first real request
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._build_client()
+        return self._client
+
+    def _build_client(self):
+        from openai import OpenAI
+        # The router does its own failover, so SDK-level retries would only add latency
+        kwargs = {"api_key": self.api_key, "max_retries": 0}
+        if self.base_url:
+            kwargs["base_url"] = self.base_url
+        client = OpenAI(**kwargs)
+
+        # Tracing only applies to the hosted API, not local stub servers
+        if self.base_url:
+            logger.info("OpenAI-compatible client initialized for %s (%s).", self.name, self.base_url)
+            return client
+
+        # LangSmith Integration
+        if config.LANGCHAIN_TRACING_V2:
+            try:
+                from langsmith.wrappers import wrap_openai
+                client = wrap_openai(client)
+                logger.info("LangSmith tracing enabled.")
+            except ImportError:
+                logger.warning("LangSmith not installed, skipping tracing.")
+            except Exception as e:
+                logger.warning("Failed to enable LangSmith tracing: %s", e)
+
+        # Langfuse Integration
+        if config.LANGFUSE_PUBLIC_KEY and config.LANGFUSE_SECRET_KEY:
+            try:
+                # Langfuse's wrapper inherits from OpenAI, so re-instantiating is the cleanest route.
+                from langfuse.openai import OpenAI as LangfuseOpenAI
+                client = LangfuseOpenAI(api_key=self.api_key, max_retries=0)
+                logger.info("Langfuse tracing enabled.")
+            except ImportError:
+                logger.warning("Langfuse not installed, skipping tracing.")
+            except Exception as e:
+                logger.warning("Failed to enable Langfuse tracing: %s", e)
+
+        logger.info("OpenAI Client initialized.")
+        return client
+
+    def complete(self, prompt: str, system_prompt: Optional[str] = None,
+                 tier: str = STRONG, timeout: Optional[float] = None) -> str:
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+
+        response = self.client.chat.completions.create(
+            model=self.model_for(tier),
+            messages=messages,
+            temperature=0.7,
+            timeout=timeout
+        )
+        return response.choices[0].message.content.strip()
+
+
+class AnthropicProvider(LLMProvider):
+    name = "anthropic"
+
+    def __init__(self, api_key: str, models: Dict[str, str], max_tokens: int = 1024):
+        super().__init__(models)
+        self.api_key = api_key
+        self.max_tokens = max_tokens
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from anthropic import Anthropic
+                    self._client = Anthropic(api_key=self.api_key, max_retries=0)
+                    logger.info("Anthropic Client initialized.")
+        return self._client
+
+    def complete(self, prompt: str, system_prompt: Optional[str] = None,
+                 tier: str = STRONG, timeout: Optional[float] = None) -> str:
+        kwargs = {
+            "model": self.model_for(tier),
+            "max_tokens": self.max_tokens,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": 0.7,
+        }
+        if system_prompt:
+            kwargs["system"] = system_prompt
+        if timeout:
+            kwargs["timeout"] = timeout
+
+        response = self.client.messages.create(**kwargs)
+        text = "".join(block.text for block in response.content if getattr(block, "type", "") == "text")
+        return text.strip()
+
+
+def mock_response(prompt: str) -> str:
+    prompt_lower = prompt.lower()
+
+    if "analyze" in prompt_lower or "summary" in prompt_lower:
+        return "Analyzed Company: A leader in cloud infrastructure. Strong fit for our DevOps tools aimed at reducing latency."
+
+    if "email" in prompt_lower or "subject" in prompt_lower:
+        return "Subject: Optimization for your Cloud Infrastructure\n\nHi [Name],\n\nI saw your work on cloud infra..."
+
+    if "classify" in prompt_lower:
+        if "interested" in prompt_lower:
+            return "interested"
+        if "stop" in prompt_lower:
+            return "not_interested"
+        return "maybe"
+
+    return "Mock LLM Response"
+
+
+def _sdk_available(name: str) -> bool:
+    package = PROVIDER_SDKS[name]
+    if importlib.util.find_spec(package) is not None:
+        return True
+    if package not in _missing_sdks:
+        _missing_sdks.add(package)
+        logger.warning("LLM provider '%s' is configured but the '%s' package is not installed (pip install %s), skipping.",
+                       name, package, package)
+    return False
+
+
+def build_providers():
+    """
+    Builds the configured providers in preference order (LLM_PROVIDERS).
+    Providers without credentials or without their SDK installed are skipped.
+    """
+    providers = []
+    for name in [p.strip().lower() for p in config.LLM_PROVIDERS.split(",") if p.strip()]:
+        if name == "openai" and config.OPENAI_API_KEY and _sdk_available(name):
+            providers.append(OpenAIProvider(
+                api_key=config.OPENAI_API_KEY,
+                models={FAST: config.OPENAI_FAST_MODEL, STRONG: config.OPENAI_STRONG_MODEL}
+            ))
+        elif name == "anthropic" and config.ANTHROPIC_API_KEY and _sdk_available(name):
+            providers.append(AnthropicProvider(
+                api_key=config.ANTHROPIC_API_KEY,
+                models={FAST: config.ANTHROPIC_FAST_MODEL, STRONG: config.ANTHROPIC_STRONG_MODEL}
+            ))
+        elif name == "local" and config.LOCAL_LLM_BASE_URL and _sdk_available(name):
+            providers.append(OpenAIProvider(
+                api_key="local",
+                models={FAST: config.LOCAL_LLM_MODEL, STRONG: config.LOCAL_LLM_MODEL},
+                base_url=config.LOCAL_LLM_BASE_URL,
+                name="local"
+            ))
+        elif name not in PROVIDER_SDKS:
+            logger.warning("Unknown LLM provider '%s' in LLM_PROVIDERS, skipping.", name)
+    return providers
@@ -0,0 +1,188 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, List, Optional
+from backend.core.config import config
+from backend.core.llm_providers import LLMProvider, LLMProviderError, STRONG
+from backend.utils.logger import setup_logger
+from backend.utils.metrics import LLM_REQUEST_SECONDS, RETRIES_TOTAL
+
+logger = setup_logger("LLMRouter")
+
+
+def parse_task_tiers(raw: str) -> Dict[str, str]:
+    # "classify=fast,draft=strong" -> {"classify": "fast", "draft": "strong"}
+    tiers = {}
+    for item in raw.split(","):
+        if "=" in item:
+            task, tier = item.split("=", 1)
+            tiers[task.strip()] = tier.strip()
+    return tiers
+
+
+class ProviderStats:
+    """
+    Rolling latency / error window for one provider.
+    """
+    def __init__(self, window: int = 200):
+        self.samples = deque(maxlen=window)  # (latency_seconds, ok)
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, ok: bool):
+        with self._lock:
+            self.samples.append((latency, ok))
+            if ok:
+                self.consecutive_failures = 0
+            else:
+                self.consecutive_failures += 1
+                if self.consecutive_failures >= 3:
+                    # Back off for longer the more it keeps failing
+                    backoff = min(5 * 2 ** (self.consecutive_failures - 3), 300)
+                    self.cooldown_until = time.monotonic() + backoff
+
+    def percentile(self, pct: float) -> Optional[float]:
+        with self._lock:
+            latencies = sorted(l for l, ok in self.samples if ok)
+        if not latencies:
+            return None
+        idx = min(len(latencies) - 1, int(round(pct / 100.0 * (len(latencies) - 1))))
+        return latencies[idx]
+
+    @property
+    def p50(self) -> Optional[float]:
+        return self.percentile(50)
+
+    @property
+    def p95(self) -> Optional[float]:
+        return self.percentile(95)
+
+    @property
+    def error_rate(self) -> float:
+        with self._lock:
+            if not self.samples:
+                return 0.0
+            return sum(1 for _, ok in self.samples if not ok) / len(self.samples)
+
+    @property
+    def cooling_down(self) -> bool:
+        return time.monotonic() < self.cooldown_until
+
+    def health_score(self) -> float:
+        # Lower is better. Unknown providers get a neutral latency so they still get traffic.
+        p95 = self.p95
+        latency = p95 if p95 is not None else 1.0
+        score = latency * (1 + 4 * self.error_rate)
+        if self.cooling_down:
+            score += 1000
+        return score
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "p50": self.p50,
+            "p95": self.p95,
+            "error_rate": round(self.error_rate, 4),
+            "samples": len(self.samples),
+            "cooling_down": self.cooling_down,
+        }
+
+
+class LLMRouter:
+    """
+    Routes each request to the healthiest provider.
+    If the primary has not answered by the hedge deadline, a duplicate request goes to the
+    next provider and the first successful answer wins. Errors fail over immediately.
+    """
+    def __init__(self, providers: List[LLMProvider], task_tiers: Dict[str, str] = None,
+                 hedge_after: float = None, timeout: float = None, max_workers: int = 16):
+        if not providers:
+            raise ValueError("LLMRouter needs at least one provider")
+        self.providers = providers
+        self.stats = {p.name: ProviderStats() for p in providers}
+        self.task_tiers = task_tiers if task_tiers is not None else parse_task_tiers(config.LLM_TASK_TIERS)
+        self.hedge_after = config.LLM_HEDGE_AFTER_SECONDS if hedge_after is None else hedge_after
+        self.timeout = config.LLM_REQUEST_TIMEOUT_SECONDS if timeout is None else timeout
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm")
+
+    def tier_for(self, task: Optional[str]) -> str:
+        return self.task_tiers.get(task or "", STRONG)
+
+    def ranked_providers(self) -> List[LLMProvider]:
+        # Stable sort keeps the configured preference order among equally healthy providers
+        return sorted(self.providers, key=lambda p: self.stats[p.name].health_score())
+
+    def hedge_deadline(self, provider: LLMProvider) -> float:
+        if self.hedge_after > 0:
+            return self.hedge_after
+        # Adaptive: hedge once the primary is slower than its own recent p95
+        p95 = self.stats[provider.name].p95
+        if p95 is None:
+            return 5.0
+        return min(max(p95 * 1.2, 0.25), self.timeout)
+
+    def _call(self, provider: LLMProvider, prompt: str, system_prompt: Optional[str], tier: str) -> str:
+        start = time.monotonic()
+        try:
+            result = provider.complete(prompt, system_prompt=system_prompt, tier=tier, timeout=self.timeout)
+        except Exception:
+            elapsed = time.monotonic() - start
+            self.stats[provider.name].record(elapsed, ok=False)
+            LLM_REQUEST_SECONDS.labels(provider.name, tier, "error").observe(elapsed)
+            raise
+        elapsed = time.monotonic() - start
+        self.stats[provider.name].record(elapsed, ok=True)
+        LLM_REQUEST_SECONDS.labels(provider.name, tier, "ok").observe(elapsed)
+        return result
+
+    def generate(self, prompt: str, system_prompt: Optional[str] = None, task: Optional[str] = None) -> str:
+        tier = self.tier_for(task)
+        candidates = self.ranked_providers()
+        started_at = time.monotonic()
+
+        pending = {}
+        errors = []
+
+        def launch():
+            provider = candidates.pop(0)
+            future = self.executor.submit(self._call, provider, prompt, system_prompt, tier)
+            pending[future] = provider
+            return provider
+
+        primary = launch()
+        deadline = self.hedge_deadline(primary)
+        hedged = False
+
+        while pending:
+            remaining = self.timeout - (time.monotonic() - started_at)
+            if remaining <= 0:
+                break
+            wait_for = remaining if (hedged or not candidates) else min(deadline, remaining)
+            done, _ = wait(list(pending), timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            if not done:
+                if candidates and not hedged:
+                    hedged = True
+                    backup = launch()
+                    RETRIES_TOTAL.labels("llm_hedge").inc()
+                    logger.info("Hedging request: %s slower than %.2fs, also trying %s", primary.name, deadline, backup.name)
+                continue
+
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    return future.result()
+                except Exception as e:
+                    errors.append(f"{provider.name}: {e}")
+                    logger.warning("LLM provider %s failed: %s", provider.name, e)
+
+            # Fail over as soon as nothing is in flight
+            if not pending and candidates:
+                launch()
+                RETRIES_TOTAL.labels("llm_failover").inc()
+
+        raise LLMProviderError("All LLM providers failed or timed out: " + "; ".join(errors or ["timeout"]))
+
+    def health(self) -> Dict[str, Dict[str, object]]:
+        return {name: stats.snapshot() for name, stats in self.stats.items()}
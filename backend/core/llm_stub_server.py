@@ -0,0 +1,93 @@
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from backend.core.llm_providers import mock_response
+
+
+class StubSettings:
+    def __init__(self, latency_ms: float = 0, jitter_ms: float = 0, error_rate: float = 0.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+
+
+def make_handler(settings: StubSettings):
+    class StubHandler(BaseHTTPRequestHandler):
+        """
+        Minimal OpenAI-compatible /v1/chat/completions endpoint returning canned mock responses.
+        """
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+
+            delay = settings.latency_ms + random.uniform(0, settings.jitter_ms)
+            if delay > 0:
+                time.sleep(delay / 1000.0)
+
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._reply(404, {"error": {"message": "not found"}})
+                return
+            if settings.error_rate and random.random() < settings.error_rate:
+                self._reply(503, {"error": {"message": "stub overloaded"}})
+                return
+
+            messages = body.get("messages", [])
+            prompt = messages[-1]["content"] if messages else ""
+            content = mock_response(prompt)
+            self._reply(200, {
+                "id": f"chatcmpl-stub-{int(time.time() * 1000)}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "local-stub"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop"
+                }],
+                "usage": {"prompt_tokens": len(prompt.split()), "completion_tokens": len(content.split()),
+                          "total_tokens": len(prompt.split()) + len(content.split())}
+            })
+
+        def _reply(self, status: int, payload: dict):
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+def start_stub_server(host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0,
+                      jitter_ms: float = 0, error_rate: float = 0.0):
+    """
+    Starts the stub in a daemon thread. Returns (server, base_url); call server.shutdown() to stop.
+    """
+    settings = StubSettings(latency_ms, jitter_ms, error_rate)
+    server = ThreadingHTTPServer((host, port), make_handler(settings))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://{host}:{server.server_address[1]}/v1"
+    return server, base_url
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible LLM stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    settings = StubSettings(args.latency_ms, args.jitter_ms, args.error_rate)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(settings))
+    print(f"LLM stub listening on http://{args.host}:{args.port}/v1 (set LOCAL_LLM_BASE_URL to this)")
+    server.serve_forever()
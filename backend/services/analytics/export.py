@@ -0,0 +1,238 @@
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from backend.core.config import config
+from backend.services.analytics.snapshot import LATEST, MANIFEST, STAGES, Snapshot
+from backend.storage.base import BaseLeadStore
+from backend.storage.lead_state import LeadState
+from backend.utils.logger import setup_logger
+from backend.utils.metrics import PIPELINE_STAGE_SECONDS
+
+logger = setup_logger("SnapshotExporter")
+
+# Exported columns: (name, kind, SQL expression). Free text (names, emails, bodies, event
+# details) stays in the OLTP store; kinds: id (fixed-width bytes), category, int, float, time.
+LEAD_COLUMNS = (
+    ("id", "id", "id"),
+    ("source", "category", "source"),
+    ("campaign_id", "category", "campaign_id"),
+    ("account_id", "category", "account_id"),
+    ("status", "category", "status"),
+    ("send_count", "int", "COALESCE(send_count, 0)"),
+    ("fit_score", "float", "fit_score"),
+    ("priority", "float", "priority"),
+    ("created_at", "time", "created_at"),
+    ("last_sent_at", "time", "last_sent_at"),
+)
+# Stage inputs, read alongside the columns above but only stored as the derived `stage`
+STAGE_INPUTS = (
+    ("enriched", "company_summary IS NOT NULL"),
+    ("drafted", "generated_email_subject IS NOT NULL"),
+    ("replied", f"state = {int(LeadState.REPLIED)}"),
+)
+EVENT_COLUMNS = (
+    ("lead_row", "int", "lead_id"), # row of the lead in leads/, -1 when the lead is not in the snapshot
+    ("event_type", "category", "event_type"),
+    ("timestamp", "time", "timestamp"),
+)
+DTYPES = {"category": np.int32, "int": np.int32, "float": np.float64, "time": "datetime64[us]"}
+
+
+def lead_stage(statuses: Sequence[Optional[str]], send_counts: np.ndarray, enriched: Sequence, drafted: Sequence,
+               replied: Sequence) -> np.ndarray:
+    """
+    Index into STAGES of the furthest stage each lead reached, from its current row.
+    """
+    replied = np.asarray([bool(value) for value in replied], dtype=bool)
+    positive = np.fromiter((status == "replied_interested" for status in statuses), dtype=bool, count=len(statuses))
+    return np.select(
+        [positive, replied, send_counts > 0, np.asarray(drafted, dtype=bool), np.asarray(enriched, dtype=bool)],
+        [5, 4, 3, 2, 1], default=0,
+    ).astype(np.int8)
+
+
+class _Categories:
+    # Dictionary encoding built while streaming; NULL -> -1
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+
+    def encode(self, values: Sequence[Optional[str]]) -> np.ndarray:
+        codes = self.codes
+        return np.fromiter((-1 if value is None else codes.setdefault(value, len(codes)) for value in values),
+                           dtype=np.int32, count=len(values))
+
+    def values(self) -> List[str]:
+        return list(self.codes)
+
+
+def _times(values: Sequence) -> np.ndarray:
+    # ISO text (sqlite) or datetime (Postgres) -> datetime64[us]; NULL -> NaT
+    return np.array(values, dtype="datetime64[us]")
+
+
+class SnapshotExporter:
+    """
+    Streams leads and event logs out of a consistent point-in-time view of the store
+    (BaseLeadStore.open_snapshot) into memory-mappable NumPy columns, `chunk_rows` rows at a time:
+
+      <SNAPSHOT_DIR>/<timestamp>/manifest.json
+                                 leads/<column>.npy   (+ <column>.categories.json)
+                                 events/<column>.npy
+
+    The directory is built under a temporary name and renamed into place, then LATEST is
+    switched to it, so readers (Snapshot.latest) never see a partial export. Older exports
+    beyond `keep` are removed.
+    """
+    def __init__(self, db: BaseLeadStore, directory: str = None, chunk_rows: int = None, keep: int = None):
+        self.db = db
+        self.directory = directory or config.SNAPSHOT_DIR
+        self.chunk_rows = chunk_rows or config.SNAPSHOT_CHUNK_ROWS
+        self.keep = keep if keep is not None else config.SNAPSHOT_KEEP
+
+    def export(self) -> Snapshot:
+        started = time.perf_counter()
+        created_at = datetime.now()
+        name = created_at.strftime("%Y%m%dT%H%M%S")
+        os.makedirs(self.directory, exist_ok=True)
+        workdir = os.path.join(self.directory, f".tmp-{name}-{os.getpid()}")
+        os.makedirs(workdir)
+        try:
+            with PIPELINE_STAGE_SECONDS.labels("snapshot_export").time():
+                with self.db.open_snapshot(workdir=workdir) as execute:
+                    lead_rows: Dict[str, int] = {}
+                    leads = self._export_leads(execute, os.path.join(workdir, "leads"), lead_rows)
+                    events = self._export_events(execute, os.path.join(workdir, "events"), lead_rows)
+            manifest = {
+                "format": 1, "created_at": created_at.isoformat(), "store": type(self.db).__name__,
+                "stages": list(STAGES), "tables": {"leads": leads, "events": events},
+            }
+            with open(os.path.join(workdir, MANIFEST), "w") as f:
+                json.dump(manifest, f, indent=2)
+            path = os.path.join(self.directory, name)
+            if os.path.exists(path):
+                path = f"{path}-{os.getpid()}"
+            os.rename(workdir, path)
+        except BaseException:
+            shutil.rmtree(workdir, ignore_errors=True)
+            raise
+        self._publish(os.path.basename(path))
+        logger.info("Exported snapshot %s: %d leads, %d events in %.2fs",
+                    path, leads["rows"], events["rows"], time.perf_counter() - started)
+        return Snapshot(path)
+
+    # --- Tables ---
+    def _export_leads(self, execute: Callable, path: str, lead_rows: Dict[str, int]) -> dict:
+        rows = execute("SELECT COUNT(*) FROM leads").fetchone()[0]
+        id_width = max(execute("SELECT MAX(LENGTH(id)) FROM leads").fetchone()[0] or 1, 1)
+        columns = [(name, kind) for name, kind, _ in LEAD_COLUMNS] + [("stage", "stage")]
+        writer = _ColumnWriter(path, rows, columns, id_width)
+        expressions = [expression for _, _, expression in LEAD_COLUMNS] + [expression for _, expression in STAGE_INPUTS]
+        cursor = execute(f"SELECT {', '.join(expressions)} FROM leads")
+        width = len(LEAD_COLUMNS)
+        while True:
+            chunk = cursor.fetchmany(self.chunk_rows)
+            if not chunk:
+                break
+            values = list(zip(*chunk))
+            for offset, lead_id in enumerate(values[0], start=writer.offset):
+                lead_rows[lead_id] = offset
+            status = values[4]
+            send_counts = np.asarray(values[5], dtype=np.int32)
+            data = dict(zip((name for name, _, _ in LEAD_COLUMNS), values[:width]))
+            data["stage"] = lead_stage(status, send_counts, *values[width:])
+            writer.append(data)
+        return writer.close()
+
+    def _export_events(self, execute: Callable, path: str, lead_rows: Dict[str, int]) -> dict:
+        rows = execute("SELECT COUNT(*) FROM event_logs").fetchone()[0]
+        writer = _ColumnWriter(path, rows, [(name, kind) for name, kind, _ in EVENT_COLUMNS])
+        cursor = execute(f"SELECT {', '.join(expression for _, _, expression in EVENT_COLUMNS)} FROM event_logs")
+        while True:
+            chunk = cursor.fetchmany(self.chunk_rows)
+            if not chunk:
+                break
+            lead_ids, event_types, timestamps = zip(*chunk)
+            writer.append({
+                "lead_row": np.fromiter((lead_rows.get(lead_id, -1) for lead_id in lead_ids),
+                                        dtype=np.int32, count=len(lead_ids)),
+                "event_type": event_types,
+                "timestamp": timestamps,
+            })
+        return writer.close()
+
+    # --- Publishing ---
+    def _publish(self, name: str):
+        tmp = os.path.join(self.directory, f"{LATEST}.tmp")
+        with open(tmp, "w") as f:
+            f.write(name)
+        os.replace(tmp, os.path.join(self.directory, LATEST))
+        exports = sorted(entry for entry in os.listdir(self.directory)
+                         if not entry.startswith(".") and entry != LATEST
+                         and os.path.isfile(os.path.join(self.directory, entry, MANIFEST)))
+        for old in exports[:-self.keep] if self.keep > 0 else []:
+            if old != name:
+                shutil.rmtree(os.path.join(self.directory, old), ignore_errors=True)
+
+
+class _ColumnWriter:
+    """
+    Preallocated .npy files (np.lib.format.open_memmap) filled chunk by chunk; the row count
+    comes from the same snapshot, so it cannot change while streaming.
+    """
+    def __init__(self, path: str, rows: int, columns: Sequence[Tuple[str, str]], id_width: int = 36):
+        os.makedirs(path)
+        self.path = path
+        self.rows = rows
+        self.offset = 0
+        self.kinds = dict(columns)
+        self.categories = {name: _Categories() for name, kind in columns if kind == "category"}
+        self.arrays = {}
+        for name, kind in columns:
+            dtype = {"id": f"S{id_width}", "stage": np.int8}.get(kind) or DTYPES[kind]
+            self.arrays[name] = np.lib.format.open_memmap(
+                os.path.join(path, f"{name}.npy"), mode="w+", dtype=dtype, shape=(rows,))
+
+    def append(self, data: Dict[str, Sequence]):
+        count = len(next(iter(data.values())))
+        end = self.offset + count
+        if end > self.rows:
+            raise RuntimeError(f"{self.path}: more rows than counted ({end} > {self.rows})")
+        for name, values in data.items():
+            kind = self.kinds[name]
+            if kind == "category":
+                values = self.categories[name].encode(values)
+            elif kind == "time":
+                values = _times(values)
+            elif kind == "float":
+                values = np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+            elif kind == "id":
+                values = np.array([value.encode("utf-8") for value in values], dtype=self.arrays[name].dtype)
+            self.arrays[name][self.offset:end] = values
+        self.offset = end
+
+    def close(self) -> dict:
+        for array in self.arrays.values():
+            array.flush()
+        for name, categories in self.categories.items():
+            with open(os.path.join(self.path, f"{name}.categories.json"), "w") as f:
+                json.dump(categories.values(), f)
+        spec = {"rows": self.offset, "columns": {name: {"kind": kind, "dtype": str(self.arrays[name].dtype)}
+                                                for name, kind in self.kinds.items()}}
+        self.arrays.clear()
+        return spec
+
+
+if __name__ == "__main__":
+    from backend.core.container import get_container
+
+    container = get_container()
+    try:
+        snapshot = SnapshotExporter(container.db).export()
+        print(json.dumps({"snapshot": snapshot.path, "leads": len(snapshot.leads), "events": len(snapshot.events),
+                          "funnel": snapshot.funnel()}, indent=2))
+    finally:
+        container.close()
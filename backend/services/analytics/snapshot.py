@@ -0,0 +1,193 @@
+import functools
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Union
+import numpy as np
+from backend.core.config import config
+
+# Furthest pipeline stage a lead has reached; each stage implies the ones before it
+STAGES = ("ingested", "enriched", "drafted", "sent", "replied", "positive")
+
+MANIFEST = "manifest.json"
+LATEST = "LATEST"
+
+
+class Table:
+    """
+    One exported table: a directory of .npy columns, memory-mapped on first access.
+    Categorical columns are int32 codes (-1 = NULL) with their values in <column>.categories.json.
+    """
+    def __init__(self, path: str, spec: dict):
+        self.path = path
+        self.rows = spec["rows"]
+        self.spec = spec["columns"]
+        self._columns: Dict[str, np.ndarray] = {}
+        self._categories: Dict[str, List[str]] = {}
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        column = self._columns.get(name)
+        if column is None:
+            if name not in self.spec:
+                raise KeyError(f"No column {name!r} in {self.path}")
+            column = self._columns[name] = np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode="r")
+        return column
+
+    def categories(self, name: str) -> List[str]:
+        values = self._categories.get(name)
+        if values is None:
+            with open(os.path.join(self.path, f"{name}.categories.json")) as f:
+                values = self._categories[name] = json.load(f)
+        return values
+
+    def isin(self, name: str, values: Union[str, Sequence[str]]) -> np.ndarray:
+        # Row mask for a categorical column; compares codes, never strings
+        values = {values} if isinstance(values, str) else set(values)
+        wanted = [code for code, value in enumerate(self.categories(name)) if value in values]
+        return np.isin(self[name], wanted)
+
+
+def _as_datetime64(value) -> np.datetime64:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return np.datetime64(value, "us")
+
+
+class Snapshot:
+    """
+    Read-only view of one export (see SnapshotExporter), separate from the OLTP store: funnel and
+    event queries are NumPy reductions over memory-mapped columns, milliseconds for millions of rows.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, MANIFEST)) as f:
+            self.manifest = json.load(f)
+        self.created_at = datetime.fromisoformat(self.manifest["created_at"])
+        self.leads = Table(os.path.join(path, "leads"), self.manifest["tables"]["leads"])
+        self.events = Table(os.path.join(path, "events"), self.manifest["tables"]["events"])
+
+    @classmethod
+    def latest(cls, directory: str = None) -> Optional["Snapshot"]:
+        """
+        Most recent complete export in `directory` (SNAPSHOT_DIR), or None. Opened snapshots are cached.
+        """
+        directory = directory or config.SNAPSHOT_DIR
+        try:
+            with open(os.path.join(directory, LATEST)) as f:
+                name = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return _open_snapshot(os.path.join(directory, name))
+
+    # --- Filters ---
+    def lead_mask(self, campaign_id: Union[str, Sequence[str]] = None, source: Union[str, Sequence[str]] = None,
+                  since=None, until=None) -> np.ndarray:
+        """
+        Leads matching every given filter; since / until bound created_at (datetime or ISO string).
+        """
+        mask = np.ones(len(self.leads), dtype=bool)
+        if campaign_id is not None:
+            mask &= self.leads.isin("campaign_id", campaign_id)
+        if source is not None:
+            mask &= self.leads.isin("source", source)
+        if since is not None:
+            mask &= self.leads["created_at"] >= _as_datetime64(since)
+        if until is not None:
+            mask &= self.leads["created_at"] < _as_datetime64(until)
+        return mask
+
+    # --- Queries ---
+    def funnel(self, **filters) -> Dict[str, int]:
+        """
+        Number of leads that reached each stage, e.g. {"ingested": 1000, "enriched": 940, ...}.
+        """
+        counts = np.bincount(self.leads["stage"][self.lead_mask(**filters)], minlength=len(STAGES))
+        return dict(zip(STAGES, counts[::-1].cumsum()[::-1].tolist()))
+
+    def funnel_by(self, column: str, **filters) -> Dict[Optional[str], Dict[str, int]]:
+        """
+        funnel() per value of a categorical lead column (campaign_id, source, status, account_id);
+        one bincount over code * stages + stage. NULL values are reported under None.
+        """
+        if self.leads.spec.get(column, {}).get("kind") != "category":
+            raise ValueError(f"Cannot group by {column!r}: not a categorical lead column")
+        mask = self.lead_mask(**filters)
+        categories = self.leads.categories(column)
+        codes = self.leads[column][mask].astype(np.int64)
+        codes[codes < 0] = len(categories)
+        stages = len(STAGES)
+        counts = np.bincount(codes * stages + self.leads["stage"][mask], minlength=(len(categories) + 1) * stages)
+        reached = counts.reshape(-1, stages)[:, ::-1].cumsum(axis=1)[:, ::-1]
+        labels = list(categories) + [None]
+        return {labels[code]: dict(zip(STAGES, reached[code].tolist()))
+                for code in np.flatnonzero(reached[:, 0])}
+
+    def daily_events(self, event_types: Sequence[str] = None, since=None, until=None,
+                     **lead_filters) -> Dict[str, Dict[str, int]]:
+        """
+        Event counts per day and type, e.g. {"2024-05-01": {"INGEST": 120, "ENRICH_OK": 97}}.
+        since / until bound the event timestamp; lead filters (campaign_id, source) go through
+        the lead each event belongs to.
+        """
+        events = self.events
+        mask = np.ones(len(events), dtype=bool)
+        if event_types is not None:
+            mask &= events.isin("event_type", event_types)
+        if since is not None:
+            mask &= events["timestamp"] >= _as_datetime64(since)
+        if until is not None:
+            mask &= events["timestamp"] < _as_datetime64(until)
+        lead_filters = {name: value for name, value in lead_filters.items() if value is not None}
+        if lead_filters:
+            rows = events["lead_row"]
+            mask &= (rows >= 0) & self.lead_mask(**lead_filters)[np.maximum(rows, 0)]
+        types = events["event_type"][mask].astype(np.int64)
+        days = events["timestamp"][mask].astype("datetime64[D]")
+        known = (types >= 0) & ~np.isnat(days)
+        types, days = types[known], days[known].astype(np.int64)
+        if not len(days):
+            return {}
+        names = events.categories("event_type")
+        first = days.min()
+        counts = np.bincount((days - first) * len(names) + types,
+                             minlength=(days.max() - first + 1) * len(names)).reshape(-1, len(names))
+        result = {}
+        for day, code in zip(*np.nonzero(counts)):
+            date = str(np.datetime64(int(first + day), "D"))
+            result.setdefault(date, {})[names[code]] = int(counts[day, code])
+        return result
+
+
+@functools.lru_cache(maxsize=4)
+def _open_snapshot(path: str) -> Snapshot:
+    return Snapshot(path)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Funnel queries over the latest analytics snapshot")
+    parser.add_argument("--path", help="snapshot directory (default: latest in SNAPSHOT_DIR)")
+    parser.add_argument("--by", help="break the funnel down by a lead column, e.g. campaign_id or source")
+    parser.add_argument("--campaign-id")
+    parser.add_argument("--source")
+    parser.add_argument("--since")
+    parser.add_argument("--until")
+    parser.add_argument("--events", action="store_true", help="daily event counts instead of the funnel")
+    args = parser.parse_args()
+
+    snapshot = Snapshot(args.path) if args.path else Snapshot.latest()
+    if snapshot is None:
+        raise SystemExit(f"No snapshot in {config.SNAPSHOT_DIR}; run python -m backend.services.analytics.export")
+    filters = dict(campaign_id=args.campaign_id, source=args.source, since=args.since, until=args.until)
+    if args.events:
+        result = snapshot.daily_events(**filters)
+    elif args.by:
+        result = snapshot.funnel_by(args.by, **filters)
+    else:
+        result = snapshot.funnel(**filters)
+    print(json.dumps({"snapshot": os.path.basename(snapshot.path), "created_at": snapshot.manifest["created_at"],
+                      "result": result}, indent=2))
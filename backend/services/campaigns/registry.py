@@ -0,0 +1,191 @@
+import dataclasses
+import re
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+from backend.core.config import config
+from backend.storage.base import BaseLeadStore
+from backend.storage.models import Campaign
+from backend.utils.logger import setup_logger
+
+logger = setup_logger("CampaignRegistry")
+
+DEFAULT_CAMPAIGN_ID = "default"
+STATUSES = ("active", "paused", "archived")
+# Fields an update may change; id, created_at and version are managed here
+EDITABLE_FIELDS = ("name", "icp_description", "product_description", "email_template", "blacklist_domains",
+                   "daily_limit", "pipeline_workers", "weight", "status")
+
+
+class CampaignConflict(Exception):
+    """
+    The campaign changed since the version the caller read (optimistic concurrency).
+    """
+    def __init__(self, campaign: Campaign):
+        super().__init__(f"Campaign {campaign.id} is at version {campaign.version}")
+        self.campaign = campaign
+
+
+def default_campaign() -> Campaign:
+    # Leads without a campaign; its limits come from config until someone saves it
+    return Campaign(id=DEFAULT_CAMPAIGN_ID, name="Default", icp_description="", email_template="",
+                    daily_limit=config.DEFAULT_DAILY_LIMIT, version=0)
+
+
+def _validate(campaign: Campaign):
+    if not campaign.name or not campaign.name.strip():
+        raise ValueError("Campaign name is required")
+    if campaign.status not in STATUSES:
+        raise ValueError(f"Unknown campaign status {campaign.status!r}; expected one of {', '.join(STATUSES)}")
+    if campaign.daily_limit < 0 or campaign.pipeline_workers < 0:
+        raise ValueError("daily_limit and pipeline_workers must be >= 0")
+    if campaign.weight < 1:
+        raise ValueError("weight must be >= 1")
+    campaign.blacklist_domains = sorted({domain.strip().lower() for domain in campaign.blacklist_domains if domain.strip()})
+
+
+class CampaignRegistry:
+    """
+    Campaign configs (prompts, limits, blacklists, pipeline worker caps) cached in memory.
+
+    Agents, the risk controller and the pipeline read them on every lead without a query.
+    Changes made through this registry apply at once and are broadcast to subscribers
+    (e.g. the scheduler waking up for a resumed campaign). Edits from other
+    processes are picked up by re-reading the table at most every CAMPAIGN_REFRESH_SECONDS.
+    Every update bumps the campaign's version, and `expected_version` turns an update into a
+    compare-and-set, so two editors cannot silently overwrite each other.
+    """
+    def __init__(self, db: BaseLeadStore, refresh_seconds: float = None):
+        self.db = db
+        self.refresh_seconds = config.CAMPAIGN_REFRESH_SECONDS if refresh_seconds is None else refresh_seconds
+        self._campaigns: Dict[str, Campaign] = {}
+        self._listeners: List[Callable[[Campaign], None]] = []
+        self._lock = threading.RLock()
+        self._loaded_at: Optional[float] = None
+
+    # --- Reads ---
+    def get(self, campaign_id: Optional[str]) -> Optional[Campaign]:
+        """
+        Cached campaign, refreshed when stale; the default campaign always resolves.
+        """
+        self.refresh_if_stale()
+        return self.cached(campaign_id)
+
+    def cached(self, campaign_id: Optional[str]) -> Optional[Campaign]:
+        # No I/O: safe to call while holding other locks
+        campaign_id = campaign_id or DEFAULT_CAMPAIGN_ID
+        campaign = self._campaigns.get(campaign_id)
+        if campaign is None and campaign_id == DEFAULT_CAMPAIGN_ID:
+            return default_campaign()
+        return campaign
+
+    def list(self, include_archived: bool = False) -> List[Campaign]:
+        self.refresh_if_stale()
+        with self._lock:
+            return [c for c in self._campaigns.values() if include_archived or c.status != "archived"]
+
+    # --- Writes ---
+    def create(self, fields: Dict[str, Any]) -> Campaign:
+        fields = {key: value for key, value in fields.items() if value is not None}
+        campaign_id = fields.pop("id", None) or uuid.uuid4().hex[:12]
+        campaign = Campaign(id=campaign_id, name=fields.pop("name", ""), icp_description=fields.pop("icp_description", ""),
+                            email_template=fields.pop("email_template", ""),
+                            **{key: value for key, value in fields.items() if key in EDITABLE_FIELDS})
+        if not re.fullmatch(r"[A-Za-z0-9_.-]{1,64}", campaign.id):
+            raise ValueError("Campaign id may only contain letters, digits, '.', '_' and '-' (max 64)")
+        _validate(campaign)
+        with self._lock:
+            existing = self.db.get_campaign(campaign.id)
+            if existing is not None:
+                raise CampaignConflict(existing)
+            self.db.save_campaign(campaign)
+            self._apply(campaign)
+        logger.info("Created campaign %s (%s)", campaign.id, campaign.name)
+        return campaign
+
+    def update(self, campaign_id: str, changes: Dict[str, Any], expected_version: int = None) -> Campaign:
+        """
+        Applies `changes` (EDITABLE_FIELDS) as version + 1. Raises KeyError for an unknown campaign,
+        CampaignConflict when `expected_version` is given and no longer current, ValueError on bad values.
+        """
+        with self._lock:
+            current = self.db.get_campaign(campaign_id)
+            if current is None:
+                if campaign_id != DEFAULT_CAMPAIGN_ID:
+                    raise KeyError(campaign_id)
+                current = default_campaign()
+            if expected_version is not None and current.version != expected_version:
+                raise CampaignConflict(current)
+            unknown = set(changes) - set(EDITABLE_FIELDS)
+            if unknown:
+                raise ValueError(f"Cannot change {', '.join(sorted(unknown))}")
+            campaign = dataclasses.replace(current, **changes, version=current.version + 1)
+            _validate(campaign)
+            # The default campaign's first save is an insert; everything else is a compare-and-set
+            if current.version == 0:
+                self.db.save_campaign(campaign)
+            elif not self.db.update_campaign(campaign):
+                raise CampaignConflict(self.db.get_campaign(campaign_id) or current)
+            self._apply(campaign)
+        logger.info("Updated campaign %s to version %d (%s)", campaign.id, campaign.version, ", ".join(sorted(changes)))
+        return campaign
+
+    def archive(self, campaign_id: str, expected_version: int = None) -> Campaign:
+        # Leads and analytics keep pointing at archived campaigns, so they are never deleted
+        return self.update(campaign_id, {"status": "archived"}, expected_version)
+
+    # --- Change propagation ---
+    def subscribe(self, listener: Callable[[Campaign], None]):
+        """
+        `listener(campaign)` runs after every change, local or picked up by a refresh.
+        """
+        with self._lock:
+            self._listeners.append(listener)
+
+    def refresh_if_stale(self):
+        if not self._stale():
+            return
+        with self._lock:
+            # One thread re-reads; the others waited on the lock and find it fresh
+            if self._stale():
+                self.refresh()
+
+    def _stale(self) -> bool:
+        loaded_at = self._loaded_at
+        return loaded_at is None or time.monotonic() - loaded_at >= self.refresh_seconds
+
+    def refresh(self) -> List[Campaign]:
+        """
+        Re-reads every campaign; returns (and broadcasts) the ones whose version changed.
+        """
+        campaigns = self.db.get_campaigns()
+        changed, loaded = [], {}
+        with self._lock:
+            for campaign in campaigns:
+                known = self._campaigns.get(campaign.id)
+                if known is not None and known.version >= campaign.version:
+                    # Read before a local update that already landed: keep the newer one
+                    loaded[campaign.id] = known
+                    continue
+                loaded[campaign.id] = campaign
+                changed.append(campaign)
+            self._campaigns = loaded
+            self._loaded_at = time.monotonic()
+        if changed and self._listeners:
+            logger.info("Reloaded %d changed campaign(s)", len(changed))
+            self._broadcast(changed)
+        return changed
+
+    def _apply(self, campaign: Campaign):
+        with self._lock:
+            self._campaigns = {**self._campaigns, campaign.id: campaign}
+        self._broadcast([campaign])
+
+    def _broadcast(self, campaigns: List[Campaign]):
+        for listener in list(self._listeners):
+            for campaign in campaigns:
+                try:
+                    listener(campaign)
+                except Exception as e:
+                    logger.error("Campaign listener failed for %s: %s", campaign.id, e)
@@ -0,0 +1,305 @@
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import zlib
+from contextlib import contextmanager
+from collections import Counter
+from typing import List, NamedTuple, Optional, Sequence
+import numpy as np
+from backend.core.config import config
+from backend.utils.logger import setup_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: single writer process per directory
+    fcntl = None
+
+logger = setup_logger("EmbeddingIndex")
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+MIN_CAPACITY = 1024
+
+
+def text_key(text: str) -> str:
+    # Stable id for a text: repeated replies (auto-responders, "unsubscribe") share one row
+    normalized = " ".join(TOKEN_RE.findall((text or "").lower()))
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=12).hexdigest()
+
+
+class HashedTfidfEmbedder:
+    """
+    Dependency-free fallback: word unigrams and bigrams hashed into `dim` signed buckets
+    (crc32, stable across processes), sublinear TF times a smoothed IDF, L2-normalized.
+    Document frequencies are learned per index as texts are upserted; stored rows keep the
+    IDF of their upsert, which is fine for the near-duplicate matching this is used for.
+    """
+    def __init__(self, dim: int = None):
+        self.dim = dim or config.EMBEDDING_DIM
+        self.name = f"hashed-tfidf-{self.dim}"
+        self.df = np.zeros(self.dim, dtype=np.float64)
+        self.docs = 0
+
+    def _features(self, text: str) -> Counter:
+        words = TOKEN_RE.findall((text or "").lower())
+        return Counter(words + [f"{a} {b}" for a, b in zip(words, words[1:])])
+
+    def _buckets(self, features: Counter):
+        buckets = np.empty(len(features), dtype=np.int64)
+        values = np.empty(len(features), dtype=np.float64)
+        for i, (token, count) in enumerate(features.items()):
+            h = zlib.crc32(token.encode("utf-8"))
+            buckets[i] = h % self.dim
+            values[i] = (1.0 + math.log(count)) * (1.0 if h & 0x80000000 else -1.0)
+        return buckets, values
+
+    def fit(self, texts: Sequence[str]):
+        for text in texts:
+            buckets, _ = self._buckets(self._features(text))
+            self.df[np.unique(buckets)] += 1
+        self.docs += len(texts)
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        idf = np.log((1.0 + self.docs) / (1.0 + self.df)) + 1.0
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            buckets, values = self._buckets(self._features(text))
+            np.add.at(vectors[row], buckets, values * idf[buckets])
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms > 0, norms, 1.0)
+
+    def state(self) -> dict:
+        return {"docs": self.docs, "df": self.df.tolist()}
+
+    def load_state(self, state: dict):
+        self.docs = int(state.get("docs", 0))
+        df = state.get("df")
+        if df is not None and len(df) == self.dim:
+            self.df = np.array(df, dtype=np.float64)
+
+
+class LocalModelEmbedder:
+    """
+    A small sentence-transformers model from a local directory (EMBEDDING_MODEL), CPU only.
+    Needs `pip install sentence-transformers`; loaded on first use.
+    """
+    def __init__(self, model_path: str):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_path, device="cpu")
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.name = f"model-{os.path.basename(os.path.normpath(model_path))}-{self.dim}"
+
+    def fit(self, texts: Sequence[str]):
+        pass
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        return self.model.encode(list(texts), batch_size=64, normalize_embeddings=True,
+                                 convert_to_numpy=True).astype(np.float32)
+
+    def state(self) -> dict:
+        return {}
+
+    def load_state(self, state: dict):
+        pass
+
+
+def default_embedder():
+    if config.EMBEDDING_MODEL:
+        return LocalModelEmbedder(config.EMBEDDING_MODEL)
+    return HashedTfidfEmbedder()
+
+
+class Neighbor(NamedTuple):
+    id: str
+    score: float # cosine similarity
+    label: Optional[str]
+
+
+class EmbeddingIndex:
+    """
+    Exact nearest-neighbour index over L2-normalized vectors, persisted in `directory` as
+      <name>.f32   float32 rows in a memory-mapped file (capacity doubles as it fills)
+      <name>.ids   append-only "row<TAB>id<TAB>label" log; the last line for a row wins
+      <name>.json  row count, write version, embedder name and embedder state (IDF)
+    The meta file is replaced last, so rows past its count (a crash mid-upsert) are ignored.
+    Upserts hold an flock on <name>.lock and first reload if another process (API server,
+    mailbox listener) has written since, so several processes can share one directory.
+    Search is one matrix product over the mapped rows: the OS page cache keeps hot indexes in
+    memory and cold ones cost nothing until used.
+    """
+    def __init__(self, name: str, directory: str = None, embedder=None):
+        self.name = name
+        self.directory = directory or config.EMBEDDING_DIR
+        self.embedder = embedder or default_embedder()
+        self.dim = self.embedder.dim
+        os.makedirs(self.directory, exist_ok=True)
+        self._base = os.path.join(self.directory, name)
+        self._lock = threading.RLock()
+        self._ids: List[str] = []
+        self._labels: List[Optional[str]] = []
+        self._rows = {}
+        self._log_lines = 0
+        self._version = 0
+        self._meta_mtime = None
+        self._load()
+
+    def __len__(self):
+        return len(self._ids)
+
+    # --- Persistence ---
+    def _read_meta(self) -> dict:
+        try:
+            with open(self._base + ".json") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _stat_meta(self):
+        try:
+            return os.stat(self._base + ".json").st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _load(self):
+        self._meta_mtime = self._stat_meta()
+        meta = self._read_meta()
+        if meta and meta.get("embedder") != self.embedder.name:
+            # Vectors from another model / dimension are not comparable: start over
+            logger.warning("Embedding index %s was built with %s, now %s; rebuilding",
+                           self.name, meta.get("embedder"), self.embedder.name)
+            meta = {}
+            for suffix in (".f32", ".ids"):
+                if os.path.exists(self._base + suffix):
+                    os.remove(self._base + suffix)
+        count = int(meta.get("count", 0))
+        self._version = int(meta.get("version", 0))
+        self._log_lines = 0
+        self.embedder.load_state(meta.get("state", {}))
+
+        self._ids, self._labels = [None] * count, [None] * count
+        if count and os.path.exists(self._base + ".ids"):
+            with open(self._base + ".ids", encoding="utf-8") as f:
+                for line in f:
+                    self._log_lines += 1
+                    row, item_id, label = line.rstrip("\n").split("\t")
+                    row = int(row)
+                    if row < count:
+                        self._ids[row], self._labels[row] = item_id, label or None
+        self._rows = {item_id: row for row, item_id in enumerate(self._ids)}
+        self._open(max(MIN_CAPACITY, count))
+        if count:
+            logger.info("Loaded embedding index %s: %d rows (%s)", self.name, count, self.embedder.name)
+
+    def _open(self, capacity: int):
+        path = self._base + ".f32"
+        size = capacity * self.dim * 4
+        with open(path, "ab") as f:
+            if f.tell() < size:
+                f.truncate(size)
+        self._capacity = os.path.getsize(path) // (self.dim * 4)
+        self._vectors = np.memmap(path, dtype=np.float32, mode="r+", shape=(self._capacity, self.dim))
+
+    @contextmanager
+    def _writer(self):
+        with open(self._base + ".lock", "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                if int(self._read_meta().get("version", 0)) != self._version:
+                    self._load()
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _save_meta(self):
+        self._version += 1
+        meta = {"count": len(self._ids), "version": self._version, "dim": self.dim,
+                "embedder": self.embedder.name, "state": self.embedder.state()}
+        tmp = self._base + ".json.tmp"
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._base + ".json")
+        self._meta_mtime = self._stat_meta()
+
+    def _compact_log(self):
+        tmp = self._base + ".ids.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for row, (item_id, label) in enumerate(zip(self._ids, self._labels)):
+                f.write(f"{row}\t{item_id}\t{label or ''}\n")
+        os.replace(tmp, self._base + ".ids")
+        self._log_lines = len(self._ids)
+
+    def flush(self):
+        with self._lock:
+            self._vectors.flush()
+
+    def close(self):
+        self.flush()
+
+    # --- Writes ---
+    def upsert(self, ids: Sequence[str], texts: Sequence[str], labels: Sequence[Optional[str]] = None):
+        """
+        Embeds `texts` in one batch and inserts or replaces the rows for `ids`.
+        """
+        if not ids:
+            return
+        # Labels share a line with the id in the log: collapse tabs / newlines
+        labels = [" ".join(label.split()) or None if label else None for label in labels or [None] * len(ids)]
+        with self._lock, self._writer():
+            self.embedder.fit(texts)
+            vectors = self.embedder.embed(texts)
+            log = []
+            for item_id, vector, label in zip(ids, vectors, labels):
+                row = self._rows.get(item_id)
+                if row is None:
+                    row = len(self._ids)
+                    if row >= self._capacity:
+                        self._vectors.flush()
+                        self._open(self._capacity * 2)
+                    self._ids.append(item_id)
+                    self._labels.append(label)
+                    self._rows[item_id] = row
+                elif self._labels[row] == label:
+                    self._vectors[row] = vector
+                    continue
+                self._vectors[row] = vector
+                self._labels[row] = label
+                log.append(f"{row}\t{item_id}\t{label or ''}\n")
+            self._vectors.flush()
+            with open(self._base + ".ids", "a", encoding="utf-8") as f:
+                f.writelines(log)
+            self._log_lines += len(log)
+            self._save_meta()
+            if self._log_lines > 2 * len(self._ids) + MIN_CAPACITY:
+                self._compact_log()
+
+    # --- Reads ---
+    def search(self, texts: Sequence[str], k: int = 5, min_score: float = 0.0) -> List[List[Neighbor]]:
+        """
+        Top-k neighbours (cosine, best first) for each query text, above `min_score`.
+        """
+        if not texts:
+            return []
+        with self._lock:
+            if self._stat_meta() != self._meta_mtime:
+                self._load()  # written by another process since
+            queries = self.embedder.embed(texts)
+            count = len(self._ids)
+            if not count:
+                return [[] for _ in texts]
+            scores = queries @ self._vectors[:count].T
+            k = min(k, count)
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            results = []
+            for query_scores, candidates in zip(scores, top):
+                ranked = candidates[np.argsort(-query_scores[candidates])]
+                results.append([Neighbor(self._ids[row], float(query_scores[row]), self._labels[row])
+                                for row in ranked if query_scores[row] >= min_score])
+        return results
+
+    def nearest(self, text: str, min_score: float = 0.0) -> Optional[Neighbor]:
+        matches = self.search([text], k=1, min_score=min_score)[0]
+        return matches[0] if matches else None
@@ -0,0 +1,383 @@
+import difflib
+import hashlib
+import re
+import threading
+import unicodedata
+import zlib
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+import numpy as np
+from backend.core.config import config
+from backend.utils.logger import setup_logger
+
+logger = setup_logger("AccountIndex")
+
+# Dropped from the end of a company name ("Wayne Enterprises, Inc." -> "wayne enterprises")
+LEGAL_SUFFIXES = frozenset((
+    "inc", "incorporated", "llc", "llp", "lp", "ltd", "limited", "corp", "corporation", "co", "company",
+    "plc", "gmbh", "ag", "kg", "sa", "sas", "sarl", "srl", "spa", "bv", "nv", "oy", "ab", "as", "aps",
+    "pty", "pte", "kk", "sl", "holdings", "group",
+))
+# Common abbreviations -> one spelling, so "Wayne Ent" and "Wayne Enterprises" share a key
+ABBREVIATIONS = {
+    "ent": "enterprises", "enterprise": "enterprises", "ind": "industries", "inds": "industries", "intl": "international", "int'l": "international",
+    "tech": "technologies", "technology": "technologies", "sys": "systems", "system": "systems",
+    "svc": "services", "svcs": "services", "service": "services", "mfg": "manufacturing",
+    "natl": "national", "assoc": "associates", "bros": "brothers", "lab": "labs", "solution": "solutions",
+    "&": "and", "+": "and",
+}
+# Industry words shared by thousands of unrelated companies: a fuzzy match must also hold on the rest
+GENERIC_TOKENS = frozenset((
+    "and", "of", "technologies", "systems", "solutions", "services", "software", "labs", "analytics",
+    "logistics", "health", "healthcare", "robotics", "capital", "energy", "networks", "foods", "dynamics",
+    "media", "security", "consulting", "partners", "international", "global", "digital", "data",
+    "industries", "manufacturing", "enterprises", "associates", "ventures", "communications", "financial",
+    "marketing", "studios", "brothers", "national", "cloud", "ai",
+))
+# Mailbox providers: the domain says nothing about the employer
+FREE_MAIL_DOMAINS = frozenset((
+    "gmail.com", "googlemail.com", "yahoo.com", "hotmail.com", "outlook.com", "live.com", "msn.com",
+    "aol.com", "icloud.com", "me.com", "mac.com", "proton.me", "protonmail.com", "gmx.com", "gmx.de",
+    "web.de", "yandex.ru", "mail.ru", "qq.com", "163.com", "zoho.com", "fastmail.com",
+))
+
+_TOKEN_RE = re.compile(r"[a-z0-9&+']+")
+
+_P = np.uint64((1 << 31) - 1)  # Mersenne prime for the permutation hashes; values fit in uint32
+_EMPTY_KEYS = np.empty(0, dtype=np.uint64)
+_EMPTY_SLOTS = np.empty(0, dtype=np.int32)
+
+
+def normalize_company(name: str) -> str:
+    """
+    Match key for a company name: lowercase ASCII tokens, abbreviations expanded,
+    leading "the" and trailing legal suffixes removed.
+    """
+    text = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode().lower()
+    tokens = [ABBREVIATIONS.get(t, t) for t in _TOKEN_RE.findall(text.replace(".", ""))]
+    tokens = [t.replace("'", "") for t in tokens]
+    if len(tokens) > 1 and tokens[0] == "the":
+        tokens = tokens[1:]
+    while len(tokens) > 1 and tokens[-1] in LEGAL_SUFFIXES:
+        tokens.pop()
+    return " ".join(tokens)
+
+
+def email_domain(email: Optional[str]) -> Optional[str]:
+    """
+    Corporate domain of an address, or None for free-mail providers / missing addresses.
+    """
+    if not email or "@" not in email:
+        return None
+    domain = email.rsplit("@", 1)[1].strip().lower()
+    if domain.startswith(("www.", "mail.")):
+        domain = domain.split(".", 1)[1]
+    return None if domain in FREE_MAIL_DOMAINS or "." not in domain else domain
+
+
+def _key_hash(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "little")
+
+
+def _grams(key: str, n: int = 3) -> set:
+    padded = f" {key} "
+    return {padded[i:i + n] for i in range(max(1, len(padded) - n + 1))}
+
+
+def _distinctive(key: str) -> str:
+    return " ".join(t for t in key.split() if t not in GENERIC_TOKENS) or key
+
+
+class _Similarity:
+    """
+    Edit similarity (0..1) of a normalized key to others, taken over the whole key and over its
+    distinctive tokens, whichever is lower: "Vacepa Software" and "Nucepa Software" are close
+    as strings but the brand differs; "Acme Labs" and "Acme Health" share the brand only.
+    The query side is indexed once; the quick_ratio() upper bounds skip most full comparisons.
+    """
+    def __init__(self, key: str):
+        self.full = difflib.SequenceMatcher(None, autojunk=False)
+        self.full.set_seq2(key)
+        self.brand = difflib.SequenceMatcher(None, autojunk=False)
+        self.brand.set_seq2(_distinctive(key))
+
+    def at_least(self, other: str, threshold: float) -> Optional[float]:
+        score = 1.0
+        for matcher, text in ((self.brand, _distinctive(other)), (self.full, other)):
+            matcher.set_seq1(text)
+            if matcher.real_quick_ratio() < threshold or matcher.quick_ratio() < threshold:
+                return None
+            score = min(score, matcher.ratio())
+            if score < threshold:
+                return None
+        return score
+
+
+def _shingles(key: str) -> np.ndarray:
+    grams = _grams(key)
+    return np.fromiter((zlib.crc32(g.encode()) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+class AccountMatch(NamedTuple):
+    account_id: str
+    created: bool # no existing account matched; a new one was registered
+    domain: Optional[str] # corporate domain of the lead's email, if any
+    domain_learned: bool # an existing account just gained this domain
+
+
+class _HashTable:
+    """
+    uint64 key -> int32 slots (a key may map to several). Sorted NumPy arrays hold the bulk
+    (12 bytes per entry, vectorised searchsorted lookups); recent inserts go to a small dict
+    that is merged in once it grows, so single inserts stay O(1) amortised.
+    """
+    def __init__(self, merge_threshold: int):
+        self.keys = _EMPTY_KEYS
+        self.slots = _EMPTY_SLOTS
+        self.delta: Dict[int, List[int]] = {}
+        self.delta_size = 0
+        self.merge_threshold = merge_threshold
+
+    def add(self, key: int, slot: int):
+        self.delta.setdefault(key, []).append(slot)
+        self.delta_size += 1
+        if self.delta_size >= self.merge_threshold:
+            self.merge()
+
+    def add_many(self, keys: np.ndarray, slots: np.ndarray):
+        self._absorb(keys.astype(np.uint64, copy=False), slots.astype(np.int32, copy=False))
+
+    def merge(self):
+        if not self.delta:
+            return
+        keys = np.fromiter((k for k, v in self.delta.items() for _ in v), dtype=np.uint64, count=self.delta_size)
+        slots = np.fromiter((s for v in self.delta.values() for s in v), dtype=np.int32, count=self.delta_size)
+        self.delta, self.delta_size = {}, 0
+        self._absorb(keys, slots)
+
+    def _absorb(self, keys: np.ndarray, slots: np.ndarray):
+        keys = np.concatenate((self.keys, keys))
+        slots = np.concatenate((self.slots, slots))
+        order = np.argsort(keys, kind="stable")
+        self.keys, self.slots = keys[order], slots[order]
+
+    def get(self, key: int) -> List[int]:
+        return self.get_many(np.array([key], dtype=np.uint64))
+
+    def get_many(self, keys: np.ndarray, max_per_key: int = None) -> List[int]:
+        found: List[int] = []
+        lo = np.searchsorted(self.keys, keys, side="left")
+        hi = np.searchsorted(self.keys, keys, side="right")
+        for key, start, end in zip(keys.tolist(), lo.tolist(), hi.tolist()):
+            if max_per_key and end - start > max_per_key:
+                continue  # a very common bucket carries no signal
+            if end > start:
+                found.extend(self.slots[start:end].tolist())
+            found.extend(self.delta.get(key, ()))
+        return found
+
+    @property
+    def nbytes(self) -> int:
+        return self.keys.nbytes + self.slots.nbytes
+
+
+class AccountIndex:
+    """
+    In-memory account resolution: company name / email -> canonical account id.
+
+    Lookups, cheapest first:
+    1. corporate email domain (free-mail providers ignored)
+    2. exact normalized name key ("Wayne Ent" == "Wayne Enterprises, Inc." == "wayne enterprises")
+    3. MinHash over character 3-grams of the key with LSH banding, for near duplicates
+       ("Waine Enterprises", "Wayne Enterprise Group"); candidates are ranked on the estimated
+       Jaccard similarity, the best few are verified on edit similarity against the threshold,
+       and a candidate is rejected when both sides have different domains.
+
+    Lookup structures are NumPy arrays (a few hundred bytes per account), so a million accounts
+    resolve in well under a millisecond. resolve() / add() keep it current as leads are ingested.
+    """
+    def __init__(self, num_perm: int = 32, bands: int = 16, threshold: float = None,
+                 max_bucket: int = 64, max_verify: int = 8, min_estimate: float = 0.4, merge_threshold: int = 20_000):
+        assert num_perm % bands == 0
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = config.ACCOUNT_MATCH_THRESHOLD if threshold is None else threshold
+        self.max_bucket = max_bucket
+        self.max_verify = max_verify
+        self.min_estimate = min_estimate
+
+        rng = np.random.default_rng(0x6774_6d61)
+        self._a = rng.integers(1, int(_P), size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, int(_P), size=(num_perm, 1), dtype=np.uint64)
+        # Per-row multipliers that fold a band's rows into one uint64 bucket key
+        self._band_mix = rng.integers(1, 1 << 62, size=(self.rows,), dtype=np.uint64) | np.uint64(1)
+        self._band_salt = rng.integers(1, 1 << 62, size=(bands,), dtype=np.uint64)
+
+        self._ids: List[str] = []
+        self._keys: List[str] = []
+        self._domains: List[Optional[str]] = []
+        self._signatures = np.empty((0, num_perm), dtype=np.uint32)
+        self._size = 0
+        self._by_domain = _HashTable(merge_threshold)
+        self._by_name = _HashTable(merge_threshold)
+        self._by_band = _HashTable(merge_threshold * bands)
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return self._size
+
+    @staticmethod
+    def account_id_for(name_key: str, domain: Optional[str]) -> str:
+        # Deterministic, so two ingest nodes creating the same account converge on one row
+        basis = f"d:{domain}" if domain else f"n:{name_key}"
+        return "acct_" + hashlib.blake2b(basis.encode(), digest_size=8).hexdigest()
+
+    # --- MinHash ---
+    def signature(self, key: str) -> np.ndarray:
+        shingles = _shingles(key)
+        return ((self._a * shingles[None, :] + self._b) % _P).min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, signatures: np.ndarray) -> np.ndarray:
+        # (n, num_perm) -> (n, bands) bucket keys; uint64 arithmetic wraps, which is fine for hashing
+        folded = signatures.astype(np.uint64).reshape(len(signatures), self.bands, self.rows) * self._band_mix
+        return folded.sum(axis=2, dtype=np.uint64) ^ self._band_salt
+
+    # --- Lookup ---
+    def match(self, company_name: str, email: Optional[str] = None) -> Optional[Tuple[str, str]]:
+        """
+        (account_id, how) for the best existing account, how in {"domain", "name", "fuzzy"}; None if new.
+        """
+        key = normalize_company(company_name)
+        domain = email_domain(email)
+        with self._lock:
+            slot, how = self._match(key, domain)
+            return (self._ids[slot], how) if slot is not None else None
+
+    def _match(self, key: str, domain: Optional[str], signature: np.ndarray = None):
+        if domain:
+            slots = self._by_domain.get(_key_hash(domain))
+            if slots:
+                return slots[0], "domain"
+        if not key:
+            return None, None
+        for slot in self._by_name.get(_key_hash(key)):
+            if self._compatible(slot, domain):
+                return slot, "name"
+
+        if signature is None:
+            signature = self.signature(key)
+        band_keys = self._band_keys(signature[None, :])[0]
+        candidates = np.unique(np.array(self._by_band.get_many(band_keys, self.max_bucket), dtype=np.int64))
+        if not len(candidates):
+            return None, None
+        # The estimated 3-gram Jaccard only shortlists; the edit similarity of the keys decides
+        estimate = (self._signatures[candidates] == signature).mean(axis=1)
+        shortlist = [int(candidates[i]) for i in np.argsort(-estimate, kind="stable")[:self.max_verify]
+                     if estimate[i] >= self.min_estimate]
+        scorer = _Similarity(key)
+        best, best_score = None, self.threshold
+        for slot in shortlist:
+            score = scorer.at_least(self._keys[slot], best_score)
+            if score is not None and self._compatible(slot, domain):
+                best, best_score = slot, score
+        return (best, "fuzzy") if best is not None else (None, None)
+
+    def _compatible(self, slot: int, domain: Optional[str]) -> bool:
+        # Same name, different corporate domains: different companies (apple.com vs appleplumbing.com)
+        other = self._domains[slot]
+        return not (domain and other and other != domain)
+
+    # --- Maintenance ---
+    def resolve(self, company_name: str, email: Optional[str] = None) -> AccountMatch:
+        """
+        Matches or registers an account in one step (atomic per process).
+        """
+        key = normalize_company(company_name)
+        domain = email_domain(email)
+        with self._lock:
+            signature = self.signature(key) if key else None
+            slot, how = self._match(key, domain, signature)
+            if slot is not None:
+                learned = bool(domain) and self._domains[slot] is None
+                if learned:
+                    self._domains[slot] = domain
+                    self._by_domain.add(_key_hash(domain), slot)
+                return AccountMatch(self._ids[slot], False, domain, learned)
+            account_id = self.account_id_for(key, domain)
+            self._add(account_id, key, domain, signature)
+            return AccountMatch(account_id, True, domain, False)
+
+    def add(self, account_id: str, company_name: str, domain: Optional[str] = None):
+        key = normalize_company(company_name)
+        with self._lock:
+            self._add(account_id, key, domain, self.signature(key) if key else None)
+
+    def _add(self, account_id: str, key: str, domain: Optional[str], signature: Optional[np.ndarray]):
+        slot = self._size
+        self._ensure_capacity(slot + 1)
+        self._ids.append(account_id)
+        self._keys.append(key)
+        self._domains.append(domain)
+        self._size += 1
+        if domain:
+            self._by_domain.add(_key_hash(domain), slot)
+        if key:
+            self._signatures[slot] = signature
+            self._by_name.add(_key_hash(key), slot)
+            for band_key in self._band_keys(signature[None, :])[0].tolist():
+                self._by_band.add(band_key, slot)
+
+    def _ensure_capacity(self, needed: int):
+        if needed > len(self._signatures):
+            grown = np.zeros((max(needed, len(self._signatures) * 2, 1024), self.num_perm), dtype=np.uint32)
+            grown[:self._size] = self._signatures[:self._size]
+            self._signatures = grown
+
+    def build(self, rows: Iterable[Tuple[str, str, Optional[str]]], batch_size: int = 10_000):
+        """
+        Bulk load (id, name, domain) rows, e.g. BaseLeadStore.get_account_keys() at startup.
+        Signatures are computed a batch at a time with NumPy, and each table is sorted once at the end.
+        """
+        rows = list(rows)
+        parts = {"domain": [], "name": [], "band": []}
+        with self._lock:
+            for start in range(0, len(rows), batch_size):
+                for table, entries in self._build_batch(rows[start:start + batch_size]).items():
+                    parts[table].append(entries)
+            for table, index in (("domain", self._by_domain), ("name", self._by_name), ("band", self._by_band)):
+                if parts[table]:
+                    index.add_many(np.concatenate([k for k, _ in parts[table]]),
+                                   np.concatenate([v for _, v in parts[table]]))
+        logger.info("Account index built: %d accounts, %.1f MB", self._size, self.nbytes / 1e6)
+
+    def _build_batch(self, rows: List[Tuple[str, str, Optional[str]]]) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        first = self._size
+        self._ensure_capacity(first + len(rows))
+        keys = [normalize_company(name) for _, name, _ in rows]
+        shingles = [_shingles(key) if key else np.zeros(1, dtype=np.uint64) for key in keys]
+        lengths = np.fromiter((len(s) for s in shingles), dtype=np.int64, count=len(shingles))
+        flat = np.concatenate(shingles)
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        # (num_perm, total_shingles) -> min per account via reduceat
+        hashed = (self._a * flat[None, :] + self._b) % _P
+        signatures = np.minimum.reduceat(hashed, starts, axis=1).T.astype(np.uint32)
+
+        slots = np.arange(first, first + len(rows), dtype=np.int32)
+        self._signatures[first:first + len(rows)] = signatures
+        self._ids.extend(account_id for account_id, _, _ in rows)
+        self._keys.extend(keys)
+        self._domains.extend(domain for _, _, domain in rows)
+        self._size += len(rows)
+
+        named = np.array([bool(key) for key in keys], dtype=bool)
+        with_domain = np.array([bool(domain) for _, _, domain in rows], dtype=bool)
+        return {
+            "domain": (np.array([_key_hash(d) for _, _, d in rows if d], dtype=np.uint64), slots[with_domain]),
+            "name": (np.array([_key_hash(k) for k in keys if k], dtype=np.uint64), slots[named]),
+            "band": (self._band_keys(signatures[named]).ravel(), np.repeat(slots[named], self.bands)),
+        }
+
+    @property
+    def nbytes(self) -> int:
+        return (self._signatures[:self._size].nbytes + self._by_domain.nbytes + self._by_name.nbytes
+                + self._by_band.nbytes)
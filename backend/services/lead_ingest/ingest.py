@@ -1,46 +1,98 @@
 import uuid
-from typing import Dict, Any
-from backend.storage.models import Lead
-from backend.storage.db import LeadStore
+from typing import Dict, Any, List, Optional
+from backend.storage.models import Account, Lead
+from backend.storage.base import BaseLeadStore
+from backend.services.lead_ingest.account_index import AccountIndex
+from backend.services.scoring.lead_scorer import LeadScorer
 from backend.utils.logger import setup_logger
 
 logger = setup_logger("LeadIngestionService")
 
 class LeadIngestionService:
-    def __init__(self, db: LeadStore):
+    def __init__(self, db: BaseLeadStore, accounts: AccountIndex = None, scorer: LeadScorer = None):
         self.db = db
+        # Company variants resolve to one account, so enrichment runs once per company
+        self.accounts = accounts
+        # Initial priority from the cheap features; refined once the LLM fit score is in
+        self.scorer = scorer
 
     def ingest_lead(self, raw_data: Dict[str, Any], source: str):
+        lead = self._build_lead(raw_data, source)
+        if not lead:
+            return None
+
+        # 4. Store
+        try:
+            self._resolve_accounts([lead])
+            if self.scorer:
+                self.scorer.score_lead(lead)
+            self.db.add_lead(lead)
+            self.db.log_event(lead.id, "INGEST", f"Source: {source}")
+            logger.info("Ingested lead: %s from %s (ID: %s)", lead.name, lead.company_name, lead.id,
+                        extra={"lead_id": lead.id, "campaign_id": lead.campaign_id})
+            return lead.id
+        except Exception as e:
+            logger.error("Failed to save lead: %s", e)
+            return None
+
+    def ingest_leads(self, raw_leads: List[Dict[str, Any]], source: Optional[str] = None) -> List[str]:
+        """
+        Bulk import (CSV / CRM sync): one bulk insert (COPY on Postgres) instead of a write per lead.
+        Each row keeps its own 'source'; `source` applies to rows without one.
+        Returns the ids of the leads stored; invalid rows are skipped.
+        """
+        leads = [lead for lead in (self._build_lead(raw, raw.get('source') or source) for raw in raw_leads) if lead]
+        if not leads:
+            return []
+        try:
+            self._resolve_accounts(leads)
+            if self.scorer:
+                self.scorer.score_leads(leads)
+            self.db.bulk_add_leads(leads)
+        except Exception as e:
+            logger.error("Failed to bulk save %d leads: %s", len(leads), e)
+            return []
+        logger.info("Bulk ingested %d/%d leads from %s", len(leads), len(raw_leads),
+                    ", ".join(sorted({lead.source for lead in leads})))
+        return [lead.id for lead in leads]
+
+    def _build_lead(self, raw_data: Dict[str, Any], source: str):
         # 1. Validate
         if 'name' not in raw_data or 'company' not in raw_data:
-            logger.error(f"Skipping invalid lead from {source}: {raw_data}")
+            logger.error("Skipping invalid lead from %s: %s", source, raw_data)
             return None
 
         # 2. Dedup (Check if email exists)
         # Assuming db has a method check_exists_by_email (to be added) or we just risk it for MVP
         
         # 3. Clean / Normalize
-        lead_id = str(uuid.uuid4())
-        name = raw_data['name'].strip()
-        company = raw_data['company'].strip()
-        email = raw_data.get('email', '').strip() or None
-        
-        lead = Lead(
-            id=lead_id,
+        metadata = {}
+        description = (raw_data.get('company_description') or raw_data.get('description') or '').strip()
+        if description:
+            metadata['company_description'] = description # matched against analysed companies at enrichment
+        return Lead(
+            id=str(uuid.uuid4()),
             source=source,
-            name=name,
-            company_name=company,
-            email=email,
+            name=raw_data['name'].strip(),
+            company_name=raw_data['company'].strip(),
+            email=(raw_data.get('email') or '').strip() or None,
             linkedin_url=raw_data.get('linkedin', ''),
-            status="new"
+            title=(raw_data.get('title') or '').strip() or None,
+            metadata=metadata,
+            status="new",
+            campaign_id=raw_data.get('campaign_id') or "default"
         )
-        
-        # 4. Store
-        try:
-            self.db.add_lead(lead)
-            self.db.log_event(lead_id, "INGEST", f"Source: {source}")
-            logger.info(f"Ingested lead: {name} from {company} (ID: {lead_id})")
-            return lead_id
-        except Exception as e:
-            logger.error(f"Failed to save lead: {e}")
-            return None
+
+    def _resolve_accounts(self, leads: List[Lead]):
+        if self.accounts is None:
+            return
+        new_accounts = []
+        for lead in leads:
+            match = self.accounts.resolve(lead.company_name, lead.email)
+            lead.account_id = match.account_id
+            if match.created:
+                new_accounts.append(Account(id=match.account_id, name=lead.company_name, domain=match.domain))
+            elif match.domain_learned:
+                self.db.set_account_domain(match.account_id, match.domain)
+        if new_accounts:
+            self.db.save_accounts(new_accounts)
@@ -1,34 +1,89 @@
 import os
+import time
 import datetime
-import base64
+import threading
 from typing import List, Optional
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
+from backend.storage.lead_state import LeadState
 from backend.storage.models import Reply
-from backend.storage.db import LeadStore
+from backend.storage.base import BaseLeadStore
 from backend.agents.reply_cls.classifier import ReplyClassifierAgent
+from backend.services.listener.lead_router import LeadRouter
+from backend.services.listener.mime_extract import extract_reply_text
+from backend.services.pipeline.scheduler import REPLY
 from backend.utils.logger import setup_logger
+from backend.utils.metrics import GMAIL_REQUEST_SECONDS, GMAIL_QUOTA_UNITS_TOTAL
 
 logger = setup_logger("GmailListener")
 
 SCOPES = ['https://www.googleapis.com/auth/gmail.readonly']
 
+# Gmail API quota units per call (per-user limit is 250 units/second)
+GMAIL_QUOTA_UNITS = {"getProfile": 1, "history.list": 2, "messages.list": 5, "messages.get": 5}
+
+
+class MailboxQuota:
+    """
+    Token bucket over Gmail quota units for one mailbox. acquire() blocks until the call fits,
+    so a burst of messages.get on a busy mailbox slows that mailbox down instead of earning 429s.
+    """
+    def __init__(self, mailbox: str, units_per_second: float):
+        self.mailbox = mailbox
+        self.rate = units_per_second
+        self.tokens = units_per_second
+        self.used_units = 0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, units: int):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self.tokens >= units:
+                    self.tokens -= units
+                    self.used_units += units
+                    GMAIL_QUOTA_UNITS_TOTAL.labels(self.mailbox).inc(units)
+                    return
+                wait = (units - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def exhaust(self):
+        # Called on a rate-limit response: Gmail's view of our budget is the one that counts
+        with self._lock:
+            self.tokens = 0
+            self._updated = time.monotonic()
+
+
 class GmailListener:
-    def __init__(self, db: LeadStore):
+    def __init__(self, db: BaseLeadStore, service=None, classifier: ReplyClassifierAgent = None,
+                 mailbox: str = "me", token_path: str = "token.json", router: LeadRouter = None,
+                 quota: MailboxQuota = None, scheduler=None):
         self.db = db
-        self.service = self._authenticate()
-        self.classifier = ReplyClassifierAgent(db)
+        self.mailbox = mailbox
+        self.token_path = token_path
+        # A pre-built Gmail service (or a local fake) can be injected instead of token file auth
+        self.service = service or self._authenticate()
+        self.classifier = classifier or ReplyClassifierAgent(db)
+        self.router = router or LeadRouter(db)
+        self.quota = quota
+        self.scheduler = scheduler  # FairScheduler for classification; None = classify inline
+        self.history_id: Optional[int] = None  # last Gmail historyId processed (push / incremental sync)
+        self._sync_lock = threading.Lock()  # poll() and push sync_history() share history_id
 
     def _authenticate(self):
+        # Google client libraries are heavy; only load them when the listener actually starts
+        from google.oauth2.credentials import Credentials
+        from google.auth.transport.requests import Request
+        from googleapiclient.discovery import build
+
         creds = None
-        # In a real deployment, manage token.json better (e.g. Secrets Manager or ENV)
-        if os.path.exists('token.json'):
+        # In a real deployment, manage token files better (e.g. Secrets Manager or ENV)
+        if os.path.exists(self.token_path):
             try:
-                creds = Credentials.from_authorized_user_file('token.json', SCOPES)
+                creds = Credentials.from_authorized_user_file(self.token_path, SCOPES)
             except Exception:
-                logger.warning("Invalid token.json")
+                logger.warning("Invalid token file %s", self.token_path)
         
         # If no valid credentials available, we cannot run real Gmail pull
         if not creds or not creds.valid:
@@ -41,46 +96,114 @@ class GmailListener:
             else:
                 # We can't do interactive login in headless easily without a local browser
                 # For this demo, if no token, we return None and log warning
-                logger.warning("No valid Gmail credentials (token.json). Listener in MOCK mode.")
+                logger.warning("No valid Gmail credentials (%s). Listener in MOCK mode.", self.token_path)
                 return None
 
         try:
             return build('gmail', 'v1', credentials=creds)
         except Exception as e:
-            logger.error(f"Gmail Build Error: {e}")
+            logger.error("Gmail Build Error: %s", e)
             return None
 
+    def _execute(self, op: str, request):
+        if self.quota:
+            self.quota.acquire(GMAIL_QUOTA_UNITS.get(op, 5))
+        with GMAIL_REQUEST_SECONDS.labels(op).time():
+            return request.execute()
+
     def check_for_replies(self):
         if not self.service:
             # Simulate check
             logger.info("Gmail Service not active. Skipping check.")
             return
-
-        logger.info("Polling Gmail for replies (last 24h)...")
-        
-        # Calculate date query
-        # yesterday = (datetime.datetime.now() - datetime.timedelta(days=1)).strftime("%Y/%m/%d")
-        # q = f"after:{yesterday}" 
-        # Actually standard query: "newer_than:1d"
-        
         try:
-            # Get list of messages
-            results = self.service.users().messages().list(userId='me', q='newer_than:1d').execute()
-            messages = results.get('messages', [])
-            
-            if not messages:
-                logger.info("No new messages found.")
-                return
+            self._scan_recent()
+        except Exception as e:
+            logger.error("Gmail polling error: %s", e)
 
-            for msg in messages:
-                self._process_message(msg['id'], msg['threadId'])
-                
+    def poll(self) -> int:
+        """
+        One listener cycle for the mailbox service. The first call scans the last day and takes
+        a historyId baseline; later calls only fetch what history.list reports as added.
+        Errors propagate so the caller can back off. Returns messages processed.
+        """
+        if not self.service:
+            return 0
+        with self._sync_lock:
+            return self._poll()
+
+    def _poll(self) -> int:
+        if self.history_id is None:
+            # Baseline first, so nothing that arrives during the scan is skipped
+            profile = self._execute("getProfile", self.service.users().getProfile(userId='me'))
+            processed = self._scan_recent()
+            self.history_id = int(profile['historyId'])
+            return processed
+        return self._sync_from(self.history_id)
+
+    def _scan_recent(self) -> int:
+        logger.info("Polling Gmail mailbox %s for replies (last 24h)...", self.mailbox)
+        results = self._execute("messages.list", self.service.users().messages().list(userId='me', q='newer_than:1d'))
+        messages = results.get('messages', [])
+
+        if not messages:
+            logger.info("No new messages found.")
+            return 0
+
+        for msg in messages:
+            self._process_message(msg['id'], msg['threadId'])
+        return len(messages)
+
+    def sync_history(self, notified_history_id: int):
+        """
+        Push path: processes only messages added since the last synced historyId.
+        The first notification has no baseline, so it runs one regular poll instead.
+        """
+        if not self.service:
+            logger.info("Gmail Service not active. Skipping history sync.")
+            return
+        with self._sync_lock:
+            self._sync_history(notified_history_id)
+
+    def _sync_history(self, notified_history_id: int):
+        if self.history_id is None:
+            self.check_for_replies()
+            self.history_id = notified_history_id
+            return
+        if notified_history_id <= self.history_id:
+            return
+        try:
+            self._sync_from(self.history_id, notified_history_id)
         except Exception as e:
-            logger.error(f"Gmail polling error: {e}")
+            logger.error("Gmail history sync error: %s", e)
+
+    def _sync_from(self, start_history_id: int, latest: int = 0) -> int:
+        added = {}
+        page_token = None
+        while True:
+            response = self._execute("history.list", self.service.users().history().list(
+                userId='me', startHistoryId=start_history_id,
+                historyTypes=['messageAdded'], pageToken=page_token
+            ))
+            for record in response.get('history', []):
+                for item in record.get('messagesAdded', []):
+                    message = item['message']
+                    added[message['id']] = message['threadId']
+            latest = max(latest, int(response.get('historyId', 0)))
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                break
+
+        if added:
+            logger.info("History sync %s %s -> %s: %d new messages", self.mailbox, start_history_id, latest, len(added))
+        for msg_id, thread_id in added.items():
+            self._process_message(msg_id, thread_id)
+        self.history_id = max(latest, start_history_id)
+        return len(added)
 
     def _process_message(self, msg_id, thread_id):
         try:
-            msg_detail = self.service.users().messages().get(userId='me', id=msg_id).execute()
+            msg_detail = self._execute("messages.get", self.service.users().messages().get(userId='me', id=msg_id))
             payload = msg_detail.get('payload', {})
             headers = payload.get('headers', [])
             
@@ -90,36 +213,19 @@ class GmailListener:
             in_reply_to = next((h['value'] for h in headers if h['name'] == 'In-Reply-To'), None)
             references = next((h['value'] for h in headers if h['name'] == 'References'), None)
             
-            # Extract Body (Simplified)
-            body = "Could not parse body"
-            if 'parts' in payload:
-                for part in payload['parts']:
-                    if part['mimeType'] == 'text/plain':
-                        data = part['body'].get('data')
-                        if data:
-                            body = base64.urlsafe_b64decode(data).decode()
-                            break
-            elif 'body' in payload:
-                data = payload['body'].get('data')
-                if data:
-                    body = base64.urlsafe_b64decode(data).decode()
-
             # MATCHING LOGIC
-            # 1. Check if we have a Lead with this thread_id
-            lead = self._find_lead_by_thread(thread_id)
-            
-            # 2. Or match by In-Reply-To (provider message id)
-            if not lead and in_reply_to:
-                 # In-Reply-To usually contains limits like <abc@xyz>. Our DB might have just raw ID.
-                 # This requires loose matching or exact storage. 
-                 pass 
+            # Shared router: thread_id first, then the sender address
+            lead = self.router.resolve(thread_id, from_header)
             
             if lead:
                 # Check status to avoid re-processing 
-                if "replied" in lead.status or "stopped" in lead.status:
+                if lead.state in (LeadState.REPLIED, LeadState.STOPPED):
                      return
 
-                logger.info(f"New reply from Lead {lead.id} ({from_header})")
+                # Only the new text goes to the classifier: nested parts walked, quotes and signature stripped
+                body = extract_reply_text(payload) or "Could not parse body"
+
+                logger.info("New reply from Lead %s (%s)", lead.id, from_header)
                 
                 # Create Reply Object
                 reply = Reply(
@@ -129,21 +235,18 @@ class GmailListener:
                     classification="unknown"
                 )
                 
-                # Classify & Update
-                self.classifier.classify_reply(reply)
+                # Classify & Update (ahead of any queued bulk work when a scheduler is shared)
+                if self.scheduler is not None:
+                    self.scheduler.run(lead.campaign_id, REPLY, self.classifier.classify_reply, reply)
+                else:
+                    self.classifier.classify_reply(reply)
                 self.db.log_event(lead.id, "REPLY_RECEIVED", f"From: {from_header}")
                 
         except Exception as e:
-            logger.error(f"Error processing message {msg_id}: {e}")
+            logger.error("Error processing message %s: %s", msg_id, e)
 
     def _find_lead_by_thread(self, thread_id: str):
-        # Inefficient to query all, but for MVP it works. 
-        # Better: db.get_lead_by_thread_id(thread_id)
-        # We need to add that query to DB logic or loop all (bad).
-        # Let's add a specialized query to DB.
-        
-        # For now, let's assume we implement `get_lead_by_thread_id` in DB
-        return self.db.get_lead_by_thread_id(thread_id)
+        return self.router.resolve(thread_id)
 
     def simulate_incoming_reply(self, lead_id: str, content: str):
          # Keep this for demo script compatibility
@@ -0,0 +1,108 @@
+import base64
+import hmac
+import json
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+from backend.core.config import config
+from backend.services.listener.mailbox_listener import MailboxListenerService
+from backend.utils.logger import setup_logger
+from backend.utils.metrics import WEBHOOK_EVENTS_TOTAL
+
+logger = setup_logger("GmailPush")
+
+
+class GmailPushHandler:
+    """
+    Gmail watch() notifications delivered by Pub/Sub push.
+    A notification only carries (emailAddress, historyId). Bursts are coalesced per mailbox:
+    while a mailbox's history sync is running, newer notifications just raise its target
+    historyId and the running sync picks them up, so N pushes cost one history.list pass, not N polls.
+    """
+    def __init__(self, mailboxes: MailboxListenerService):
+        self.mailboxes = mailboxes
+        self._lock = threading.Lock()
+        self._targets: Dict[str, int] = {}
+        self._syncing: Set[str] = set()
+
+    def verify(self, authorization: Optional[str], token: Optional[str]) -> bool:
+        if config.GMAIL_PUSH_AUDIENCE:
+            return self._verify_oidc(authorization)
+        if config.GMAIL_PUSH_TOKEN:
+            return hmac.compare_digest((token or "").encode(), config.GMAIL_PUSH_TOKEN.encode())
+        if not config.WEBHOOK_ALLOW_UNVERIFIED:
+            logger.warning("Neither GMAIL_PUSH_AUDIENCE nor GMAIL_PUSH_TOKEN set; rejecting push.")
+        return config.WEBHOOK_ALLOW_UNVERIFIED
+
+    def _verify_oidc(self, authorization: Optional[str]) -> bool:
+        # Pub/Sub authenticated push: Google-signed OIDC token in the Authorization header
+        if not authorization or not authorization.startswith("Bearer "):
+            return False
+        try:
+            from google.oauth2 import id_token
+            from google.auth.transport.requests import Request
+            claims = id_token.verify_oauth2_token(authorization[len("Bearer "):], Request(), audience=config.GMAIL_PUSH_AUDIENCE)
+        except Exception as e:
+            logger.warning("Gmail push token rejected: %s", e)
+            return False
+        if config.GMAIL_PUSH_SERVICE_ACCOUNT and claims.get("email") != config.GMAIL_PUSH_SERVICE_ACCOUNT:
+            logger.warning("Gmail push token from unexpected account %s", claims.get("email"))
+            return False
+        return True
+
+    def parse(self, payload: Any) -> List[Tuple[str, int]]:
+        """
+        Accepts one Pub/Sub push envelope or a list of them; returns (emailAddress, historyId) pairs.
+        """
+        envelopes = payload if isinstance(payload, list) else [payload]
+        notifications = []
+        for envelope in envelopes:
+            try:
+                data = json.loads(base64.b64decode(envelope["message"]["data"]))
+                notifications.append((data["emailAddress"], int(data["historyId"])))
+                WEBHOOK_EVENTS_TOTAL.labels("gmail", "notification").inc()
+            except (KeyError, TypeError, ValueError) as e:
+                WEBHOOK_EVENTS_TOTAL.labels("gmail", "invalid").inc()
+                logger.warning("Skipping malformed Gmail push envelope: %s", e)
+        return notifications
+
+    def notify(self, notifications: List[Tuple[str, int]]) -> List[str]:
+        """
+        Records the newest historyId per mailbox. Returns the mailboxes the caller should
+        schedule sync() for; mailboxes with a sync already running will catch up on their own.
+        """
+        latest: Dict[str, int] = {}
+        for address, history_id in notifications:
+            if self.mailboxes.listener_for(address) is None:
+                # Not one of ours, or owned by another listener shard
+                WEBHOOK_EVENTS_TOTAL.labels("gmail", "unrouted").inc()
+                continue
+            latest[address] = max(history_id, latest.get(address, 0))
+
+        to_sync = []
+        with self._lock:
+            for address, history_id in latest.items():
+                self._targets[address] = max(history_id, self._targets.get(address, 0))
+                if address in self._syncing:
+                    WEBHOOK_EVENTS_TOTAL.labels("gmail", "coalesced").inc()
+                    continue
+                self._syncing.add(address)
+                to_sync.append(address)
+        return to_sync
+
+    def sync(self, address: str):
+        listener = self.mailboxes.listener_for(address)
+        target = None
+        while True:
+            with self._lock:
+                # Clear the flag under the same lock as the final check, so no notification is missed
+                if self._targets.get(address) == target:
+                    self._syncing.discard(address)
+                    return
+                target = self._targets[address]
+            try:
+                listener.sync_history(target)
+            except Exception as e:
+                logger.error("Gmail push sync for %s failed: %s", address, e)
+                with self._lock:
+                    self._syncing.discard(address)
+                return
@@ -0,0 +1,54 @@
+import threading
+from collections import OrderedDict
+from email.utils import parseaddr
+from typing import Optional
+from backend.storage.base import BaseLeadStore
+from backend.storage.models import Lead
+from backend.utils.metrics import CACHE_REQUESTS_TOTAL
+
+
+class LeadRouter:
+    """
+    Maps inbound mail to a lead. One instance is shared by every mailbox listener in the
+    process, so all mailboxes resolve through the same indexed lookups (thread_id, then the
+    sender address) and the same thread -> lead cache.
+    """
+    def __init__(self, db: BaseLeadStore, cache_size: int = 10_000):
+        self.db = db
+        self.cache_size = cache_size
+        self._threads: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resolve(self, thread_id: str, from_header: str = "") -> Optional[Lead]:
+        lead_id = self._cached(thread_id)
+        if lead_id:
+            CACHE_REQUESTS_TOTAL.labels("lead_router", "hit").inc()
+            lead = self.db.get_lead(lead_id)
+            if lead:
+                return lead
+        CACHE_REQUESTS_TOTAL.labels("lead_router", "miss").inc()
+
+        lead = self.db.get_lead_by_thread_id(thread_id) if thread_id else None
+        if not lead:
+            # Replies from other mailboxes (or clients that break threading) still carry the sender
+            address = parseaddr(from_header or "")[1]
+            lead = self.db.get_lead_by_email(address) if address else None
+        if lead and thread_id:
+            self._remember(thread_id, lead.id)
+        return lead
+
+    def _cached(self, thread_id: str) -> Optional[str]:
+        if not thread_id:
+            return None
+        with self._lock:
+            lead_id = self._threads.get(thread_id)
+            if lead_id:
+                self._threads.move_to_end(thread_id)
+            return lead_id
+
+    def _remember(self, thread_id: str, lead_id: str):
+        with self._lock:
+            self._threads[thread_id] = lead_id
+            self._threads.move_to_end(thread_id)
+            while len(self._threads) > self.cache_size:
+                self._threads.popitem(last=False)
@@ -0,0 +1,200 @@
+import glob
+import os
+import random
+import threading
+import time
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional
+from backend.agents.reply_cls.classifier import ReplyClassifierAgent
+from backend.core.config import config
+from backend.services.listener.gmail_listener import GmailListener, MailboxQuota
+from backend.services.listener.lead_router import LeadRouter
+from backend.storage.base import BaseLeadStore
+from backend.utils.logger import setup_logger, log_context
+from backend.utils.metrics import GMAIL_POLLS_TOTAL, RETRIES_TOTAL
+
+logger = setup_logger("MailboxListener")
+
+
+def shard_for(mailbox: str, shard_count: int) -> int:
+    # Stable across processes and restarts (unlike hash())
+    return zlib.crc32(mailbox.lower().encode()) % max(shard_count, 1)
+
+
+def is_rate_limited(error: Exception) -> bool:
+    status = getattr(getattr(error, "resp", None), "status", None)
+    return status == 429 or (status == 403 and "rateLimitExceeded" in str(error))
+
+
+class MailboxState:
+    def __init__(self, listener: GmailListener):
+        self.listener = listener
+        self.failures = 0
+        self.next_poll_at = 0.0
+        self.last_success_at: Optional[float] = None
+
+
+class MailboxListenerService:
+    """
+    Watches every sending mailbox owned by this shard. Each mailbox is polled on its own
+    schedule from a shared worker pool, with its own quota bucket and error backoff, so
+    one slow or throttled mailbox never stalls the others. All mailboxes route replies
+    through one LeadRouter.
+    """
+    def __init__(self, db: BaseLeadStore, listeners: Dict[str, GmailListener] = None, classifier: ReplyClassifierAgent = None,
+                 shard_index: int = None, shard_count: int = None, workers: int = None, scheduler=None):
+        self.db = db
+        self.classifier = classifier or ReplyClassifierAgent(db)
+        # FairScheduler: classification runs as top-priority work on the shared LLM workers
+        self.scheduler = scheduler
+        self.router = LeadRouter(db)
+        self.shard_index = config.GMAIL_SHARD_INDEX if shard_index is None else shard_index
+        self.shard_count = config.GMAIL_SHARD_COUNT if shard_count is None else shard_count
+        self.poll_seconds = config.GMAIL_POLL_SECONDS
+        self.max_backoff = config.GMAIL_MAX_BACKOFF_SECONDS
+        self.workers = workers or config.GMAIL_LISTENER_WORKERS
+
+        if listeners is None:
+            listeners = {
+                mailbox: self._build_listener(mailbox, token_path)
+                for mailbox, token_path in self.discover_mailboxes().items() if self.owns(mailbox)
+            }
+        self.mailboxes: Dict[str, MailboxState] = {mailbox: MailboxState(l) for mailbox, l in listeners.items()}
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="gmail")
+        self._stop = threading.Event()
+        self._thread = None
+        logger.info("Mailbox listener shard %s/%s owns %d mailboxes",
+                    self.shard_index, self.shard_count, len(self.mailboxes))
+
+    @staticmethod
+    def discover_mailboxes() -> Dict[str, str]:
+        """
+        mailbox address -> token file. GMAIL_TOKEN_DIR holds one <address>.json per mailbox;
+        without it the single legacy token.json is used.
+        """
+        if not config.GMAIL_TOKEN_DIR:
+            return {"me": "token.json"}
+        paths = sorted(glob.glob(os.path.join(config.GMAIL_TOKEN_DIR, "*.json")))
+        return {os.path.splitext(os.path.basename(path))[0]: path for path in paths}
+
+    def owns(self, mailbox: str) -> bool:
+        return shard_for(mailbox, self.shard_count) == self.shard_index
+
+    def _build_listener(self, mailbox: str, token_path: str) -> GmailListener:
+        return GmailListener(
+            self.db, classifier=self.classifier, mailbox=mailbox, token_path=token_path, router=self.router,
+            quota=MailboxQuota(mailbox, config.GMAIL_QUOTA_UNITS_PER_SECOND), scheduler=self.scheduler
+        )
+
+    def add_mailbox(self, mailbox: str, listener: GmailListener):
+        listener.router = self.router
+        if listener.scheduler is None:
+            listener.scheduler = self.scheduler
+        if listener.quota is None:
+            listener.quota = MailboxQuota(mailbox, config.GMAIL_QUOTA_UNITS_PER_SECOND)
+        self.mailboxes[mailbox] = MailboxState(listener)
+
+    def listener_for(self, mailbox: str) -> Optional[GmailListener]:
+        state = self.mailboxes.get(mailbox)
+        if state is None and len(self.mailboxes) == 1 and "me" in self.mailboxes:
+            # Single legacy token.json: every notification is for that mailbox
+            state = self.mailboxes["me"]
+        return state.listener if state else None
+
+    def poll_mailbox(self, mailbox: str) -> int:
+        state = self.mailboxes[mailbox]
+        with log_context(mailbox=mailbox):
+            try:
+                processed = state.listener.poll()
+            except Exception as e:
+                state.failures += 1
+                delay = min(self.max_backoff, self.poll_seconds * 2 ** state.failures)
+                outcome = "error"
+                if is_rate_limited(e):
+                    outcome = "rate_limited"
+                    if state.listener.quota:
+                        state.listener.quota.exhaust()
+                # Jitter keeps mailboxes that failed together from retrying together
+                state.next_poll_at = time.monotonic() + delay * random.uniform(0.5, 1.0)
+                GMAIL_POLLS_TOTAL.labels(mailbox, outcome).inc()
+                RETRIES_TOTAL.labels("gmail_poll").inc()
+                logger.warning("Mailbox %s poll failed (%s, attempt %d); retrying in ~%.0fs",
+                               mailbox, e, state.failures, delay)
+                return 0
+            state.failures = 0
+            state.last_success_at = time.time()
+            state.next_poll_at = time.monotonic() + self.poll_seconds
+            GMAIL_POLLS_TOTAL.labels(mailbox, "ok").inc()
+            return processed
+
+    def run_once(self) -> int:
+        """
+        Polls every owned mailbox once, concurrently. Returns messages processed.
+        """
+        return sum(self._executor.map(self.poll_mailbox, list(self.mailboxes)))
+
+    # --- Background loop ---
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run_forever, name="mailbox-listener", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_seconds)
+            self._thread = None
+        self._executor.shutdown(wait=True)
+
+    def run_forever(self):
+        logger.info("Mailbox listener started (%d mailboxes, %d workers, poll=%ss)",
+                    len(self.mailboxes), self.workers, self.poll_seconds)
+        in_flight = {}
+        while not self._stop.is_set():
+            now = time.monotonic()
+            busy = set(in_flight.values())
+            for mailbox, state in self.mailboxes.items():
+                if mailbox not in busy and state.next_poll_at <= now:
+                    in_flight[self._executor.submit(self.poll_mailbox, mailbox)] = mailbox
+
+            busy = set(in_flight.values())
+            due = [s.next_poll_at for m, s in self.mailboxes.items() if m not in busy]
+            timeout = max(0.0, min(due) - time.monotonic()) if due else self.poll_seconds
+            if in_flight:
+                done, _ = wait(list(in_flight), timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    in_flight.pop(future)
+            else:
+                self._stop.wait(timeout)
+
+    def status(self) -> List[dict]:
+        now = time.monotonic()
+        return [{
+            "mailbox": mailbox,
+            "failures": state.failures,
+            "next_poll_in": round(max(0.0, state.next_poll_at - now), 1),
+            "quota_units_used": state.listener.quota.used_units if state.listener.quota else None,
+        } for mailbox, state in self.mailboxes.items()]
+
+
+if __name__ == "__main__":
+    # Standalone listener process: python -m backend.services.listener.mailbox_listener [--once]
+    # Shard with GMAIL_SHARD_INDEX / GMAIL_SHARD_COUNT, one process per shard.
+    import argparse
+    from backend.core.container import get_container
+
+    parser = argparse.ArgumentParser(description="Poll sending mailboxes for replies")
+    parser.add_argument("--once", action="store_true", help="poll every mailbox once and exit")
+    args = parser.parse_args()
+
+    service = get_container().mailbox_listener
+    if args.once:
+        print(f"Processed {service.run_once()} messages across {len(service.mailboxes)} mailboxes")
+    else:
+        try:
+            service.run_forever()
+        except KeyboardInterrupt:
+            pass
+    service.stop()
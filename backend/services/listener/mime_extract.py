@@ -0,0 +1,163 @@
+import base64
+import codecs
+import html
+import re
+from typing import Dict, Iterator, List, Optional, Tuple
+from backend.core.config import config
+
+# --- Precompiled patterns (module level: compiled once per process) ---
+
+_CHARSET_RE = re.compile(r'charset\s*=\s*"?([\w.:-]+)"?', re.I)
+
+# HTML -> text
+_HTML_DROP_RE = re.compile(
+    r'<(script|style|head)\b.*?</\1\s*>'
+    r'|<blockquote\b.*?</blockquote\s*>'  # quoted history in most HTML clients
+    r'|<div\b[^>]*class="[^"]*(?:gmail_quote|OutlookMessageHeader|moz-cite-prefix)[^"]*".*',  # quote wrapper to the end
+    re.I | re.S)
+_HTML_BREAK_RE = re.compile(r'<br\s*/?>|</(?:p|div|li|tr|h\d)\s*>', re.I)
+_HTML_TAG_RE = re.compile(r'<[^>]+>')
+_BLANK_LINES_RE = re.compile(r'\n\s*\n\s*\n+')
+_SPACES_RE = re.compile(r'[ \t\xa0]+')
+
+# Start of the quoted original: everything from here on is dropped
+_QUOTE_HEADER_RE = re.compile(
+    r'^[ \t]*(?:'
+    r'On\b[^\n]{0,200}(?:\n[^\n]{0,200})?\bwrote:'  # Gmail / Apple Mail (often wrapped over two lines)
+    r'|-{2,}\s*(?:Original Message|Forwarded message|Ursprüngliche Nachricht|Message d\'origine)\s*-{2,}'  # Outlook
+    r'|_{20,}'  # Outlook web separator
+    r'|(?:From|Von|De):[^\n]*\n(?:[^\n]*\n){0,2}?[ \t]*(?:Sent|Date|Gesendet|Envoyé):'  # Outlook header block
+    r'|Le\b[^\n]{0,200}a écrit\s?:'  # French
+    r'|Am\b[^\n]{0,200}schrieb[^\n]{0,100}:'  # German
+    r'|El\b[^\n]{0,200}escribió:'  # Spanish
+    r')', re.M | re.I)
+# Inline quoted lines ("> ...") are removed wherever they appear
+_QUOTED_LINE_RE = re.compile(r'^[ \t]*>[^\n]*(?:\n|$)', re.M)
+# Start of a signature / client footer
+_SIGNATURE_RE = re.compile(
+    r'^(?:-- ?|—|Sent from my [^\n]+|Sent from Mail for Windows[^\n]*|Get Outlook for [^\n]+|Sent via [^\n]+)[ \t]*$',
+    re.M)
+
+
+def _header(headers: List[Dict[str, str]], name: str) -> str:
+    name = name.lower()
+    return next((h.get('value', '') for h in headers or () if h.get('name', '').lower() == name), '')
+
+
+def _charset(part: dict) -> str:
+    match = _CHARSET_RE.search(_header(part.get('headers'), 'Content-Type'))
+    return match.group(1) if match else 'utf-8'
+
+
+def _is_attachment(part: dict) -> bool:
+    return bool(part.get('filename')) or _header(part.get('headers'), 'Content-Disposition').lower().startswith('attachment')
+
+
+def iter_text_parts(payload: dict) -> Iterator[Tuple[str, dict]]:
+    """
+    Depth-first walk of a Gmail API payload (format=full), yielding (mimeType, part) for
+    inline text/plain and text/html leaves. Nested multipart/* and message/rfc822 are
+    followed; attachments are skipped. Iterative, so deep nesting cannot hit the recursion limit.
+    """
+    stack = [payload]
+    while stack:
+        part = stack.pop()
+        mime_type = (part.get('mimeType') or '').lower()
+        children = part.get('parts')
+        if children:
+            stack.extend(reversed(children))
+        elif mime_type in ('text/plain', 'text/html') and not _is_attachment(part):
+            yield mime_type, part
+
+
+def iter_decoded(part: dict, chunk_chars: int = 4096) -> Iterator[str]:
+    """
+    Streams a base64url body as text in the part's declared charset, one chunk at a time,
+    so callers can stop as soon as they have what they need (e.g. the quote header).
+    """
+    data = (part.get('body') or {}).get('data')
+    if not data:
+        return
+    try:
+        codec = codecs.lookup(_charset(part))
+    except LookupError:
+        # Unknown charset label; latin-1 never fails and keeps ASCII intact
+        codec = codecs.lookup('latin-1')
+    if len(data) <= chunk_chars:
+        # Most replies fit one chunk: skip the incremental machinery
+        yield base64.urlsafe_b64decode(data + '=' * (-len(data) % 4)).decode(codec.name, errors='replace')
+        return
+    decoder = codec.incrementaldecoder(errors='replace')
+    for i in range(0, len(data), chunk_chars):
+        chunk = data[i:i + chunk_chars]
+        yield decoder.decode(base64.urlsafe_b64decode(chunk + '=' * (-len(chunk) % 4)))
+    yield decoder.decode(b'', final=True)
+
+
+def decode_part(part: dict, max_chars: int = None) -> str:
+    """
+    Whole body as text, or roughly the first max_chars of it (the rest is never decoded).
+    """
+    text = ''
+    for chunk in iter_decoded(part):
+        text += chunk
+        if max_chars and len(text) >= max_chars:
+            break
+    return text
+
+
+def _read_reply(part: dict, max_chars: int) -> str:
+    # Decode only up to the quoted original: in a long thread the new text is a small prefix
+    text = ''
+    for chunk in iter_decoded(part):
+        scan_from = max(0, len(text) - 512)  # a quote header may straddle two chunks
+        text += chunk
+        if _QUOTE_HEADER_RE.search(text, scan_from) or len(text) >= max_chars:
+            break
+    return text
+
+
+def html_to_text(markup: str) -> str:
+    markup = _HTML_DROP_RE.sub('', markup)
+    markup = _HTML_BREAK_RE.sub('\n', markup)
+    text = html.unescape(_HTML_TAG_RE.sub('', markup))
+    return _BLANK_LINES_RE.sub('\n\n', _SPACES_RE.sub(' ', text))
+
+
+def strip_quoted(text: str) -> str:
+    """
+    Drops the quoted original, "> " lines and the signature, keeping only what the sender wrote.
+    If nothing is left (a bare forward, say), the unstripped text is returned instead.
+    """
+    text = text.replace('\r\n', '\n')
+    reply = text
+    match = _QUOTE_HEADER_RE.search(reply)
+    if match:
+        reply = reply[:match.start()]
+    reply = _QUOTED_LINE_RE.sub('', reply)
+    match = _SIGNATURE_RE.search(reply)
+    if match:
+        reply = reply[:match.start()]
+    reply = reply.strip()
+    return reply or text.strip()
+
+
+def extract_reply_text(payload: dict, max_chars: int = None) -> Optional[str]:
+    """
+    The new text of an inbound reply: first inline text/plain part (text/html converted if
+    that is all there is), quoted history and signature removed, capped at max_chars.
+    """
+    max_chars = max_chars or config.REPLY_MAX_CHARS
+    # Over-read before stripping: quotes, markup and signature are cut after decoding
+    read_chars = max_chars * 4
+    html_part = None
+    for mime_type, part in iter_text_parts(payload):
+        if mime_type == 'text/plain':
+            text = _read_reply(part, read_chars)
+            if text.strip():
+                return strip_quoted(text)[:max_chars]
+        elif html_part is None:
+            html_part = part
+    if html_part is not None:
+        return strip_quoted(html_to_text(decode_part(html_part, read_chars * 2)))[:max_chars]
+    return None
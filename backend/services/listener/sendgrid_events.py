@@ -0,0 +1,75 @@
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+from backend.core.config import config
+from backend.storage.base import BaseLeadStore
+from backend.storage.models import DeliveryEvent
+from backend.utils.logger import setup_logger
+from backend.utils.metrics import WEBHOOK_EVENTS_TOTAL
+
+logger = setup_logger("SendGridEvents")
+
+SIGNATURE_HEADER = "X-Twilio-Email-Event-Webhook-Signature"
+TIMESTAMP_HEADER = "X-Twilio-Email-Event-Webhook-Timestamp"
+
+
+class SendGridEventProcessor:
+    """
+    SendGrid Event Webhook: verifies the signed batch and applies it to lead state and metrics
+    in one store transaction. Bounces, spam reports and unsubscribes stop the lead immediately
+    instead of waiting for the Gmail poll + LLM classification of the bounce email.
+    """
+    def __init__(self, db: BaseLeadStore, public_key: str = None):
+        self.db = db
+        self.public_key = config.SENDGRID_WEBHOOK_PUBLIC_KEY if public_key is None else public_key
+        self._verifier = None
+
+    def verify(self, payload: bytes, signature: str, timestamp: str) -> bool:
+        if not self.public_key:
+            if not config.WEBHOOK_ALLOW_UNVERIFIED:
+                logger.warning("SENDGRID_WEBHOOK_PUBLIC_KEY not set; rejecting unsigned event batch.")
+            return config.WEBHOOK_ALLOW_UNVERIFIED
+        if not signature or not timestamp:
+            return False
+        try:
+            if abs(time.time() - int(timestamp)) > config.WEBHOOK_MAX_AGE_SECONDS:
+                logger.warning("Rejecting SendGrid batch with stale timestamp %s", timestamp)
+                return False
+            if self._verifier is None:
+                from sendgrid.helpers.eventwebhook import EventWebhook
+                self._verifier = EventWebhook(self.public_key)
+            return self._verifier.verify_signature(payload.decode("utf-8"), signature, timestamp)
+        except Exception as e:
+            logger.warning("SendGrid signature check failed: %s", e)
+            return False
+
+    def parse(self, raw_events: List[Dict[str, Any]]) -> List[DeliveryEvent]:
+        events = []
+        for raw in raw_events:
+            if not isinstance(raw, dict) or not raw.get("event"):
+                WEBHOOK_EVENTS_TOTAL.labels("sendgrid", "invalid").inc()
+                continue
+            # sg_message_id is "<X-Message-Id>.<filter suffix>"; we store the X-Message-Id
+            message_id = (raw.get("sg_message_id") or "").split(".", 1)[0] or None
+            timestamp = raw.get("timestamp")
+            events.append(DeliveryEvent(
+                event_id=raw.get("sg_event_id") or f"{message_id}:{raw['event']}:{timestamp}",
+                event_type=raw["event"],
+                email=raw.get("email"),
+                message_id=message_id,
+                outbox_key=raw.get("idempotency_key"),
+                reason=raw.get("reason") or raw.get("response"),
+                timestamp=datetime.fromtimestamp(timestamp) if isinstance(timestamp, (int, float)) else datetime.now()
+            ))
+        return events
+
+    def apply(self, raw_events: List[Dict[str, Any]]) -> Dict[str, int]:
+        events = self.parse(raw_events)
+        if not events:
+            return {"applied": 0, "duplicate": 0, "unmatched": 0}
+
+        counts = self.db.apply_delivery_events(events)
+        for event in events:
+            WEBHOOK_EVENTS_TOTAL.labels("sendgrid", event.event_type).inc()
+        logger.info("Applied SendGrid batch of %d events: %s", len(events), counts)
+        return counts
@@ -1,5 +1,4 @@
 import os
-import requests
 from backend.storage.models import Reply
 from backend.utils.logger import setup_logger
 
@@ -11,15 +10,16 @@ class NotifierService:
 
     def notify_slack(self, message: str):
         if not self.slack_webhook_url:
-            logger.info(f"[SLACK MOCK]: {message}")
+            logger.info("[SLACK MOCK]: %s", message)
             return
 
         try:
+            import requests
             payload = {"text": message}
             requests.post(self.slack_webhook_url, json=payload, timeout=5)
             logger.info("Sent notification to Slack.")
         except Exception as e:
-            logger.error(f"Failed to send Slack notification: {e}")
+            logger.error("Failed to send Slack notification: %s", e)
 
     def handle_new_reply(self, reply: Reply):
         if reply.classification == "interested":
@@ -0,0 +1,298 @@
+import argparse
+import json
+import multiprocessing
+import signal
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from backend.core.config import config
+from backend.storage.base import open_lead_store
+from backend.storage.lead_events import project
+from backend.storage.lead_state import LeadState
+from backend.storage.models import Lead
+from backend.utils.logger import setup_logger
+
+logger = setup_logger("BatchRunner")
+
+# Per-chunk outcome counters, summed over the whole run
+OUTCOMES = ("updated", "unchanged", "skipped", "conflicts", "failed")
+
+
+# --- Jobs (built and run inside the worker processes) ---
+class BatchJob:
+    """
+    Work applied to every lead of a chunk inside a worker process. `container` is that process's
+    own AppContainer: its own store connection, LLM client and campaign cache.
+
+    The default chunk loop reads the chunk with one query, calls apply() on each lead (False =
+    not eligible, skipped) and writes every changed lead in one transaction with version checks
+    (update_leads), so a lead edited while the job ran is counted as a conflict, not overwritten.
+    """
+    def __init__(self, container):
+        self.container = container
+        self.db = container.db
+
+    def apply(self, lead: Lead) -> Optional[bool]:
+        raise NotImplementedError
+
+    def run_chunk(self, lead_ids: Sequence[str]) -> Dict[str, int]:
+        counts = dict.fromkeys(OUTCOMES, 0)
+        changed = []
+        for lead in self.db.get_leads(lead_ids):
+            try:
+                if self.apply(lead) is False:
+                    counts["skipped"] += 1
+                elif lead.changes():
+                    changed.append(lead)
+                else:
+                    counts["unchanged"] += 1
+            except Exception as e:
+                logger.error("Batch %s failed on lead %s: %s", type(self).__name__, lead.id, e)
+                counts["failed"] += 1
+        if changed:
+            counts["conflicts"] = len(self.db.update_leads(changed))
+            counts["updated"] = len(changed) - counts["conflicts"]
+        return counts
+
+
+class RescoreJob(BatchJob):
+    """
+    Recomputes review-queue priorities. Like LeadScorer.rescore_all, only priorities that moved
+    are written (update_priorities), without bumping lead versions.
+    """
+    def __init__(self, container):
+        super().__init__(container)
+        self.scorer = container.lead_scorer
+        # Reply rates once per worker; they drift over hours, not during one run
+        self.scorer.refresh_rates()
+
+    def run_chunk(self, lead_ids: Sequence[str], tolerance: float = 0.01) -> Dict[str, int]:
+        leads = self.db.get_leads(lead_ids)
+        current = [lead.priority for lead in leads]
+        priorities = self.scorer.score_leads(leads)
+        moved = [(lead.id, priority) for lead, priority, before in zip(leads, priorities, current)
+                 if before is None or abs(priority - before) >= tolerance]
+        if moved:
+            self.db.update_priorities(moved)
+        counts = dict.fromkeys(OUTCOMES, 0)
+        counts["updated"], counts["unchanged"] = len(moved), len(leads) - len(moved)
+        return counts
+
+
+class RetemplateJob(BatchJob):
+    """
+    Re-renders drafts awaiting review (processed leads) from their campaign's email_template,
+    e.g. after the template was edited. Leads of campaigns without a template are skipped.
+    """
+    def __init__(self, container):
+        super().__init__(container)
+        from backend.agents.email_gen.generator import render_template
+        self.render = render_template
+        self.campaigns = container.campaigns
+
+    def apply(self, lead: Lead) -> Optional[bool]:
+        if lead.state != LeadState.PROCESSED:
+            return False
+        campaign = self.campaigns.get(lead.campaign_id)
+        if campaign is None or not campaign.email_template:
+            return False
+        lead.generated_email_body = self.render(campaign.email_template, lead)
+
+
+class ReenrichJob(BatchJob):
+    """
+    Runs the ICP analysis again for enriched leads (new product description, ICP or model) and
+    re-scores them. Statuses are kept: drafts and sends are not redone.
+    """
+    def __init__(self, container):
+        super().__init__(container)
+        from backend.agents.icp_persona.agent import ICPPersonaAgent
+        # No embedding index: several processes must not write one local index at once
+        self.agent = ICPPersonaAgent(self.db, llm=container.llm, campaigns=container.campaigns)
+        self.scorer = container.lead_scorer
+        self.scorer.refresh_rates()
+
+    def apply(self, lead: Lead) -> Optional[bool]:
+        if lead.company_summary is None or lead.state == LeadState.STOPPED:
+            return False
+        status = lead.status
+        self.agent.analyze_lead(lead, reuse=False)
+        lead.status = status
+        self.scorer.score_lead(lead)
+
+
+class RedraftJob(BatchJob):
+    """
+    Drafts processed leads again with the current prompt and campaign (LLM). Approved and sent
+    leads keep the text they went out with.
+    """
+    def __init__(self, container):
+        super().__init__(container)
+        from backend.agents.email_gen.generator import EmailGeneratorAgent
+        self.agent = EmailGeneratorAgent(self.db, llm=container.llm, campaigns=container.campaigns)
+
+    def apply(self, lead: Lead) -> Optional[bool]:
+        if lead.state != LeadState.PROCESSED:
+            return False
+        self.agent.generate_email(lead)
+
+
+class RebuildJob(BatchJob):
+    """
+    Rebuilds the event-sourced lead fields (lead_events.PROJECTED_FIELDS: enrichment, draft and
+    approved text, send counters) from the payloads in event_logs, e.g. after a bad migration
+    or a faulty script. Leads whose events carry no payloads (logged before payloads existed)
+    are skipped; status is not touched.
+    """
+    def run_chunk(self, lead_ids: Sequence[str]) -> Dict[str, int]:
+        self._events = defaultdict(list)
+        for event in self.db.get_lead_events(lead_ids):
+            self._events[event.lead_id].append(event)
+        return super().run_chunk(lead_ids)
+
+    def apply(self, lead: Lead) -> Optional[bool]:
+        values = project(self._events.get(lead.id, ()))
+        if not values:
+            return False
+        for name, value in values.items():
+            setattr(lead, name, value)
+
+
+JOBS: Dict[str, Callable] = {
+    "rescore": RescoreJob,
+    "retemplate": RetemplateJob,
+    "reenrich": ReenrichJob,
+    "redraft": RedraftJob,
+    "rebuild": RebuildJob,
+}
+
+_jobs: List[Tuple[str, BatchJob]] = []
+
+
+def init_worker(job_names: Sequence[str], db_path: Optional[str]):
+    # Process pool initializer. Ctrl-C is left to the driver, which stops handing out chunks;
+    # a worker finishes the chunk it holds instead of dying halfway through its writes.
+    global _jobs
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    from backend.core.container import AppContainer
+    container = AppContainer(db_path)
+    _jobs = [(name, JOBS[name](container)) for name in job_names]
+
+
+def run_worker_chunk(lead_ids: List[str]) -> Dict[str, Dict[str, int]]:
+    # Jobs run in order on the chunk, each one reading what the previous one wrote
+    return {name: job.run_chunk(lead_ids) for name, job in _jobs}
+
+
+# --- Driver (parent process) ---
+class BatchRunner:
+    """
+    Runs a batch job over many leads on BATCH_WORKERS processes, so CPU-bound per-lead work
+    (parsing, rendering, scoring) is not serialized on one GIL.
+
+    The parent only pages lead ids (keyset, BATCH_CHUNK_LEADS per page) and hands each page to
+    the pool as one chunk, keeping at most two chunks per worker in flight, so memory stays flat
+    however many leads there are. Workers read, process and write their chunk themselves.
+    Processes are spawned, not forked: the parent's store connections, pool threads and log
+    writer thread do not survive a fork safely.
+    """
+    def __init__(self, job: str, workers: int = None, chunk_size: int = None, db_path: str = None,
+                 progress_seconds: float = 2.0):
+        if job not in JOBS:
+            raise ValueError(f"Unknown batch job {job!r}; expected one of {', '.join(JOBS)}")
+        self.job = job
+        self.workers = workers or config.BATCH_WORKERS or multiprocessing.cpu_count()
+        self.chunk_size = chunk_size or config.BATCH_CHUNK_LEADS
+        self.db_path = db_path
+        self.progress_seconds = progress_seconds
+
+    def chunks(self, campaign_id: Optional[str] = None) -> Iterator[List[str]]:
+        store = open_lead_store(db_path=self.db_path)
+        try:
+            after_id = None
+            while True:
+                page = store.get_lead_ids_page(after_id, self.chunk_size, campaign_id=campaign_id)
+                if not page:
+                    return
+                yield page
+                after_id = page[-1]
+        finally:
+            store.close()
+
+    def run(self, campaign_id: Optional[str] = None, lead_ids: Iterable[str] = None,
+            on_progress: Callable[[Dict[str, object]], None] = None) -> Dict[str, object]:
+        """
+        Processes the given leads, or every lead (of `campaign_id`). Returns the totals:
+        leads, per-outcome counts, seconds and leads_per_sec. `on_progress` gets the same
+        dict every `progress_seconds` while the run is going.
+        """
+        if lead_ids is not None:
+            lead_ids = list(lead_ids)
+            chunks = iter([lead_ids[i:i + self.chunk_size] for i in range(0, len(lead_ids), self.chunk_size)])
+        else:
+            chunks = self.chunks(campaign_id)
+        totals = dict.fromkeys(OUTCOMES, 0)
+        totals["leads"] = 0
+        started = last_report = time.perf_counter()
+
+        def snapshot() -> Dict[str, object]:
+            elapsed = time.perf_counter() - started
+            return {"job": self.job, "workers": self.workers, **totals, "seconds": round(elapsed, 3),
+                    "leads_per_sec": round(totals["leads"] / elapsed, 1) if elapsed > 0 else 0.0}
+
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(self.workers, mp_context=context, initializer=init_worker,
+                                 initargs=((self.job,), self.db_path)) as pool:
+            pending = {}
+            exhausted = False
+            while pending or not exhausted:
+                while not exhausted and len(pending) < self.workers * 2:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        exhausted = True
+                    else:
+                        pending[pool.submit(run_worker_chunk, chunk)] = chunk
+                if not pending:
+                    break
+                done, _ = wait(pending, timeout=self.progress_seconds, return_when=FIRST_COMPLETED)
+                for future in done:
+                    chunk = pending.pop(future)
+                    totals["leads"] += len(chunk)
+                    try:
+                        counts = future.result()[self.job]
+                    except Exception as e:
+                        # A lost chunk (worker died, store unreachable); the rest of the run goes on
+                        logger.error("Batch %s chunk of %d leads from %s failed: %s", self.job, len(chunk), chunk[0], e)
+                        totals["failed"] += len(chunk)
+                        continue
+                    # Leads deleted since their id was listed are counted in no outcome
+                    for outcome in OUTCOMES:
+                        totals[outcome] += counts.get(outcome, 0)
+                if time.perf_counter() - last_report >= self.progress_seconds:
+                    last_report = time.perf_counter()
+                    progress = snapshot()
+                    logger.info("Batch %s: %d leads done (%.0f leads/s), %d updated, %d conflicts, %d failed",
+                                self.job, progress["leads"], progress["leads_per_sec"], progress["updated"],
+                                progress["conflicts"], progress["failed"])
+                    if on_progress:
+                        on_progress(progress)
+        result = snapshot()
+        logger.info("Batch %s finished: %s", self.job, result)
+        return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a batch job over leads on a pool of worker processes.")
+    parser.add_argument("job", choices=sorted(JOBS))
+    parser.add_argument("--campaign", help="only the leads of this campaign")
+    parser.add_argument("--workers", type=int, help="worker processes (default BATCH_WORKERS, else one per core)")
+    parser.add_argument("--chunk-size", type=int, help="leads per chunk (default BATCH_CHUNK_LEADS)")
+    args = parser.parse_args()
+
+    runner = BatchRunner(args.job, workers=args.workers, chunk_size=args.chunk_size)
+    result = runner.run(args.campaign, on_progress=lambda p: print(
+        f"{p['leads']} leads, {p['leads_per_sec']} leads/s, {p['updated']} updated, "
+        f"{p['conflicts']} conflicts, {p['failed']} failed", file=sys.stderr))
+    print(json.dumps(result, indent=2))
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+from typing import List
+from backend.core.config import config
+from backend.services.pipeline.scheduler import OUTREACH
+from backend.storage.base import BaseLeadStore, LeadConflict
+from backend.storage.lead_state import LeadState
+from backend.utils.logger import setup_logger, log_context
+from backend.utils.metrics import PIPELINE_STAGE_SECONDS
+
+logger = setup_logger("LeadPipeline")
+
+
+class LeadPipeline:
+    """
+    Enrichment and drafting for one new lead: claim (new -> enriching), ICP analysis, re-score,
+    email draft, one write. The claim's time is the lead's updated_at: a lead still 'enriching'
+    after PIPELINE_CLAIM_LEASE_SECONDS lost its worker and is released by `recover`.
+    """
+    def __init__(self, db: BaseLeadStore, icp_agent, email_agent, scorer=None):
+        self.db = db
+        self.icp_agent = icp_agent
+        self.email_agent = email_agent
+        self.scorer = scorer
+
+    def process(self, lead_id: str):
+        logger.info("Background processing for lead %s", lead_id)
+        lead = self.db.get_lead(lead_id)
+        if not lead:
+            return
+
+        with log_context(lead_id=lead_id, campaign_id=lead.campaign_id):
+            # Compare-and-set claim: a duplicate submit, or another node's worker, finds it taken
+            if not self.db.transition_lead(lead_id, "enriching", expected=lead.status, reason="pipeline"):
+                logger.info("Lead %s is %s, not new; skipping", lead_id, lead.status)
+                return
+            # Fresh copy at the claimed version, so the final write is checked against it
+            lead = self.db.get_lead(lead_id)
+
+            # 1. Enrichment
+            with PIPELINE_STAGE_SECONDS.labels("enrich").time():
+                lead = self.icp_agent.analyze_lead(lead)
+            # Fit score is in: re-rank the lead before it reaches the review queue
+            if self.scorer:
+                self.scorer.score_lead(lead)
+
+            # 2. Generation, only for an enriched lead (a failed enrichment released it back to new)
+            if lead.state == LeadState.ENRICHED:
+                with PIPELINE_STAGE_SECONDS.labels("generate").time():
+                    lead = self.email_agent.generate_email(lead)
+
+            # Write the enriched fields, unless the lead moved on meanwhile (blacklisted, stopped)
+            try:
+                self.db.update_lead(lead)
+            except LeadConflict:
+                self._merge(lead)
+            logger.info("Pipeline complete for %s", lead_id)
+
+    def recover(self, scheduler) -> List[str]:
+        """
+        Releases leads left 'enriching' by a crashed or stopped worker back to 'new' and submits
+        them to the scheduler's outreach queue again. Returns their ids.
+        """
+        older_than = datetime.now() - timedelta(seconds=config.PIPELINE_CLAIM_LEASE_SECONDS)
+        released = self.db.release_lead_claims("enriching", "new", older_than)
+        for lead in released:
+            scheduler.submit(lead.campaign_id, OUTREACH, self.process, lead.id)
+        if released:
+            logger.warning("Released %d leads stuck in enriching since before %s", len(released), older_than)
+        return [lead.id for lead in released]
+
+    def _merge(self, lead):
+        # Someone else wrote the lead during the LLM calls: re-apply our fields on a fresh
+        # copy if it is still ours to finish, instead of redoing enrichment
+        changes = lead.changes()
+
+        def apply(fresh):
+            if fresh.state != LeadState.ENRICHING:
+                logger.info("Lead %s became %s during processing; dropping the pipeline result", lead.id, fresh.status)
+                return False
+            for name, value in changes.items():
+                setattr(fresh, name, value)
+
+        self.db.modify_lead(lead.id, apply)
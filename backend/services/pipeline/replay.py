@@ -0,0 +1,177 @@
+import argparse
+import dataclasses
+import json
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Sequence
+from backend.core.config import config
+from backend.services.pipeline.batch_runner import JOBS, OUTCOMES, init_worker, run_worker_chunk
+from backend.storage.base import BaseLeadStore
+from backend.storage.lead_state import state_of
+from backend.storage.models import LeadFilter, ReplayCheckpoint
+from backend.utils.logger import setup_logger
+
+logger = setup_logger("ReplayEngine")
+
+
+class ReplayEngine:
+    """
+    Named, resumable reprocessing: runs batch_runner stages (rebuild, reenrich, redraft, rescore,
+    retemplate) in order over every lead matching a LeadFilter (campaign, states, events logged
+    in a time window), e.g. after a prompt or scoring change.
+
+    Leads are taken in id order, `batch_size` at a time, and each batch is split over `workers`
+    processes. Once a batch is fully written, the last lead id and the outcome counts are saved
+    as the replay's checkpoint (replay_checkpoints), so a stopped, interrupted or crashed replay
+    resumes after the last complete batch; a batch that was cut off is simply run again (every
+    stage writes with version checks and is safe to repeat). `max_rate` caps leads per second,
+    to keep LLM spend and store load bounded; `limit` caps the leads of one invocation.
+    """
+    def __init__(self, db: BaseLeadStore, name: str, stages: Sequence[str] = None, lead_filter: LeadFilter = None,
+                 batch_size: int = None, workers: int = None, max_rate: float = None, db_path: str = None):
+        for stage in stages or ():
+            if stage not in JOBS:
+                raise ValueError(f"Unknown replay stage {stage!r}; expected one of {', '.join(JOBS)}")
+        self.db = db
+        self.name = name
+        self.stages = list(stages) if stages else None
+        self.lead_filter = lead_filter
+        self.batch_size = batch_size or config.REPLAY_BATCH_LEADS
+        self.workers = workers or config.BATCH_WORKERS or multiprocessing.cpu_count()
+        self.max_rate = config.REPLAY_MAX_LEADS_PER_SEC if max_rate is None else max_rate
+        self.db_path = db_path
+
+    def checkpoint(self, restart: bool = False) -> ReplayCheckpoint:
+        """
+        The stored checkpoint to resume, or a fresh one. A resumed replay keeps the stages and filter
+        it was started with; asking for different ones is an error unless `restart` is set.
+        """
+        checkpoint = None if restart else self.db.get_replay_checkpoint(self.name)
+        if checkpoint is None:
+            if not self.stages:
+                raise ValueError(f"Replay {self.name!r} has no checkpoint; stages are required to start it")
+            return ReplayCheckpoint(name=self.name, stages=self.stages, lead_filter=self.lead_filter or LeadFilter())
+        if self.stages and self.stages != checkpoint.stages or self.lead_filter and self.lead_filter != checkpoint.lead_filter:
+            raise ValueError(f"Replay {self.name!r} was started with stages {','.join(checkpoint.stages)} and filter "
+                             f"{checkpoint.lead_filter}; restart it to change them")
+        return checkpoint
+
+    def run(self, limit: int = None, restart: bool = False,
+            on_progress: Callable[[ReplayCheckpoint], None] = None) -> ReplayCheckpoint:
+        """
+        Runs (or resumes) the replay until every matching lead is done or `limit` leads were
+        processed. Returns the checkpoint: status "done", or "paused" (limit reached, Ctrl-C)
+        and "failed" (a batch could not be processed), both resumable by running it again.
+        """
+        checkpoint = self.checkpoint(restart)
+        if checkpoint.status == "done":
+            logger.info("Replay %s is already done (%s); restart it to run again", self.name, checkpoint.counts)
+            return checkpoint
+        logger.info("Replay %s: stages %s, filter %s, resuming after %s", self.name, ",".join(checkpoint.stages),
+                    checkpoint.lead_filter, checkpoint.after_id)
+        checkpoint.status = "running"
+        self._save(checkpoint)
+        processed = 0
+        context = multiprocessing.get_context("spawn")
+        pool = ProcessPoolExecutor(self.workers, mp_context=context, initializer=init_worker,
+                                   initargs=(checkpoint.stages, self.db_path))
+        try:
+            while limit is None or processed < limit:
+                size = self.batch_size if limit is None else min(self.batch_size, limit - processed)
+                lead_ids = self.db.find_lead_ids(checkpoint.lead_filter, checkpoint.after_id, size)
+                if not lead_ids:
+                    checkpoint.status = "done"
+                    break
+                started = time.perf_counter()
+                counts = self._run_batch(pool, lead_ids)
+                for stage, outcomes in counts.items():
+                    totals = checkpoint.counts.setdefault(stage, dict.fromkeys(OUTCOMES, 0))
+                    for outcome, count in outcomes.items():
+                        totals[outcome] = totals.get(outcome, 0) + count
+                checkpoint.after_id = lead_ids[-1]
+                processed += len(lead_ids)
+                self._save(checkpoint)
+                if on_progress:
+                    on_progress(checkpoint)
+                logger.info("Replay %s: %d leads this run, up to %s (%.0f leads/s)", self.name, processed,
+                            checkpoint.after_id, len(lead_ids) / max(time.perf_counter() - started, 1e-9))
+                if self.max_rate:
+                    # Paced per batch: the next one starts no earlier than the rate allows
+                    time.sleep(max(0.0, len(lead_ids) / self.max_rate - (time.perf_counter() - started)))
+            else:
+                checkpoint.status = "paused"
+        except KeyboardInterrupt:
+            logger.warning("Replay %s interrupted; resumes after %s", self.name, checkpoint.after_id)
+            checkpoint.status = "paused"
+        except Exception as e:
+            logger.error("Replay %s stopped after %s: %s", self.name, checkpoint.after_id, e)
+            checkpoint.status = "failed"
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+            self._save(checkpoint)
+        logger.info("Replay %s %s: %s", self.name, checkpoint.status, checkpoint.counts)
+        return checkpoint
+
+    def _run_batch(self, pool: ProcessPoolExecutor, lead_ids: List[str]) -> Dict[str, Dict[str, int]]:
+        # One slice per worker; the batch counts only once every slice is written
+        step = -(-len(lead_ids) // self.workers)
+        futures = [pool.submit(run_worker_chunk, lead_ids[i:i + step]) for i in range(0, len(lead_ids), step)]
+        counts: Dict[str, Dict[str, int]] = {}
+        for future in futures:
+            for stage, outcomes in future.result().items():
+                totals = counts.setdefault(stage, dict.fromkeys(OUTCOMES, 0))
+                for outcome, count in outcomes.items():
+                    totals[outcome] += count
+        return counts
+
+    def _save(self, checkpoint: ReplayCheckpoint):
+        checkpoint.updated_at = datetime.now()
+        self.db.save_replay_checkpoint(checkpoint)
+
+
+def _csv(raw: str) -> List[str]:
+    return [item.strip() for item in raw.split(",") if item.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay pipeline stages over a filtered set of leads (resumable).")
+    parser.add_argument("name", help="replay name; running it again resumes from its checkpoint")
+    parser.add_argument("--stages", type=_csv, help=f"comma-separated, run in order: {', '.join(JOBS)}")
+    parser.add_argument("--campaign", help="only leads of this campaign")
+    parser.add_argument("--states", type=_csv, help="only leads in these states, e.g. processed,sent")
+    parser.add_argument("--events", type=_csv, help="only leads with one of these events, e.g. ENRICH_OK,GEN_OK")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="... logged at or after this time (ISO)")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="... logged before this time (ISO)")
+    parser.add_argument("--batch-size", type=int, help="leads per checkpointed batch (default REPLAY_BATCH_LEADS)")
+    parser.add_argument("--workers", type=int, help="worker processes (default BATCH_WORKERS, else one per core)")
+    parser.add_argument("--max-rate", type=float, help="max leads per second (default REPLAY_MAX_LEADS_PER_SEC, 0 = unlimited)")
+    parser.add_argument("--limit", type=int, help="stop (paused) after this many leads")
+    parser.add_argument("--restart", action="store_true", help="discard the checkpoint and start over")
+    parser.add_argument("--status", action="store_true", help="print the checkpoint and exit")
+    args = parser.parse_args()
+
+    from backend.core.container import get_container
+    container = get_container()
+    try:
+        lead_filter = None
+        if any(value is not None for value in (args.campaign, args.states, args.events, args.since, args.until)):
+            lead_filter = LeadFilter(campaign_id=args.campaign, event_types=args.events, since=args.since, until=args.until,
+                                     states=[int(state_of(state)) for state in args.states] if args.states else None)
+        engine = ReplayEngine(container.db, args.name, stages=args.stages, lead_filter=lead_filter,
+                              batch_size=args.batch_size, workers=args.workers, max_rate=args.max_rate,
+                              db_path=container.db_path)
+        if args.status:
+            checkpoint = container.db.get_replay_checkpoint(args.name)
+        else:
+            try:
+                engine.checkpoint(args.restart)
+            except ValueError as e:
+                parser.error(str(e))
+            checkpoint = engine.run(limit=args.limit, restart=args.restart, on_progress=lambda cp: print(
+                f"{cp.name}: up to {cp.after_id}, {json.dumps(cp.counts)}", file=sys.stderr))
+        print(json.dumps(dataclasses.asdict(checkpoint), default=str, indent=2) if checkpoint else "null")
+    finally:
+        container.close()
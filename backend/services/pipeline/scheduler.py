@@ -0,0 +1,242 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+from backend.core.config import config
+from backend.services.campaigns.registry import CampaignRegistry, DEFAULT_CAMPAIGN_ID
+from backend.storage.models import Campaign
+from backend.utils.logger import setup_logger
+from backend.utils.metrics import QUEUE_DEPTH, QUEUE_WAIT_SECONDS
+
+logger = setup_logger("FairScheduler")
+
+# Priority classes, served strictly in this order
+# Follow-up sends need no LLM work; they go ahead of new outreach in the outbox claim order
+# (claim_outbox, ORDER BY step = 0), not here
+REPLY = "reply"  # classifying an inbound reply (stops follow-ups, alerts the owner)
+OUTREACH = "outreach"  # enriching and drafting new leads: the bulk
+WORK_CLASSES = (REPLY, OUTREACH)
+
+
+class _Task:
+    __slots__ = ("fn", "args", "future", "submitted_at")
+
+    def __init__(self, fn: Callable, args: tuple):
+        self.fn = fn
+        self.args = args
+        self.future = Future()
+        self.submitted_at = time.monotonic()
+
+
+class _ClassQueue:
+    # One priority class: a FIFO per campaign plus the deficit round-robin state over them
+    def __init__(self):
+        self.queues: Dict[str, Deque[_Task]] = {}
+        self.ring: Deque[str] = deque()  # campaigns with queued work, in serving order
+        self.deficit: Dict[str, int] = {}
+
+    def push(self, campaign_id: str, task: _Task):
+        queue = self.queues.get(campaign_id)
+        if queue is None:
+            queue = self.queues[campaign_id] = deque()
+        if not queue:
+            self.ring.append(campaign_id)
+            self.deficit[campaign_id] = 0
+        queue.append(task)
+
+
+class FairScheduler:
+    """
+    Shared worker threads (PIPELINE_WORKERS) for LLM work across campaigns.
+
+    Priority classes are strict: a free worker takes a queued reply before any new outreach, so
+    latency-sensitive work waits at most for one running task to finish, never behind a bulk
+    import. Within a class, campaigns are served by deficit round-robin: each turn a campaign may
+    start `weight` tasks, so with queued work everywhere capacity splits in proportion to the
+    weights however deep any one queue is.
+    A campaign's `pipeline_workers` caps how many workers its outreach work may hold at once
+    (0 = no cap), and paused or archived campaigns keep that queue but are not served. Replies
+    are exempt from both: an answer is classified even while its campaign is capped or paused.
+    """
+    def __init__(self, campaigns: CampaignRegistry, workers: int = None, name: str = "pipeline"):
+        self.campaigns = campaigns
+        self.workers = workers or config.PIPELINE_WORKERS
+        self.name = name
+        self._classes = {work_class: _ClassQueue() for work_class in WORK_CLASSES}
+        self._running: Dict[str, int] = {}
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+        # Config changes (cap raised, weight changed, campaign resumed) can make waiting work runnable
+        campaigns.subscribe(self._on_campaign_change)
+
+    def submit(self, campaign_id: Optional[str], work_class: str, fn: Callable, *args) -> Future:
+        """
+        Queues `fn(*args)` for the campaign; the returned future carries its result or exception.
+        """
+        if work_class not in self._classes:
+            raise ValueError(f"Unknown work class {work_class!r}; expected one of {', '.join(WORK_CLASSES)}")
+        task = _Task(fn, args)
+        with self._cond:
+            if self._stopping:
+                raise RuntimeError("Scheduler is stopped")
+            self._classes[work_class].push(campaign_id or DEFAULT_CAMPAIGN_ID, task)
+            QUEUE_DEPTH.labels(f"{self.name}.{work_class}").inc()
+            self._ensure_workers()
+            self._cond.notify()
+        return task.future
+
+    def run(self, campaign_id: Optional[str], work_class: str, fn: Callable, *args):
+        # Blocking submit, for callers that need the result in order (the reply listener)
+        return self.submit(campaign_id, work_class, fn, *args).result()
+
+    def _ensure_workers(self):
+        # Lazily started, so processes that never submit (scripts, exporters) own no threads
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"{self.name}-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    # --- Selection (caller holds the lock) ---
+    def _eligible(self, campaign_id: str, work_class: str) -> bool:
+        if work_class == REPLY:
+            return True
+        campaign = self.campaigns.cached(campaign_id)
+        if campaign is None:
+            return True
+        if campaign.status != "active":
+            return False
+        return not campaign.pipeline_workers or self._running.get(campaign_id, 0) < campaign.pipeline_workers
+
+    def _weight(self, campaign_id: str) -> int:
+        campaign = self.campaigns.cached(campaign_id)
+        return max(campaign.weight, 1) if campaign is not None else 1
+
+    def _next(self) -> Optional[Tuple[str, str, _Task]]:
+        for work_class in WORK_CLASSES:
+            item = self._next_in(work_class)
+            if item is not None:
+                return item
+        return None
+
+    def _next_in(self, work_class: str) -> Optional[Tuple[str, str, _Task]]:
+        state = self._classes[work_class]
+        ring = state.ring
+        for _ in range(len(ring)):
+            campaign_id = ring[0]
+            if not self._eligible(campaign_id, work_class):
+                # Skipped without spending its turn
+                ring.rotate(-1)
+                continue
+            if state.deficit[campaign_id] <= 0:
+                # New turn: `weight` tasks may start before the next campaign's turn
+                state.deficit[campaign_id] = self._weight(campaign_id)
+            state.deficit[campaign_id] -= 1
+            queue = state.queues[campaign_id]
+            task = queue.popleft()
+            if not queue:
+                ring.popleft()
+                del state.deficit[campaign_id]
+            elif state.deficit[campaign_id] <= 0:
+                ring.rotate(-1)
+            self._running[campaign_id] = self._running.get(campaign_id, 0) + 1
+            return campaign_id, work_class, task
+        return None
+
+    # --- Workers ---
+    def _work(self):
+        while True:
+            # Outside the lock: a stale registry re-reads the campaigns table
+            self.campaigns.refresh_if_stale()
+            with self._cond:
+                item = None
+                while not self._stopping:
+                    item = self._next()
+                    if item is not None:
+                        break
+                    # Bounded wait, so edits from other processes are picked up by the refresh
+                    self._cond.wait(self.campaigns.refresh_seconds or None)
+                    if self._queued():
+                        break
+                if self._stopping:
+                    return
+            if item is None:
+                continue
+            self._execute(*item)
+
+    def _execute(self, campaign_id: str, work_class: str, task: _Task):
+        QUEUE_WAIT_SECONDS.labels(self.name, work_class).observe(time.monotonic() - task.submitted_at)
+        try:
+            if task.future.set_running_or_notify_cancel():
+                task.future.set_result(task.fn(*task.args))
+        except Exception as e:
+            logger.error("%s task failed (campaign %s, %s): %s", self.name, campaign_id, work_class, e)
+            task.future.set_exception(e)
+        finally:
+            QUEUE_DEPTH.labels(f"{self.name}.{work_class}").dec()
+            with self._cond:
+                self._running[campaign_id] -= 1
+                self._cond.notify_all()
+
+    def _queued(self) -> bool:
+        return any(state.ring for state in self._classes.values())
+
+    def _on_campaign_change(self, campaign: Campaign):
+        with self._cond:
+            self._cond.notify_all()
+
+    def wait_idle(self, timeout: float = None) -> bool:
+        """
+        Blocks until all runnable queued work is done. Held queues of paused campaigns do not count.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while any(self._running.values()) or any(
+                self._runnable(campaign_id, work_class)
+                for work_class, state in self._classes.items() for campaign_id in state.ring
+            ):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining if remaining is not None else 1.0)
+        return True
+
+    def _runnable(self, campaign_id: str, work_class: str) -> bool:
+        # Eligible now or once a running task finishes; false only for held (paused) queues
+        campaign = self.campaigns.cached(campaign_id)
+        return work_class == REPLY or campaign is None or campaign.status == "active"
+
+    def stats(self) -> Dict[str, Dict[str, object]]:
+        """
+        Queued tasks per class and campaign, and running tasks per campaign.
+        """
+        with self._cond:
+            return {
+                "queued": {
+                    work_class: {campaign_id: len(queue) for campaign_id, queue in state.queues.items() if queue}
+                    for work_class, state in self._classes.items()
+                },
+                "running": {campaign_id: count for campaign_id, count in self._running.items() if count},
+            }
+
+    def stop(self, timeout: float = 5.0):
+        # Dropped and cut-off tasks are not resubmitted: queued leads stay 'new', running ones stay
+        # 'enriching' until LeadPipeline.recover releases them (claim older than PIPELINE_CLAIM_LEASE_SECONDS)
+        with self._cond:
+            self._stopping = True
+            for work_class, state in self._classes.items():
+                for queue in state.queues.values():
+                    for task in queue:
+                        # Wakes blocked run() callers
+                        task.future.cancel()
+                        QUEUE_DEPTH.labels(f"{self.name}.{work_class}").dec()
+                    queue.clear()
+                state.ring.clear()
+                state.deficit.clear()
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
@@ -0,0 +1,230 @@
+import re
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+import numpy as np
+from backend.core.config import config
+from backend.services.lead_ingest.account_index import FREE_MAIL_DOMAINS
+from backend.storage.base import BaseLeadStore
+from backend.storage.models import Lead
+from backend.utils.logger import setup_logger
+from backend.utils.metrics import PIPELINE_STAGE_SECONDS
+
+logger = setup_logger("LeadScorer")
+
+FEATURES = ("fit", "title", "domain", "source", "campaign")
+
+# Seniority in a job title, strongest first; the first matching pattern wins
+TITLE_PATTERNS = tuple((re.compile(pattern), weight) for pattern, weight in (
+    (r"\b(?:ceo|cto|cio|ciso|coo|cfo|cro|cmo|chief|founder|co-?founder|owner|president)\b", 1.0),
+    (r"\b(?:vp|svp|evp|vice president)\b", 0.85),
+    (r"\bhead of\b", 0.8),
+    (r"\b(?:director|partner)\b", 0.7),
+    (r"\b(?:principal|staff|architect|lead)\b", 0.55),
+    (r"\bmanager\b", 0.45),
+    (r"\b(?:engineer|developer|analyst|specialist|consultant)\b", 0.3),
+    (r"\b(?:intern|student|assistant)\b", 0.05),
+))
+UNKNOWN_TITLE = 0.3
+
+# Email domain: corporate addresses beat free mail; institutional TLDs rarely buy
+TLD_WEIGHTS = {
+    "com": 1.0, "io": 1.0, "ai": 1.0, "co": 0.9, "tech": 0.9, "dev": 0.9, "app": 0.9, "net": 0.8,
+    "org": 0.4, "edu": 0.2, "gov": 0.2, "mil": 0.1,
+}
+COUNTRY_TLD = 0.8 # two-letter TLDs not listed above
+OTHER_TLD = 0.6
+FREE_MAIL = 0.2
+NO_EMAIL = 0.0
+
+UNSCORED_FIT = 0.4 # fit feature until the LLM has scored the lead
+RATE_PRIOR_LEADS = 20 # a source / campaign needs about this many contacted leads to move off the overall rate
+
+
+def parse_weights(raw: str) -> Dict[str, float]:
+    # "fit=0.45,title=0.2" -> {"fit": 0.45, "title": 0.2}; unknown features are ignored
+    weights = {}
+    for item in raw.split(","):
+        if "=" in item:
+            name, value = item.split("=", 1)
+            if name.strip() in FEATURES:
+                weights[name.strip()] = float(value)
+    return weights
+
+
+def title_feature(title: str) -> float:
+    title = title.lower()
+    for pattern, weight in TITLE_PATTERNS:
+        if pattern.search(title):
+            return weight
+    return UNKNOWN_TITLE
+
+
+def domain_feature(domain: str) -> float:
+    if not domain:
+        return NO_EMAIL
+    if domain in FREE_MAIL_DOMAINS:
+        return FREE_MAIL
+    tld = domain.rsplit(".", 1)[-1]
+    if tld in TLD_WEIGHTS:
+        return TLD_WEIGHTS[tld]
+    return COUNTRY_TLD if len(tld) == 2 else OTHER_TLD
+
+
+def _per_value(values: Iterable[Optional[str]], feature: Callable[[str], float]) -> np.ndarray:
+    """
+    Factorizes a text column (one dict pass), evaluates `feature` once per distinct value and
+    gathers the results back with one NumPy take. Titles, domains, sources and campaigns repeat
+    heavily, so a million rows cost a few thousand feature calls.
+    """
+    codes: Dict[str, int] = {}
+    indices = np.fromiter((codes.setdefault(value or "", len(codes)) for value in values), dtype=np.int64)
+    table = np.fromiter((feature(value) for value in codes), dtype=np.float64, count=len(codes))
+    return table[indices]
+
+
+class LeadScorer:
+    """
+    Review-queue priority (0-100) for every lead: a weighted sum of features in [0, 1]
+    (weights from SCORING_WEIGHTS):
+      fit       LLM ICP fit_score / 100 (UNSCORED_FIT until the lead is enriched)
+      title     seniority from job-title keywords
+      domain    corporate TLD vs free mail / institutional address
+      source    smoothed reply rate of the lead's source
+      campaign  smoothed reply rate of the lead's campaign
+
+    Scoring is columnar, so the same code scores one lead at ingest / enrichment and the whole
+    table in a periodic rescore; only priorities that moved are written back.
+    """
+    def __init__(self, db: BaseLeadStore, weights: Dict[str, float] = None):
+        self.db = db
+        weights = weights if weights is not None else parse_weights(config.SCORING_WEIGHTS)
+        self.weights = np.array([weights.get(name, 0.0) for name in FEATURES], dtype=np.float64)
+        total = self.weights.sum()
+        if total > 0:
+            self.weights /= total
+        self._source_rates: Dict[str, float] = {}
+        self._campaign_rates: Dict[str, float] = {}
+        self._default_rate = 0.5
+        self._stop = threading.Event()
+        self._thread = None
+
+    # --- Reply-rate features ---
+    def refresh_rates(self):
+        """
+        Recomputes the source / campaign reply-rate features from one GROUP BY over leads.
+        Rates are shrunk towards the overall rate (RATE_PRIOR_LEADS) and mapped so the
+        overall rate scores 0.5 and twice the overall rate (or more) scores 1.
+        """
+        by_source: Dict[str, List[int]] = {}
+        by_campaign: Dict[str, List[int]] = {}
+        contacted = replied = 0
+        for source, campaign_id, sent, replies in self.db.get_reply_stats():
+            sent, replies = int(sent or 0), int(replies or 0)
+            for totals, key in ((by_source, source or ""), (by_campaign, campaign_id or "default")):
+                entry = totals.setdefault(key, [0, 0])
+                entry[0] += sent
+                entry[1] += replies
+            contacted += sent
+            replied += replies
+
+        if not replied:
+            # Nothing to learn from yet: every source and campaign is neutral
+            self._source_rates, self._campaign_rates = {}, {}
+            return
+        overall = replied / contacted
+
+        def feature(sent: int, replies: int) -> float:
+            smoothed = (replies + RATE_PRIOR_LEADS * overall) / (sent + RATE_PRIOR_LEADS)
+            return min(1.0, smoothed / (2 * overall))
+
+        self._source_rates = {key: feature(*totals) for key, totals in by_source.items()}
+        self._campaign_rates = {key: feature(*totals) for key, totals in by_campaign.items()}
+
+    # --- Scoring ---
+    def score(self, titles: Sequence[Optional[str]], emails: Sequence[Optional[str]], sources: Sequence[Optional[str]],
+              campaign_ids: Sequence[Optional[str]], fit_scores: Sequence[Optional[float]]) -> np.ndarray:
+        """
+        Priorities for parallel columns of leads, rounded to 2 decimals.
+        """
+        fit = np.array(fit_scores, dtype=np.float64)  # None -> nan
+        fit = np.where(np.isnan(fit), UNSCORED_FIT, np.clip(fit / 100.0, 0.0, 1.0))
+        features = np.vstack((
+            fit,
+            _per_value(titles, title_feature),
+            _per_value((email.rpartition("@")[2].lower() if email else "" for email in emails), domain_feature),
+            _per_value(sources, lambda source: self._source_rates.get(source, self._default_rate)),
+            _per_value((c or "default" for c in campaign_ids),
+                       lambda campaign_id: self._campaign_rates.get(campaign_id, self._default_rate)),
+        ))
+        return np.round(self.weights @ features * 100.0, 2)
+
+    def score_leads(self, leads: Sequence[Lead]) -> List[float]:
+        """
+        Sets lead.priority on each lead (persisted with the lead's next save).
+        """
+        if not leads:
+            return []
+        priorities = self.score(
+            [lead.title for lead in leads], [lead.email for lead in leads], [lead.source for lead in leads],
+            [lead.campaign_id for lead in leads], [lead.fit_score for lead in leads],
+        ).tolist()
+        for lead, priority in zip(leads, priorities):
+            lead.priority = priority
+        return priorities
+
+    def score_lead(self, lead: Lead) -> float:
+        return self.score_leads([lead])[0]
+
+    def rescore_all(self, tolerance: float = 0.01) -> int:
+        """
+        Refreshes reply rates and rescores every lead; writes only priorities that changed by
+        at least `tolerance` (or were never set). Returns the number of leads updated.
+        """
+        started = time.perf_counter()
+        with PIPELINE_STAGE_SECONDS.labels("rescore").time():
+            self.refresh_rates()
+            rows = self.db.get_scoring_rows()
+            if not rows:
+                return 0
+            ids, titles, emails, sources, campaign_ids, fit_scores, current = zip(*rows)
+            priorities = self.score(titles, emails, sources, campaign_ids, fit_scores)
+            current = np.array(current, dtype=np.float64)
+            changed = np.flatnonzero(np.isnan(current) | (np.abs(priorities - current) >= tolerance))
+            if len(changed):
+                self.db.update_priorities(zip(map(ids.__getitem__, changed.tolist()), priorities[changed].tolist()))
+        logger.info("Rescored %d leads in %.2fs (%d priorities updated)", len(ids), time.perf_counter() - started, len(changed))
+        return len(changed)
+
+    # --- Background rescore ---
+    def start(self):
+        if self._thread is None and config.SCORING_RESCORE_SECONDS > 0:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run_forever, name="lead-scorer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+            self._thread = None
+
+    def run_forever(self):
+        # Incremental scoring happens at ingest / enrichment; this pass picks up reply-rate drift
+        logger.info("Lead scorer started (rescore every %ss)", config.SCORING_RESCORE_SECONDS)
+        while not self._stop.is_set():
+            try:
+                self.rescore_all()
+            except Exception as e:
+                logger.error("Rescore failed: %s", e)
+            self._stop.wait(config.SCORING_RESCORE_SECONDS)
+
+
+if __name__ == "__main__":
+    from backend.core.container import get_container
+
+    container = get_container()
+    try:
+        print(f"{container.lead_scorer.rescore_all()} priorities updated")
+    finally:
+        container.close()
@@ -1,96 +1,175 @@
 from datetime import datetime
+from typing import Optional
+from backend.core.config import config
+from backend.services.sender.outbox_relay import OutboxRelay
 from backend.services.sender.providers.sendgrid_adapter import SendGridEmailProvider
-from backend.storage.models import Lead, EmailInteraction
-from backend.storage.db import LeadStore
+from backend.storage.lead_state import LeadState, can_transition
+from backend.storage.models import EmailInteraction, OutboxMessage
+from backend.storage.base import BaseLeadStore, LeadConflict
 from backend.services.sender.risk_control import RiskController
-from backend.utils.logger import setup_logger
+from backend.utils.logger import setup_logger, log_context
+from backend.utils.metrics import RETRIES_TOTAL
 
 logger = setup_logger("SendOrchestrator")
 
+
+class FollowUpNotDue(Exception):
+    """A follow-up was asked for, but the lead has nothing new to send yet."""
+    pass
+
+
 class SendOrchestrator:
-    def __init__(self, db_store: LeadStore):
+    """
+    Approval -> outbox -> provider.
+    Approval writes the lead and its outbox message in one transaction (idempotency key
+    "<lead_id>:step<n>"), then delivers that message right away through the relay. If the
+    process dies before delivery, the background relay picks the message up; retried or
+    parallel approvals of the same step never produce a second outbox message.
+
+    Approving a lead that was already sent is a no-op that returns the send on record: a retried
+    request or a double click never mails the prospect twice. The next step only goes out through
+    send_follow_up, and only with new content or once the lead's next_scheduled_at has passed.
+    """
+    def __init__(self, db_store: BaseLeadStore, risk_control: RiskController = None, provider: SendGridEmailProvider = None,
+                 async_db=None, relay: OutboxRelay = None):
         self.db = db_store
-        self.risk_control = RiskController(db_store)
-        self.provider = SendGridEmailProvider()
+        self.risk_control = risk_control or RiskController(db_store)
+        self.provider = provider or SendGridEmailProvider()
+        self.relay = relay or OutboxRelay(db_store, provider=self.provider, risk_control=self.risk_control)
+        self.async_db = async_db  # AsyncLeadStore, required by approve_and_send_async
+
+    def approve_and_send(self, lead_id: str, subject_override: str = None, body_override: str = None,
+                         follow_up: bool = False) -> Optional[EmailInteraction]:
+        with log_context(lead_id=lead_id):
+            message = self._enqueue(lead_id, subject_override, body_override, follow_up)
+            if not message:
+                return
+            if message.status != "sending":
+                return self.relay.interaction(message)
+            return self.relay.deliver(message)
+
+    async def approve_and_send_async(self, lead_id: str, subject_override: str = None, body_override: str = None,
+                                     follow_up: bool = False) -> Optional[EmailInteraction]:
+        """
+        Same flow as approve_and_send, but DB work runs on the store executor and the
+        provider call goes over async HTTP, so the event loop is never blocked.
+        """
+        with log_context(lead_id=lead_id):
+            message = await self.async_db.run(self._enqueue, lead_id, subject_override, body_override, follow_up)
+            if not message:
+                return
+            if message.status != "sending":
+                return self.relay.interaction(message)
+            return await self.relay.deliver_async(message, self.async_db)
+
+    def send_follow_up(self, lead_id: str, subject_override: str = None, body_override: str = None) -> Optional[EmailInteraction]:
+        """
+        Sends the next step to a lead that was already sent. Raises FollowUpNotDue unless the draft
+        (with the overrides) differs from the last message sent or next_scheduled_at has passed.
+        """
+        return self.approve_and_send(lead_id, subject_override, body_override, follow_up=True)
+
+    async def send_follow_up_async(self, lead_id: str, subject_override: str = None,
+                                   body_override: str = None) -> Optional[EmailInteraction]:
+        return await self.approve_and_send_async(lead_id, subject_override, body_override, follow_up=True)
+
+    def _enqueue(self, lead_id: str, subject_override: str = None, body_override: str = None,
+                 follow_up: bool = False) -> Optional[OutboxMessage]:
+        """
+        Validates, writes the outbox message and claims it for immediate delivery.
+        Returns the claimed message, the pending one when the send interval is not over (the relay
+        delivers it), the settled message of the last step when the lead was already sent (and this
+        is not a follow-up), or None when there is nothing to send now. Raises if
+        risk control blocks, or FollowUpNotDue. The lead write is conditional on the version read:
+        if a reply, stop or edit lands in between, the checks run again on a fresh copy.
+        """
+        for _ in range(config.LEAD_UPDATE_ATTEMPTS):
+            try:
+                return self._try_enqueue(lead_id, subject_override, body_override, follow_up)
+            except LeadConflict:
+                RETRIES_TOTAL.labels("lead_update").inc()
+                logger.info("Lead %s changed while queueing; checking again", lead_id)
+        raise LeadConflict(lead_id)
 
-    def approve_and_send(self, lead_id: str, subject_override: str = None, body_override: str = None):
+    def _try_enqueue(self, lead_id: str, subject_override: str = None, body_override: str = None,
+                     follow_up: bool = False) -> Optional[OutboxMessage]:
         lead = self.db.get_lead(lead_id)
         if not lead:
-            logger.error(f"Lead {lead_id} not found")
-            return
+            logger.error("Lead %s not found", lead_id)
+            return None
 
-        # Apply edits if provided
+        # Apply edits if provided (persisted together with the outbox message)
         if subject_override:
             lead.generated_email_subject = subject_override
         if body_override:
             lead.generated_email_body = body_override
-        if subject_override or body_override:
-            self.db.update_lead(lead)
 
         # 1. State & Idempotency Validations
-        if lead.status == "sent":
-             logger.warning(f"Idempotency Block: Lead {lead_id} already sent. Refusing to resend.")
-             return
-             
-        if lead.last_message_id and lead.status == "sent":
-             logger.warning(f"Idempotency Block: Lead {lead_id} has message_id {lead.last_message_id}. Refusing.")
-             return
-
-        if "stopped" in lead.status:
-             logger.warning(f"Lead {lead_id} is stopped ({lead.status}). Skipping.")
-             return
-
-        # 2. Risk Checks
-        if not self.risk_control.can_send(lead_id):
-            self.db.log_event(lead_id, "SEND_BLOCKED", "Risk Control Limit Reached")
-            logger.error(f"Risk Control blocked sending for lead {lead_id}")
-            raise Exception("Risk Control Blocked")
-
-        logger.info(f"Sending email to {lead.email}...")
-        
-        try:
-            db_event_type = "SEND_ATTEMPT"
-            self.db.log_event(lead.id, db_event_type, "Initiating Provider Send")
-            
-            # 3. Call Provider
-            provider_msg_id = self.provider.send_email(
-                to_email=lead.email,
-                subject=lead.generated_email_subject,
-                content=lead.generated_email_body
-            )
-            
-            # 4. Success State Update (Atomic-ish)
-            # Determine step: if new -> step0. If step0 -> step1.
-            # Simplified logic: just increment send_count and use that for step
-            current_step = lead.send_count # 0 initially
-            new_status = f"sent_step{current_step}"
-            
-            thread_id = lead.thread_id or f"th_{lead.id}_{int(datetime.now().timestamp())}"
-            
-            lead.status = new_status
-            lead.last_sent_at = datetime.now()
-            lead.send_count += 1
-            lead.last_message_id = provider_msg_id
-            lead.thread_id = thread_id
-            
-            # Reset schedule for next step (e.g. +3 days) - Placeholder logic
-            # lead.next_scheduled_at = datetime.now() + timedelta(days=3)
-            
-            self.db.update_lead(lead) 
-            self.db.log_event(lead_id, "SEND_OK", f"Provider ID: {provider_msg_id}, New Status: {new_status}")
-            self.risk_control.record_send_success() 
-            
-            logger.info(f"Email sent successfully. ID: {provider_msg_id}")
-            
-            return EmailInteraction(
-                lead_id=lead.id,
-                sent_at=datetime.now(),
-                message_id=provider_msg_id,
-                thread_id=thread_id,
-                subject=lead.generated_email_subject,
-                body=lead.generated_email_body
-            )
-        except Exception as e:
-            logger.error(f"Failed to send email to {lead.email}: {e}")
-            self.db.log_event(lead_id, "SEND_ERR", str(e))
-            raise e
+        state = lead.state
+        if state == LeadState.STOPPED:
+             logger.warning("Lead %s is stopped (%s). Skipping.", lead_id, lead.status)
+             return None
+
+        if state == LeadState.SENT:
+             previous = self.db.get_outbox_message(OutboxMessage.key_for(lead.id, lead.send_count - 1))
+             if not follow_up:
+                 logger.warning("Idempotency Block: Lead %s already sent (%s, message_id %s). Not sending again.",
+                                lead_id, lead.status, lead.last_message_id)
+                 return previous
+             if not self._follow_up_due(lead, previous):
+                 raise FollowUpNotDue(f"Lead {lead_id}: nothing new since step {lead.send_count - 1} and no follow-up scheduled")
+        elif follow_up and state != LeadState.QUEUED:
+             raise FollowUpNotDue(f"Lead {lead_id} is {lead.status}; only sent leads get follow-ups")
+
+        if state != LeadState.QUEUED and not can_transition(state, LeadState.QUEUED):
+             logger.warning("Lead %s is %s; only drafted leads can be queued. Skipping.", lead_id, lead.status)
+             return None
+
+        # One message per lead and step
+        step = lead.send_count
+        key = OutboxMessage.key_for(lead.id, step)
+        existing = self.db.get_outbox_message(key)
+        if existing and (existing.status in ("sent", "unconfirmed")
+                         or existing.status in ("pending", "sending") and state != LeadState.QUEUED):
+             logger.warning("Idempotency Block: %s is already %s (message_id %s). Refusing to resend.",
+                            key, existing.status, existing.provider_message_id)
+             return None
+
+        # 2. Risk Checks (a queued lead was already checked when it was first approved)
+        if state != LeadState.QUEUED:
+            if not self.risk_control.can_send(lead_id):
+                self.db.log_event(lead_id, "SEND_BLOCKED", "Risk Control Limit Reached")
+                logger.error("Risk Control blocked sending for lead %s", lead_id)
+                raise Exception("Risk Control Blocked")
+
+        # 3. Outbox (same transaction as the lead update)
+        logger.info("Queueing email to %s (%s)...", lead.email, key)
+        lead.status = f"queued_step{step}"
+        queued = self.db.enqueue_send(lead, OutboxMessage(
+            key=key,
+            lead_id=lead.id,
+            step=step,
+            to_email=lead.email,
+            subject=lead.generated_email_subject,
+            body=lead.generated_email_body,
+            thread_id=lead.thread_id or f"th_{lead.id}_{int(datetime.now().timestamp())}"
+        ))
+
+        # 4. Throttle: within the send interval the relay delivers it once a slot is free
+        if not self.risk_control.reserve_send():
+            logger.info("Send interval not over; %s waits in the outbox", key)
+            # Never hand back a row another relay holds: the caller delivers 'sending' messages
+            return queued if queued and queued.status == "pending" else None
+
+        message = self.relay.claim(key)
+        if not message:
+            self.risk_control.release_send()
+            logger.warning("Outbox %s is already being delivered or settled. Not sending again.", key)
+        return message
+
+    @staticmethod
+    def _follow_up_due(lead, previous: Optional[OutboxMessage]) -> bool:
+        # New content (a redraft or the reviewer's edit), or the follow-up's scheduled time has come
+        if lead.next_scheduled_at is not None and lead.next_scheduled_at <= datetime.now():
+            return True
+        return previous is None or (lead.generated_email_subject, lead.generated_email_body) != (previous.subject, previous.body)
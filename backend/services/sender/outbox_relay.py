@@ -0,0 +1,170 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Optional
+from backend.core.config import config
+from backend.services.sender.providers.sendgrid_adapter import SendGridEmailProvider
+from backend.services.sender.risk_control import RiskController
+from backend.storage.base import BaseLeadStore
+from backend.storage.models import EmailInteraction, OutboxMessage
+from backend.utils.logger import setup_logger, log_context
+from backend.utils.metrics import RETRIES_TOTAL
+
+logger = setup_logger("OutboxRelay")
+
+
+class OutboxRelay:
+    """
+    Drains the send outbox: claims due messages under a lease, calls the provider with the
+    message's idempotency key and records the result in one transaction.
+    Any number of relays (threads, processes, nodes) can run against the same store;
+    claim_outbox hands each message to exactly one of them.
+    """
+    def __init__(self, db: BaseLeadStore, provider: SendGridEmailProvider = None, risk_control: RiskController = None):
+        self.db = db
+        self.provider = provider or SendGridEmailProvider()
+        self.risk_control = risk_control or RiskController(db)
+        self.batch_size = config.OUTBOX_BATCH_SIZE
+        self.lease_seconds = config.OUTBOX_LEASE_SECONDS
+        self.max_attempts = config.OUTBOX_MAX_ATTEMPTS
+        self.backoff_seconds = config.OUTBOX_RETRY_BACKOFF_SECONDS
+        self._executor = ThreadPoolExecutor(max_workers=config.OUTBOX_WORKERS, thread_name_prefix="outbox")
+        self._stop = threading.Event()
+        self._thread = None
+
+    def claim(self, key: str) -> Optional[OutboxMessage]:
+        """
+        Claims one specific message (the approve path delivers its own message right away).
+        """
+        claimed = self.db.claim_outbox(1, self.lease_seconds, key=key)
+        return claimed[0] if claimed else None
+
+    def deliver(self, message: OutboxMessage) -> Optional[EmailInteraction]:
+        with log_context(lead_id=message.lead_id, outbox_key=message.key):
+            try:
+                provider_msg_id = self.provider.send_email(
+                    to_email=message.to_email,
+                    subject=message.subject,
+                    content=message.body,
+                    idempotency_key=message.key
+                )
+            except Exception as e:
+                self._record_failure(message, e)
+                raise e
+            return self._record_success(message, provider_msg_id)
+
+    async def deliver_async(self, message: OutboxMessage, async_db) -> Optional[EmailInteraction]:
+        with log_context(lead_id=message.lead_id, outbox_key=message.key):
+            try:
+                provider_msg_id = await self.provider.send_email_async(
+                    to_email=message.to_email,
+                    subject=message.subject,
+                    content=message.body,
+                    idempotency_key=message.key
+                )
+            except Exception as e:
+                await async_db.run(self._record_failure, message, e)
+                raise e
+            return await async_db.run(self._record_success, message, provider_msg_id)
+
+    def drain(self) -> int:
+        """
+        One relay pass: parks expired leases, then claims and delivers a batch. Returns messages claimed.
+        With a send interval (SEND_MIN_INTERVAL_SECONDS) the batch is one message, and none while
+        the interval since the last send, here or on the approve path, is not over.
+        """
+        for message in self.db.expire_outbox_leases(requeue=config.OUTBOX_RETRY_UNCONFIRMED):
+            logger.warning("Outbox %s lease expired mid-send; marked %s", message.key,
+                           "pending" if config.OUTBOX_RETRY_UNCONFIRMED else "unconfirmed")
+
+        paced = self.risk_control.MIN_SECONDS_BETWEEN_SENDS > 0
+        if paced and not self.risk_control.reserve_send():
+            return 0
+        batch = self.db.claim_outbox(1 if paced else self.batch_size, self.lease_seconds)
+        if paced and not batch:
+            self.risk_control.release_send()
+        if batch:
+            list(self._executor.map(self._deliver_quietly, batch))
+        return len(batch)
+
+    def _deliver_quietly(self, message: OutboxMessage):
+        # Failures are already recorded on the outbox row by deliver()
+        try:
+            self.deliver(message)
+        except Exception:
+            pass
+
+    def _record_success(self, message: OutboxMessage, provider_msg_id: str) -> Optional[EmailInteraction]:
+        if not self.db.complete_outbox(message, provider_msg_id):
+            logger.warning("Outbox %s was already completed; ignoring provider ID %s", message.key, provider_msg_id)
+            return None
+        self.risk_control.record_send_success()
+        logger.info("Email sent successfully. ID: %s", provider_msg_id)
+        return self.interaction(message, provider_msg_id, datetime.now())
+
+    @staticmethod
+    def interaction(message: OutboxMessage, provider_msg_id: str = None, sent_at: datetime = None) -> EmailInteraction:
+        # A settled message as an EmailInteraction (also how an already-sent step is reported back)
+        return EmailInteraction(
+            lead_id=message.lead_id,
+            sent_at=sent_at or message.updated_at,
+            message_id=provider_msg_id or message.provider_message_id,
+            thread_id=message.thread_id,
+            subject=message.subject,
+            body=message.body
+        )
+
+    def _record_failure(self, message: OutboxMessage, error: Exception):
+        retry_at = None
+        if message.attempts < self.max_attempts:
+            retry_at = datetime.now() + timedelta(seconds=self.backoff_seconds * 2 ** (message.attempts - 1))
+            RETRIES_TOTAL.labels("outbox_send").inc()
+        logger.error("Failed to send email to %s (attempt %s/%s): %s",
+                     message.to_email, message.attempts, self.max_attempts, error)
+        self.db.fail_outbox(message, str(error), retry_at)
+
+    # --- Background loop ---
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run_forever, name="outbox-relay", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.lease_seconds)
+            self._thread = None
+        self._executor.shutdown(wait=True)
+
+    def run_forever(self):
+        logger.info("Outbox relay started (batch=%s, poll=%ss)", self.batch_size, config.OUTBOX_POLL_SECONDS)
+        while not self._stop.is_set():
+            try:
+                claimed = self.drain()
+            except Exception as e:
+                logger.error("Outbox relay pass failed: %s", e)
+                claimed = 0
+            # Keep draining while there is a backlog
+            if claimed < self.batch_size:
+                self._stop.wait(config.OUTBOX_POLL_SECONDS)
+
+
+if __name__ == "__main__":
+    # Standalone relay process: python -m backend.services.sender.outbox_relay [--once]
+    import argparse
+    from backend.core.container import get_container
+
+    parser = argparse.ArgumentParser(description="Drain the send outbox")
+    parser.add_argument("--once", action="store_true", help="run a single pass and exit")
+    args = parser.parse_args()
+
+    relay = get_container().outbox_relay
+    if args.once:
+        print(f"Claimed {relay.drain()} outbox messages")
+    else:
+        try:
+            relay.run_forever()
+        except KeyboardInterrupt:
+            pass
+    relay.stop()
@@ -1,7 +1,9 @@
 import os
-import sendgrid
-from sendgrid.helpers.mail import Mail, Email, To, Content
+import threading
+import time
+from backend.core.config import config
 from backend.utils.logger import setup_logger
+from backend.utils.metrics import PROVIDER_SEND_SECONDS
 
 logger = setup_logger("SendGridAdapter")
 
@@ -9,27 +11,57 @@ class SendGridEmailProvider:
     def __init__(self, api_key: str = None):
         self.api_key = api_key or os.getenv("SENDGRID_API_KEY")
         self.from_email = os.getenv("SENDGRID_FROM_EMAIL", "test@example.com")
-        
-        if self.api_key:
-            self.sg = sendgrid.SendGridAPIClient(api_key=self.api_key)
-        else:
-            self.sg = None
+        self._sg = None
+        self._http = None
+        self._lock = threading.Lock()
+
+        if not self.api_key:
             logger.warning("SENDGRID_API_KEY not set. Using Mock mode.")
 
-    def send_email(self, to_email: str, subject: str, content: str) -> str:
-        if not self.sg:
-            logger.info(f"[Mock SendGrid] Sending to {to_email} | Subject: {subject}")
+    @property
+    def sg(self):
+        # API client is built once, on the first real send
+        if self.api_key and self._sg is None:
+            with self._lock:
+                if self._sg is None:
+                    import sendgrid
+                    if config.SENDGRID_API_HOST:
+                        self._sg = sendgrid.SendGridAPIClient(api_key=self.api_key, host=config.SENDGRID_API_HOST)
+                    else:
+                        self._sg = sendgrid.SendGridAPIClient(api_key=self.api_key)
+        return self._sg
+
+    @property
+    def http(self):
+        # Shared async client (connection pool) for send_email_async
+        if self._http is None:
+            import httpx
+            self._http = httpx.AsyncClient(
+                base_url=config.SENDGRID_API_HOST or "https://api.sendgrid.com",
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=30.0
+            )
+        return self._http
+
+    def send_email(self, to_email: str, subject: str, content: str, idempotency_key: str = None) -> str:
+        if not self.api_key:
+            logger.info("[Mock SendGrid] Sending to %s | Subject: %s", to_email, subject)
+            PROVIDER_SEND_SECONDS.labels("sendgrid_mock", "ok").observe(0.0)
             return f"mock_sg_{to_email}"
 
+        start = time.perf_counter()
         try:
+            from sendgrid.helpers.mail import Mail, CustomArg
             message = Mail(
                 from_email=self.from_email,
                 to_emails=to_email,
                 subject=subject,
                 html_content=content
             )
-            # Add custom arguments to help tracking
-            message.custom_args = {"source": "ai_gtm_agent"}
+            # Add custom arguments to help tracking (echoed back by SendGrid event webhooks)
+            message.custom_arg = CustomArg("source", "ai_gtm_agent")
+            if idempotency_key:
+                message.custom_arg = CustomArg("idempotency_key", idempotency_key)
             
             response = self.sg.send(message)
             
@@ -38,9 +70,50 @@ class SendGridEmailProvider:
             # We can use the header or generate a reliable ID.
             provider_id = response.headers.get('X-Message-Id', f"sg_success_{to_email}")
             
-            logger.info(f"SendGrid sent email to {to_email}. Status: {response.status_code}")
+            logger.info("SendGrid sent email to %s. Status: %s", to_email, response.status_code)
+            PROVIDER_SEND_SECONDS.labels("sendgrid", "ok").observe(time.perf_counter() - start)
             return provider_id
             
         except Exception as e:
-            logger.error(f"SendGrid Error: {str(e)}")
+            PROVIDER_SEND_SECONDS.labels("sendgrid", "error").observe(time.perf_counter() - start)
+            logger.error("SendGrid Error: %s", str(e))
+            raise e
+
+    async def send_email_async(self, to_email: str, subject: str, content: str, idempotency_key: str = None) -> str:
+        """
+        Non-blocking variant of send_email for async handlers: posts the v3 mail/send payload via httpx.
+        """
+        if not self.api_key:
+            logger.info("[Mock SendGrid] Sending to %s | Subject: %s", to_email, subject)
+            PROVIDER_SEND_SECONDS.labels("sendgrid_mock", "ok").observe(0.0)
+            return f"mock_sg_{to_email}"
+
+        start = time.perf_counter()
+        try:
+            payload = {
+                "personalizations": [{"to": [{"email": to_email}]}],
+                "from": {"email": self.from_email},
+                "subject": subject,
+                "content": [{"type": "text/html", "value": content}],
+                "custom_args": {"source": "ai_gtm_agent"}
+            }
+            if idempotency_key:
+                payload["custom_args"]["idempotency_key"] = idempotency_key
+            response = await self.http.post("/v3/mail/send", json=payload)
+            response.raise_for_status()
+
+            provider_id = response.headers.get('X-Message-Id', f"sg_success_{to_email}")
+
+            logger.info("SendGrid sent email to %s. Status: %s", to_email, response.status_code)
+            PROVIDER_SEND_SECONDS.labels("sendgrid", "ok").observe(time.perf_counter() - start)
+            return provider_id
+
+        except Exception as e:
+            PROVIDER_SEND_SECONDS.labels("sendgrid", "error").observe(time.perf_counter() - start)
+            logger.error("SendGrid Error: %s", str(e))
             raise e
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
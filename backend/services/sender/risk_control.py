@@ -1,8 +1,12 @@
+import threading
 import time
 import re
 from datetime import datetime
-from backend.storage.db import LeadStore
+from backend.core.config import config
+from backend.storage.base import BaseLeadStore
+from backend.storage.lead_state import LeadState
 from backend.utils.logger import setup_logger
+from backend.utils.metrics import RISK_BLOCKS_TOTAL
 
 logger = setup_logger("RiskController")
 
@@ -10,11 +14,17 @@ class RiskController:
     """
     Handles Sending Risk Management: Caps, Throttling, and Blacklists.
     Now Campaign-aware.
+    can_send decides whether a lead may be sent at all; the send interval only decides when,
+    through reserve_send (one provider call per MIN_SECONDS_BETWEEN_SENDS).
     """
-    def __init__(self, db: LeadStore):
+    def __init__(self, db: BaseLeadStore, campaigns=None):
         self.db = db
-        self.MIN_SECONDS_BETWEEN_SENDS = 5 
+        # CampaignRegistry (cached configs); without one, campaigns are read per check
+        self.campaigns = campaigns
+        self.MIN_SECONDS_BETWEEN_SENDS = config.SEND_MIN_INTERVAL_SECONDS
         self.last_send_time = 0
+        self._reserved_from = 0
+        self._lock = threading.Lock()
 
     def can_send(self, lead_id: str) -> bool:
         lead = self.db.get_lead(lead_id)
@@ -22,45 +32,64 @@ class RiskController:
             return False
 
         # 0. Check Lead Status
-        if "stopped" in lead.status:
-            logger.warning(f"RiskControl: Lead {lead_id} is in stopped state: {lead.status}")
+        if lead.state == LeadState.STOPPED:
+            logger.warning("RiskControl: Lead %s is in stopped state: %s", lead_id, lead.status)
+            RISK_BLOCKS_TOTAL.labels("stopped").inc()
             return False
 
         # Get Campaign Config
-        campaign = self.db.get_campaign(lead.campaign_id)
+        campaign = self.campaigns.get(lead.campaign_id) if self.campaigns else self.db.get_campaign(lead.campaign_id)
+        if campaign and campaign.status != "active":
+            logger.warning("RiskControl: Campaign %s is %s", campaign.id, campaign.status)
+            RISK_BLOCKS_TOTAL.labels("campaign_inactive").inc()
+            return False
         if not campaign:
              # Default Fallback if no campaign found or default
-             campaign_limit = 50
+             campaign_limit = config.DEFAULT_DAILY_LIMIT
              blacklist = []
         else:
              campaign_limit = campaign.daily_limit
              blacklist = campaign.blacklist_domains
 
-        # 1. Check Global/Campaign Cap
-        metrics = self.db.get_todays_metrics()
-        if metrics.sent_count >= campaign_limit:
-            logger.warning(f"RiskControl: Daily Cap Reached ({metrics.sent_count}/{campaign_limit})")
+        # 1. Check Campaign Cap (each campaign spends its own daily_limit; the global count is only reported)
+        sent_today = self.db.get_campaign_sent_today(lead.campaign_id)
+        if sent_today >= campaign_limit:
+            logger.warning("RiskControl: Daily Cap Reached for campaign %s (%s/%s)",
+                           lead.campaign_id, sent_today, campaign_limit)
+            RISK_BLOCKS_TOTAL.labels("daily_cap").inc()
             return False
 
-        # 2. Check Throttling
-        current_time = time.time()
-        if current_time - self.last_send_time < self.MIN_SECONDS_BETWEEN_SENDS:
-            logger.warning(f"RiskControl: Throttling active. Wait.")
-            return False
-            
-        # 3. Check Blacklist
+        # 2. Check Blacklist
         if lead.email:
             domain = lead.email.split('@')[-1].lower()
             for blocked_domain in blacklist:
                 if blocked_domain.lower() in domain:
-                    logger.warning(f"RiskControl: Domain {domain} is blacklisted.")
+                    logger.warning("RiskControl: Domain %s is blacklisted.", domain)
                     self.db.log_event(lead_id, "SEND_BLOCKED", f"Blacklisted domain: {domain}")
                     # Auto stop
-                    self.db.update_lead_status(lead_id, "stopped_blacklist")
+                    self.db.transition_lead(lead_id, "stopped_blacklist", reason="blacklist")
+                    RISK_BLOCKS_TOTAL.labels("blacklist").inc()
                     return False
         
         return True
 
+    def reserve_send(self) -> bool:
+        """
+        Takes the next send slot if the send interval has passed since the last one; False means
+        throttled, and the message should wait in the outbox for the relay.
+        """
+        with self._lock:
+            current_time = time.time()
+            if current_time - self.last_send_time < self.MIN_SECONDS_BETWEEN_SENDS:
+                return False
+            self._reserved_from, self.last_send_time = self.last_send_time, current_time
+            return True
+
+    def release_send(self):
+        # Gives back a slot reserved for a message that could not be claimed after all
+        with self._lock:
+            self.last_send_time = self._reserved_from
+
     def record_send_success(self):
         self.last_send_time = time.time()
         self.db.increment_metric("sent_count")
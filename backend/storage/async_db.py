@@ -0,0 +1,76 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+from backend.storage.base import BaseLeadStore
+from backend.storage.models import Lead, LeadSummary, LeadTransition, DailyMetric, EventLog
+
+
+class AsyncLeadStore:
+    """
+    Async facade over a lead store for async route handlers.
+    Calls run on a small dedicated executor (one thread for sqlite's single connection,
+    pool-sized for Postgres), so the event loop never blocks on the database.
+    """
+    def __init__(self, store: BaseLeadStore, max_workers: int = 1):
+        self.store = store
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="leadstore")
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Runs any blocking callable that touches the store (agents, services) on the store executor.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    async def get_lead(self, lead_id: str) -> Optional[Lead]:
+        return await self.run(self.store.get_lead, lead_id)
+
+    async def get_lead_ids(self) -> List[str]:
+        return await self.run(self.store.get_lead_ids)
+
+    async def get_lead_summaries(self) -> List[LeadSummary]:
+        return await self.run(self.store.get_lead_summaries)
+
+    async def stream_lead_ids(self, chunk_rows: int = 1000) -> AsyncIterator[List[str]]:
+        async for page in self._pages(self.store.get_lead_ids_page, chunk_rows, lambda lead_id: lead_id):
+            yield page
+
+    async def stream_lead_summaries(self, chunk_rows: int = 1000) -> AsyncIterator[List[LeadSummary]]:
+        async for page in self._pages(self.store.get_lead_summaries_page, chunk_rows, lambda summary: summary.id):
+            yield page
+
+    async def _pages(self, fetch: Callable, chunk_rows: int, key: Callable) -> AsyncIterator[list]:
+        # Keyset pages, one executor call each: other store calls interleave between pages
+        after = None
+        while True:
+            page = await self.run(fetch, after, chunk_rows)
+            if page:
+                yield page
+            if len(page) < chunk_rows:
+                return
+            after = key(page[-1])
+
+    async def get_review_queue(self, status: str = "processed", limit: int = 50) -> List[LeadSummary]:
+        return await self.run(self.store.get_review_queue, status, limit)
+
+    async def update_lead(self, lead: Lead):
+        return await self.run(self.store.update_lead, lead)
+
+    async def log_event(self, lead_id: str, event_type: str, details: str, payload: Optional[Dict[str, Any]] = None):
+        return await self.run(self.store.log_event, lead_id, event_type, details, payload)
+
+    async def get_lead_logs(self, lead_id: str) -> List[EventLog]:
+        return await self.run(self.store.get_lead_logs, lead_id)
+
+    async def get_lead_transitions(self, lead_id: str) -> List[LeadTransition]:
+        return await self.run(self.store.get_lead_transitions, lead_id)
+
+    async def get_change_version(self) -> str:
+        return await self.run(self.store.get_change_version)
+
+    async def get_todays_metrics(self) -> DailyMetric:
+        return await self.run(self.store.get_todays_metrics)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,384 @@
+import random
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from backend.core.config import config
+from backend.storage.lead_state import LeadState
+from backend.storage.models import (
+    Account, Lead, LeadFilter, LeadSummary, LeadTransition, DailyMetric, Campaign, EventLog, OutboxMessage, DeliveryEvent,
+    ReplayCheckpoint
+)
+from backend.utils.metrics import RETRIES_TOTAL
+
+
+class LeadConflict(Exception):
+    """
+    update_lead lost a race: the lead was written by someone else since this copy was read.
+    """
+    def __init__(self, lead_id: str):
+        super().__init__(f"Lead {lead_id} was changed since it was read")
+        self.lead_id = lead_id
+
+
+class BaseLeadStore(ABC):
+    """
+    Storage interface for leads, campaigns, event logs and daily metrics.
+    Implementations: LeadStore (sqlite, single host) and PostgresLeadStore (shared by many nodes).
+    Reads return LeadRecord objects in LEAD_FIELDS order semantics.
+    Every lead write also stores leads.state (see lead_state) and logs state changes to lead_transitions.
+    """
+    # Number of callers that may safely use the store concurrently (sizes AsyncLeadStore's executor)
+    max_concurrency: int = 1
+
+    # --- Lead Methods ---
+    def add_lead(self, lead: Lead):
+        self.save_lead(lead)
+
+    @abstractmethod
+    def update_lead(self, lead: Lead):
+        """
+        Writes the fields of a lead read from the store that changed since it was read, only if the
+        stored version is still the one read (then bumps it); raises LeadConflict otherwise.
+        A Lead that was never read from the store is written whole, as save_lead does.
+        """
+
+    @abstractmethod
+    def update_leads(self, leads: Sequence[Lead]) -> List[str]:
+        """
+        update_lead for many leads in one transaction. A lead that conflicts is skipped, not the
+        batch: returns the ids of the conflicting leads, whose writes were rolled back.
+        """
+
+    def modify_lead(self, lead_id: str, mutate: Callable[[Lead], Optional[bool]], attempts: int = None) -> Optional[Lead]:
+        """
+        Read-modify-write with optimistic retries: `mutate` edits a freshly read lead in place
+        (returning False skips the write) and runs again on a fresh copy after each conflict.
+        Returns the lead, None if it does not exist; raises LeadConflict when every attempt lost.
+        """
+        attempts = attempts or config.LEAD_UPDATE_ATTEMPTS
+        for attempt in range(attempts):
+            lead = self.get_lead(lead_id)
+            if lead is None:
+                return None
+            if mutate(lead) is False:
+                return lead
+            try:
+                self.update_lead(lead)
+                return lead
+            except LeadConflict:
+                RETRIES_TOTAL.labels("lead_update").inc()
+                # Jittered, so writers that collided do not collide again in lockstep
+                time.sleep(random.uniform(0, min(0.005 * 2 ** attempt, 0.1)))
+        raise LeadConflict(lead_id)
+
+    @abstractmethod
+    def save_lead(self, lead: Lead):
+        """
+        Writes the whole record as given, whatever the stored version (overrides concurrent edits);
+        the state follows its status without a transition check. Sets lead.version to the new version.
+        """
+        ...
+
+    @abstractmethod
+    def bulk_add_leads(self, leads: Iterable[Lead]) -> int:
+        """
+        Inserts many new leads in one round trip; returns the number written.
+        """
+
+    @abstractmethod
+    def get_lead(self, lead_id: str) -> Optional[Lead]:
+        ...
+
+    @abstractmethod
+    def get_leads(self, lead_ids: Sequence[str]) -> List[Lead]:
+        """
+        The leads with these ids (missing ones are left out), in no particular order.
+        """
+
+    @abstractmethod
+    def get_all_leads(self) -> List[Lead]:
+        ...
+
+    @abstractmethod
+    def get_lead_ids(self) -> List[str]:
+        ...
+
+    @abstractmethod
+    def get_lead_summaries(self) -> List[LeadSummary]:
+        ...
+
+    @abstractmethod
+    def get_lead_ids_page(self, after_id: Optional[str] = None, limit: int = 1000,
+                          campaign_id: Optional[str] = None) -> List[str]:
+        """
+        Up to `limit` lead ids greater than `after_id`, in id order (keyset pagination),
+        optionally only the leads of one campaign.
+        """
+
+    @abstractmethod
+    def get_lead_summaries_page(self, after_id: Optional[str] = None, limit: int = 1000) -> List[LeadSummary]:
+        """
+        Up to `limit` lead summaries with id greater than `after_id`, in id order. Each page is
+        one short indexed query, so a long scan never holds a connection between pages.
+        """
+
+    @abstractmethod
+    def get_lead_by_thread_id(self, thread_id: str) -> Optional[Lead]:
+        ...
+
+    @abstractmethod
+    def get_lead_by_email(self, email: str) -> Optional[Lead]:
+        """
+        Most recently updated lead with this address (case-insensitive).
+        """
+        ...
+
+    @abstractmethod
+    def update_lead_status(self, lead_id: str, status: str):
+        """
+        Unconditional status write (operator override); use transition_lead for workflow moves.
+        """
+        ...
+
+    @abstractmethod
+    def transition_lead(self, lead_id: str, status: str, expected: Optional[str] = None,
+                        reason: Optional[str] = None) -> bool:
+        """
+        Compare-and-set move to `status`: applied only if the transition table allows it from the
+        lead's current state (and, with `expected`, only while its status is exactly that), and
+        logged to lead_transitions in the same transaction. False if the lead is missing, the move
+        is not allowed, or another writer changed the lead first.
+        """
+
+    @abstractmethod
+    def claim_leads(self, status: Union[str, LeadState], claimed_status: str, limit: int = 10) -> List[Lead]:
+        """
+        Atomically moves up to `limit` leads from `status` (an exact status, or every status of a
+        LeadState) to `claimed_status` and returns them, highest priority first. A lead is handed to
+        exactly one caller even when several workers claim concurrently. ValueError if the
+        transition table does not allow the move.
+        """
+
+    @abstractmethod
+    def release_lead_claims(self, claimed_status: str, released_status: str, older_than: datetime) -> List[Lead]:
+        """
+        Moves leads left in `claimed_status` since before `older_than` (their claim time is the
+        last write, updated_at) to `released_status` and returns them: claims of a worker that
+        crashed or was stopped mid-task. ValueError if the transition table does not allow the move.
+        """
+
+    @abstractmethod
+    def get_lead_transitions(self, lead_id: str) -> List[LeadTransition]:
+        """
+        State changes of the lead, oldest first.
+        """
+
+    # --- Prioritization (LeadScorer) ---
+    @abstractmethod
+    def get_review_queue(self, status: str = "processed", limit: int = 50) -> List[LeadSummary]:
+        """
+        Top `limit` leads in `status` by priority (unscored leads last), via the (status, priority) index.
+        """
+
+    @abstractmethod
+    def get_scoring_rows(self) -> List[tuple]:
+        """
+        (id, title, email, source, campaign_id, fit_score, priority) of every lead.
+        """
+
+    @abstractmethod
+    def get_reply_stats(self) -> List[Tuple[Optional[str], Optional[str], int, int]]:
+        """
+        (source, campaign_id, leads contacted, leads replied) per source and campaign.
+        """
+
+    @abstractmethod
+    def update_priorities(self, priorities: Iterable[Tuple[str, float]]) -> int:
+        """
+        Writes (lead_id, priority) pairs in one transaction; updated_at is left alone.
+        """
+
+    # --- Campaign Methods ---
+    @abstractmethod
+    def save_campaign(self, campaign: Campaign):
+        ...
+
+    @abstractmethod
+    def update_campaign(self, campaign: Campaign) -> bool:
+        """
+        Writes `campaign` only if the stored row is still at campaign.version - 1 (compare-and-set);
+        False when the campaign is missing or was updated concurrently.
+        """
+
+    @abstractmethod
+    def get_campaign(self, campaign_id: str) -> Optional[Campaign]:
+        ...
+
+    @abstractmethod
+    def get_campaigns(self) -> List[Campaign]:
+        ...
+
+    # --- Account Methods ---
+    @abstractmethod
+    def save_accounts(self, accounts: Iterable[Account]) -> int:
+        """
+        Inserts accounts that do not exist yet (ids are deterministic, so re-inserts are no-ops).
+        """
+
+    @abstractmethod
+    def get_account(self, account_id: str) -> Optional[Account]:
+        ...
+
+    @abstractmethod
+    def get_account_keys(self) -> List[Tuple[str, str, Optional[str]]]:
+        """
+        (id, name, domain) of every account; used to build the in-memory AccountIndex.
+        """
+
+    @abstractmethod
+    def set_account_domain(self, account_id: str, domain: str):
+        """
+        Records a corporate domain for an account that has none yet.
+        """
+
+    @abstractmethod
+    def update_account_enrichment(self, account_id: str, company_summary: str, product_summary: str,
+                                  fit_score: Optional[float] = None):
+        ...
+
+    # --- Event Log Methods ---
+    @abstractmethod
+    def log_event(self, lead_id: str, event_type: str, details: str, payload: Optional[Dict[str, Any]] = None):
+        """
+        Appends an event; `payload` is its structured data (JSON), e.g. the lead fields it set (lead_events).
+        """
+
+    @abstractmethod
+    def get_lead_logs(self, lead_id: str) -> List[EventLog]:
+        ...
+
+    @abstractmethod
+    def get_lead_events(self, lead_ids: Sequence[str]) -> List[EventLog]:
+        """
+        Events of these leads in log order (oldest first), for replaying them.
+        """
+
+    # --- Replay (backend.services.pipeline.replay) ---
+    @abstractmethod
+    def find_lead_ids(self, lead_filter: LeadFilter, after_id: Optional[str] = None, limit: int = 1000) -> List[str]:
+        """
+        Up to `limit` ids of leads matching the filter, greater than `after_id`, in id order.
+        """
+
+    @abstractmethod
+    def get_replay_checkpoint(self, name: str) -> Optional[ReplayCheckpoint]:
+        ...
+
+    @abstractmethod
+    def save_replay_checkpoint(self, checkpoint: ReplayCheckpoint):
+        """
+        Inserts or replaces the checkpoint of replay `checkpoint.name`.
+        """
+
+    # --- Outbox Methods (transactional send path) ---
+    @abstractmethod
+    def enqueue_send(self, lead: Lead, message: OutboxMessage) -> OutboxMessage:
+        """
+        In one transaction: saves the lead, inserts the outbox message and logs SEND_QUEUED.
+        Re-enqueueing an existing key never duplicates it; a pending or failed message gets the
+        new content and becomes pending again, any other state is left untouched.
+        """
+
+    @abstractmethod
+    def get_outbox_message(self, key: str) -> Optional[OutboxMessage]:
+        ...
+
+    @abstractmethod
+    def claim_outbox(self, limit: int, lease_seconds: float, key: str = None) -> List[OutboxMessage]:
+        """
+        Moves due pending messages (optionally just `key`) to sending under a lease and returns them.
+        Each message is handed to exactly one caller; follow-ups (step > 0) go before new outreach.
+        """
+
+    @abstractmethod
+    def complete_outbox(self, message: OutboxMessage, provider_message_id: str) -> bool:
+        """
+        In one transaction: marks the message sent, moves the lead to sent_step<n>, counts the send
+        against the lead's campaign for today and logs SEND_OK.
+        Returns False if the message was already completed elsewhere.
+        """
+
+    @abstractmethod
+    def fail_outbox(self, message: OutboxMessage, error: str, retry_at: Optional[datetime]) -> bool:
+        """
+        Returns the message to pending until retry_at, or marks it (and the lead) failed when retry_at is None.
+        """
+
+    @abstractmethod
+    def expire_outbox_leases(self, requeue: bool = False) -> List[OutboxMessage]:
+        """
+        Messages whose sender died mid-send. The provider may or may not have accepted them, so
+        they become unconfirmed (or pending again when requeue=True).
+        """
+
+    # --- Provider Delivery Events ---
+    @abstractmethod
+    def apply_delivery_events(self, events: List[DeliveryEvent]) -> Dict[str, int]:
+        """
+        Applies one webhook batch in a single transaction: skips event ids already seen, stops
+        leads on bounce / spam / unsubscribe, reconciles unconfirmed outbox sends on delivery,
+        logs ESP_<EVENT> events and bumps bounce_count once for the batch.
+        Returns counts: applied, duplicate, unmatched.
+        """
+
+    # --- Analytics Export ---
+    @abstractmethod
+    def open_snapshot(self, workdir: str = None):
+        """
+        Context manager yielding `execute(sql) -> cursor` on a consistent, read-only point-in-time
+        view of the store, for exports. Writers are not blocked while it is open. Cursors support
+        fetchmany(); sqlite copies the database into `workdir` (temp dir by default) first.
+        """
+
+    # --- Change Tracking ---
+    @abstractmethod
+    def get_change_version(self) -> str:
+        """
+        Opaque token that changes whenever a write to the store commits, from any process; equal
+        tokens mean nothing changed in between. Read it before the data it stands for (ETags).
+        """
+
+    # --- Metrics Methods ---
+    @abstractmethod
+    def get_todays_metrics(self) -> DailyMetric:
+        ...
+
+    @abstractmethod
+    def increment_metric(self, field: str):
+        ...
+
+    @abstractmethod
+    def get_campaign_sent_today(self, campaign_id: str) -> int:
+        """
+        Emails of this campaign sent today (counted by complete_outbox).
+        """
+
+    @abstractmethod
+    def close(self):
+        ...
+
+
+def open_lead_store(database_url: str = None, db_path: str = None) -> BaseLeadStore:
+    """
+    Picks the backend from DATABASE_URL: postgres:// / postgresql:// -> PostgresLeadStore,
+    anything else (or empty) -> sqlite LeadStore at db_path / DB_PATH.
+    """
+    from backend.core.config import config
+    database_url = config.DATABASE_URL if database_url is None else database_url
+    if database_url.startswith(("postgres://", "postgresql://")):
+        from backend.storage.postgres import PostgresLeadStore
+        return PostgresLeadStore(database_url)
+
+    from backend.storage.db import LeadStore
+    return LeadStore(db_path or config.DB_PATH)
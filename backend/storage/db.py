@@ -1,15 +1,193 @@
+import dataclasses
+import functools
+import os
 import sqlite3
 import json
-from datetime import datetime
-from typing import List, Optional, Dict
-from backend.storage.models import Lead, DailyMetric, Campaign, EventLog
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Dict, Sequence, Tuple, Union
+from backend.storage.base import BaseLeadStore, LeadConflict
+from backend.storage.lead_events import draft_payload, send_payload
+from backend.storage.lead_state import LeadState, can_transition, sources_of, state_case_sql, state_of
+from backend.storage.models import (
+    Account, Lead, LeadFilter, LeadRecord, LeadSummary, LeadTransition, DailyMetric, Campaign, EventLog, OutboxMessage,
+    DeliveryEvent, ReplayCheckpoint, LEAD_FIELDS, LEAD_WRITE_FIELDS, LEAD_SUMMARY_FIELDS, OUTBOX_FIELDS, DELIVERY_STOP_STATUSES
+)
 from backend.utils.logger import setup_logger
+from backend.utils.metrics import timed, DB_QUERY_SECONDS
 
 logger = setup_logger("LeadStore")
+# Per-event lines are high-frequency; sample them via LOG_SAMPLING="LeadStore.events=<rate>"
+event_logger = setup_logger("LeadStore.events")
 
-class LeadStore:
+LEAD_COLUMNS_SQL = ", ".join(LEAD_FIELDS)
+CLAIM_PRIORITY, CLAIM_CREATED_AT = LEAD_FIELDS.index("priority"), LEAD_FIELDS.index("created_at")
+LEAD_WRITE_COLUMNS_SQL = ", ".join(LEAD_WRITE_FIELDS)
+# Full-row upsert (save_lead): every column from the new row, the version bumped from the stored one
+LEAD_UPSERT_SET = ", ".join("version = leads.version + 1" if name == "version" else f"{name} = excluded.{name}"
+                            for name in LEAD_WRITE_FIELDS if name != "id")
+LEAD_SUMMARY_COLUMNS_SQL = ", ".join(LEAD_SUMMARY_FIELDS)
+OUTBOX_COLUMNS_SQL = ", ".join(OUTBOX_FIELDS)
+EVENT_COLUMNS_SQL = "id, lead_id, event_type, details, timestamp, payload"
+REPLAY_COLUMNS_SQL = "name, stages, lead_filter, after_id, counts, status, started_at, updated_at"
+
+# Datetime columns of the outbox table (stored as ISO text in sqlite)
+OUTBOX_DATETIME_FIELDS = ("available_at", "lease_until", "created_at", "updated_at")
+
+# Columns added after the first release: name -> DDL, applied once at startup
+LEAD_MIGRATIONS = {
+    "campaign_id": "TEXT DEFAULT 'default'",
+    "account_id": "TEXT",
+    "title": "TEXT",
+    "fit_score": "REAL",
+    "priority": "REAL",
+    "state": "SMALLINT",
+    "version": "INTEGER DEFAULT 1",
+}
+ACCOUNT_MIGRATIONS = {
+    "fit_score": "REAL",
+}
+CAMPAIGN_MIGRATIONS = {
+    "product_description": "TEXT",
+    "pipeline_workers": "INTEGER DEFAULT 0",
+    "version": "INTEGER DEFAULT 1",
+    "weight": "INTEGER DEFAULT 1",
+}
+EVENT_LOG_MIGRATIONS = {
+    "payload": "TEXT",
+}
+CAMPAIGN_COLUMNS_SQL = ("id, name, icp_description, email_template, blacklist_domains, daily_limit, status, "
+                        "created_at, product_description, pipeline_workers, version, weight")
+
+# Fills leads.state from status when the column is first added
+LEAD_STATE_BACKFILL_SQL = f"UPDATE leads SET state = {state_case_sql()} WHERE state IS NULL"
+
+
+def state_sources_sql(target: LeadState) -> str:
+    # "state IN (...)": the states allowed to move to `target`, for guarded UPDATEs
+    return f"state IN ({', '.join(str(int(state)) for state in sorted(sources_of(target)))})"
+
+
+def guarded_status_set(target: LeadState, placeholder: str = "?") -> str:
+    # SET clause moving status / state to `target` only from states allowed to reach it;
+    # the other columns of the UPDATE are written regardless
+    sources = state_sources_sql(target)
+    return (f"status = CASE WHEN {sources} THEN {placeholder} ELSE status END, "
+            f"state = CASE WHEN {sources} THEN {int(target)} ELSE state END")
+
+
+STOPPED_SOURCES = state_sources_sql(LeadState.STOPPED)
+SEND_FAILED_SOURCES = state_sources_sql(LeadState.SEND_FAILED)
+SENT_STATUS_SET = guarded_status_set(LeadState.SENT)
+# Lead states whose pending outbox messages are cancelled, not sent
+OUTBOX_CANCEL_STATES = (LeadState.STOPPED, LeadState.REPLIED)
+# A pending outbox row that must not be sent any more: its lead is no longer queued for that step
+# (replied, stopped, re-queued) or its campaign is not active
+OUTBOX_STALE_SQL = """(
+    NOT EXISTS (SELECT 1 FROM leads l WHERE l.id = outbox.lead_id AND l.status = 'queued_step' || outbox.step)
+    OR EXISTS (SELECT 1 FROM leads l JOIN campaigns c ON c.id = COALESCE(l.campaign_id, 'default')
+               WHERE l.id = outbox.lead_id AND c.status <> 'active')
+)"""
+
+
+def lead_filter_sql(lead_filter: LeadFilter, placeholder: str = "?") -> Tuple[str, list]:
+    """
+    WHERE clause over leads (and their event_logs) for a LeadFilter, with its parameters.
+    Times are passed as datetimes; sqlite callers encode them.
+    """
+    clauses, params = [], []
+    if lead_filter.campaign_id is not None:
+        # Leads stored without a campaign belong to the default one
+        clauses.append(f"COALESCE(campaign_id, 'default') = {placeholder}")
+        params.append(lead_filter.campaign_id)
+    if lead_filter.states:
+        clauses.append(f"state IN ({', '.join(str(int(state)) for state in lead_filter.states)})")
+    event_clauses = []
+    if lead_filter.event_types:
+        event_clauses.append(f"e.event_type IN ({', '.join([placeholder] * len(lead_filter.event_types))})")
+        params.extend(lead_filter.event_types)
+    if lead_filter.since is not None:
+        event_clauses.append(f"e.timestamp >= {placeholder}")
+        params.append(lead_filter.since)
+    if lead_filter.until is not None:
+        event_clauses.append(f"e.timestamp < {placeholder}")
+        params.append(lead_filter.until)
+    if event_clauses:
+        # One probe of the (lead_id, timestamp) index per candidate lead
+        clauses.append(f"EXISTS (SELECT 1 FROM event_logs e WHERE e.lead_id = leads.id AND {' AND '.join(event_clauses)})")
+    return " AND ".join(clauses) or "1 = 1", params
+
+
+def lead_filter_to_json(lead_filter: LeadFilter) -> str:
+    values = dataclasses.asdict(lead_filter)
+    for name in ("since", "until"):
+        if values[name] is not None:
+            values[name] = values[name].isoformat()
+    return json.dumps(values)
+
+
+def lead_filter_from_json(raw: str) -> LeadFilter:
+    values = json.loads(raw)
+    for name in ("since", "until"):
+        if values.get(name):
+            values[name] = datetime.fromisoformat(values[name])
+    return LeadFilter(**values)
+
+
+def lead_to_row(lead) -> tuple:
+    """
+    Encodes a Lead / LeadRecord into a tuple in LEAD_WRITE_FIELDS order (updated_at is set to now,
+    state is derived from status).
+    """
+    row = []
+    for name in LEAD_WRITE_FIELDS:
+        if name == "updated_at":
+            value = datetime.now().isoformat()
+        elif name == "metadata":
+            value = json.dumps(lead.metadata)
+        elif name == "state":
+            value = int(lead.state)
+        else:
+            value = getattr(lead, name)
+            if isinstance(value, datetime):
+                value = value.isoformat()
+        row.append(value)
+    return tuple(row)
+
+def outbox_to_row(message: OutboxMessage) -> tuple:
+    return tuple(
+        value.isoformat() if isinstance(value, datetime) else value
+        for value in (getattr(message, name) for name in OUTBOX_FIELDS)
+    )
+
+def row_to_outbox(row) -> OutboxMessage:
+    values = dict(zip(OUTBOX_FIELDS, row))
+    for name in OUTBOX_DATETIME_FIELDS:
+        if isinstance(values[name], str):
+            values[name] = datetime.fromisoformat(values[name])
+    return OutboxMessage(**values)
+
+def synchronized(fn):
+    # The sqlite connection is shared across threads; one statement + commit at a time
+    @functools.wraps(fn)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return fn(self, *args, **kwargs)
+    return wrapper
+
+class LeadStore(BaseLeadStore):
+    """
+    SQLite implementation of BaseLeadStore: one local file, one shared connection.
+    """
     def __init__(self, db_path="gtm_agent.db"):
         self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.RLock()
+        # Change versions restart with the connection; the epoch keeps them unique across restarts
+        self._epoch = uuid.uuid4().hex[:8]
         self._init_db()
 
     def _init_db(self):
@@ -37,7 +215,27 @@ class LeadStore:
                 metadata TEXT,
                 created_at TEXT,
                 updated_at TEXT,
-                campaign_id TEXT DEFAULT 'default'
+                campaign_id TEXT DEFAULT 'default',
+                account_id TEXT,
+                title TEXT,
+                fit_score REAL,
+                priority REAL,
+                state SMALLINT,
+                version INTEGER DEFAULT 1
+            )
+        ''')
+
+        # Accounts Table (one row per resolved company)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS accounts (
+                id TEXT PRIMARY KEY,
+                name TEXT,
+                domain TEXT,
+                company_summary TEXT,
+                product_summary TEXT,
+                fit_score REAL,
+                enriched_at TEXT,
+                created_at TEXT
             )
         ''')
         
@@ -62,7 +260,21 @@ class LeadStore:
                 blacklist_domains TEXT,
                 daily_limit INTEGER,
                 status TEXT,
-                created_at TEXT
+                created_at TEXT,
+                product_description TEXT,
+                pipeline_workers INTEGER DEFAULT 0,
+                version INTEGER DEFAULT 1,
+                weight INTEGER DEFAULT 1
+            )
+        ''')
+
+        # Per-campaign daily send counts (each campaign's daily_limit)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS campaign_metrics (
+                campaign_id TEXT,
+                date TEXT,
+                sent_count INTEGER DEFAULT 0,
+                PRIMARY KEY (campaign_id, date)
             )
         ''')
 
@@ -73,125 +285,831 @@ class LeadStore:
                 lead_id TEXT,
                 event_type TEXT,
                 details TEXT,
-                timestamp TEXT
+                timestamp TEXT,
+                payload TEXT
             )
         ''')
-        
+
+        # Progress of named replays (resumable reprocessing jobs)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS replay_checkpoints (
+                name TEXT PRIMARY KEY,
+                stages TEXT,
+                lead_filter TEXT,
+                after_id TEXT,
+                counts TEXT,
+                status TEXT,
+                started_at TEXT,
+                updated_at TEXT
+            )
+        ''')
+
+        # State changes of leads after creation (see lead_state)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS lead_transitions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                lead_id TEXT,
+                from_state SMALLINT,
+                to_state SMALLINT,
+                status TEXT,
+                reason TEXT,
+                created_at TEXT
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_lead_transitions_lead_id ON lead_transitions (lead_id)')
+
+        # Outbox Table (one row per lead + step; key is the idempotency key)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS outbox (
+                key TEXT PRIMARY KEY,
+                lead_id TEXT,
+                step INTEGER,
+                to_email TEXT,
+                subject TEXT,
+                body TEXT,
+                thread_id TEXT,
+                status TEXT,
+                attempts INTEGER DEFAULT 0,
+                provider_message_id TEXT,
+                last_error TEXT,
+                available_at TEXT,
+                lease_until TEXT,
+                created_at TEXT,
+                updated_at TEXT
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_outbox_status ON outbox (status, available_at)')
+
+        # Provider webhook events already applied (dedupes webhook retries)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS delivery_events (
+                event_id TEXT PRIMARY KEY,
+                event_type TEXT,
+                lead_id TEXT,
+                received_at TEXT
+            )
+        ''')
+
+        if "state" in self._migrate_columns(cursor, "leads", LEAD_MIGRATIONS):
+            cursor.execute(LEAD_STATE_BACKFILL_SQL)
+            logger.info("Backfilled leads.state for %s leads", cursor.rowcount)
+        self._migrate_columns(cursor, "accounts", ACCOUNT_MIGRATIONS)
+        self._migrate_columns(cursor, "campaigns", CAMPAIGN_MIGRATIONS)
+        self._migrate_columns(cursor, "event_logs", EVENT_LOG_MIGRATIONS)
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_event_logs_lead_id ON event_logs (lead_id, timestamp)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_leads_status ON leads (status)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_leads_last_message_id ON leads (last_message_id)')
+        # Reply routing: every mailbox listener resolves inbound mail through these two
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_leads_thread_id ON leads (thread_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_leads_email ON leads (lower(email))')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_leads_account_id ON leads (account_id)')
+        # Review queue / claim order: top-N of a status without sorting the table
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_leads_queue ON leads (status, priority DESC)')
+        # Same for claims by state (every sent_step<n>, every replied_<label>)
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_leads_state ON leads (state, priority DESC)')
         self.conn.commit()
 
-    # --- Lead Methods ---
+    def _migrate_columns(self, cursor, table: str, columns: Dict[str, str]) -> List[str]:
+        existing = {row[1] for row in cursor.execute(f'PRAGMA table_info({table})')}
+        added = []
+        for name, ddl in columns.items():
+            if name not in existing:
+                cursor.execute(f'ALTER TABLE {table} ADD COLUMN {name} {ddl}')
+                logger.info("Migrated %s: added column %s", table, name)
+                added.append(name)
+        return added
 
-    def add_lead(self, lead: Lead):
-        self.save_lead(lead)
+    # --- Lead Methods ---
+    @timed(DB_QUERY_SECONDS, "save_lead")
+    @synchronized
+    def save_lead(self, lead: Lead):
+        with self.conn:
+            version = self._upsert_lead(self.conn.cursor(), lead, "save")
+        self._saved(lead, version)
 
+    @timed(DB_QUERY_SECONDS, "update_lead")
+    @synchronized
     def update_lead(self, lead: Lead):
-        self.save_lead(lead)
+        if not isinstance(lead, LeadRecord):
+            # Not read from the store: nothing to compare against, write it whole
+            return self.save_lead(lead)
+        now = datetime.now()
+        with self.conn:
+            if not self._update_changed(self.conn.cursor(), lead, "update", now):
+                return
+        lead.mark_saved(lead.version + 1, now)
 
-    def save_lead(self, lead: Lead):
+    @timed(DB_QUERY_SECONDS, "update_leads")
+    @synchronized
+    def update_leads(self, leads: Sequence[Lead]) -> List[str]:
+        now = datetime.now()
+        written, conflicts = [], []
+        with self.conn:
+            cursor = self.conn.cursor()
+            # Write lock up front, and an outer transaction so releasing a savepoint does not commit
+            cursor.execute('BEGIN IMMEDIATE')
+            for lead in leads:
+                if not isinstance(lead, LeadRecord):
+                    written.append((lead, self._upsert_lead(cursor, lead, "update")))
+                    continue
+                cursor.execute('SAVEPOINT lead_update')
+                try:
+                    if self._update_changed(cursor, lead, "update", now):
+                        written.append((lead, None))
+                except LeadConflict:
+                    cursor.execute('ROLLBACK TO lead_update')
+                    conflicts.append(lead.id)
+                cursor.execute('RELEASE lead_update')
+        for lead, version in written:
+            if version is None:
+                lead.mark_saved(lead.version + 1, now)
+            else:
+                self._saved(lead, version)
+        return conflicts
+
+    def _upsert_lead(self, cursor, lead: Lead, reason: str) -> int:
+        # Whole row, whatever the stored version; returns the version written
+        self._record_transition(cursor, lead.id, lead.status, reason)
+        # Missing columns on old DBs are added once in _init_db (_migrate_columns)
+        return cursor.execute(f'''
+            INSERT INTO leads ({LEAD_WRITE_COLUMNS_SQL})
+            VALUES ({", ".join("?" * len(LEAD_WRITE_FIELDS))})
+            ON CONFLICT (id) DO UPDATE SET {LEAD_UPSERT_SET}
+            RETURNING version
+        ''', lead_to_row(lead)).fetchone()[0]
+
+    def _update_changed(self, cursor, lead: LeadRecord, reason: str, now: datetime) -> bool:
+        # Only the changed columns, only if nobody wrote the lead since it was read. Raises
+        # LeadConflict (the caller's transaction then rolls back); False if nothing changed.
+        changes = lead.changes()
+        if not changes:
+            return False
+        if "status" in changes:
+            self._record_transition(cursor, lead.id, lead.status, reason)
+            changes["state"] = int(lead.state)
+        for name, value in changes.items():
+            if name == "metadata":
+                changes[name] = json.dumps(value)
+            elif isinstance(value, datetime):
+                changes[name] = value.isoformat()
+        assignments = ", ".join(f"{name} = ?" for name in changes)
+        cursor.execute(f'UPDATE leads SET {assignments}, version = version + 1, updated_at = ? WHERE id = ? AND version = ?',
+                       (*changes.values(), now.isoformat(), lead.id, lead.version))
+        if cursor.rowcount == 0:
+            raise LeadConflict(lead.id)
+        return True
+
+    def _saved(self, lead: Lead, version: int):
+        if isinstance(lead, LeadRecord):
+            lead.mark_saved(version)
+        else:
+            lead.version = version
+
+    @timed(DB_QUERY_SECONDS, "bulk_add_leads")
+    @synchronized
+    def bulk_add_leads(self, leads: Iterable[Lead]) -> int:
         cursor = self.conn.cursor()
-        # Ensure we handle the new campaign_id column if it didn't exist in old DBs (migration hack)
-        # For this demo, assuming we just re-create DB or it's fine.
-        # Actually sqlite doesn't throw if col missing in INSERT unless specified.
-        # But safest is to DROP table or use ALTER in production.
-        # Here we rely on "CREATE IF NOT EXISTS".
-        
-        # Check if column exists, if not add it (Simple Migration)
-        try:
-            cursor.execute('SELECT campaign_id FROM leads LIMIT 1')
-        except sqlite3.OperationalError:
-            cursor.execute('ALTER TABLE leads ADD COLUMN campaign_id TEXT DEFAULT "default"')
-            self.conn.commit()
-            
-        cursor.execute('''
-            INSERT OR REPLACE INTO leads (
-                id, source, name, company_name, email, linkedin_url, status,
-                company_summary, product_summary, generated_email_subject,
-                generated_email_body, send_count, last_sent_at, next_scheduled_at,
-                last_message_id, thread_id, metadata, created_at, updated_at, campaign_id
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            lead.id, lead.source, lead.name, lead.company_name, lead.email,
-            lead.linkedin_url, lead.status, lead.company_summary,
-            lead.product_summary, lead.generated_email_subject,
-            lead.generated_email_body, lead.send_count,
-            lead.last_sent_at.isoformat() if lead.last_sent_at else None,
-            lead.next_scheduled_at.isoformat() if lead.next_scheduled_at else None,
-            lead.last_message_id, lead.thread_id,
-            json.dumps(lead.metadata),
-            lead.created_at.isoformat(), datetime.now().isoformat(),
-            lead.campaign_id
-        ))
+        cursor.executemany(f'''
+            INSERT INTO leads ({LEAD_WRITE_COLUMNS_SQL})
+            VALUES ({", ".join("?" * len(LEAD_WRITE_FIELDS))})
+        ''', (lead_to_row(lead) for lead in leads))
         self.conn.commit()
+        return cursor.rowcount
 
+    @timed(DB_QUERY_SECONDS, "get_lead")
+    @synchronized
     def get_lead(self, lead_id: str) -> Optional[Lead]:
         cursor = self.conn.cursor()
-        try:
-            # Need to handle potential missing column if migrating on the fly without restart
-            cursor.execute('SELECT * FROM leads WHERE id = ?', (lead_id,))
-        except Exception:
-             return None 
-             
+        cursor.execute(f'SELECT {LEAD_COLUMNS_SQL} FROM leads WHERE id = ?', (lead_id,))
         row = cursor.fetchone()
         if row:
             return self._row_to_lead(row)
         return None
 
+    @timed(DB_QUERY_SECONDS, "get_leads")
+    @synchronized
+    def get_leads(self, lead_ids: Sequence[str]) -> List[Lead]:
+        leads = []
+        lead_ids = list(lead_ids)
+        # Kept well under SQLITE_MAX_VARIABLE_NUMBER (999 on older builds)
+        for start in range(0, len(lead_ids), 500):
+            batch = lead_ids[start:start + 500]
+            cursor = self.conn.execute(
+                f'SELECT {LEAD_COLUMNS_SQL} FROM leads WHERE id IN ({", ".join("?" * len(batch))})', batch)
+            leads.extend(self._row_to_lead(row) for row in cursor.fetchall())
+        return leads
+
+    @timed(DB_QUERY_SECONDS, "get_all_leads")
+    @synchronized
     def get_all_leads(self) -> List[Lead]:
         cursor = self.conn.cursor()
-        cursor.execute('SELECT * FROM leads')
+        cursor.execute(f'SELECT {LEAD_COLUMNS_SQL} FROM leads')
         rows = cursor.fetchall()
         return [self._row_to_lead(row) for row in rows]
 
-    def update_lead_status(self, lead_id: str, status: str):
+    # --- Projections (no Lead objects, no JSON / datetime decoding) ---
+    @timed(DB_QUERY_SECONDS, "get_lead_ids")
+    @synchronized
+    def get_lead_ids(self) -> List[str]:
         cursor = self.conn.cursor()
-        cursor.execute('UPDATE leads SET status = ?, updated_at = ? WHERE id = ?', 
-                       (status, datetime.now().isoformat(), lead_id))
-        self.conn.commit()
+        cursor.execute('SELECT id FROM leads')
+        return [row[0] for row in cursor.fetchall()]
+
+    @timed(DB_QUERY_SECONDS, "get_lead_summaries")
+    @synchronized
+    def get_lead_summaries(self) -> List[LeadSummary]:
+        cursor = self.conn.cursor()
+        cursor.execute(f'SELECT {LEAD_SUMMARY_COLUMNS_SQL} FROM leads')
+        return list(map(LeadSummary._make, cursor.fetchall()))
+
+    @timed(DB_QUERY_SECONDS, "get_lead_ids_page")
+    @synchronized
+    def get_lead_ids_page(self, after_id: Optional[str] = None, limit: int = 1000,
+                          campaign_id: Optional[str] = None) -> List[str]:
+        cursor = self.conn.cursor()
+        if campaign_id is None:
+            cursor.execute('SELECT id FROM leads WHERE id > ? ORDER BY id LIMIT ?', (after_id or "", limit))
+        else:
+            # Leads stored without a campaign belong to the default one
+            cursor.execute("SELECT id FROM leads WHERE id > ? AND COALESCE(campaign_id, 'default') = ? ORDER BY id LIMIT ?",
+                           (after_id or "", campaign_id, limit))
+        return [row[0] for row in cursor.fetchall()]
+
+    @timed(DB_QUERY_SECONDS, "get_lead_summaries_page")
+    @synchronized
+    def get_lead_summaries_page(self, after_id: Optional[str] = None, limit: int = 1000) -> List[LeadSummary]:
+        cursor = self.conn.cursor()
+        cursor.execute(f'SELECT {LEAD_SUMMARY_COLUMNS_SQL} FROM leads WHERE id > ? ORDER BY id LIMIT ?',
+                       (after_id or "", limit))
+        return list(map(LeadSummary._make, cursor.fetchall()))
+
+    @timed(DB_QUERY_SECONDS, "update_lead_status")
+    @synchronized
+    def update_lead_status(self, lead_id: str, status: str):
+        with self.conn:
+            cursor = self.conn.cursor()
+            self._record_transition(cursor, lead_id, status, "set")
+            cursor.execute('UPDATE leads SET status = ?, state = ?, version = version + 1, updated_at = ? WHERE id = ?',
+                           (status, int(state_of(status)), datetime.now().isoformat(), lead_id))
+
+    @timed(DB_QUERY_SECONDS, "transition_lead")
+    @synchronized
+    def transition_lead(self, lead_id: str, status: str, expected: Optional[str] = None,
+                        reason: Optional[str] = None) -> bool:
+        target = state_of(status)
+        now = datetime.now().isoformat()
+        with self.conn:
+            cursor = self.conn.cursor()
+            row = cursor.execute('SELECT state, status FROM leads WHERE id = ?', (lead_id,)).fetchone()
+            if row is None or row[0] is None or not can_transition(LeadState(row[0]), target):
+                return False
+            if expected is not None and row[1] != expected:
+                return False
+            # Compare-and-set on what was read: another process may have moved it since
+            cursor.execute('UPDATE leads SET status = ?, state = ?, version = version + 1, updated_at = ? WHERE id = ? AND state = ? AND status = ?',
+                           (status, int(target), now, lead_id, row[0], row[1]))
+            if cursor.rowcount == 0:
+                return False
+            cursor.execute('''
+                INSERT INTO lead_transitions (lead_id, from_state, to_state, status, reason, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (lead_id, row[0], int(target), status, reason, now))
+            if target in OUTBOX_CANCEL_STATES:
+                self._cancel_outbox(cursor, lead_id, status)
+        return True
+
+    @timed(DB_QUERY_SECONDS, "claim_leads")
+    @synchronized
+    def claim_leads(self, status: Union[str, LeadState], claimed_status: str, limit: int = 10) -> List[Lead]:
+        source = status if isinstance(status, LeadState) else state_of(status)
+        target = state_of(claimed_status)
+        if not can_transition(source, target):
+            raise ValueError(f"Leads cannot move from {source.label} to {target.label}")
+        where = "state = ?" if isinstance(status, LeadState) else "status = ?"
+        now = datetime.now().isoformat()
+        with self.conn:
+            cursor = self.conn.cursor()
+            # Single UPDATE ... RETURNING statement, so a lead is claimed by one caller only
+            cursor.execute(f'''
+                UPDATE leads SET status = ?, state = ?, version = version + 1, updated_at = ?
+                WHERE id IN (SELECT id FROM leads WHERE {where} ORDER BY priority DESC, created_at LIMIT ?)
+                RETURNING {LEAD_COLUMNS_SQL}
+            ''', (claimed_status, int(target), now, int(status) if where == "state = ?" else status, limit))
+            # RETURNING keeps no order: highest priority first again, unscored last, then oldest
+            rows = sorted(cursor.fetchall(), key=lambda row: (row[CLAIM_PRIORITY] is None, -(row[CLAIM_PRIORITY] or 0),
+                                                               row[CLAIM_CREATED_AT]))
+            cursor.executemany('''
+                INSERT INTO lead_transitions (lead_id, from_state, to_state, status, reason, created_at)
+                VALUES (?, ?, ?, ?, 'claim', ?)
+            ''', [(row[0], int(source), int(target), claimed_status, now) for row in rows])
+        return [self._row_to_lead(row) for row in rows]
+
+    @timed(DB_QUERY_SECONDS, "release_lead_claims")
+    @synchronized
+    def release_lead_claims(self, claimed_status: str, released_status: str, older_than: datetime) -> List[Lead]:
+        source, target = state_of(claimed_status), state_of(released_status)
+        if not can_transition(source, target):
+            raise ValueError(f"Leads cannot move from {source.label} to {target.label}")
+        now = datetime.now().isoformat()
+        with self.conn:
+            cursor = self.conn.cursor()
+            cursor.execute(f'''
+                UPDATE leads SET status = ?, state = ?, version = version + 1, updated_at = ?
+                WHERE status = ? AND updated_at < ?
+                RETURNING {LEAD_COLUMNS_SQL}
+            ''', (released_status, int(target), now, claimed_status, older_than.isoformat()))
+            rows = cursor.fetchall()
+            cursor.executemany('''
+                INSERT INTO lead_transitions (lead_id, from_state, to_state, status, reason, created_at)
+                VALUES (?, ?, ?, ?, 'claim_expired', ?)
+            ''', [(row[0], int(source), int(target), released_status, now) for row in rows])
+        return [self._row_to_lead(row) for row in rows]
+
+    @timed(DB_QUERY_SECONDS, "get_lead_transitions")
+    @synchronized
+    def get_lead_transitions(self, lead_id: str) -> List[LeadTransition]:
+        rows = self.conn.execute('''
+            SELECT id, lead_id, from_state, to_state, status, reason, created_at
+            FROM lead_transitions WHERE lead_id = ? ORDER BY id
+        ''', (lead_id,)).fetchall()
+        return [LeadTransition(id=row[0], lead_id=row[1], from_state=None if row[2] is None else LeadState(row[2]),
+                               to_state=LeadState(row[3]), status=row[4], reason=row[5],
+                               created_at=datetime.fromisoformat(row[6])) for row in rows]
+
+    def _record_transition(self, cursor, lead_id: str, status: str, reason: str, guarded: bool = False):
+        # Logs the move to `status` if it changes the stored state (caller writes the lead next, in the
+        # same transaction); guarded: only from states allowed to reach it, matching a guarded UPDATE
+        target = state_of(status)
+        condition = state_sources_sql(target) if guarded else f"state IS NOT {int(target)}"
+        cursor.execute(f'''
+            INSERT INTO lead_transitions (lead_id, from_state, to_state, status, reason, created_at)
+            SELECT id, state, ?, ?, ?, ? FROM leads WHERE id = ? AND {condition}
+        ''', (int(target), status, reason, datetime.now().isoformat(), lead_id))
+        if target in OUTBOX_CANCEL_STATES:
+            self._cancel_outbox(cursor, lead_id, status)
+
+    def _cancel_outbox(self, cursor, lead_id: str, status: str):
+        # Queued messages of a lead that replied or was stopped are settled without sending
+        rows = cursor.execute('''
+            UPDATE outbox SET status = 'cancelled', last_error = ?, lease_until = NULL, updated_at = ?
+            WHERE lead_id = ? AND status = 'pending'
+            RETURNING key
+        ''', (f"lead {status}", datetime.now().isoformat(), lead_id)).fetchall()
+        for (key,) in rows:
+            self._insert_event(cursor, lead_id, "SEND_CANCELLED", f"Outbox key: {key}, lead {status}")
+
+    # --- Prioritization ---
+    @timed(DB_QUERY_SECONDS, "get_review_queue")
+    @synchronized
+    def get_review_queue(self, status: str = "processed", limit: int = 50) -> List[LeadSummary]:
+        # sqlite sorts NULL lowest, so unscored leads come last
+        rows = self.conn.execute(
+            f'SELECT {LEAD_SUMMARY_COLUMNS_SQL} FROM leads WHERE status = ? ORDER BY priority DESC LIMIT ?',
+            (status, limit)
+        ).fetchall()
+        return list(map(LeadSummary._make, rows))
+
+    @timed(DB_QUERY_SECONDS, "get_scoring_rows")
+    @synchronized
+    def get_scoring_rows(self) -> List[tuple]:
+        return self.conn.execute('SELECT id, title, email, source, campaign_id, fit_score, priority FROM leads').fetchall()
+
+    @timed(DB_QUERY_SECONDS, "get_reply_stats")
+    @synchronized
+    def get_reply_stats(self) -> List[Tuple[Optional[str], Optional[str], int, int]]:
+        return self.conn.execute(f'''
+            SELECT source, campaign_id,
+                   SUM(CASE WHEN send_count > 0 THEN 1 ELSE 0 END),
+                   SUM(CASE WHEN state = {int(LeadState.REPLIED)} THEN 1 ELSE 0 END)
+            FROM leads GROUP BY source, campaign_id
+        ''').fetchall()
+
+    @timed(DB_QUERY_SECONDS, "update_priorities")
+    @synchronized
+    def update_priorities(self, priorities: Iterable[Tuple[str, float]]) -> int:
+        with self.conn:
+            cursor = self.conn.executemany('UPDATE leads SET priority = ? WHERE id = ?',
+                                           ((priority, lead_id) for lead_id, priority in priorities))
+        return cursor.rowcount
 
     # --- Campaign Methods ---
+    @timed(DB_QUERY_SECONDS, "save_campaign")
+    @synchronized
     def save_campaign(self, campaign: Campaign):
         cursor = self.conn.cursor()
+        cursor.execute(f'''
+            INSERT OR REPLACE INTO campaigns ({CAMPAIGN_COLUMNS_SQL}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', self._campaign_row(campaign))
+        self.conn.commit()
+
+    @timed(DB_QUERY_SECONDS, "update_campaign")
+    @synchronized
+    def update_campaign(self, campaign: Campaign) -> bool:
+        cursor = self.conn.cursor()
+        row = self._campaign_row(campaign)
         cursor.execute('''
-            INSERT OR REPLACE INTO campaigns (
-                id, name, icp_description, email_template, blacklist_domains,
-                daily_limit, status, created_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            campaign.id, campaign.name, campaign.icp_description, campaign.email_template,
-            json.dumps(campaign.blacklist_domains), campaign.daily_limit,
-            campaign.status, campaign.created_at.isoformat()
-        ))
+            UPDATE campaigns SET name = ?, icp_description = ?, email_template = ?, blacklist_domains = ?,
+                daily_limit = ?, status = ?, created_at = ?, product_description = ?, pipeline_workers = ?, version = ?,
+                weight = ?
+            WHERE id = ? AND version = ?
+        ''', row[1:] + (campaign.id, campaign.version - 1))
         self.conn.commit()
+        return cursor.rowcount == 1
 
+    @timed(DB_QUERY_SECONDS, "get_campaign")
+    @synchronized
     def get_campaign(self, campaign_id: str) -> Optional[Campaign]:
         cursor = self.conn.cursor()
-        cursor.execute('SELECT * FROM campaigns WHERE id = ?', (campaign_id,))
+        cursor.execute(f'SELECT {CAMPAIGN_COLUMNS_SQL} FROM campaigns WHERE id = ?', (campaign_id,))
         row = cursor.fetchone()
+        return self._row_to_campaign(row) if row else None
+
+    @timed(DB_QUERY_SECONDS, "get_campaigns")
+    @synchronized
+    def get_campaigns(self) -> List[Campaign]:
+        cursor = self.conn.cursor()
+        cursor.execute(f'SELECT {CAMPAIGN_COLUMNS_SQL} FROM campaigns ORDER BY created_at')
+        return [self._row_to_campaign(row) for row in cursor.fetchall()]
+
+    def _campaign_row(self, campaign: Campaign) -> tuple:
+        return (
+            campaign.id, campaign.name, campaign.icp_description, campaign.email_template,
+            json.dumps(campaign.blacklist_domains), campaign.daily_limit, campaign.status,
+            campaign.created_at.isoformat(), campaign.product_description, campaign.pipeline_workers, campaign.version,
+            campaign.weight
+        )
+
+    def _row_to_campaign(self, row) -> Campaign:
+        return Campaign(
+            id=row[0], name=row[1], icp_description=row[2], email_template=row[3],
+            blacklist_domains=json.loads(row[4]), daily_limit=row[5], status=row[6],
+            created_at=datetime.fromisoformat(row[7]), product_description=row[8],
+            pipeline_workers=row[9] or 0, version=row[10] or 1, weight=row[11] or 1
+        )
+
+    # --- Account Methods ---
+    @timed(DB_QUERY_SECONDS, "save_accounts")
+    @synchronized
+    def save_accounts(self, accounts: Iterable[Account]) -> int:
+        rows = [(
+            a.id, a.name, a.domain, a.company_summary, a.product_summary, a.fit_score,
+            a.enriched_at.isoformat() if a.enriched_at else None, a.created_at.isoformat()
+        ) for a in accounts]
+        with self.conn:
+            cursor = self.conn.executemany('''
+                INSERT OR IGNORE INTO accounts (id, name, domain, company_summary, product_summary, fit_score, enriched_at, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+        return cursor.rowcount
+
+    @timed(DB_QUERY_SECONDS, "get_account")
+    @synchronized
+    def get_account(self, account_id: str) -> Optional[Account]:
+        row = self.conn.execute('''
+            SELECT id, name, domain, company_summary, product_summary, fit_score, enriched_at, created_at
+            FROM accounts WHERE id = ?
+        ''', (account_id,)).fetchone()
         if row:
-            return Campaign(
-                id=row[0], name=row[1], icp_description=row[2], email_template=row[3],
-                blacklist_domains=json.loads(row[4]), daily_limit=row[5],
-                status=row[6], created_at=datetime.fromisoformat(row[7])
+            return Account(
+                id=row[0], name=row[1], domain=row[2], company_summary=row[3], product_summary=row[4],
+                fit_score=row[5], enriched_at=datetime.fromisoformat(row[6]) if row[6] else None,
+                created_at=datetime.fromisoformat(row[7])
             )
         return None
 
+    @timed(DB_QUERY_SECONDS, "get_account_keys")
+    @synchronized
+    def get_account_keys(self) -> List[Tuple[str, str, Optional[str]]]:
+        return self.conn.execute('SELECT id, name, domain FROM accounts').fetchall()
+
+    @timed(DB_QUERY_SECONDS, "set_account_domain")
+    @synchronized
+    def set_account_domain(self, account_id: str, domain: str):
+        with self.conn:
+            self.conn.execute('UPDATE accounts SET domain = ? WHERE id = ? AND domain IS NULL', (domain, account_id))
+
+    @timed(DB_QUERY_SECONDS, "update_account_enrichment")
+    @synchronized
+    def update_account_enrichment(self, account_id: str, company_summary: str, product_summary: str,
+                                  fit_score: Optional[float] = None):
+        with self.conn:
+            self.conn.execute('''
+                UPDATE accounts SET company_summary = ?, product_summary = ?, fit_score = ?, enriched_at = ? WHERE id = ?
+            ''', (company_summary, product_summary, fit_score, datetime.now().isoformat(), account_id))
+
     # --- Event Log Methods ---
-    def log_event(self, lead_id: str, event_type: str, details: str):
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            INSERT INTO event_logs (lead_id, event_type, details, timestamp)
-            VALUES (?, ?, ?, ?)
-        ''', (lead_id, event_type, details, datetime.now().isoformat()))
-        logger.info(f"[EVENT] {event_type} for {lead_id}: {details}")
+    @timed(DB_QUERY_SECONDS, "log_event")
+    @synchronized
+    def log_event(self, lead_id: str, event_type: str, details: str, payload: Optional[Dict] = None):
+        self._insert_event(self.conn.cursor(), lead_id, event_type, details, payload)
         self.conn.commit()
 
+    def _insert_event(self, cursor, lead_id: str, event_type: str, details: str, payload: Optional[Dict] = None):
+        # Shared by log_event and the outbox transactions (caller commits)
+        cursor.execute('''
+            INSERT INTO event_logs (lead_id, event_type, details, timestamp, payload)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (lead_id, event_type, details, datetime.now().isoformat(), None if payload is None else json.dumps(payload)))
+        event_logger.info("[EVENT] %s for %s: %s", event_type, lead_id, details,
+                          extra={"lead_id": lead_id, "event_type": event_type})
+
+    @timed(DB_QUERY_SECONDS, "get_lead_logs")
+    @synchronized
     def get_lead_logs(self, lead_id: str) -> List[EventLog]:
         cursor = self.conn.cursor()
-        cursor.execute('SELECT * FROM event_logs WHERE lead_id = ? ORDER BY timestamp DESC', (lead_id,))
-        rows = cursor.fetchall()
-        return [EventLog(id=row[0], lead_id=row[1], event_type=row[2], details=row[3], timestamp=datetime.fromisoformat(row[4])) for row in rows]
+        cursor.execute(f'SELECT {EVENT_COLUMNS_SQL} FROM event_logs WHERE lead_id = ? ORDER BY timestamp DESC', (lead_id,))
+        return [self._row_to_event(row) for row in cursor.fetchall()]
+
+    @timed(DB_QUERY_SECONDS, "get_lead_events")
+    @synchronized
+    def get_lead_events(self, lead_ids: Sequence[str]) -> List[EventLog]:
+        events = []
+        lead_ids = list(lead_ids)
+        for start in range(0, len(lead_ids), 500):
+            batch = lead_ids[start:start + 500]
+            cursor = self.conn.execute(
+                f'SELECT {EVENT_COLUMNS_SQL} FROM event_logs WHERE lead_id IN ({", ".join("?" * len(batch))})', batch)
+            events.extend(self._row_to_event(row) for row in cursor.fetchall())
+        events.sort(key=lambda event: event.id)
+        return events
+
+    def _row_to_event(self, row) -> EventLog:
+        return EventLog(id=row[0], lead_id=row[1], event_type=row[2], details=row[3],
+                        timestamp=datetime.fromisoformat(row[4]), payload=json.loads(row[5]) if row[5] else None)
+
+    # --- Replay Methods ---
+    @timed(DB_QUERY_SECONDS, "find_lead_ids")
+    @synchronized
+    def find_lead_ids(self, lead_filter: LeadFilter, after_id: Optional[str] = None, limit: int = 1000) -> List[str]:
+        where, params = lead_filter_sql(lead_filter)
+        params = [value.isoformat() if isinstance(value, datetime) else value for value in params]
+        cursor = self.conn.execute(f'SELECT id FROM leads WHERE id > ? AND {where} ORDER BY id LIMIT ?',
+                                   (after_id or "", *params, limit))
+        return [row[0] for row in cursor.fetchall()]
+
+    @timed(DB_QUERY_SECONDS, "get_replay_checkpoint")
+    @synchronized
+    def get_replay_checkpoint(self, name: str) -> Optional[ReplayCheckpoint]:
+        row = self.conn.execute(f'SELECT {REPLAY_COLUMNS_SQL} FROM replay_checkpoints WHERE name = ?', (name,)).fetchone()
+        if not row:
+            return None
+        return ReplayCheckpoint(
+            name=row[0], stages=row[1].split(","), lead_filter=lead_filter_from_json(row[2]), after_id=row[3],
+            counts=json.loads(row[4]), status=row[5], started_at=datetime.fromisoformat(row[6]),
+            updated_at=datetime.fromisoformat(row[7])
+        )
+
+    @timed(DB_QUERY_SECONDS, "save_replay_checkpoint")
+    @synchronized
+    def save_replay_checkpoint(self, checkpoint: ReplayCheckpoint):
+        with self.conn:
+            self.conn.execute(f'INSERT OR REPLACE INTO replay_checkpoints ({REPLAY_COLUMNS_SQL}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)', (
+                checkpoint.name, ",".join(checkpoint.stages), lead_filter_to_json(checkpoint.lead_filter),
+                checkpoint.after_id, json.dumps(checkpoint.counts), checkpoint.status,
+                checkpoint.started_at.isoformat(), checkpoint.updated_at.isoformat()
+            ))
     
+    # --- Outbox Methods ---
+    @timed(DB_QUERY_SECONDS, "enqueue_send")
+    @synchronized
+    def enqueue_send(self, lead: Lead, message: OutboxMessage) -> OutboxMessage:
+        now = datetime.now()
+        version = None
+        with self.conn:
+            cursor = self.conn.cursor()
+            if isinstance(lead, LeadRecord):
+                # Conditional: a lead replied to or stopped since it was read is not queued
+                if self._update_changed(cursor, lead, "enqueue", now):
+                    version = lead.version + 1
+            else:
+                version = self._upsert_lead(cursor, lead, "enqueue")
+            cursor.execute(f'''
+                INSERT INTO outbox ({OUTBOX_COLUMNS_SQL})
+                VALUES ({", ".join("?" * len(OUTBOX_FIELDS))})
+                ON CONFLICT (key) DO UPDATE SET
+                    to_email = excluded.to_email, subject = excluded.subject, body = excluded.body,
+                    status = 'pending', attempts = 0, available_at = excluded.available_at,
+                    updated_at = excluded.updated_at
+                WHERE outbox.status IN ('pending', 'failed', 'cancelled')
+            ''', outbox_to_row(message))
+            # The approved text: what a projection rebuild restores, reviewer edits included
+            self._insert_event(cursor, lead.id, "SEND_QUEUED", f"Outbox key: {message.key}", draft_payload(lead))
+        if version is not None:
+            self._saved(lead, version)
+        return self.get_outbox_message(message.key)
+
+    @timed(DB_QUERY_SECONDS, "get_outbox_message")
+    @synchronized
+    def get_outbox_message(self, key: str) -> Optional[OutboxMessage]:
+        cursor = self.conn.cursor()
+        cursor.execute(f'SELECT {OUTBOX_COLUMNS_SQL} FROM outbox WHERE key = ?', (key,))
+        row = cursor.fetchone()
+        return row_to_outbox(row) if row else None
+
+    @timed(DB_QUERY_SECONDS, "claim_outbox")
+    @synchronized
+    def claim_outbox(self, limit: int, lease_seconds: float, key: str = None) -> List[OutboxMessage]:
+        now = datetime.now()
+        params = [(now + timedelta(seconds=lease_seconds)).isoformat(), now.isoformat(), now.isoformat()]
+        key_filter = ""
+        if key is not None:
+            key_filter = "AND key = ?"
+            params.append(key)
+        params.append(limit)
+        with self.conn:
+            cursor = self.conn.cursor()
+            # Due messages are checked against their lead and campaign first: a retry that waited
+            # out its backoff may belong to a lead that has since replied, unsubscribed or bounced
+            cancelled = cursor.execute(f'''
+                UPDATE outbox SET status = 'cancelled', last_error = 'lead or campaign no longer sendable',
+                    lease_until = NULL, updated_at = ?
+                WHERE status = 'pending' AND available_at <= ? {key_filter} AND {OUTBOX_STALE_SQL}
+                RETURNING key, lead_id
+            ''', params[1:-1]).fetchall()
+            for key, lead_id in cancelled:
+                self._insert_event(cursor, lead_id, "SEND_CANCELLED", f"Outbox key: {key}, lead or campaign no longer sendable")
+            rows = cursor.execute(f'''
+                UPDATE outbox SET status = 'sending', attempts = attempts + 1, lease_until = ?, updated_at = ?
+                WHERE key IN (
+                    SELECT key FROM outbox WHERE status = 'pending' AND available_at <= ? {key_filter}
+                    ORDER BY step = 0, created_at LIMIT ?
+                )
+                RETURNING {OUTBOX_COLUMNS_SQL}
+            ''', params).fetchall()
+        return [row_to_outbox(row) for row in rows]
+
+    @timed(DB_QUERY_SECONDS, "complete_outbox")
+    @synchronized
+    def complete_outbox(self, message: OutboxMessage, provider_message_id: str) -> bool:
+        sent_at = datetime.now()
+        now = sent_at.isoformat()
+        new_status = f"sent_step{message.step}"
+        with self.conn:
+            cursor = self.conn.cursor()
+            # 'unconfirmed' too: a slow send may finish after its lease was expired
+            cursor.execute('''
+                UPDATE outbox SET status = 'sent', provider_message_id = ?, lease_until = NULL, updated_at = ?
+                WHERE key = ? AND status IN ('sending', 'unconfirmed')
+            ''', (provider_message_id, now, message.key))
+            if cursor.rowcount == 0:
+                return False
+            # The send is recorded either way; a lead stopped or replied to meanwhile keeps that state
+            self._record_transition(cursor, message.lead_id, new_status, "send", guarded=True)
+            cursor.execute(f'''
+                UPDATE leads SET {SENT_STATUS_SET}, version = version + 1, send_count = ?, last_sent_at = ?, last_message_id = ?,
+                    thread_id = ?, updated_at = ?
+                WHERE id = ?
+            ''', (new_status, message.step + 1, now, provider_message_id, message.thread_id, now, message.lead_id))
+            cursor.execute('''
+                INSERT INTO campaign_metrics (campaign_id, date, sent_count)
+                SELECT COALESCE(campaign_id, 'default'), ?, 1 FROM leads WHERE id = ?
+                ON CONFLICT (campaign_id, date) DO UPDATE SET sent_count = sent_count + 1
+            ''', (now[:10], message.lead_id))
+            self._insert_event(cursor, message.lead_id, "SEND_OK",
+                               f"Provider ID: {provider_message_id}, New Status: {new_status}",
+                               send_payload(message.step, provider_message_id, message.thread_id, sent_at))
+        return True
+
+    @timed(DB_QUERY_SECONDS, "fail_outbox")
+    @synchronized
+    def fail_outbox(self, message: OutboxMessage, error: str, retry_at: Optional[datetime]) -> bool:
+        now = datetime.now().isoformat()
+        with self.conn:
+            cursor = self.conn.cursor()
+            if retry_at is not None:
+                cursor.execute('''
+                    UPDATE outbox SET status = 'pending', available_at = ?, last_error = ?, lease_until = NULL, updated_at = ?
+                    WHERE key = ? AND status = 'sending'
+                ''', (retry_at.isoformat(), error, now, message.key))
+                details = f"{error} (attempt {message.attempts}, retry at {retry_at.isoformat()})"
+            else:
+                cursor.execute('''
+                    UPDATE outbox SET status = 'failed', last_error = ?, lease_until = NULL, updated_at = ?
+                    WHERE key = ? AND status = 'sending'
+                ''', (error, now, message.key))
+                details = f"{error} (attempt {message.attempts}, giving up)"
+            if cursor.rowcount == 0:
+                return False
+            if retry_at is None:
+                self._record_transition(cursor, message.lead_id, "send_failed", "send", guarded=True)
+                cursor.execute(f'UPDATE leads SET status = ?, state = ?, version = version + 1, updated_at = ? WHERE id = ? AND {SEND_FAILED_SOURCES}',
+                               ("send_failed", int(LeadState.SEND_FAILED), now, message.lead_id))
+            self._insert_event(cursor, message.lead_id, "SEND_ERR", details)
+        return True
+
+    @timed(DB_QUERY_SECONDS, "expire_outbox_leases")
+    @synchronized
+    def expire_outbox_leases(self, requeue: bool = False) -> List[OutboxMessage]:
+        now = datetime.now().isoformat()
+        with self.conn:
+            cursor = self.conn.cursor()
+            rows = cursor.execute(f'''
+                UPDATE outbox SET status = ?, lease_until = NULL, updated_at = ?
+                WHERE status = 'sending' AND lease_until < ?
+                RETURNING {OUTBOX_COLUMNS_SQL}
+            ''', ("pending" if requeue else "unconfirmed", now, now)).fetchall()
+            expired = [row_to_outbox(row) for row in rows]
+            for message in expired:
+                self._insert_event(cursor, message.lead_id, "SEND_UNCONFIRMED",
+                                   f"Lease expired for {message.key}" + (", requeued" if requeue else ""))
+        return expired
+
+    # --- Provider Delivery Events ---
+    @timed(DB_QUERY_SECONDS, "apply_delivery_events")
+    @synchronized
+    def apply_delivery_events(self, events: List[DeliveryEvent]) -> Dict[str, int]:
+        counts = {"applied": 0, "duplicate": 0, "unmatched": 0}
+        bounces = 0
+        now = datetime.now().isoformat()
+        with self.conn:
+            cursor = self.conn.cursor()
+            for event in events:
+                lead_id = event.lead_id
+                if lead_id is None and event.message_id:
+                    row = cursor.execute('SELECT id FROM leads WHERE last_message_id = ?', (event.message_id,)).fetchone()
+                    lead_id = row[0] if row else None
+
+                cursor.execute('INSERT OR IGNORE INTO delivery_events (event_id, event_type, lead_id, received_at) VALUES (?, ?, ?, ?)',
+                               (event.event_id, event.event_type, lead_id, now))
+                if cursor.rowcount == 0:
+                    counts["duplicate"] += 1
+                    continue
+                if lead_id is None:
+                    counts["unmatched"] += 1
+                    continue
+
+                stop_status = DELIVERY_STOP_STATUSES.get(event.event_type)
+                if stop_status:
+                    self._record_transition(cursor, lead_id, stop_status, event.event_type, guarded=True)
+                    cursor.execute(f"UPDATE leads SET status = ?, state = ?, version = version + 1, updated_at = ? WHERE id = ? AND {STOPPED_SOURCES}",
+                                   (stop_status, int(LeadState.STOPPED), now, lead_id))
+                elif event.event_type == "delivered" and event.outbox_key:
+                    # Delivery proves a send parked as unconfirmed (crash mid-send) went out
+                    cursor.execute('''
+                        UPDATE outbox SET status = 'sent', provider_message_id = COALESCE(provider_message_id, ?), updated_at = ?
+                        WHERE key = ? AND status = 'unconfirmed'
+                    ''', (event.message_id, now, event.outbox_key))
+                    if cursor.rowcount:
+                        self._record_transition(cursor, lead_id, f"sent_step{event.step}", "delivered", guarded=True)
+                        cursor.execute(f'''
+                            UPDATE leads SET {SENT_STATUS_SET}, version = version + 1, send_count = ?, last_sent_at = ?, last_message_id = ?,
+                                thread_id = COALESCE(thread_id, (SELECT thread_id FROM outbox WHERE key = ?)), updated_at = ?
+                            WHERE id = ?
+                        ''', (f"sent_step{event.step}", event.step + 1, event.timestamp.isoformat(), event.message_id,
+                              event.outbox_key, now, lead_id))
+                if event.event_type == "bounce":
+                    bounces += 1
+                self._insert_event(cursor, lead_id, f"ESP_{event.event_type.upper()}", event.reason or event.email or "")
+                counts["applied"] += 1
+
+            if bounces:
+                today = datetime.now().strftime("%Y-%m-%d")
+                cursor.execute('INSERT OR IGNORE INTO daily_metrics (date) VALUES (?)', (today,))
+                cursor.execute('UPDATE daily_metrics SET bounce_count = bounce_count + ? WHERE date = ?', (bounces, today))
+        return counts
+
+    # --- Analytics Export ---
+    @contextmanager
+    def open_snapshot(self, workdir: str = None, pages: int = 1024):
+        # Online backup API: the copy is taken from this connection, so writes made through it
+        # during the copy are carried over instead of restarting the backup. The store lock is
+        # held per step of `pages` pages only; other statements run between steps.
+        fd, path = tempfile.mkstemp(prefix="snapshot-", suffix=".db", dir=workdir)
+        os.close(fd)
+        try:
+            started = time.perf_counter()
+            target = sqlite3.connect(path)
+
+            def between_steps(status, remaining, total):
+                self._lock.release()
+                time.sleep(0)
+                self._lock.acquire()
+
+            try:
+                with self._lock:
+                    self.conn.backup(target, pages=pages, progress=between_steps)
+            finally:
+                target.close()
+            logger.info("Snapshot copy of %s bytes in %.2fs", os.path.getsize(path), time.perf_counter() - started)
+            snapshot = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+            try:
+                yield snapshot.execute
+            finally:
+                snapshot.close()
+        finally:
+            os.remove(path)
+
+    # --- Change Tracking ---
+    @synchronized
+    def get_change_version(self) -> str:
+        # total_changes counts rows written through this connection; data_version moves when
+        # another connection (mailbox listener, outbox relay, CLIs) commits
+        data_version = self.conn.execute('PRAGMA data_version').fetchone()[0]
+        return f"{self._epoch}.{self.conn.total_changes}.{data_version}"
+
     # --- Metrics Methods ---
+    @timed(DB_QUERY_SECONDS, "get_todays_metrics")
+    @synchronized
     def get_todays_metrics(self) -> DailyMetric:
         today = datetime.now().strftime("%Y-%m-%d")
         cursor = self.conn.cursor()
@@ -202,6 +1120,16 @@ class LeadStore:
         else:
             return DailyMetric(date=today)
 
+    @timed(DB_QUERY_SECONDS, "get_campaign_sent_today")
+    @synchronized
+    def get_campaign_sent_today(self, campaign_id: str) -> int:
+        today = datetime.now().strftime("%Y-%m-%d")
+        row = self.conn.execute('SELECT sent_count FROM campaign_metrics WHERE campaign_id = ? AND date = ?',
+                                (campaign_id or "default", today)).fetchone()
+        return row[0] if row else 0
+
+    @timed(DB_QUERY_SECONDS, "increment_metric")
+    @synchronized
     def increment_metric(self, field: str):
         today = datetime.now().strftime("%Y-%m-%d")
         valid_fields = ["sent_count", "reply_count", "positive_count", "bounce_count"]
@@ -212,34 +1140,30 @@ class LeadStore:
         cursor.execute(f'UPDATE daily_metrics SET {field} = {field} + 1 WHERE date = ?', (today,))
         self.conn.commit()
 
+    @timed(DB_QUERY_SECONDS, "get_lead_by_thread_id")
+    @synchronized
     def get_lead_by_thread_id(self, thread_id: str) -> Optional[Lead]:
         cursor = self.conn.cursor()
-        cursor.execute('SELECT * FROM leads WHERE thread_id = ?', (thread_id,))
+        cursor.execute(f'SELECT {LEAD_COLUMNS_SQL} FROM leads WHERE thread_id = ?', (thread_id,))
         row = cursor.fetchone()
         if row:
             return self._row_to_lead(row)
         return None
 
-    def _row_to_lead(self, row):
-        # Handle dynamic column length if strictly needed, but for now assuming fixed schema or recreating DB
-        # If campaign_id was added last (index 19)
-        # 0..18 match previous
-        campaign_id = "default"
-        if len(row) > 19:
-            campaign_id = row[19]
-            
-        return Lead(
-            id=row[0], source=row[1], name=row[2], company_name=row[3],
-            email=row[4], linkedin_url=row[5], status=row[6],
-            company_summary=row[7], product_summary=row[8],
-            generated_email_subject=row[9], generated_email_body=row[10],
-            send_count=row[11],
-            last_sent_at=datetime.fromisoformat(row[12]) if row[12] else None,
-            next_scheduled_at=datetime.fromisoformat(row[13]) if row[13] else None,
-            last_message_id=row[14],
-            thread_id=row[15],
-            metadata=json.loads(row[16]) if row[16] else {},
-            created_at=datetime.fromisoformat(row[17]),
-            updated_at=datetime.fromisoformat(row[18]),
-            campaign_id=campaign_id
-        )
+    @timed(DB_QUERY_SECONDS, "get_lead_by_email")
+    @synchronized
+    def get_lead_by_email(self, email: str) -> Optional[Lead]:
+        cursor = self.conn.cursor()
+        cursor.execute(f'SELECT {LEAD_COLUMNS_SQL} FROM leads WHERE lower(email) = lower(?) ORDER BY updated_at DESC LIMIT 1', (email,))
+        row = cursor.fetchone()
+        if row:
+            return self._row_to_lead(row)
+        return None
+
+    def _row_to_lead(self, row) -> LeadRecord:
+        # Rows are selected in LEAD_FIELDS order; metadata and timestamps decode lazily
+        return LeadRecord.from_row(row)
+
+    @synchronized
+    def close(self):
+        self.conn.close()
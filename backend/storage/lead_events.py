@@ -0,0 +1,43 @@
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+# Lead fields that event payloads carry, so they can be rebuilt from event_logs alone.
+# A payload key named after one of these is the field's value as of that event.
+PROJECTED_FIELDS = (
+    "company_summary", "product_summary", "fit_score",  # ENRICH_OK / ENRICH_WARN / ENRICH_REUSED
+    "generated_email_subject", "generated_email_body",  # GEN_OK / GEN_WARN, SEND_QUEUED (approved text)
+    "send_count", "last_sent_at", "last_message_id", "thread_id",  # SEND_OK
+)
+_DATETIME_FIELDS = ("last_sent_at",)
+
+
+def enrichment_payload(lead) -> Dict[str, Any]:
+    return {"company_summary": lead.company_summary, "product_summary": lead.product_summary,
+            "fit_score": lead.fit_score}
+
+
+def draft_payload(lead) -> Dict[str, Any]:
+    return {"generated_email_subject": lead.generated_email_subject,
+            "generated_email_body": lead.generated_email_body}
+
+
+def send_payload(step: int, provider_message_id: str, thread_id: Optional[str], sent_at: datetime) -> Dict[str, Any]:
+    return {"send_count": step + 1, "last_message_id": provider_message_id, "thread_id": thread_id,
+            "last_sent_at": sent_at.isoformat()}
+
+
+def project(events: Iterable) -> Dict[str, Any]:
+    """
+    Folds the payloads of one lead's events, oldest first, into the PROJECTED_FIELDS they set
+    (last write wins). Events without a payload are ignored; status is not projected, the
+    transition log owns it.
+    """
+    values = {}
+    for event in events:
+        for name, value in (event.payload or {}).items():
+            if name in PROJECTED_FIELDS:
+                values[name] = value
+    for name in _DATETIME_FIELDS:
+        if isinstance(values.get(name), str):
+            values[name] = datetime.fromisoformat(values[name])
+    return values
@@ -0,0 +1,79 @@
+import functools
+from enum import IntEnum
+from typing import Dict, FrozenSet
+
+
+class LeadState(IntEnum):
+    """
+    Lifecycle state of a lead, stored as a small integer in leads.state.
+
+    The text status keeps the detail around it: a status is the state's lower-case name,
+    optionally followed by "_<detail>" (sent_step1, queued_step0, replied_interested,
+    stopped_bounce). Code branches on the state; the detail is for people and analytics.
+    """
+    NEW = 0
+    ENRICHING = 1  # claimed by a pipeline worker
+    ENRICHED = 2
+    PROCESSED = 3  # draft ready for review
+    QUEUED = 4  # approved, waiting in the outbox
+    SENT = 5
+    SEND_FAILED = 6  # outbox gave up after retries
+    REPLIED = 7
+    STOPPED = 8  # terminal: bounce, unsubscribe, blacklist, reply handled
+
+    @property
+    def label(self) -> str:
+        return self.name.lower()
+
+
+# Allowed moves; anything not listed is rejected by transition_lead and claim_leads
+TRANSITIONS: Dict[LeadState, FrozenSet[LeadState]] = {
+    LeadState.NEW: frozenset({LeadState.ENRICHING, LeadState.ENRICHED, LeadState.STOPPED}),
+    # Enrichment failures release the lead; enrichment and drafting usually land in one write
+    LeadState.ENRICHING: frozenset({LeadState.NEW, LeadState.ENRICHED, LeadState.PROCESSED, LeadState.STOPPED}),
+    LeadState.ENRICHED: frozenset({LeadState.PROCESSED, LeadState.STOPPED}),
+    LeadState.PROCESSED: frozenset({LeadState.QUEUED, LeadState.STOPPED}),
+    # Replies to an earlier step can arrive while a follow-up is queued or has failed
+    LeadState.QUEUED: frozenset({LeadState.SENT, LeadState.SEND_FAILED, LeadState.REPLIED, LeadState.STOPPED}),
+    # Back to QUEUED for the next follow-up step
+    LeadState.SENT: frozenset({LeadState.QUEUED, LeadState.REPLIED, LeadState.STOPPED}),
+    LeadState.SEND_FAILED: frozenset({LeadState.QUEUED, LeadState.REPLIED, LeadState.STOPPED}),
+    LeadState.REPLIED: frozenset({LeadState.STOPPED}),
+    LeadState.STOPPED: frozenset(),
+}
+
+# Longest labels first, so a label is never matched as another one's prefix
+_LABELS = sorted(((state.label, state) for state in LeadState), key=lambda item: -len(item[0]))
+
+
+@functools.lru_cache(maxsize=4096)
+def state_of(status: str) -> LeadState:
+    """
+    State of a status string: "sent_step2" -> SENT. Raises ValueError for anything else.
+    """
+    for label, state in _LABELS:
+        if status == label or status.startswith(label + "_"):
+            return state
+    raise ValueError(f"Unknown lead status {status!r}; expected one of "
+                     f"{', '.join(state.label for state in LeadState)}, optionally with a _<detail> suffix")
+
+
+def can_transition(source: LeadState, target: LeadState) -> bool:
+    return target in TRANSITIONS[source]
+
+
+def sources_of(target: LeadState) -> FrozenSet[LeadState]:
+    """
+    States a lead may be in to move to `target` (the compare-and-set candidates).
+    """
+    return frozenset(source for source, targets in TRANSITIONS.items() if target in targets)
+
+
+def state_case_sql(column: str = "status") -> str:
+    # SQL for state_of() over a text column (sqlite and Postgres); NULL for unknown statuses.
+    # Used once, to backfill leads.state when the column is added.
+    whens = " ".join(
+        f"WHEN {column} = '{label}' OR substr({column}, 1, {len(label) + 1}) = '{label}_' THEN {int(state)}"
+        for label, state in _LABELS
+    )
+    return f"CASE {whens} END"
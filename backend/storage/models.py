@@ -1,6 +1,9 @@
+import copy
+import json
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, NamedTuple
+from backend.storage.lead_state import LeadState, state_of
 
 @dataclass
 class Campaign:
@@ -10,7 +13,22 @@ class Campaign:
     email_template: str # Jinja2 style or simple format string
     blacklist_domains: List[str] = field(default_factory=list)
     daily_limit: int = 50
-    status: str = "active" # active, paused
+    status: str = "active" # active, paused, archived
+    created_at: datetime = field(default_factory=datetime.now)
+    product_description: Optional[str] = None # What this campaign sells; used in the ICP and drafting prompts
+    pipeline_workers: int = 0 # Max leads of this campaign enriched/drafted at once; 0 = no cap beyond PIPELINE_WORKERS
+    version: int = 1 # Bumped by every update (compare-and-set in update_campaign)
+    weight: int = 1 # Share of pipeline capacity relative to other campaigns with queued work
+
+@dataclass
+class Account:
+    id: str # Deterministic from the domain / normalized name key (see AccountIndex.account_id_for)
+    name: str # Company name as first seen
+    domain: Optional[str] = None # Corporate email domain, if known
+    company_summary: Optional[str] = None # Shared enrichment, reused by every lead of the account
+    product_summary: Optional[str] = None
+    fit_score: Optional[float] = None # LLM ICP fit (0-100), reused with the summaries
+    enriched_at: Optional[datetime] = None
     created_at: datetime = field(default_factory=datetime.now)
 
 @dataclass
@@ -20,6 +38,37 @@ class EventLog:
     event_type: str # INGEST, ENRICH, GEN_EMAIL, APPROVE, SEND, REPLY, STOP
     details: str
     timestamp: datetime = field(default_factory=datetime.now)
+    payload: Optional[Dict[str, Any]] = None # Structured data of the event (see lead_events); None on old rows
+
+@dataclass
+class LeadFilter:
+    # Leads a replay covers; every field that is set must match
+    campaign_id: Optional[str] = None
+    states: Optional[List[int]] = None # LeadState values
+    event_types: Optional[List[str]] = None # has at least one event of these types ...
+    since: Optional[datetime] = None # ... logged in [since, until) (any event type when event_types is unset)
+    until: Optional[datetime] = None
+
+@dataclass
+class ReplayCheckpoint:
+    name: str
+    stages: List[str] # batch_runner JOBS, run in this order on each chunk
+    lead_filter: LeadFilter
+    after_id: Optional[str] = None # Last lead id done; the replay resumes after it
+    counts: Dict[str, Dict[str, int]] = field(default_factory=dict) # Outcome counts per stage
+    status: str = "running" # running, paused, failed, done
+    started_at: datetime = field(default_factory=datetime.now)
+    updated_at: datetime = field(default_factory=datetime.now)
+
+@dataclass
+class LeadTransition:
+    id: int # Auto-inc
+    lead_id: str
+    from_state: Optional[LeadState] # None when recorded without a known previous state
+    to_state: LeadState
+    status: str # Full status written with the move (sent_step1, stopped_bounce, ...)
+    reason: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.now)
 
 @dataclass
 class Lead:
@@ -33,7 +82,7 @@ class Lead:
     # Campaign Link
     campaign_id: Optional[str] = "default"
     
-    # State Machine
+    # State Machine: "<state>[_<detail>]", see lead_state.LeadState
     status: str = "new"  
     
     # Sending Logic
@@ -57,6 +106,150 @@ class Lead:
     created_at: datetime = field(default_factory=datetime.now)
     updated_at: datetime = field(default_factory=datetime.now)
 
+    # Resolved company account; leads of one account share enrichment
+    account_id: Optional[str] = None
+
+    # Prioritization
+    title: Optional[str] = None # Job title, if the source provides one
+    fit_score: Optional[float] = None # LLM ICP fit (0-100), set by ICPPersonaAgent
+    priority: Optional[float] = None # LeadScorer output (0-100); review queue and claim order
+
+    # Optimistic concurrency: bumped by every write; update_lead only applies to the version it read
+    version: int = 1
+
+    @property
+    def state(self) -> LeadState:
+        return state_of(self.status)
+
+# Storage column order for leads (shared by every LeadStore backend)
+LEAD_FIELDS = (
+    "id", "source", "name", "company_name", "email", "linkedin_url", "status",
+    "company_summary", "product_summary", "generated_email_subject",
+    "generated_email_body", "send_count", "last_sent_at", "next_scheduled_at",
+    "last_message_id", "thread_id", "metadata", "created_at", "updated_at", "campaign_id",
+    "account_id", "title", "fit_score", "priority", "version"
+)
+# Written with every lead row but not read back: leads.state is derived from status
+LEAD_WRITE_FIELDS = LEAD_FIELDS + ("state",)
+
+# Fields stored as text and decoded on first access by LeadRecord
+_LAZY_DATETIME_FIELDS = ("last_sent_at", "next_scheduled_at", "created_at", "updated_at")
+# Maintained by the store, never part of LeadRecord.changes()
+_UNTRACKED_FIELDS = ("id", "updated_at", "version")
+_METADATA_INDEX = LEAD_FIELDS.index("metadata")
+
+
+def _lazy_datetime(slot: str):
+    def getter(self):
+        value = getattr(self, slot)
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value)
+            setattr(self, slot, value)
+        return value
+
+    def setter(self, value):
+        setattr(self, slot, value)
+
+    return property(getter, setter)
+
+
+class LeadRecord:
+    """
+    Lead as read back from storage: same attributes as Lead, but slots-based, and
+    metadata / timestamps stay as stored text until first accessed.
+    The row it was read from is kept, so update_lead can write only the fields that changed.
+    """
+    __slots__ = tuple(f"_{f}" if f in _LAZY_DATETIME_FIELDS or f == "metadata" else f for f in LEAD_FIELDS) + ("_loaded",)
+
+    @classmethod
+    def from_row(cls, row):
+        # row must follow LEAD_FIELDS order
+        record = cls.__new__(cls)
+        for slot, value in zip(cls.__slots__, row):
+            setattr(record, slot, value)
+        record._loaded = row
+        if record.campaign_id is None:
+            record.campaign_id = "default"
+            record._loaded = record._snapshot()
+        return record
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        value = self._metadata
+        if value is None or isinstance(value, str):
+            value = json.loads(value) if value else {}
+            self._metadata = value
+        elif value is self._loaded[_METADATA_INDEX]:
+            # Postgres hands back a dict: edit a copy, so in-place changes show up in changes()
+            value = self._metadata = copy.deepcopy(value)
+        return value
+
+    @metadata.setter
+    def metadata(self, value: Dict[str, Any]):
+        self._metadata = value
+
+    last_sent_at = _lazy_datetime("_last_sent_at")
+    next_scheduled_at = _lazy_datetime("_next_scheduled_at")
+    created_at = _lazy_datetime("_created_at")
+    updated_at = _lazy_datetime("_updated_at")
+
+    @property
+    def state(self) -> LeadState:
+        return state_of(self.status)
+
+    def changes(self) -> Dict[str, Any]:
+        """
+        Fields assigned a different value since the record was read (or last written).
+        """
+        changed = {}
+        for name, slot, original in zip(LEAD_FIELDS, self.__slots__, self._loaded):
+            current = getattr(self, slot)
+            if current is original or name in _UNTRACKED_FIELDS:
+                continue
+            if isinstance(original, str) and not isinstance(current, str):
+                # Decoded since it was read: compare decoded values
+                if name == "metadata":
+                    original = json.loads(original)
+                elif name in _LAZY_DATETIME_FIELDS:
+                    original = datetime.fromisoformat(original)
+            if current != original:
+                changed[name] = current
+        return changed
+
+    def mark_saved(self, version: int, updated_at: datetime = None):
+        # Called by the store after a write: the record now matches row `version`
+        self.version = version
+        if updated_at is not None:
+            self.updated_at = updated_at
+        self._loaded = self._snapshot()
+
+    def _snapshot(self) -> tuple:
+        values = [getattr(self, slot) for slot in self.__slots__[:-1]]
+        if isinstance(values[_METADATA_INDEX], dict):
+            # Serialized, so later in-place edits of the dict still compare as changes
+            values[_METADATA_INDEX] = json.dumps(values[_METADATA_INDEX])
+        return tuple(values)
+
+    def __repr__(self):
+        return f"LeadRecord(id={self.id!r}, status={self.status!r}, company_name={self.company_name!r})"
+
+
+class LeadSummary(NamedTuple):
+    """
+    Projection used by list endpoints; built straight from sqlite rows.
+    """
+    id: str
+    name: str
+    company_name: str
+    status: str
+    generated_email_subject: Optional[str]
+    generated_email_body: Optional[str]
+    priority: Optional[float]
+    fit_score: Optional[float]
+
+
+LEAD_SUMMARY_FIELDS = LeadSummary._fields
+
 @dataclass
 class DailyMetric:
     date: str 
@@ -74,6 +267,59 @@ class EmailInteraction:
     subject: str
     body: str
 
+@dataclass
+class OutboxMessage:
+    key: str # Idempotency key: "<lead_id>:step<n>"
+    lead_id: str
+    step: int
+    to_email: str
+    subject: str
+    body: str
+    thread_id: str
+    status: str = "pending" # pending, sending, sent, failed, unconfirmed, cancelled (lead replied / stopped, campaign inactive)
+    attempts: int = 0
+    provider_message_id: Optional[str] = None
+    last_error: Optional[str] = None
+    available_at: datetime = field(default_factory=datetime.now)
+    lease_until: Optional[datetime] = None
+    created_at: datetime = field(default_factory=datetime.now)
+    updated_at: datetime = field(default_factory=datetime.now)
+
+    @staticmethod
+    def key_for(lead_id: str, step: int) -> str:
+        return f"{lead_id}:step{step}"
+
+
+OUTBOX_FIELDS = tuple(OutboxMessage.__dataclass_fields__)
+
+@dataclass
+class DeliveryEvent:
+    event_id: str # Provider event id (sg_event_id); duplicates are ignored
+    event_type: str # delivered, bounce, dropped, spamreport, unsubscribe, ...
+    email: Optional[str] = None
+    message_id: Optional[str] = None # Provider message id, matched against leads.last_message_id
+    outbox_key: Optional[str] = None # Idempotency key echoed back via custom_args
+    reason: Optional[str] = None
+    timestamp: datetime = field(default_factory=datetime.now)
+
+    @property
+    def lead_id(self) -> Optional[str]:
+        return self.outbox_key.rsplit(":step", 1)[0] if self.outbox_key else None
+
+    @property
+    def step(self) -> Optional[int]:
+        return int(self.outbox_key.rsplit(":step", 1)[1]) if self.outbox_key else None
+
+
+# Provider events that end the sequence for a lead
+DELIVERY_STOP_STATUSES = {
+    "bounce": "stopped_bounce",
+    "dropped": "stopped_bounce",
+    "spamreport": "stopped_spam",
+    "unsubscribe": "stopped_unsubscribe",
+    "group_unsubscribe": "stopped_unsubscribe",
+}
+
 @dataclass
 class Reply:
     lead_id: str
@@ -0,0 +1,962 @@
+import itertools
+import json
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from backend.core.config import config
+from backend.storage.base import BaseLeadStore, LeadConflict
+from backend.storage.db import (
+    LEAD_COLUMNS_SQL, LEAD_WRITE_COLUMNS_SQL, LEAD_UPSERT_SET, LEAD_SUMMARY_COLUMNS_SQL, OUTBOX_COLUMNS_SQL, LEAD_MIGRATIONS,
+    ACCOUNT_MIGRATIONS, CAMPAIGN_MIGRATIONS, CAMPAIGN_COLUMNS_SQL, LEAD_STATE_BACKFILL_SQL, STOPPED_SOURCES,
+    OUTBOX_CANCEL_STATES, OUTBOX_STALE_SQL,
+    SEND_FAILED_SOURCES, EVENT_COLUMNS_SQL, REPLAY_COLUMNS_SQL, guarded_status_set, lead_filter_from_json, lead_filter_sql,
+    lead_filter_to_json, state_sources_sql
+)
+from backend.storage.lead_events import draft_payload, send_payload
+from backend.storage.lead_state import LeadState, can_transition, state_of
+from backend.storage.models import (
+    Account, Lead, LeadFilter, LeadRecord, LeadSummary, LeadTransition, DailyMetric, Campaign, EventLog, OutboxMessage,
+    DeliveryEvent, ReplayCheckpoint, LEAD_WRITE_FIELDS, OUTBOX_FIELDS, DELIVERY_STOP_STATUSES
+)
+from backend.utils.logger import setup_logger
+from backend.utils.metrics import timed, DB_QUERY_SECONDS
+
+logger = setup_logger("PostgresLeadStore")
+event_logger = setup_logger("LeadStore.events")
+
+# Serializes schema setup when several nodes start at once
+_SCHEMA_LOCK_ID = 0x67746d01
+
+# Migration DDL is written for sqlite, whose REAL is a double; Postgres REAL is single precision
+_PG_COLUMN_TYPES = {"REAL": "DOUBLE PRECISION"}
+
+_LEAD_PLACEHOLDERS = ", ".join(["%s"] * len(LEAD_WRITE_FIELDS))
+_SENT_STATUS_SET = guarded_status_set(LeadState.SENT, "%s")
+_OUTBOX_PLACEHOLDERS = ", ".join(["%s"] * len(OUTBOX_FIELDS))
+
+
+class PostgresLeadStore(BaseLeadStore):
+    """
+    PostgreSQL implementation of BaseLeadStore for multi-node deployments (API, workers and
+    listeners sharing one database). Uses a psycopg connection pool, JSONB metadata,
+    COPY for bulk ingest and FOR UPDATE SKIP LOCKED for claiming work.
+    """
+    def __init__(self, database_url: str, min_size: int = None, max_size: int = None):
+        # Driver is only needed when Postgres is configured
+        from psycopg_pool import ConnectionPool
+        from psycopg.types.json import Jsonb
+        self._jsonb = Jsonb
+
+        self.max_concurrency = max_size or config.DB_POOL_MAX_SIZE
+        self.pool = ConnectionPool(
+            database_url,
+            min_size=min_size or config.DB_POOL_MIN_SIZE,
+            max_size=self.max_concurrency,
+            open=True,
+            name="leadstore"
+        )
+        self._init_db()
+
+    def _init_db(self):
+        with self.pool.connection() as conn:
+            conn.execute('SELECT pg_advisory_xact_lock(%s)', (_SCHEMA_LOCK_ID,))
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS leads (
+                    id TEXT PRIMARY KEY,
+                    source TEXT,
+                    name TEXT,
+                    company_name TEXT,
+                    email TEXT,
+                    linkedin_url TEXT,
+                    status TEXT,
+                    company_summary TEXT,
+                    product_summary TEXT,
+                    generated_email_subject TEXT,
+                    generated_email_body TEXT,
+                    send_count INTEGER DEFAULT 0,
+                    last_sent_at TIMESTAMP,
+                    next_scheduled_at TIMESTAMP,
+                    last_message_id TEXT,
+                    thread_id TEXT,
+                    metadata JSONB NOT NULL DEFAULT '{}'::jsonb,
+                    created_at TIMESTAMP,
+                    updated_at TIMESTAMP,
+                    campaign_id TEXT DEFAULT 'default',
+                    account_id TEXT,
+                    title TEXT,
+                    fit_score DOUBLE PRECISION,
+                    priority DOUBLE PRECISION,
+                    state SMALLINT,
+                    version INTEGER DEFAULT 1
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS accounts (
+                    id TEXT PRIMARY KEY,
+                    name TEXT,
+                    domain TEXT,
+                    company_summary TEXT,
+                    product_summary TEXT,
+                    fit_score DOUBLE PRECISION,
+                    enriched_at TIMESTAMP,
+                    created_at TIMESTAMP
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS daily_metrics (
+                    date TEXT PRIMARY KEY,
+                    sent_count INTEGER DEFAULT 0,
+                    reply_count INTEGER DEFAULT 0,
+                    positive_count INTEGER DEFAULT 0,
+                    bounce_count INTEGER DEFAULT 0
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS campaigns (
+                    id TEXT PRIMARY KEY,
+                    name TEXT,
+                    icp_description TEXT,
+                    email_template TEXT,
+                    blacklist_domains JSONB NOT NULL DEFAULT '[]'::jsonb,
+                    daily_limit INTEGER,
+                    status TEXT,
+                    created_at TIMESTAMP,
+                    product_description TEXT,
+                    pipeline_workers INTEGER DEFAULT 0,
+                    version INTEGER DEFAULT 1,
+                    weight INTEGER DEFAULT 1
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS campaign_metrics (
+                    campaign_id TEXT,
+                    date TEXT,
+                    sent_count INTEGER DEFAULT 0,
+                    PRIMARY KEY (campaign_id, date)
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS event_logs (
+                    id BIGSERIAL PRIMARY KEY,
+                    lead_id TEXT,
+                    event_type TEXT,
+                    details TEXT,
+                    timestamp TIMESTAMP,
+                    payload JSONB
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS replay_checkpoints (
+                    name TEXT PRIMARY KEY,
+                    stages TEXT,
+                    lead_filter TEXT,
+                    after_id TEXT,
+                    counts TEXT,
+                    status TEXT,
+                    started_at TIMESTAMP,
+                    updated_at TIMESTAMP
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS lead_transitions (
+                    id BIGSERIAL PRIMARY KEY,
+                    lead_id TEXT,
+                    from_state SMALLINT,
+                    to_state SMALLINT,
+                    status TEXT,
+                    reason TEXT,
+                    created_at TIMESTAMP
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS outbox (
+                    key TEXT PRIMARY KEY,
+                    lead_id TEXT,
+                    step INTEGER,
+                    to_email TEXT,
+                    subject TEXT,
+                    body TEXT,
+                    thread_id TEXT,
+                    status TEXT,
+                    attempts INTEGER DEFAULT 0,
+                    provider_message_id TEXT,
+                    last_error TEXT,
+                    available_at TIMESTAMP,
+                    lease_until TIMESTAMP,
+                    created_at TIMESTAMP,
+                    updated_at TIMESTAMP
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS delivery_events (
+                    event_id TEXT PRIMARY KEY,
+                    event_type TEXT,
+                    lead_id TEXT,
+                    received_at TIMESTAMP
+                )
+            ''')
+            has_state = conn.execute('''
+                SELECT 1 FROM information_schema.columns
+                WHERE table_schema = current_schema() AND table_name = 'leads' AND column_name = 'state'
+            ''').fetchone()
+            for table, migrations in (("leads", LEAD_MIGRATIONS), ("accounts", ACCOUNT_MIGRATIONS),
+                                      ("campaigns", CAMPAIGN_MIGRATIONS)):
+                for name, ddl in migrations.items():
+                    conn.execute(f'ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {name} {_PG_COLUMN_TYPES.get(ddl, ddl)}')
+            conn.execute('ALTER TABLE event_logs ADD COLUMN IF NOT EXISTS payload JSONB')
+            if not has_state:
+                count = conn.execute(LEAD_STATE_BACKFILL_SQL).rowcount
+                logger.info("Backfilled leads.state for %s leads", count)
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_leads_status_created ON leads (status, created_at)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_leads_thread_id ON leads (thread_id)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_leads_last_message_id ON leads (last_message_id)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_leads_email ON leads (lower(email))')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_leads_account_id ON leads (account_id)')
+            # Review queue / claim order: top-N of a status without sorting the table
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_leads_queue ON leads (status, priority DESC NULLS LAST)')
+            # Same for claims by state (every sent_step<n>, every replied_<label>)
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_leads_state ON leads (state, priority DESC NULLS LAST)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_lead_transitions_lead_id ON lead_transitions (lead_id)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_event_logs_lead_id ON event_logs (lead_id, timestamp)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_outbox_status ON outbox (status, available_at)')
+
+    def _lead_params(self, lead: Lead) -> tuple:
+        # LEAD_WRITE_FIELDS order; datetimes stay native, metadata goes in as JSONB
+        params = []
+        for name in LEAD_WRITE_FIELDS:
+            if name == "updated_at":
+                value = datetime.now()
+            elif name == "metadata":
+                value = self._jsonb(lead.metadata or {})
+            elif name == "state":
+                value = int(lead.state)
+            else:
+                value = getattr(lead, name)
+            params.append(value)
+        return tuple(params)
+
+    # --- Lead Methods ---
+    @timed(DB_QUERY_SECONDS, "save_lead")
+    def save_lead(self, lead: Lead):
+        with self.pool.connection() as conn:
+            version = self._upsert_lead(conn, lead, "save")
+        self._saved(lead, version)
+
+    @timed(DB_QUERY_SECONDS, "update_lead")
+    def update_lead(self, lead: Lead):
+        if not isinstance(lead, LeadRecord):
+            # Not read from the store: nothing to compare against, write it whole
+            return self.save_lead(lead)
+        now = datetime.now()
+        with self.pool.connection() as conn:
+            if not self._update_changed(conn, lead, "update", now):
+                return
+        lead.mark_saved(lead.version + 1, now)
+
+    @timed(DB_QUERY_SECONDS, "update_leads")
+    def update_leads(self, leads: Sequence[Lead]) -> List[str]:
+        now = datetime.now()
+        written, conflicts = [], []
+        with self.pool.connection() as conn, conn.transaction():
+            for lead in leads:
+                if not isinstance(lead, LeadRecord):
+                    written.append((lead, self._upsert_lead(conn, lead, "update")))
+                    continue
+                try:
+                    # Nested: a savepoint, rolled back alone on a conflict
+                    with conn.transaction():
+                        if self._update_changed(conn, lead, "update", now):
+                            written.append((lead, None))
+                except LeadConflict:
+                    conflicts.append(lead.id)
+        for lead, version in written:
+            if version is None:
+                lead.mark_saved(lead.version + 1, now)
+            else:
+                self._saved(lead, version)
+        return conflicts
+
+    def _upsert_lead(self, conn, lead: Lead, reason: str) -> int:
+        # Whole row, whatever the stored version; returns the version written
+        self._record_transition(conn, lead.id, lead.status, reason)
+        return conn.execute(f'''
+            INSERT INTO leads ({LEAD_WRITE_COLUMNS_SQL}) VALUES ({_LEAD_PLACEHOLDERS})
+            ON CONFLICT (id) DO UPDATE SET {LEAD_UPSERT_SET}
+            RETURNING version
+        ''', self._lead_params(lead)).fetchone()[0]
+
+    def _update_changed(self, conn, lead: LeadRecord, reason: str, now: datetime) -> bool:
+        # Only the changed columns, only if nobody wrote the lead since it was read. Raises
+        # LeadConflict (the transaction then rolls back); False if nothing changed.
+        changes = lead.changes()
+        if not changes:
+            return False
+        if "status" in changes:
+            self._record_transition(conn, lead.id, lead.status, reason)
+            changes["state"] = int(lead.state)
+        if "metadata" in changes:
+            changes["metadata"] = self._jsonb(changes["metadata"] or {})
+        assignments = ", ".join(f"{name} = %s" for name in changes)
+        updated = conn.execute(
+            f'UPDATE leads SET {assignments}, version = version + 1, updated_at = %s WHERE id = %s AND version = %s',
+            (*changes.values(), now, lead.id, lead.version)
+        ).rowcount
+        if updated == 0:
+            raise LeadConflict(lead.id)
+        return True
+
+    def _saved(self, lead: Lead, version: int):
+        if isinstance(lead, LeadRecord):
+            lead.mark_saved(version)
+        else:
+            lead.version = version
+
+    @timed(DB_QUERY_SECONDS, "bulk_add_leads")
+    def bulk_add_leads(self, leads: Iterable[Lead]) -> int:
+        count = 0
+        with self.pool.connection() as conn:
+            with conn.cursor() as cursor:
+                with cursor.copy(f'COPY leads ({LEAD_WRITE_COLUMNS_SQL}) FROM STDIN') as copy:
+                    for lead in leads:
+                        copy.write_row(self._lead_params(lead))
+                        count += 1
+        return count
+
+    @timed(DB_QUERY_SECONDS, "get_lead")
+    def get_lead(self, lead_id: str) -> Optional[Lead]:
+        with self.pool.connection() as conn:
+            row = conn.execute(f'SELECT {LEAD_COLUMNS_SQL} FROM leads WHERE id = %s', (lead_id,)).fetchone()
+        return LeadRecord.from_row(row) if row else None
+
+    @timed(DB_QUERY_SECONDS, "get_leads")
+    def get_leads(self, lead_ids: Sequence[str]) -> List[Lead]:
+        with self.pool.connection() as conn:
+            rows = conn.execute(f'SELECT {LEAD_COLUMNS_SQL} FROM leads WHERE id = ANY(%s)', (list(lead_ids),)).fetchall()
+        return [LeadRecord.from_row(row) for row in rows]
+
+    @timed(DB_QUERY_SECONDS, "get_all_leads")
+    def get_all_leads(self) -> List[Lead]:
+        with self.pool.connection() as conn:
+            rows = conn.execute(f'SELECT {LEAD_COLUMNS_SQL} FROM leads').fetchall()
+        return [LeadRecord.from_row(row) for row in rows]
+
+    @timed(DB_QUERY_SECONDS, "get_lead_ids")
+    def get_lead_ids(self) -> List[str]:
+        with self.pool.connection() as conn:
+            return [row[0] for row in conn.execute('SELECT id FROM leads').fetchall()]
+
+    @timed(DB_QUERY_SECONDS, "get_lead_summaries")
+    def get_lead_summaries(self) -> List[LeadSummary]:
+        with self.pool.connection() as conn:
+            rows = conn.execute(f'SELECT {LEAD_SUMMARY_COLUMNS_SQL} FROM leads').fetchall()
+        return list(map(LeadSummary._make, rows))
+
+    @timed(DB_QUERY_SECONDS, "get_lead_ids_page")
+    def get_lead_ids_page(self, after_id: Optional[str] = None, limit: int = 1000,
+                          campaign_id: Optional[str] = None) -> List[str]:
+        with self.pool.connection() as conn:
+            if campaign_id is None:
+                rows = conn.execute('SELECT id FROM leads WHERE id > %s ORDER BY id LIMIT %s',
+                                    (after_id or "", limit)).fetchall()
+            else:
+                rows = conn.execute("SELECT id FROM leads WHERE id > %s AND COALESCE(campaign_id, 'default') = %s "
+                                    "ORDER BY id LIMIT %s", (after_id or "", campaign_id, limit)).fetchall()
+        return [row[0] for row in rows]
+
+    @timed(DB_QUERY_SECONDS, "get_lead_summaries_page")
+    def get_lead_summaries_page(self, after_id: Optional[str] = None, limit: int = 1000) -> List[LeadSummary]:
+        with self.pool.connection() as conn:
+            rows = conn.execute(f'SELECT {LEAD_SUMMARY_COLUMNS_SQL} FROM leads WHERE id > %s ORDER BY id LIMIT %s',
+                                (after_id or "", limit)).fetchall()
+        return list(map(LeadSummary._make, rows))
+
+    @timed(DB_QUERY_SECONDS, "get_lead_by_thread_id")
+    def get_lead_by_thread_id(self, thread_id: str) -> Optional[Lead]:
+        with self.pool.connection() as conn:
+            row = conn.execute(f'SELECT {LEAD_COLUMNS_SQL} FROM leads WHERE thread_id = %s', (thread_id,)).fetchone()
+        return LeadRecord.from_row(row) if row else None
+
+    @timed(DB_QUERY_SECONDS, "get_lead_by_email")
+    def get_lead_by_email(self, email: str) -> Optional[Lead]:
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                f'SELECT {LEAD_COLUMNS_SQL} FROM leads WHERE lower(email) = lower(%s) ORDER BY updated_at DESC LIMIT 1',
+                (email,)
+            ).fetchone()
+        return LeadRecord.from_row(row) if row else None
+
+    @timed(DB_QUERY_SECONDS, "update_lead_status")
+    def update_lead_status(self, lead_id: str, status: str):
+        with self.pool.connection() as conn:
+            self._record_transition(conn, lead_id, status, "set")
+            conn.execute('UPDATE leads SET status = %s, state = %s, version = version + 1, updated_at = %s WHERE id = %s',
+                         (status, int(state_of(status)), datetime.now(), lead_id))
+
+    @timed(DB_QUERY_SECONDS, "transition_lead")
+    def transition_lead(self, lead_id: str, status: str, expected: Optional[str] = None,
+                        reason: Optional[str] = None) -> bool:
+        target = state_of(status)
+        now = datetime.now()
+        expected_filter = "AND status = %s" if expected is not None else ""
+        params = [lead_id] + ([expected] if expected is not None else []) + [status, int(target), now]
+        with self.pool.connection() as conn:
+            # The guard is the transition table itself; the row lock makes read and write one step
+            row = conn.execute(f'''
+                WITH current AS (
+                    SELECT id, state FROM leads
+                    WHERE id = %s AND {state_sources_sql(target)} {expected_filter}
+                    FOR UPDATE
+                )
+                UPDATE leads SET status = %s, state = %s, version = version + 1, updated_at = %s
+                FROM current WHERE leads.id = current.id
+                RETURNING current.state
+            ''', params).fetchone()
+            if row is None:
+                return False
+            conn.execute('''
+                INSERT INTO lead_transitions (lead_id, from_state, to_state, status, reason, created_at)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            ''', (lead_id, row[0], int(target), status, reason, now))
+            if target in OUTBOX_CANCEL_STATES:
+                self._cancel_outbox(conn, lead_id, status)
+        return True
+
+    @timed(DB_QUERY_SECONDS, "claim_leads")
+    def claim_leads(self, status: Union[str, LeadState], claimed_status: str, limit: int = 10) -> List[Lead]:
+        source = status if isinstance(status, LeadState) else state_of(status)
+        target = state_of(claimed_status)
+        if not can_transition(source, target):
+            raise ValueError(f"Leads cannot move from {source.label} to {target.label}")
+        by_state = isinstance(status, LeadState)
+        now = datetime.now()
+        # Rows locked by another worker's claim are skipped instead of waited on; RETURNING keeps
+        # no order, so the claimed rows are sorted again
+        with self.pool.connection() as conn:
+            rows = conn.execute(f'''
+                WITH claimed AS (
+                    UPDATE leads SET status = %s, state = %s, version = version + 1, updated_at = %s
+                    WHERE id IN (
+                        SELECT id FROM leads WHERE {"state" if by_state else "status"} = %s
+                        ORDER BY priority DESC NULLS LAST, created_at LIMIT %s
+                        FOR UPDATE SKIP LOCKED
+                    )
+                    RETURNING {LEAD_COLUMNS_SQL}
+                )
+                SELECT {LEAD_COLUMNS_SQL} FROM claimed ORDER BY priority DESC NULLS LAST, created_at
+            ''', (claimed_status, int(target), now, int(status) if by_state else status, limit)).fetchall()
+            if rows:
+                with conn.cursor() as cursor:
+                    cursor.executemany('''
+                        INSERT INTO lead_transitions (lead_id, from_state, to_state, status, reason, created_at)
+                        VALUES (%s, %s, %s, %s, 'claim', %s)
+                    ''', [(row[0], int(source), int(target), claimed_status, now) for row in rows])
+        return [LeadRecord.from_row(row) for row in rows]
+
+    @timed(DB_QUERY_SECONDS, "release_lead_claims")
+    def release_lead_claims(self, claimed_status: str, released_status: str, older_than: datetime) -> List[Lead]:
+        source, target = state_of(claimed_status), state_of(released_status)
+        if not can_transition(source, target):
+            raise ValueError(f"Leads cannot move from {source.label} to {target.label}")
+        now = datetime.now()
+        with self.pool.connection() as conn:
+            rows = conn.execute(f'''
+                UPDATE leads SET status = %s, state = %s, version = version + 1, updated_at = %s
+                WHERE status = %s AND updated_at < %s
+                RETURNING {LEAD_COLUMNS_SQL}
+            ''', (released_status, int(target), now, claimed_status, older_than)).fetchall()
+            if rows:
+                with conn.cursor() as cursor:
+                    cursor.executemany('''
+                        INSERT INTO lead_transitions (lead_id, from_state, to_state, status, reason, created_at)
+                        VALUES (%s, %s, %s, %s, 'claim_expired', %s)
+                    ''', [(row[0], int(source), int(target), released_status, now) for row in rows])
+        return [LeadRecord.from_row(row) for row in rows]
+
+    @timed(DB_QUERY_SECONDS, "get_lead_transitions")
+    def get_lead_transitions(self, lead_id: str) -> List[LeadTransition]:
+        with self.pool.connection() as conn:
+            rows = conn.execute('''
+                SELECT id, lead_id, from_state, to_state, status, reason, created_at
+                FROM lead_transitions WHERE lead_id = %s ORDER BY id
+            ''', (lead_id,)).fetchall()
+        return [LeadTransition(id=row[0], lead_id=row[1], from_state=None if row[2] is None else LeadState(row[2]),
+                               to_state=LeadState(row[3]), status=row[4], reason=row[5], created_at=row[6])
+                for row in rows]
+
+    def _record_transition(self, conn, lead_id: str, status: str, reason: str, guarded: bool = False):
+        # Logs the move to `status` if it changes the stored state (caller writes the lead next, in the
+        # same transaction); guarded: only from states allowed to reach it, matching a guarded UPDATE
+        target = state_of(status)
+        condition = state_sources_sql(target) if guarded else f"state IS DISTINCT FROM {int(target)}"
+        conn.execute(f'''
+            INSERT INTO lead_transitions (lead_id, from_state, to_state, status, reason, created_at)
+            SELECT id, state, %s, %s, %s, %s FROM leads WHERE id = %s AND {condition}
+        ''', (int(target), status, reason, datetime.now(), lead_id))
+        if target in OUTBOX_CANCEL_STATES:
+            self._cancel_outbox(conn, lead_id, status)
+
+    def _cancel_outbox(self, conn, lead_id: str, status: str):
+        # Queued messages of a lead that replied or was stopped are settled without sending
+        rows = conn.execute('''
+            UPDATE outbox SET status = 'cancelled', last_error = %s, lease_until = NULL, updated_at = %s
+            WHERE lead_id = %s AND status = 'pending'
+            RETURNING key
+        ''', (f"lead {status}", datetime.now(), lead_id)).fetchall()
+        for (key,) in rows:
+            self._insert_event(conn, lead_id, "SEND_CANCELLED", f"Outbox key: {key}, lead {status}")
+
+    # --- Prioritization ---
+    @timed(DB_QUERY_SECONDS, "get_review_queue")
+    def get_review_queue(self, status: str = "processed", limit: int = 50) -> List[LeadSummary]:
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                f'SELECT {LEAD_SUMMARY_COLUMNS_SQL} FROM leads WHERE status = %s ORDER BY priority DESC NULLS LAST LIMIT %s',
+                (status, limit)
+            ).fetchall()
+        return list(map(LeadSummary._make, rows))
+
+    @timed(DB_QUERY_SECONDS, "get_scoring_rows")
+    def get_scoring_rows(self) -> List[tuple]:
+        with self.pool.connection() as conn:
+            return conn.execute('SELECT id, title, email, source, campaign_id, fit_score, priority FROM leads').fetchall()
+
+    @timed(DB_QUERY_SECONDS, "get_reply_stats")
+    def get_reply_stats(self) -> List[Tuple[Optional[str], Optional[str], int, int]]:
+        with self.pool.connection() as conn:
+            return conn.execute('''
+                SELECT source, campaign_id,
+                       COUNT(*) FILTER (WHERE send_count > 0),
+                       COUNT(*) FILTER (WHERE state = %s)
+                FROM leads GROUP BY source, campaign_id
+            ''', (int(LeadState.REPLIED),)).fetchall()
+
+    @timed(DB_QUERY_SECONDS, "update_priorities")
+    def update_priorities(self, priorities: Iterable[Tuple[str, float]]) -> int:
+        ids, values = [], []
+        for lead_id, priority in priorities:
+            ids.append(lead_id)
+            values.append(priority)
+        if not ids:
+            return 0
+        # One statement for the whole batch instead of a round trip per lead
+        with self.pool.connection() as conn:
+            return conn.execute('''
+                UPDATE leads SET priority = batch.priority
+                FROM unnest(%s::text[], %s::double precision[]) AS batch(id, priority)
+                WHERE leads.id = batch.id
+            ''', (ids, values)).rowcount
+
+    # --- Campaign Methods ---
+    @timed(DB_QUERY_SECONDS, "save_campaign")
+    def save_campaign(self, campaign: Campaign):
+        with self.pool.connection() as conn:
+            conn.execute(f'''
+                INSERT INTO campaigns ({CAMPAIGN_COLUMNS_SQL}) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                ON CONFLICT (id) DO UPDATE SET
+                    name = EXCLUDED.name, icp_description = EXCLUDED.icp_description,
+                    email_template = EXCLUDED.email_template, blacklist_domains = EXCLUDED.blacklist_domains,
+                    daily_limit = EXCLUDED.daily_limit, status = EXCLUDED.status, created_at = EXCLUDED.created_at,
+                    product_description = EXCLUDED.product_description,
+                    pipeline_workers = EXCLUDED.pipeline_workers, version = EXCLUDED.version,
+                    weight = EXCLUDED.weight
+            ''', self._campaign_row(campaign))
+
+    @timed(DB_QUERY_SECONDS, "update_campaign")
+    def update_campaign(self, campaign: Campaign) -> bool:
+        row = self._campaign_row(campaign)
+        with self.pool.connection() as conn:
+            return conn.execute('''
+                UPDATE campaigns SET name = %s, icp_description = %s, email_template = %s, blacklist_domains = %s,
+                    daily_limit = %s, status = %s, created_at = %s, product_description = %s,
+                    pipeline_workers = %s, version = %s, weight = %s
+                WHERE id = %s AND version = %s
+            ''', row[1:] + (campaign.id, campaign.version - 1)).rowcount == 1
+
+    @timed(DB_QUERY_SECONDS, "get_campaign")
+    def get_campaign(self, campaign_id: str) -> Optional[Campaign]:
+        with self.pool.connection() as conn:
+            row = conn.execute(f'SELECT {CAMPAIGN_COLUMNS_SQL} FROM campaigns WHERE id = %s', (campaign_id,)).fetchone()
+        return self._row_to_campaign(row) if row else None
+
+    @timed(DB_QUERY_SECONDS, "get_campaigns")
+    def get_campaigns(self) -> List[Campaign]:
+        with self.pool.connection() as conn:
+            rows = conn.execute(f'SELECT {CAMPAIGN_COLUMNS_SQL} FROM campaigns ORDER BY created_at').fetchall()
+        return [self._row_to_campaign(row) for row in rows]
+
+    def _campaign_row(self, campaign: Campaign) -> tuple:
+        return (
+            campaign.id, campaign.name, campaign.icp_description, campaign.email_template,
+            self._jsonb(campaign.blacklist_domains), campaign.daily_limit, campaign.status, campaign.created_at,
+            campaign.product_description, campaign.pipeline_workers, campaign.version, campaign.weight
+        )
+
+    def _row_to_campaign(self, row) -> Campaign:
+        return Campaign(
+            id=row[0], name=row[1], icp_description=row[2], email_template=row[3],
+            blacklist_domains=row[4], daily_limit=row[5], status=row[6], created_at=row[7],
+            product_description=row[8], pipeline_workers=row[9] or 0, version=row[10] or 1, weight=row[11] or 1
+        )
+
+    # --- Account Methods ---
+    @timed(DB_QUERY_SECONDS, "save_accounts")
+    def save_accounts(self, accounts: Iterable[Account]) -> int:
+        rows = [(a.id, a.name, a.domain, a.company_summary, a.product_summary, a.fit_score, a.enriched_at, a.created_at)
+                for a in accounts]
+        if not rows:
+            return 0
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.executemany('''
+                    INSERT INTO accounts (id, name, domain, company_summary, product_summary, fit_score, enriched_at, created_at)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                    ON CONFLICT (id) DO NOTHING
+                ''', rows)
+                return cur.rowcount
+
+    @timed(DB_QUERY_SECONDS, "get_account")
+    def get_account(self, account_id: str) -> Optional[Account]:
+        with self.pool.connection() as conn:
+            row = conn.execute('''
+                SELECT id, name, domain, company_summary, product_summary, fit_score, enriched_at, created_at
+                FROM accounts WHERE id = %s
+            ''', (account_id,)).fetchone()
+        return Account(*row) if row else None
+
+    @timed(DB_QUERY_SECONDS, "get_account_keys")
+    def get_account_keys(self) -> List[Tuple[str, str, Optional[str]]]:
+        with self.pool.connection() as conn:
+            return conn.execute('SELECT id, name, domain FROM accounts').fetchall()
+
+    @timed(DB_QUERY_SECONDS, "set_account_domain")
+    def set_account_domain(self, account_id: str, domain: str):
+        with self.pool.connection() as conn:
+            conn.execute('UPDATE accounts SET domain = %s WHERE id = %s AND domain IS NULL', (domain, account_id))
+
+    @timed(DB_QUERY_SECONDS, "update_account_enrichment")
+    def update_account_enrichment(self, account_id: str, company_summary: str, product_summary: str,
+                                  fit_score: Optional[float] = None):
+        with self.pool.connection() as conn:
+            conn.execute('''
+                UPDATE accounts SET company_summary = %s, product_summary = %s, fit_score = %s, enriched_at = now()
+                WHERE id = %s
+            ''', (company_summary, product_summary, fit_score, account_id))
+
+    # --- Event Log Methods ---
+    @timed(DB_QUERY_SECONDS, "log_event")
+    def log_event(self, lead_id: str, event_type: str, details: str, payload: Optional[Dict] = None):
+        with self.pool.connection() as conn:
+            self._insert_event(conn, lead_id, event_type, details, payload)
+
+    def _insert_event(self, conn, lead_id: str, event_type: str, details: str, payload: Optional[Dict] = None):
+        # Shared by log_event and the outbox transactions
+        conn.execute('''
+            INSERT INTO event_logs (lead_id, event_type, details, timestamp, payload)
+            VALUES (%s, %s, %s, %s, %s)
+        ''', (lead_id, event_type, details, datetime.now(), None if payload is None else self._jsonb(payload)))
+        event_logger.info("[EVENT] %s for %s: %s", event_type, lead_id, details,
+                          extra={"lead_id": lead_id, "event_type": event_type})
+
+    @timed(DB_QUERY_SECONDS, "get_lead_logs")
+    def get_lead_logs(self, lead_id: str) -> List[EventLog]:
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                f'SELECT {EVENT_COLUMNS_SQL} FROM event_logs WHERE lead_id = %s ORDER BY timestamp DESC', (lead_id,)
+            ).fetchall()
+        return [EventLog(*row) for row in rows]
+
+    @timed(DB_QUERY_SECONDS, "get_lead_events")
+    def get_lead_events(self, lead_ids: Sequence[str]) -> List[EventLog]:
+        with self.pool.connection() as conn:
+            rows = conn.execute(f'SELECT {EVENT_COLUMNS_SQL} FROM event_logs WHERE lead_id = ANY(%s) ORDER BY id',
+                                (list(lead_ids),)).fetchall()
+        return [EventLog(*row) for row in rows]
+
+    # --- Replay Methods ---
+    @timed(DB_QUERY_SECONDS, "find_lead_ids")
+    def find_lead_ids(self, lead_filter: LeadFilter, after_id: Optional[str] = None, limit: int = 1000) -> List[str]:
+        where, params = lead_filter_sql(lead_filter, "%s")
+        with self.pool.connection() as conn:
+            rows = conn.execute(f'SELECT id FROM leads WHERE id > %s AND {where} ORDER BY id LIMIT %s',
+                                (after_id or "", *params, limit)).fetchall()
+        return [row[0] for row in rows]
+
+    @timed(DB_QUERY_SECONDS, "get_replay_checkpoint")
+    def get_replay_checkpoint(self, name: str) -> Optional[ReplayCheckpoint]:
+        with self.pool.connection() as conn:
+            row = conn.execute(f'SELECT {REPLAY_COLUMNS_SQL} FROM replay_checkpoints WHERE name = %s', (name,)).fetchone()
+        if not row:
+            return None
+        return ReplayCheckpoint(
+            name=row[0], stages=row[1].split(","), lead_filter=lead_filter_from_json(row[2]), after_id=row[3],
+            counts=json.loads(row[4]), status=row[5], started_at=row[6], updated_at=row[7]
+        )
+
+    @timed(DB_QUERY_SECONDS, "save_replay_checkpoint")
+    def save_replay_checkpoint(self, checkpoint: ReplayCheckpoint):
+        with self.pool.connection() as conn:
+            conn.execute(f'''
+                INSERT INTO replay_checkpoints ({REPLAY_COLUMNS_SQL}) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                ON CONFLICT (name) DO UPDATE SET
+                    stages = EXCLUDED.stages, lead_filter = EXCLUDED.lead_filter, after_id = EXCLUDED.after_id,
+                    counts = EXCLUDED.counts, status = EXCLUDED.status, started_at = EXCLUDED.started_at,
+                    updated_at = EXCLUDED.updated_at
+            ''', (
+                checkpoint.name, ",".join(checkpoint.stages), lead_filter_to_json(checkpoint.lead_filter),
+                checkpoint.after_id, json.dumps(checkpoint.counts), checkpoint.status, checkpoint.started_at,
+                checkpoint.updated_at
+            ))
+
+    # --- Outbox Methods ---
+    @timed(DB_QUERY_SECONDS, "enqueue_send")
+    def enqueue_send(self, lead: Lead, message: OutboxMessage) -> OutboxMessage:
+        now = datetime.now()
+        version = None
+        with self.pool.connection() as conn:
+            if isinstance(lead, LeadRecord):
+                # Conditional: a lead replied to or stopped since it was read is not queued
+                if self._update_changed(conn, lead, "enqueue", now):
+                    version = lead.version + 1
+            else:
+                version = self._upsert_lead(conn, lead, "enqueue")
+            conn.execute(f'''
+                INSERT INTO outbox ({OUTBOX_COLUMNS_SQL}) VALUES ({_OUTBOX_PLACEHOLDERS})
+                ON CONFLICT (key) DO UPDATE SET
+                    to_email = EXCLUDED.to_email, subject = EXCLUDED.subject, body = EXCLUDED.body,
+                    status = 'pending', attempts = 0, available_at = EXCLUDED.available_at,
+                    updated_at = EXCLUDED.updated_at
+                WHERE outbox.status IN ('pending', 'failed', 'cancelled')
+            ''', tuple(getattr(message, name) for name in OUTBOX_FIELDS))
+            # The approved text: what a projection rebuild restores, reviewer edits included
+            self._insert_event(conn, lead.id, "SEND_QUEUED", f"Outbox key: {message.key}", draft_payload(lead))
+            row = conn.execute(f'SELECT {OUTBOX_COLUMNS_SQL} FROM outbox WHERE key = %s', (message.key,)).fetchone()
+        if version is not None:
+            self._saved(lead, version)
+        return OutboxMessage(*row)
+
+    @timed(DB_QUERY_SECONDS, "get_outbox_message")
+    def get_outbox_message(self, key: str) -> Optional[OutboxMessage]:
+        with self.pool.connection() as conn:
+            row = conn.execute(f'SELECT {OUTBOX_COLUMNS_SQL} FROM outbox WHERE key = %s', (key,)).fetchone()
+        return OutboxMessage(*row) if row else None
+
+    @timed(DB_QUERY_SECONDS, "claim_outbox")
+    def claim_outbox(self, limit: int, lease_seconds: float, key: str = None) -> List[OutboxMessage]:
+        now = datetime.now()
+        params = [now + timedelta(seconds=lease_seconds), now, now]
+        key_filter = ""
+        if key is not None:
+            key_filter = "AND key = %s"
+            params.append(key)
+        params.append(limit)
+        with self.pool.connection() as conn:
+            # Due messages are checked against their lead and campaign first: a retry that waited
+            # out its backoff may belong to a lead that has since replied, unsubscribed or bounced
+            cancelled = conn.execute(f'''
+                UPDATE outbox SET status = 'cancelled', last_error = 'lead or campaign no longer sendable',
+                    lease_until = NULL, updated_at = %s
+                WHERE key IN (
+                    SELECT key FROM outbox WHERE status = 'pending' AND available_at <= %s {key_filter} AND {OUTBOX_STALE_SQL}
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING key, lead_id
+            ''', params[1:-1]).fetchall()
+            for key, lead_id in cancelled:
+                self._insert_event(conn, lead_id, "SEND_CANCELLED", f"Outbox key: {key}, lead or campaign no longer sendable")
+            rows = conn.execute(f'''
+                UPDATE outbox SET status = 'sending', attempts = attempts + 1, lease_until = %s, updated_at = %s
+                WHERE key IN (
+                    SELECT key FROM outbox WHERE status = 'pending' AND available_at <= %s {key_filter}
+                    ORDER BY step = 0, created_at LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING {OUTBOX_COLUMNS_SQL}
+            ''', params).fetchall()
+        return [OutboxMessage(*row) for row in rows]
+
+    @timed(DB_QUERY_SECONDS, "complete_outbox")
+    def complete_outbox(self, message: OutboxMessage, provider_message_id: str) -> bool:
+        now = datetime.now()
+        new_status = f"sent_step{message.step}"
+        with self.pool.connection() as conn:
+            # 'unconfirmed' too: a slow send may finish after its lease was expired
+            updated = conn.execute('''
+                UPDATE outbox SET status = 'sent', provider_message_id = %s, lease_until = NULL, updated_at = %s
+                WHERE key = %s AND status IN ('sending', 'unconfirmed')
+            ''', (provider_message_id, now, message.key)).rowcount
+            if updated == 0:
+                return False
+            # The send is recorded either way; a lead stopped or replied to meanwhile keeps that state
+            self._record_transition(conn, message.lead_id, new_status, "send", guarded=True)
+            conn.execute(f'''
+                UPDATE leads SET {_SENT_STATUS_SET}, version = version + 1, send_count = %s, last_sent_at = %s, last_message_id = %s,
+                    thread_id = %s, updated_at = %s
+                WHERE id = %s
+            ''', (new_status, message.step + 1, now, provider_message_id, message.thread_id, now, message.lead_id))
+            conn.execute('''
+                INSERT INTO campaign_metrics (campaign_id, date, sent_count)
+                SELECT COALESCE(campaign_id, 'default'), %s, 1 FROM leads WHERE id = %s
+                ON CONFLICT (campaign_id, date) DO UPDATE SET sent_count = campaign_metrics.sent_count + 1
+            ''', (now.strftime("%Y-%m-%d"), message.lead_id))
+            self._insert_event(conn, message.lead_id, "SEND_OK",
+                               f"Provider ID: {provider_message_id}, New Status: {new_status}",
+                               send_payload(message.step, provider_message_id, message.thread_id, now))
+        return True
+
+    @timed(DB_QUERY_SECONDS, "fail_outbox")
+    def fail_outbox(self, message: OutboxMessage, error: str, retry_at: Optional[datetime]) -> bool:
+        now = datetime.now()
+        with self.pool.connection() as conn:
+            if retry_at is not None:
+                updated = conn.execute('''
+                    UPDATE outbox SET status = 'pending', available_at = %s, last_error = %s, lease_until = NULL, updated_at = %s
+                    WHERE key = %s AND status = 'sending'
+                ''', (retry_at, error, now, message.key)).rowcount
+                details = f"{error} (attempt {message.attempts}, retry at {retry_at.isoformat()})"
+            else:
+                updated = conn.execute('''
+                    UPDATE outbox SET status = 'failed', last_error = %s, lease_until = NULL, updated_at = %s
+                    WHERE key = %s AND status = 'sending'
+                ''', (error, now, message.key)).rowcount
+                details = f"{error} (attempt {message.attempts}, giving up)"
+            if updated == 0:
+                return False
+            if retry_at is None:
+                self._record_transition(conn, message.lead_id, "send_failed", "send", guarded=True)
+                conn.execute(f'UPDATE leads SET status = %s, state = %s, version = version + 1, updated_at = %s WHERE id = %s AND {SEND_FAILED_SOURCES}',
+                             ("send_failed", int(LeadState.SEND_FAILED), now, message.lead_id))
+            self._insert_event(conn, message.lead_id, "SEND_ERR", details)
+        return True
+
+    @timed(DB_QUERY_SECONDS, "expire_outbox_leases")
+    def expire_outbox_leases(self, requeue: bool = False) -> List[OutboxMessage]:
+        now = datetime.now()
+        with self.pool.connection() as conn:
+            rows = conn.execute(f'''
+                UPDATE outbox SET status = %s, lease_until = NULL, updated_at = %s
+                WHERE status = 'sending' AND lease_until < %s
+                RETURNING {OUTBOX_COLUMNS_SQL}
+            ''', ("pending" if requeue else "unconfirmed", now, now)).fetchall()
+            expired = [OutboxMessage(*row) for row in rows]
+            for message in expired:
+                self._insert_event(conn, message.lead_id, "SEND_UNCONFIRMED",
+                                   f"Lease expired for {message.key}" + (", requeued" if requeue else ""))
+        return expired
+
+    # --- Provider Delivery Events ---
+    @timed(DB_QUERY_SECONDS, "apply_delivery_events")
+    def apply_delivery_events(self, events: List[DeliveryEvent]) -> Dict[str, int]:
+        counts = {"applied": 0, "duplicate": 0, "unmatched": 0}
+        bounces = 0
+        now = datetime.now()
+        with self.pool.connection() as conn:
+            for event in events:
+                lead_id = event.lead_id
+                if lead_id is None and event.message_id:
+                    row = conn.execute('SELECT id FROM leads WHERE last_message_id = %s', (event.message_id,)).fetchone()
+                    lead_id = row[0] if row else None
+
+                inserted = conn.execute('''
+                    INSERT INTO delivery_events (event_id, event_type, lead_id, received_at) VALUES (%s, %s, %s, %s)
+                    ON CONFLICT (event_id) DO NOTHING
+                ''', (event.event_id, event.event_type, lead_id, now)).rowcount
+                if inserted == 0:
+                    counts["duplicate"] += 1
+                    continue
+                if lead_id is None:
+                    counts["unmatched"] += 1
+                    continue
+
+                stop_status = DELIVERY_STOP_STATUSES.get(event.event_type)
+                if stop_status:
+                    self._record_transition(conn, lead_id, stop_status, event.event_type, guarded=True)
+                    conn.execute(f"UPDATE leads SET status = %s, state = %s, version = version + 1, updated_at = %s WHERE id = %s AND {STOPPED_SOURCES}",
+                                 (stop_status, int(LeadState.STOPPED), now, lead_id))
+                elif event.event_type == "delivered" and event.outbox_key:
+                    # Delivery proves a send parked as unconfirmed (crash mid-send) went out
+                    reconciled = conn.execute('''
+                        UPDATE outbox SET status = 'sent', provider_message_id = COALESCE(provider_message_id, %s), updated_at = %s
+                        WHERE key = %s AND status = 'unconfirmed'
+                    ''', (event.message_id, now, event.outbox_key)).rowcount
+                    if reconciled:
+                        self._record_transition(conn, lead_id, f"sent_step{event.step}", "delivered", guarded=True)
+                        conn.execute(f'''
+                            UPDATE leads SET {_SENT_STATUS_SET}, version = version + 1, send_count = %s, last_sent_at = %s, last_message_id = %s,
+                                thread_id = COALESCE(thread_id, (SELECT thread_id FROM outbox WHERE key = %s)), updated_at = %s
+                            WHERE id = %s
+                        ''', (f"sent_step{event.step}", event.step + 1, event.timestamp, event.message_id,
+                              event.outbox_key, now, lead_id))
+                if event.event_type == "bounce":
+                    bounces += 1
+                self._insert_event(conn, lead_id, f"ESP_{event.event_type.upper()}", event.reason or event.email or "")
+                counts["applied"] += 1
+
+            if bounces:
+                conn.execute('''
+                    INSERT INTO daily_metrics (date, bounce_count) VALUES (%s, %s)
+                    ON CONFLICT (date) DO UPDATE SET bounce_count = daily_metrics.bounce_count + EXCLUDED.bounce_count
+                ''', (datetime.now().strftime("%Y-%m-%d"), bounces))
+        return counts
+
+    # --- Analytics Export ---
+    @contextmanager
+    def open_snapshot(self, workdir: str = None):
+        # One REPEATABLE READ, READ ONLY transaction: every query sees the same MVCC snapshot and
+        # writers are never blocked. Named (server-side) cursors stream rows in fetchmany chunks.
+        with self.pool.connection() as conn:
+            with conn.transaction():
+                conn.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY')
+                # The snapshot is taken by the first query, not by BEGIN: pin it now
+                conn.execute('SELECT 1')
+                names = itertools.count()
+
+                def execute(sql: str):
+                    cursor = conn.cursor(name=f"snapshot_{next(names)}")
+                    cursor.execute(sql)
+                    return cursor
+                yield execute
+
+    # --- Change Tracking ---
+    def get_change_version(self) -> str:
+        # xmin:xmax:in-progress moves with every committed (or aborted) write transaction, so no
+        # write path pays for a counter; writes elsewhere in the cluster only cost a refetch
+        with self.pool.connection() as conn:
+            return conn.execute('SELECT pg_current_snapshot()::text').fetchone()[0]
+
+    # --- Metrics Methods ---
+    @timed(DB_QUERY_SECONDS, "get_todays_metrics")
+    def get_todays_metrics(self) -> DailyMetric:
+        today = datetime.now().strftime("%Y-%m-%d")
+        with self.pool.connection() as conn:
+            row = conn.execute('''
+                SELECT date, sent_count, reply_count, positive_count, bounce_count
+                FROM daily_metrics WHERE date = %s
+            ''', (today,)).fetchone()
+        if row:
+            return DailyMetric(date=row[0], sent_count=row[1], reply_count=row[2], positive_count=row[3], bounce_count=row[4])
+        return DailyMetric(date=today)
+
+    @timed(DB_QUERY_SECONDS, "get_campaign_sent_today")
+    def get_campaign_sent_today(self, campaign_id: str) -> int:
+        today = datetime.now().strftime("%Y-%m-%d")
+        with self.pool.connection() as conn:
+            row = conn.execute('SELECT sent_count FROM campaign_metrics WHERE campaign_id = %s AND date = %s',
+                               (campaign_id or "default", today)).fetchone()
+        return row[0] if row else 0
+
+    @timed(DB_QUERY_SECONDS, "increment_metric")
+    def increment_metric(self, field: str):
+        today = datetime.now().strftime("%Y-%m-%d")
+        valid_fields = ["sent_count", "reply_count", "positive_count", "bounce_count"]
+        if field not in valid_fields:
+            return
+        # Single upsert so concurrent nodes never lose an increment
+        with self.pool.connection() as conn:
+            conn.execute(f'''
+                INSERT INTO daily_metrics (date, {field}) VALUES (%s, 1)
+                ON CONFLICT (date) DO UPDATE SET {field} = daily_metrics.{field} + 1
+            ''', (today,))
+
+    def close(self):
+        self.pool.close()
+        logger.info("Connection pool closed.")
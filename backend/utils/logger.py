@@ -1,13 +1,167 @@
+import atexit
+import contextvars
+import json
 import logging
+import logging.handlers
+import queue
+import random
 import sys
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Optional
+from backend.core.config import config
 
-def setup_logger(name: str):
+# Structured fields copied onto every record when present
+CONTEXT_FIELDS = ("lead_id", "campaign_id", "event_type")
+
+_log_context: contextvars.ContextVar = contextvars.ContextVar("gtm_log_context", default={})
+
+_handler: Optional[logging.Handler] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+_setup_lock = threading.Lock()
+
+
+@contextmanager
+def log_context(**fields):
+    """
+    Attaches fields (lead_id, campaign_id, ...) to every record logged inside the block.
+        with log_context(lead_id=lead.id, campaign_id=lead.campaign_id): ...
+    """
+    token = _log_context.set({**_log_context.get(), **{k: v for k, v in fields.items() if v is not None}})
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    # Runs in the calling thread, so the context is captured before the record is queued
+    def filter(self, record: logging.LogRecord) -> bool:
+        ctx = _log_context.get()
+        for key, value in ctx.items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps a fraction of INFO/DEBUG records; warnings and errors always pass.
+    """
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        return random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key in CONTEXT_FIELDS:
+            value = getattr(record, key, None)
+            if value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__('[%(asctime)s] %(levelname)s [%(name)s] %(message)s')
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        extras = " ".join(f"{k}={getattr(record, k)}" for k in CONTEXT_FIELDS if getattr(record, k, None) is not None)
+        return f"{line} {extras}" if extras else line
+
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueues the raw record; message formatting happens on the listener thread.
+    Drops records instead of blocking when the queue is full.
+    """
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _NonBlockingQueueHandler.dropped += 1
+
+
+def _build_formatter() -> logging.Formatter:
+    return JsonFormatter() if config.LOG_FORMAT == "json" else TextFormatter()
+
+
+def _get_handler() -> logging.Handler:
+    global _handler, _listener
+    if _handler is not None:
+        return _handler
+    with _setup_lock:
+        if _handler is not None:
+            return _handler
+
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(_build_formatter())
+
+        if config.LOG_ASYNC:
+            log_queue = queue.Queue(maxsize=config.LOG_QUEUE_SIZE)
+            handler = _NonBlockingQueueHandler(log_queue)
+            _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=False)
+            _listener.start()
+            atexit.register(stop_logging)
+        else:
+            handler = stream_handler
+
+        handler.addFilter(ContextFilter())
+        _handler = handler
+        return _handler
+
+
+def stop_logging():
+    """
+    Flushes queued records and stops the background writer.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def parse_sampling(raw: str) -> Dict[str, float]:
+    # "LeadStore.events=0.1,API=0.5" -> {"LeadStore.events": 0.1, "API": 0.5}
+    rates = {}
+    for item in raw.split(","):
+        if "=" in item:
+            name, rate = item.split("=", 1)
+            rates[name.strip()] = float(rate)
+    return rates
+
+
+_sampling_rates = parse_sampling(config.LOG_SAMPLING)
+
+
+def setup_logger(name: str, sample_rate: float = None):
     logger = logging.getLogger(name)
     if not logger.handlers:
-        logger.setLevel(logging.INFO)
-        handler = logging.StreamHandler(sys.stdout)
-        handler.setFormatter(logging.Formatter(
-            '[%(asctime)s] %(levelname)s [%(name)s] %(message)s'
-        ))
-        logger.addHandler(handler)
+        logger.setLevel(config.LOG_LEVEL)
+        logger.addHandler(_get_handler())
+        logger.propagate = False
+        rate = _sampling_rates.get(name, sample_rate)
+        if rate is not None and rate < 1.0:
+            logger.addFilter(SamplingFilter(rate))
     return logger
@@ -0,0 +1,292 @@
+import functools
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+from backend.core.config import config
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class MetricsRegistry:
+    """
+    Minimal in-process metrics registry rendered in the Prometheus text format.
+    When disabled, every update is a single attribute check.
+    """
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._metrics: Dict[str, "_Metric"] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: "_Metric"):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> "Counter":
+        return self._register(Counter(self, name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> "Gauge":
+        return self._register(Gauge(self, name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> "Histogram":
+        return self._register(Histogram(self, name, help, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            for metric in self._metrics.values():
+                metric.reset()
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Tuple[str, str] = None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, registry: MetricsRegistry, name: str, help: str, labelnames: Sequence[str]):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def labels(self, *values: str):
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def reset(self):
+        with self._lock:
+            for child in self._children.values():
+                child.reset()
+
+
+class _ValueChild:
+    __slots__ = ("registry", "value", "_lock")
+
+    def __init__(self, registry: MetricsRegistry):
+        self.registry = registry
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        if not self.registry.enabled:
+            return
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+    def set(self, value: float):
+        if not self.registry.enabled:
+            return
+        self.value = value
+
+    def reset(self):
+        self.value = 0.0
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _ValueChild(self.registry)
+
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+                for key, child in list(self._children.items())]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0):
+        self._default.dec(amount)
+
+    def set(self, value: float):
+        self._default.set(value)
+
+
+class _NoopTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_TIMER = _NoopTimer()
+
+
+class _Timer:
+    __slots__ = ("child", "start")
+
+    def __init__(self, child: "_HistogramChild"):
+        self.child = child
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.child.observe(time.perf_counter() - self.start)
+        return False
+
+
+class _HistogramChild:
+    __slots__ = ("registry", "buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, registry: MetricsRegistry, buckets: Tuple[float, ...]):
+        self.registry = registry
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        if not self.registry.enabled:
+            return
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[idx] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self):
+        if not self.registry.enabled:
+            return _NOOP_TIMER
+        return _Timer(self)
+
+    def reset(self):
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, registry, name, help, labelnames, buckets):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(registry, name, help, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.registry, self.buckets)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def time(self):
+        return self._default.time()
+
+    def render(self) -> List[str]:
+        lines = []
+        for key, child in list(self._children.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, child.counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', repr(bound)))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', '+Inf'))} {child.count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(child.sum)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {child.count}")
+        return lines
+
+
+def timed(histogram: Histogram, *label_values: str):
+    """
+    Decorator recording the wrapped call's duration in `histogram`.
+    """
+    def decorator(fn):
+        child = histogram.labels(*label_values)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not registry.enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                child.observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+registry = MetricsRegistry(enabled=config.METRICS_ENABLED)
+
+# --- Metric catalogue ---
+DB_QUERY_SECONDS = registry.histogram(
+    "gtm_db_query_seconds", "LeadStore query latency", ["op"])
+LLM_REQUEST_SECONDS = registry.histogram(
+    "gtm_llm_request_seconds", "LLM provider request latency", ["provider", "tier", "outcome"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0))
+PROVIDER_SEND_SECONDS = registry.histogram(
+    "gtm_provider_send_seconds", "Email provider send latency", ["provider", "outcome"])
+GMAIL_REQUEST_SECONDS = registry.histogram(
+    "gtm_gmail_request_seconds", "Gmail API request latency", ["op"])
+PIPELINE_STAGE_SECONDS = registry.histogram(
+    "gtm_pipeline_stage_seconds", "Lead pipeline stage latency", ["stage"])
+
+CACHE_REQUESTS_TOTAL = registry.counter(
+    "gtm_cache_requests_total", "Cache lookups by cache and result (hit/miss)", ["cache", "result"])
+RETRIES_TOTAL = registry.counter(
+    "gtm_retries_total", "Retries, hedges and failovers by operation", ["op"])
+RISK_BLOCKS_TOTAL = registry.counter(
+    "gtm_risk_blocks_total", "Sends blocked by risk control, by reason", ["reason"])
+WEBHOOK_EVENTS_TOTAL = registry.counter(
+    "gtm_webhook_events_total", "Inbound webhook events by source and event / outcome", ["source", "event"])
+GMAIL_POLLS_TOTAL = registry.counter(
+    "gtm_gmail_polls_total", "Mailbox listener cycles by mailbox and outcome (ok/error/rate_limited)", ["mailbox", "outcome"])
+GMAIL_QUOTA_UNITS_TOTAL = registry.counter(
+    "gtm_gmail_quota_units_total", "Gmail API quota units spent, by mailbox", ["mailbox"])
+
+QUEUE_DEPTH = registry.gauge(
+    "gtm_queue_depth", "Work items waiting or in flight, by queue", ["queue"])
+QUEUE_WAIT_SECONDS = registry.histogram(
+    "gtm_queue_wait_seconds", "Time from submit to start, by queue and priority class", ["queue", "work_class"],
+    buckets=(0.01, 0.05, 0.25, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 3600.0))
@@ -0,0 +1,105 @@
+"""
+Account resolution at scale: AccountIndex build, lookup latency and match quality.
+
+Builds an index over N synthetic companies (half with a corporate domain), then queries
+variants of known accounts and names that are not in the index:
+- suffix:  case / punctuation / legal-suffix changes   ("Zorivaken Labs" -> "ZORIVAKEN LABS, INC.")
+- abbrev:  abbreviated industry word                     ("... Technologies" -> "... Tech")
+- typo:    one character changed in the distinctive word ("Zorivaken" -> "Zorivakon")
+- domain:  unrelated company string, corporate email of the account
+- unseen:  new names; any match here is a false merge
+
+    python -m benchmarks.account_index_bench --accounts 1000000
+"""
+import argparse
+import logging
+import random
+import resource
+import time
+
+import numpy as np
+
+from backend.services.lead_ingest.account_index import AccountIndex
+
+CONSONANTS = "bcdfghjklmnprstvwxz"
+VOWELS = "aeiou"
+INDUSTRY = ["Technologies", "Systems", "Labs", "Analytics", "Logistics", "Health", "Robotics", "Software",
+            "Capital", "Energy", "Networks", "Foods", "Dynamics", "Media", "Security", "Services"]
+SUFFIXES = ["", " Inc.", " LLC", " Ltd", " GmbH", " Corp", ", Inc", " Co."]
+
+
+def synthetic_accounts(count: int, seed: int):
+    rng = random.Random(seed)
+    seen = set()
+    rows = []
+    while len(rows) < count:
+        # Pronounceable made-up brand word: 4-5 consonant-vowel pairs, sometimes a closing consonant.
+        # Shorter words get so dense at 1M accounts that most one-letter typos hit another real name
+        word = "".join(rng.choice(CONSONANTS) + rng.choice(VOWELS) for _ in range(rng.choice((4, 5))))
+        word += rng.choice(("", "", "n", "r", "x", "s"))
+        name = f"{word.capitalize()} {rng.choice(INDUSTRY)}"
+        if name in seen:
+            continue
+        seen.add(name)
+        domain = f"{word}{len(rows) % 97}.example.com" if rng.random() < 0.5 else None
+        rows.append((AccountIndex.account_id_for(name.lower(), domain), name + rng.choice(SUFFIXES), domain, word))
+    return rows
+
+
+def typo(word: str, rng: random.Random) -> str:
+    i = rng.randrange(1, len(word) - 1)
+    return word[:i] + rng.choice("aeiou".replace(word[i], "")) + word[i + 1:]
+
+
+def percentiles(samples):
+    arr = np.array(samples) * 1e6
+    return f"p50 {np.percentile(arr, 50):6.1f} us  p99 {np.percentile(arr, 99):6.1f} us"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--accounts", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=5_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    rng = random.Random(args.seed)
+
+    rows = synthetic_accounts(args.accounts + args.queries, args.seed)
+    known, unseen = rows[:args.accounts], rows[args.accounts:]
+
+    index = AccountIndex()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    index.build((account_id, name, domain) for account_id, name, domain, _ in known)
+    build_seconds = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"build   {len(index):,} accounts in {build_seconds:.1f}s; arrays {index.nbytes / 1e6:.0f} MB, "
+          f"peak RSS +{(rss_after - rss_before) / 1024:.0f} MB")
+
+    sample = rng.sample(known, args.queries)
+    cases = {
+        "suffix": [(name.upper().replace(".", "") + ", Inc.", None, account_id) for account_id, name, _, _ in sample],
+        "abbrev": [(name.replace("Technologies", "Tech").replace("Systems", "Sys").replace("Services", "Svcs"), None, account_id)
+                   for account_id, name, _, _ in sample],
+        "typo": [(name.replace(word.capitalize(), typo(word, rng).capitalize()), None, account_id)
+                 for account_id, name, _, word in sample],
+        "domain": [("Some Other Name", f"jane@{domain}", account_id) for account_id, _, domain, _ in sample if domain],
+        "unseen": [(name, None, None) for _, name, _, _ in unseen],
+    }
+    for case, queries in cases.items():
+        latencies, correct = [], 0
+        for name, email, expected in queries:
+            t0 = time.perf_counter()
+            match = index.match(name, email)
+            latencies.append(time.perf_counter() - t0)
+            correct += (match is None) if expected is None else (match is not None and match[0] == expected)
+        label = "no false merge" if case == "unseen" else "resolved"
+        print(f"{case:7} {percentiles(latencies)}  {label} {correct / len(queries):6.1%} of {len(queries):,}")
+
+    latencies = []
+    for account_id, name, domain, _ in unseen:
+        t0 = time.perf_counter()
+        index.resolve(name, f"ops@{domain}" if domain else None)
+        latencies.append(time.perf_counter() - t0)
+    print(f"insert  {percentiles(latencies)}  ({len(unseen):,} new accounts via resolve())")
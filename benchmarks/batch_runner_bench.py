@@ -0,0 +1,80 @@
+"""
+Batch runner scaling on a synthetic sqlite store: the same job over the same leads with 1, 2, 4 ...
+worker processes, each run on a fresh copy of the seeded database.
+
+- retemplate: drafts re-rendered from two campaign templates (render + batched conditional writes)
+- rescore:    review-queue priorities (columnar scoring, priorities written only where they moved)
+- reenrich:   ICP analysis again through the mock LLM, then re-scoring
+
+Reported per worker count: wall time (process start-up included), leads/s, speedup over the first
+count and the outcome counts. Speedup is bounded by the cores of the machine (printed) and, on
+sqlite, by the single writer: chunks write in one transaction each, so writes queue but stay short.
+
+    python -m benchmarks.batch_runner_bench --leads 100000 --workers 1,2,4,8 --job retemplate
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+# Inherited by the spawned workers
+os.environ.setdefault("LOG_LEVEL", "ERROR")
+os.environ.setdefault("MOCK_LLM", "True")
+
+from backend.services.pipeline.batch_runner import BatchRunner, JOBS  # noqa: E402
+from backend.storage.db import LeadStore  # noqa: E402
+from backend.storage.models import Campaign, Lead  # noqa: E402
+
+TITLES = ("CTO", "VP Engineering", "Head of Data", "Software Engineer", "Founder", "Marketing Manager", None)
+TEMPLATE = ("Hi {first_name},\n\nI read about {company_name} and your work as {title}. {company_summary}\n\n"
+            "Teams like yours use us to {product_summary}. Worth a quick call?\n\nBest,\nSam")
+
+
+def seed(path: str, count: int):
+    db = LeadStore(path)
+    for campaign_id in ("a", "b"):
+        db.save_campaign(Campaign(id=campaign_id, name=campaign_id, icp_description="B2B SaaS",
+                                  email_template=TEMPLATE, blacklist_domains=[]))
+    for offset in range(0, count, 50_000):
+        db.bulk_add_leads([
+            Lead(id=f"lead-{i:08d}", source=("csv", "linkedin", "crm")[i % 3], name=f"Alex Example{i}",
+                 company_name=f"Company {i % 5000}", email=f"p{i}@company{i % 5000}.com", status="processed",
+                 campaign_id="ab"[i % 2], title=TITLES[i % len(TITLES)], fit_score=float(i % 100),
+                 company_summary=f"Company {i % 5000} builds developer tooling for data teams.",
+                 product_summary="ship pipelines faster", generated_email_subject=f"Quick question {i}",
+                 generated_email_body="Hi there, old draft.")
+            for i in range(offset, min(count, offset + 50_000))
+        ])
+    db.close()
+
+
+def main(args):
+    workdir = tempfile.mkdtemp(prefix="gtm-batch-")
+    try:
+        seeded = os.path.join(workdir, "seed.db")
+        seed(seeded, args.leads)
+        print(f"{args.leads:,} leads, job {args.job}, chunk {args.chunk_size}, {multiprocessing.cpu_count()} CPU cores")
+        baseline = None
+        for workers in args.workers:
+            path = os.path.join(workdir, f"run-{workers}.db")
+            shutil.copyfile(seeded, path)
+            result = BatchRunner(args.job, workers=workers, chunk_size=args.chunk_size, db_path=path,
+                                 progress_seconds=3600).run()
+            baseline = baseline or result["leads_per_sec"]
+            print(f"workers {workers:3}  {result['seconds']:8.2f}s  {result['leads_per_sec']:10,.0f} leads/s  "
+                  f"x{result['leads_per_sec'] / baseline:4.2f}  updated {result['updated']:,} unchanged {result['unchanged']:,} "
+                  f"skipped {result['skipped']:,} conflicts {result['conflicts']:,} failed {result['failed']:,}")
+            os.remove(path)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--leads", type=int, default=100_000)
+    parser.add_argument("--workers", type=lambda raw: [int(n) for n in raw.split(",")], default=[1, 2, 4, 8],
+                        help="comma-separated worker counts")
+    parser.add_argument("--job", choices=sorted(JOBS), default="retemplate")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    main(parser.parse_args())
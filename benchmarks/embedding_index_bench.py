@@ -0,0 +1,152 @@
+"""
+Local embedding index (hashed TF-IDF, memory-mapped) on synthetic company descriptions and replies.
+
+- upsert:   batch upsert throughput and on-disk size
+- search:   single-query p50/p99 at the full index size, cold reopen from disk
+- companies: a lightly edited copy of an indexed description (reordered sentence, dropped clause,
+            different company suffix) should reach ENRICH_REUSE_SIMILARITY; a different company
+            from the same industry template should not
+- replies:  a stream of replies drawn from a few hundred phrasings per class; share classified
+            without an LLM call, and how many of those labels were wrong
+
+    python -m benchmarks.embedding_index_bench --companies 100000
+"""
+import argparse
+import logging
+import os
+import random
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from backend.core.config import config
+from backend.services.embeddings.embedding_index import EmbeddingIndex, HashedTfidfEmbedder, text_key
+
+INDUSTRIES = {
+    "fintech": ("payments", "ledger", "treasury", "card issuing", "fraud scoring", "lending", "payouts", "compliance"),
+    "devtools": ("ci pipelines", "code review", "observability", "feature flags", "testing", "deployments", "apis"),
+    "health": ("patient intake", "clinical trials", "telehealth", "claims", "care coordination", "imaging", "pharmacy"),
+    "logistics": ("freight", "last mile", "warehousing", "fleet telematics", "customs", "route planning", "returns"),
+    "security": ("endpoint detection", "identity", "secrets", "vulnerability scanning", "siem", "zero trust", "email security"),
+}
+CUSTOMERS = ("banks", "retailers", "hospitals", "startups", "enterprises", "governments", "universities", "insurers",
+             "manufacturers", "marketplaces", "carriers", "developers")
+REGIONS = ("north america", "europe", "latin america", "southeast asia", "the nordics", "india", "australia", "africa")
+SUFFIXES = ("Inc", "Labs", "Group", "Technologies", "Systems", "HQ")
+
+REPLY_PHRASES = {
+    "interested": ("sounds interesting, can we set up a call next week", "yes please send over more details",
+                   "happy to chat, how does thursday look", "this is timely, we are evaluating options now",
+                   "let's talk, book something on my calendar", "interested, who else is using it"),
+    "not_interested": ("not interested, thanks", "we already have a vendor for this", "no budget this year, sorry",
+                       "please do not follow up, we are not looking", "not a fit for us right now"),
+    "out_of_office": ("i am out of the office until monday with limited access to email",
+                      "on parental leave, back in march, contact my colleague",
+                      "away at a conference this week, will reply when back"),
+    "unsubscribe": ("unsubscribe", "remove me from your list", "please stop emailing me", "take me off this mailing list"),
+}
+SIGNOFFS = ("", "thanks", "best", "cheers", "regards, sam", "sent from my phone", "thank you")
+
+
+def company_description(rng: random.Random):
+    industry = rng.choice(list(INDUSTRIES))
+    products = rng.sample(INDUSTRIES[industry], 3)
+    name = f"{rng.choice('BCDFGKLMNPRSTVZ')}{rng.choice('aeiou')}{rng.choice('lmnrstvx')}{rng.choice('aeiou')}" \
+           f"{rng.choice('bdgklmnprstvz')}{rng.randrange(100)}"
+    sentences = [
+        f"{name} builds {products[0]} software for {rng.choice(CUSTOMERS)} in {rng.choice(REGIONS)}.",
+        f"The platform covers {products[1]} and {products[2]} with {rng.randrange(5, 400)} integrations.",
+        f"Founded in {rng.randrange(1995, 2024)}, the company has {rng.randrange(10, 5000)} employees "
+        f"and customers such as {rng.choice(CUSTOMERS)} and {rng.choice(CUSTOMERS)}.",
+    ]
+    return name, sentences
+
+
+def edited(rng: random.Random, name: str, sentences):
+    # Another source's copy of the same company: suffix, sentence order, one clause dropped
+    sentences = list(sentences)
+    rng.shuffle(sentences)
+    sentences[-1] = sentences[-1].split(",")[0].rstrip(".") + "."
+    return f"{name} {rng.choice(SUFFIXES)}. " + " ".join(sentences)
+
+
+def reply_text(rng: random.Random, label: str):
+    phrase = rng.choice(REPLY_PHRASES[label])
+    return f"{rng.choice(('hi', 'hello', 'hey', ''))} {phrase} {rng.choice(SIGNOFFS)}".strip()
+
+
+def percentiles(samples):
+    arr = np.array(samples) * 1e3
+    return f"p50 {np.percentile(arr, 50):7.3f} ms  p99 {np.percentile(arr, 99):7.3f} ms"
+
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--companies", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--replies", type=int, default=5000)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    rng = random.Random(args.seed)
+    workdir = tempfile.mkdtemp(prefix="gtm-embed-")
+
+    try:
+        companies = [company_description(rng) for _ in range(args.companies)]
+        index = EmbeddingIndex("companies", workdir, embedder=HashedTfidfEmbedder())
+        start = time.perf_counter()
+        for offset in range(0, len(companies), args.batch):
+            batch = companies[offset:offset + args.batch]
+            index.upsert([f"acct-{offset + i}" for i in range(len(batch))],
+                         [f"{name}. " + " ".join(sentences) for name, sentences in batch])
+        elapsed = time.perf_counter() - start
+        print(f"upsert     {len(index):,} companies in {elapsed:.1f}s ({len(index) / elapsed:,.0f}/s, "
+              f"batch {args.batch}), {directory_size(workdir) / 1e6:.0f} MB on disk ({index.dim} dims)")
+
+        index.close()
+        start = time.perf_counter()
+        index = EmbeddingIndex("companies", workdir, embedder=HashedTfidfEmbedder())
+        print(f"reopen     {time.perf_counter() - start:.2f}s")
+
+        threshold = config.ENRICH_REUSE_SIMILARITY
+        picks = rng.sample(range(len(companies)), args.queries)
+        samples, hits, top1, false_hits = [], 0, 0, 0
+        for i in picks:
+            query = edited(rng, *companies[i])
+            started = time.perf_counter()
+            match = index.nearest(query)
+            samples.append(time.perf_counter() - started)
+            top1 += match.id == f"acct-{i}"
+            hits += match.id == f"acct-{i}" and match.score >= threshold
+            # A company that was never indexed, from the same templates
+            unseen_name, unseen = company_description(rng)
+            other = index.nearest(f"{unseen_name}. " + " ".join(unseen))
+            false_hits += other.score >= threshold
+        print(f"search     {percentiles(samples)}  ({len(index):,} rows, exact)")
+        print(f"companies  near-duplicate top-1 {top1 / args.queries:.1%}, reused at >= {threshold} "
+              f"{hits / args.queries:.1%}; unseen company reused {false_hits / args.queries:.1%}")
+
+        replies = EmbeddingIndex("replies", workdir, embedder=HashedTfidfEmbedder())
+        threshold = config.REPLY_REUSE_SIMILARITY
+        llm_calls = reused = wrong = 0
+        for _ in range(args.replies):
+            label = rng.choice(list(REPLY_PHRASES))
+            text = reply_text(rng, label)
+            match = replies.nearest(text, min_score=threshold)
+            if match is not None:
+                reused += 1
+                wrong += match.label != label
+                continue
+            llm_calls += 1  # the stand-in LLM is always right
+            replies.upsert([text_key(text)], [text], labels=[label])
+        print(f"replies    {args.replies:,} classified, {reused / args.replies:.1%} without an LLM call "
+              f"({wrong} wrong labels), {len(replies):,} rows indexed")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
@@ -0,0 +1,181 @@
+"""
+Local stand-ins for the external services the pipeline talks to.
+
+- LLM: backend.core.llm_stub_server (OpenAI-compatible, latency configurable)
+- SendGrid: FakeSendGridServer, an HTTP endpoint accepting POST /v3/mail/send
+- Gmail: FakeGmailService, an in-memory object with the googleapiclient call chain
+"""
+import base64
+import itertools
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from backend.core.llm_stub_server import start_stub_server
+
+
+def start_fake_llm(latency_ms: float = 0, jitter_ms: float = 0, error_rate: float = 0.0):
+    return start_stub_server(latency_ms=latency_ms, jitter_ms=jitter_ms, error_rate=error_rate)
+
+
+class FakeSendGridServer:
+    """
+    Accepts SendGrid v3 mail/send requests and answers 202 with an X-Message-Id header.
+    """
+    def __init__(self, latency_ms: float = 0, jitter_ms: float = 0, host: str = "127.0.0.1"):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.sent = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self.rfile.read(length)
+                delay = fake.latency_ms + random.uniform(0, fake.jitter_ms)
+                if delay > 0:
+                    time.sleep(delay / 1000.0)
+                with fake._lock:
+                    fake.sent += 1
+                    msg_id = f"fake-sg-{next(fake._ids)}"
+                self.send_response(202)
+                self.send_header("X-Message-Id", msg_id)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://{host}:{self.server.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def shutdown(self):
+        self.server.shutdown()
+
+
+class FakeHttpError(Exception):
+    """
+    Shaped like googleapiclient.errors.HttpError (resp.status) for rate-limit handling.
+    """
+    def __init__(self, status: int, reason: str):
+        super().__init__(f"<HttpError {status}: {reason}>")
+        self.resp = type("Resp", (), {"status": status})()
+
+
+class _Request:
+    def __init__(self, fn, latency_ms: float, service: "FakeGmailService" = None):
+        self.fn = fn
+        self.latency_ms = latency_ms
+        self.service = service
+
+    def execute(self):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+        if self.service is not None:
+            self.service.requests += 1
+            if self.service.rate_limited:
+                raise FakeHttpError(429, "rateLimitExceeded")
+        return self.fn()
+
+
+class _Messages:
+    def __init__(self, service: "FakeGmailService"):
+        self.service = service
+
+    def list(self, userId: str = "me", q: str = None, pageToken: str = None, **kwargs):
+        return _Request(lambda: {"messages": [{"id": m["id"], "threadId": m["threadId"]}
+                                              for m in self.service.messages.values()]},
+                        self.service.latency_ms, self.service)
+
+    def get(self, userId: str = "me", id: str = None, **kwargs):
+        return _Request(lambda: self.service.messages[id], self.service.latency_ms, self.service)
+
+
+class _History:
+    def __init__(self, service: "FakeGmailService"):
+        self.service = service
+
+    def list(self, userId: str = "me", startHistoryId: int = 0, historyTypes=None, pageToken: str = None, **kwargs):
+        def run():
+            added = [{"messagesAdded": [{"message": {"id": m["id"], "threadId": m["threadId"]}}]}
+                     for m in self.service.messages.values() if m["historyId"] > int(startHistoryId)]
+            return {"history": added, "historyId": self.service.history_id}
+        return _Request(run, self.service.latency_ms, self.service)
+
+
+class _Users:
+    def __init__(self, service: "FakeGmailService"):
+        self.service = service
+        self._messages = _Messages(service)
+        self._history = _History(service)
+
+    def messages(self):
+        return self._messages
+
+    def history(self):
+        return self._history
+
+    def getProfile(self, userId: str = "me"):
+        return _Request(lambda: {"historyId": self.service.history_id}, self.service.latency_ms, self.service)
+
+
+class FakeGmailService:
+    """
+    Mimics the subset of the Gmail API used by GmailListener:
+    service.users().messages().list(...).execute() / .get(...).execute(),
+    users().history().list(...) and users().getProfile(...).
+    Set rate_limited to make every call fail with a 429.
+    """
+    def __init__(self, latency_ms: float = 0):
+        self.latency_ms = latency_ms
+        self.messages: Dict[str, dict] = {}
+        self.history_id = 1
+        self.requests = 0
+        self.rate_limited = False
+        self._ids = itertools.count(1)
+
+    def users(self):
+        return _Users(self)
+
+    def add_reply(self, thread_id: str, from_email: str, body: str, subject: str = "Re: Hello",
+                  in_reply_to: Optional[str] = None) -> str:
+        msg_id = f"fake-gm-{next(self._ids)}"
+        headers = [
+            {"name": "Subject", "value": subject},
+            {"name": "From", "value": from_email},
+        ]
+        if in_reply_to:
+            headers.append({"name": "In-Reply-To", "value": in_reply_to})
+        self.history_id += 1
+        self.messages[msg_id] = {
+            "id": msg_id,
+            "threadId": thread_id,
+            "historyId": self.history_id,
+            "payload": {
+                "mimeType": "multipart/alternative",
+                "headers": headers,
+                "parts": [{
+                    "mimeType": "text/plain",
+                    "body": {"data": base64.urlsafe_b64encode(body.encode()).decode()}
+                }]
+            }
+        }
+        return msg_id
+
+
+REPLY_BODIES: List[str] = [
+    "Thanks for reaching out, we are interested. Can we talk next week?",
+    "Please stop emailing me.",
+    "I am out of office until Monday.",
+    "Not sure yet, send more details.",
+]
@@ -0,0 +1,146 @@
+"""
+Dashboard polling on a synthetic sqlite store: one poll is GET /leads + /leads/queue + /metrics,
+as the frontend sends after every action.
+
+- full:        no validators, every poll rebuilds and sends all three bodies
+- conditional: If-None-Match from the previous poll, nothing changed -> three 304s
+- after write: one lead changes between polls -> lead lists are rebuilt (/metrics stays a 304
+               until METRICS_CACHE_SECONDS runs out), then 304s again
+- assets:      index.html + hashed app.js / style.css, first load vs revalidation
+
+The app is driven through ASGI directly; latencies are per poll (three requests in sequence).
+
+    python -m benchmarks.http_cache_bench --leads 50000
+"""
+import argparse
+import asyncio
+import logging
+import os
+import re
+import shutil
+import tempfile
+import time
+import uuid
+
+WORKDIR = tempfile.mkdtemp(prefix="gtm-http-cache-")
+os.environ["DB_PATH"] = os.path.join(WORKDIR, "bench.db")
+
+import numpy as np  # noqa: E402
+
+from backend.api.server import app  # noqa: E402
+from backend.core.container import get_container  # noqa: E402
+from backend.storage.models import Lead  # noqa: E402
+
+POLL = ("/leads", "/leads/queue?status=processed&limit=50", "/metrics")
+
+
+def populate(db, count: int):
+    for offset in range(0, count, 50_000):
+        db.bulk_add_leads([
+            Lead(id=str(uuid.uuid4()), source="bench", name=f"Lead {i}", company_name=f"Company {i % 5000}",
+                 email=f"p{i}@example.com", status="processed", generated_email_subject=f"Quick question {i}",
+                 generated_email_body="Hi there,\n\nSaw what your team is building. " * 3, priority=float(i % 97))
+            for i in range(offset, min(count, offset + 50_000))
+        ])
+
+
+async def get(url: str, headers=()):
+    path, _, query = url.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "query_string": query.encode(), "root_path": "",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers], "client": ("bench", 1), "server": ("bench", 80),
+    }
+    sent, received = [], False
+
+    async def receive():
+        nonlocal received
+        if received:
+            await asyncio.sleep(3600)
+            return {"type": "http.disconnect"}
+        received = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    status = sent[0]["status"]
+    response_headers = {k.decode(): v.decode() for k, v in sent[0]["headers"]}
+    body = b"".join(message.get("body", b"") for message in sent[1:])
+    return status, response_headers, body
+
+
+async def poll(tags: dict, encoding: str = "gzip"):
+    start = time.perf_counter()
+    statuses, wire = [], 0
+    for url in POLL:
+        headers = [("Accept-Encoding", encoding)]
+        if url in tags:
+            headers.append(("If-None-Match", tags[url]))
+        status, response_headers, body = await get(url, headers)
+        tags[url] = response_headers.get("etag", tags.get(url))
+        statuses.append(status)
+        wire += len(body)
+    return time.perf_counter() - start, statuses, wire
+
+
+def report(label: str, samples, statuses, wire):
+    arr = np.array(samples) * 1e3
+    print(f"{label:18} p50 {np.percentile(arr, 50):8.2f} ms  p99 {np.percentile(arr, 99):8.2f} ms  "
+          f"{wire / 1e3:9.1f} kB/poll  status {'/'.join(map(str, statuses))}")
+
+
+async def run_polls(repeat: int, with_tags: bool):
+    tags, samples = {}, []
+    await poll(tags)
+    for _ in range(repeat):
+        elapsed, statuses, wire = await poll(tags if with_tags else {})
+        samples.append(elapsed)
+    return samples, statuses, wire
+
+
+async def main(args):
+    async with app.router.lifespan_context(app):
+        db = get_container().db
+        start = time.perf_counter()
+        populate(db, args.leads)
+        print(f"setup    {args.leads:,} leads in {time.perf_counter() - start:.1f}s")
+
+        report("full", *await run_polls(args.repeat, with_tags=False))
+        report("conditional", *await run_polls(args.repeat * 10, with_tags=True))
+
+        ids = db.get_lead_ids_page(limit=args.repeat)
+        tags, samples = {}, []
+        await poll(tags)
+        for lead_id in ids:
+            db.update_lead_status(lead_id, "processed")
+            elapsed, statuses, wire = await poll(tags)
+            assert statuses[0] == 200, statuses
+            samples.append(elapsed)
+        report("after write", samples, statuses, wire)
+        _, statuses, _ = await poll(tags)
+        assert statuses == [304, 304, 304], statuses
+
+        status, headers, html = await get("/", [("Accept-Encoding", "identity")])
+        urls = ["/"] + re.findall(r'"(/assets/[^"]+)"', html.decode())
+        first, wire, tags = time.perf_counter(), 0, {}
+        for url in urls:
+            status, headers, body = await get(url, [("Accept-Encoding", "gzip")])
+            tags[url], wire = headers["etag"], wire + len(body)
+        print(f"assets   first load {len(urls)} files {wire / 1e3:.1f} kB gzip in {(time.perf_counter() - first) * 1e3:.2f} ms; "
+              f"cache-control {headers['cache-control']}")
+        statuses = [(await get(url, [("Accept-Encoding", "gzip"), ("If-None-Match", tags[url])]))[0] for url in urls[:1]]
+        print(f"assets   reload: index.html {statuses[0]}, {len(urls) - 1} hashed assets served from the browser cache")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--leads", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    try:
+        asyncio.run(main(args))
+    finally:
+        shutil.rmtree(WORKDIR, ignore_errors=True)
@@ -0,0 +1,95 @@
+"""
+Cold-start budget check for the API and CLI entry points.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter, takes the best
+of N runs, and fails (exit 1) if the cumulative import time exceeds the budget or if any
+heavy SDK gets imported eagerly.
+
+    python benchmarks/import_budget.py                      # default budgets
+    python benchmarks/import_budget.py --budget-ms 500 --runs 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY_POINTS = ["backend.api.server", "backend.main"]
+
+# SDKs that must only load on first real use
+DEFERRED_MODULES = ["openai", "anthropic", "sendgrid", "googleapiclient", "google.oauth2",
+                    "langsmith", "langfuse", "requests", "psycopg", "numpy"]
+
+DEFAULT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "750"))
+
+
+def measure(module: str):
+    """
+    Returns (cumulative_ms, imported_module_names) for one cold import of `module`.
+    """
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1", MOCK_LLM="True")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    cumulative_us = None
+    imported = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        try:
+            cumulative = int(parts[1].strip())
+        except ValueError:
+            continue  # header line
+        name = parts[2].strip()
+        imported.add(name)
+        if name == module:
+            cumulative_us = cumulative
+
+    if cumulative_us is None:
+        raise RuntimeError(f"No importtime entry for {module}")
+    return cumulative_us / 1000.0, imported
+
+
+def check(module: str, budget_ms: float, runs: int):
+    best_ms = None
+    imported = set()
+    for _ in range(runs):
+        ms, imported = measure(module)
+        best_ms = ms if best_ms is None else min(best_ms, ms)
+
+    eager = [m for m in DEFERRED_MODULES if m in imported]
+    return {
+        "module": module,
+        "best_ms": round(best_ms, 1),
+        "budget_ms": budget_ms,
+        "eager_sdks": eager,
+        "ok": best_ms <= budget_ms and not eager,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("modules", nargs="*", default=ENTRY_POINTS)
+    args = parser.parse_args()
+
+    results = [check(m, args.budget_ms, args.runs) for m in args.modules]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for r in results:
+            status = "OK  " if r["ok"] else "FAIL"
+            extra = f" eager SDKs: {', '.join(r['eager_sdks'])}" if r["eager_sdks"] else ""
+            print(f"[{status}] {r['module']}: {r['best_ms']} ms (budget {r['budget_ms']} ms){extra}")
+
+    sys.exit(0 if all(r["ok"] for r in results) else 1)
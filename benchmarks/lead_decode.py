@@ -0,0 +1,115 @@
+"""
+Decode cost and memory of bulk lead reads.
+
+Compares, per N leads (default 100k):
+- eager:       the previous full Lead dataclass decode (json.loads + 4x fromisoformat per row)
+- lazy:        LeadStore.get_all_leads() -> slots-based LeadRecord, decoded on access
+- lazy+access: LeadRecord with metadata and created_at touched on every row
+- summaries:   LeadStore.get_lead_summaries() projection
+- ids:         LeadStore.get_lead_ids() projection
+
+    python -m benchmarks.lead_decode --leads 100000
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+import uuid
+from datetime import datetime
+
+from backend.storage.db import LeadStore, LEAD_COLUMNS_SQL, LEAD_WRITE_COLUMNS_SQL, lead_to_row
+from backend.storage.models import Lead
+
+
+def populate(store: LeadStore, count: int):
+    now = datetime.now()
+    rows = []
+    for i in range(count):
+        lead = Lead(
+            id=str(uuid.uuid4()), source="bench", name=f"Lead {i}", company_name=f"Company {i % 5000}",
+            email=f"lead{i}@company{i % 5000}.example.com", status="processed",
+            company_summary="A leader in cloud infrastructure. " * 3,
+            product_summary="Reduces latency for DevOps teams.",
+            generated_email_subject=f"Question for Lead {i}",
+            generated_email_body="Hi, I reviewed your company and think we can help. " * 4,
+            last_sent_at=now, next_scheduled_at=now,
+            metadata={"title": "CTO", "score": i % 100, "tags": ["bench", "synthetic"]},
+        )
+        rows.append(lead_to_row(lead))
+    store.conn.executemany(f"INSERT INTO leads ({LEAD_WRITE_COLUMNS_SQL}) VALUES ({', '.join('?' * len(rows[0]))})", rows)
+    store.conn.commit()
+
+
+def eager_decode(store: LeadStore):
+    # The pre-LeadRecord _row_to_lead, kept here as the baseline
+    rows = store.conn.execute(f"SELECT {LEAD_COLUMNS_SQL} FROM leads").fetchall()
+    return [
+        Lead(
+            id=row[0], source=row[1], name=row[2], company_name=row[3],
+            email=row[4], linkedin_url=row[5], status=row[6],
+            company_summary=row[7], product_summary=row[8],
+            generated_email_subject=row[9], generated_email_body=row[10],
+            send_count=row[11],
+            last_sent_at=datetime.fromisoformat(row[12]) if row[12] else None,
+            next_scheduled_at=datetime.fromisoformat(row[13]) if row[13] else None,
+            last_message_id=row[14],
+            thread_id=row[15],
+            metadata=json.loads(row[16]) if row[16] else {},
+            created_at=datetime.fromisoformat(row[17]),
+            updated_at=datetime.fromisoformat(row[18]),
+            campaign_id=row[19] or "default"
+        )
+        for row in rows
+    ]
+
+
+def lazy_with_access(store: LeadStore):
+    leads = store.get_all_leads()
+    for lead in leads:
+        lead.metadata
+        lead.created_at
+    return leads
+
+
+def measure(fn, store: LeadStore, count: int):
+    gc.collect()
+    start = time.perf_counter()
+    fn(store)
+    elapsed = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    result = fn(store)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    per_100k = 100_000 / count
+    return {
+        "seconds_per_100k": round(elapsed * per_100k, 4),
+        "us_per_lead": round(elapsed / count * 1e6, 2),
+        "retained_mb_per_100k": round(current * per_100k / 1024 / 1024, 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--leads", type=int, default=100_000)
+    parser.add_argument("--db", default=":memory:")
+    args = parser.parse_args()
+
+    store = LeadStore(args.db)
+    if store.conn.execute("SELECT COUNT(*) FROM leads").fetchone()[0] < args.leads:
+        populate(store, args.leads)
+    count = store.conn.execute("SELECT COUNT(*) FROM leads").fetchone()[0]
+
+    results = {
+        "leads": count,
+        "eager": measure(eager_decode, store, count),
+        "lazy": measure(lambda s: s.get_all_leads(), store, count),
+        "lazy+access": measure(lazy_with_access, store, count),
+        "summaries": measure(lambda s: s.get_lead_summaries(), store, count),
+        "ids": measure(lambda s: s.get_lead_ids(), store, count),
+    }
+    print(json.dumps(results, indent=2))
@@ -0,0 +1,94 @@
+"""
+Reply detection across many sending mailboxes (fake Gmail with per-call latency).
+
+- sequential:  one GmailListener.check_for_replies() after another (the single-mailbox loop)
+- concurrent:  MailboxListenerService.run_once() (first pass: day scan + historyId baseline)
+- incremental: second run_once() after a few new replies (history.list only)
+- throttled:   one mailbox answering 429s backs off while the others keep polling
+- shards:      mailbox distribution over GMAIL_SHARD_COUNT listener processes
+
+    python -m benchmarks.mailbox_listener_bench --mailboxes 20 --replies 10 --latency-ms 40
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+from collections import Counter
+
+from backend.agents.reply_cls.classifier import ReplyClassifierAgent
+from backend.services.listener.gmail_listener import GmailListener
+from backend.services.listener.mailbox_listener import MailboxListenerService, shard_for
+from backend.storage.db import LeadStore
+from backend.storage.models import Lead
+from benchmarks.fakes import FakeGmailService, REPLY_BODIES
+
+
+def build(mailbox_count: int, replies: int, latency_ms: float):
+    store = LeadStore(os.path.join(tempfile.mkdtemp(prefix="gtm-mbx-"), "bench.db"))
+    classifier = ReplyClassifierAgent(store)
+    services = {}
+    for m in range(mailbox_count):
+        address = f"sender{m}@outbound.example.com"
+        gmail = services[address] = FakeGmailService(latency_ms)
+        for r in range(replies):
+            lead = Lead(id=f"lead-{m}-{r}", source="bench", name=f"Lead {r}", company_name=f"Co {m}",
+                        email=f"lead{m}.{r}@prospect.example.com", status="sent_step0", thread_id=f"th-{m}-{r}")
+            store.add_lead(lead)
+            gmail.add_reply(lead.thread_id, lead.email, REPLY_BODIES[r % len(REPLY_BODIES)])
+    return store, classifier, services
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mailboxes", type=int, default=20)
+    parser.add_argument("--replies", type=int, default=10, help="replies waiting per mailbox")
+    parser.add_argument("--latency-ms", type=float, default=40, help="per Gmail API call")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--shards", type=int, default=3)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    store, classifier, services = build(args.mailboxes, args.replies, args.latency_ms)
+    sequential = [GmailListener(store, service=gmail, classifier=classifier, mailbox=address)
+                  for address, gmail in services.items()]
+    _, seconds = timed(lambda: [listener.check_for_replies() for listener in sequential])
+    print(f"sequential   {args.mailboxes} mailboxes: {seconds * 1000:8.1f} ms")
+
+    store, classifier, services = build(args.mailboxes, args.replies, args.latency_ms)
+    listeners = {address: GmailListener(store, service=gmail, classifier=classifier, mailbox=address)
+                 for address, gmail in services.items()}
+    service = MailboxListenerService(store, listeners={}, classifier=classifier, workers=args.workers)
+    for address, listener in listeners.items():
+        service.add_mailbox(address, listener)
+    processed, seconds = timed(service.run_once)
+    print(f"concurrent   {args.mailboxes} mailboxes: {seconds * 1000:8.1f} ms  ({processed} messages, {args.workers} workers)")
+
+    for m, (address, gmail) in enumerate(services.items()):
+        if m % 4 == 0:
+            gmail.add_reply(f"th-{m}-0", f"lead{m}.0@prospect.example.com", "One more question")
+    before = sum(g.requests for g in services.values())
+    processed, seconds = timed(service.run_once)
+    calls = sum(g.requests for g in services.values()) - before
+    print(f"incremental  {args.mailboxes} mailboxes: {seconds * 1000:8.1f} ms  ({processed} new messages, {calls} API calls)")
+
+    throttled_address = next(iter(services))
+    services[throttled_address].rate_limited = True
+    service.run_once()
+    state = service.mailboxes[throttled_address]
+    healthy = [s for a, s in service.mailboxes.items() if a != throttled_address]
+    print(f"throttled    {throttled_address}: failures={state.failures}, "
+          f"next poll in {state.next_poll_at - time.monotonic():.0f}s; "
+          f"{sum(s.failures == 0 for s in healthy)}/{len(healthy)} other mailboxes healthy")
+
+    spread = Counter(shard_for(address, args.shards) for address in services)
+    print(f"shards       {args.shards} processes: " + ", ".join(f"#{i}={spread[i]}" for i in range(args.shards)))
+    quota = sum(s["quota_units_used"] or 0 for s in service.status())
+    print(f"quota        {quota} Gmail units spent across mailboxes")
+    service.stop()
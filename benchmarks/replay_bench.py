@@ -0,0 +1,138 @@
+"""
+Replay on a synthetic sqlite store: leads with an event history (ENRICH_OK, GEN_OK and, for a third
+of them, SEND_OK payloads) whose stored fields were then wiped, as a faulty script would.
+
+1. `rebuild` replay stopped with --limit halfway (status paused, checkpoint saved)
+2. the same replay resumed: it continues after the checkpoint and finishes (status done)
+3. every lead's fields compared with what its events say they should be
+4. a second replay capped at --max-rate, to check the pacing
+
+Reported: leads/s of each run, leads rebuilt, mismatches (should be 0) and the achieved rate.
+
+    python -m benchmarks.replay_bench --leads 100000 --workers 2
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Inherited by the spawned workers
+os.environ.setdefault("LOG_LEVEL", "ERROR")
+os.environ.setdefault("MOCK_LLM", "True")
+
+from backend.services.pipeline.replay import ReplayEngine  # noqa: E402
+from backend.storage.db import LeadStore  # noqa: E402
+from backend.storage.lead_events import draft_payload, send_payload  # noqa: E402
+from backend.storage.models import Lead, LeadFilter  # noqa: E402
+
+
+def expected(i: int) -> dict:
+    values = {"company_summary": f"Company {i % 5000} builds developer tooling.",
+              "product_summary": "ship pipelines faster", "fit_score": float(i % 100),
+              "generated_email_subject": f"Quick question {i}", "generated_email_body": f"Hi there, draft {i}."}
+    if i % 3 == 0:
+        values.update(send_payload(0, f"msg-{i}", f"thread-{i}", datetime(2024, 5, 1) + timedelta(minutes=i)))
+    return values
+
+
+def seed(path: str, count: int):
+    db = LeadStore(path)
+    started = datetime.now() - timedelta(days=1)
+    for offset in range(0, count, 50_000):
+        batch = range(offset, min(count, offset + 50_000))
+        # Stored fields wiped after the fact; only the events know the real values
+        db.bulk_add_leads([
+            Lead(id=f"lead-{i:08d}", source="csv", name=f"Alex Example{i}", company_name=f"Company {i % 5000}",
+                 email=f"p{i}@company{i % 5000}.com", status="sent_step1" if i % 3 == 0 else "processed",
+                 generated_email_body="", fit_score=0.0)
+            for i in batch
+        ])
+        rows = []
+        for i in batch:
+            values, at = expected(i), (started + timedelta(seconds=i)).isoformat()
+            enrichment = {name: values[name] for name in ("company_summary", "product_summary", "fit_score")}
+            rows.append((f"lead-{i:08d}", "ENRICH_OK", "Fit Score: -", at, json.dumps(enrichment)))
+            rows.append((f"lead-{i:08d}", "GEN_OK", "Subject: -", at, json.dumps(draft_payload(_Draft(values)))))
+            if "send_count" in values:
+                rows.append((f"lead-{i:08d}", "SEND_OK", "sent", at, json.dumps(
+                    {name: values[name] for name in ("send_count", "last_message_id", "thread_id", "last_sent_at")})))
+        with db.conn:
+            db.conn.executemany(
+                "INSERT INTO event_logs (lead_id, event_type, details, timestamp, payload) VALUES (?, ?, ?, ?, ?)", rows)
+    db.close()
+
+
+class _Draft:
+    def __init__(self, values: dict):
+        self.generated_email_subject = values["generated_email_subject"]
+        self.generated_email_body = values["generated_email_body"]
+
+
+def mismatches(path: str, count: int) -> int:
+    db = LeadStore(path)
+    try:
+        bad = 0
+        for offset in range(0, count, 1000):
+            for lead in db.get_leads([f"lead-{i:08d}" for i in range(offset, min(count, offset + 1000))]):
+                want = expected(int(lead.id.split("-")[1]))
+                if "last_sent_at" in want:
+                    want["last_sent_at"] = datetime.fromisoformat(want["last_sent_at"])
+                bad += any(getattr(lead, name) != value for name, value in want.items())
+        return bad
+    finally:
+        db.close()
+
+
+def run(path: str, name: str, workers: int, batch_size: int, **kwargs):
+    db = LeadStore(path)
+    try:
+        engine = ReplayEngine(db, name, stages=["rebuild"], lead_filter=LeadFilter(), batch_size=batch_size,
+                              workers=workers, db_path=path, max_rate=kwargs.pop("max_rate", 0))
+        started = time.perf_counter()
+        checkpoint = engine.run(**kwargs)
+        return checkpoint, time.perf_counter() - started
+    finally:
+        db.close()
+
+
+def report(label: str, checkpoint, seconds: float, leads: int):
+    counts = checkpoint.counts.get("rebuild", {})
+    print(f"{label:<22} {checkpoint.status:<7} {seconds:8.2f}s  {leads / seconds:10,.0f} leads/s  "
+          f"after {checkpoint.after_id}  updated {counts.get('updated', 0):,} unchanged {counts.get('unchanged', 0):,} "
+          f"skipped {counts.get('skipped', 0):,} conflicts {counts.get('conflicts', 0):,} failed {counts.get('failed', 0):,}")
+
+
+def main(args):
+    workdir = tempfile.mkdtemp(prefix="gtm-replay-")
+    try:
+        path = os.path.join(workdir, "replay.db")
+        started = time.perf_counter()
+        seed(path, args.leads)
+        print(f"{args.leads:,} leads seeded in {time.perf_counter() - started:.1f}s; batch {args.batch_size}, "
+              f"{args.workers} workers, {multiprocessing.cpu_count()} CPU cores")
+        half = args.leads // 2
+        checkpoint, seconds = run(path, "bench", args.workers, args.batch_size, limit=half)
+        report("rebuild (limit)", checkpoint, seconds, half)
+        checkpoint, seconds = run(path, "bench", args.workers, args.batch_size)
+        report("rebuild (resumed)", checkpoint, seconds, args.leads - half)
+        print(f"mismatched leads after replay: {mismatches(path, args.leads):,}")
+
+        leads = min(args.leads, int(args.max_rate * 5))
+        checkpoint, seconds = run(path, "bench-paced", args.workers, args.batch_size // 4 or 1,
+                                  max_rate=args.max_rate, limit=leads)
+        report(f"paced ({args.max_rate:,.0f}/s)", checkpoint, seconds, leads)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--leads", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--max-rate", type=float, default=2000, help="leads/s cap of the paced run")
+    main(parser.parse_args())
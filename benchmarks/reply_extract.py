@@ -0,0 +1,121 @@
+"""
+Reply text extraction on real-world shaped reply fixtures (benchmarks/fixtures/replies/*.eml).
+
+Each .eml is converted to the Gmail API payload shape (format=full) and run through:
+- legacy:  the previous top-level-only text/plain lookup with a strict UTF-8 decode
+- extract: mime_extract.extract_reply_text (nested parts, charsets, HTML, quote/signature strip)
+
+Prints, per fixture, chars handed to the classifier and parse time, and checks that the
+sender's new text survives and the quoted original does not. Exits 1 on a failed check.
+
+    python -m benchmarks.reply_extract --repeat 2000
+"""
+import argparse
+import base64
+import email
+import glob
+import os
+import sys
+import time
+from email import policy
+
+from backend.services.listener.mime_extract import extract_reply_text
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "replies")
+
+# fixture -> (text that must be kept, text that must be gone)
+EXPECTATIONS = {
+    "gmail_interested.eml": ("Could you do Thursday at 2pm PT?", "cloud footprint"),
+    "outlook_html_not_interested.eml": ("Not interested at this time", "cloud footprint"),
+    "apple_mail_nested_attachment.eml": ("send over the deck", "Sent from my iPhone"),
+    "latin1_qp_french.eml": ("Nous sommes intéressés", "cloud footprint"),
+    "outlook_de_unsubscribe_cp1252.eml": ("bitte nehmen Sie mich aus Ihrem Verteiler", "Ursprüngliche Nachricht"),
+    "plain_unsubscribe_signature.eml": ("Please remove me from your list.", "CTO, Tailspin Toys"),
+    "out_of_office.eml": ("out of the office until Monday", None),
+    "bounce_dsn.eml": ("address couldn't be found", "cloud footprint"),
+    "long_thread.eml": ("lock the pilot for February", "Reply number"),
+    "gmail_html_only_maybe.eml": ("Maybe later in Q3 — we're mid-migration", "cloud footprint"),
+}
+
+
+def to_gmail_payload(part) -> dict:
+    payload = {
+        "mimeType": part.get_content_type(),
+        "filename": part.get_filename() or "",
+        "headers": [{"name": k, "value": str(v)} for k, v in part.items()],
+        "body": {"size": 0},
+    }
+    if part.is_multipart():
+        payload["parts"] = [to_gmail_payload(p) for p in part.get_payload()]
+    else:
+        # Gmail returns the transfer-decoded bytes (still in the part's charset), base64url encoded
+        data = part.get_payload(decode=True) or b""
+        payload["body"] = {"size": len(data), "data": base64.urlsafe_b64encode(data).decode()}
+    return payload
+
+
+def legacy_extract(payload: dict) -> str:
+    # The pre-mime_extract body lookup in GmailListener._process_message
+    body = "Could not parse body"
+    if 'parts' in payload:
+        for part in payload['parts']:
+            if part['mimeType'] == 'text/plain':
+                data = part['body'].get('data')
+                if data:
+                    body = base64.urlsafe_b64decode(data).decode()
+                    break
+    elif 'body' in payload:
+        data = payload['body'].get('data')
+        if data:
+            body = base64.urlsafe_b64decode(data).decode()
+    return body
+
+
+def per_call_us(fn, payload, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(payload)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=1000)
+    parser.add_argument("--show", action="store_true", help="print the extracted text")
+    args = parser.parse_args()
+
+    ok = True
+    totals = {"legacy": 0, "extract": 0}
+    print(f"{'fixture':38} {'legacy chars':>12} {'new chars':>10} {'legacy us':>10} {'new us':>8}  check")
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.eml"))):
+        name = os.path.basename(path)
+        with open(path, "rb") as f:
+            payload = to_gmail_payload(email.message_from_binary_file(f, policy=policy.default))
+
+        try:
+            legacy = legacy_extract(payload)
+        except UnicodeDecodeError:
+            legacy = "<UnicodeDecodeError>"
+        text = extract_reply_text(payload) or ""
+
+        keep, gone = EXPECTATIONS.get(name, (None, None))
+        problems = []
+        if keep and keep not in text:
+            problems.append(f"missing {keep!r}")
+        if gone and gone in text:
+            problems.append(f"kept {gone!r}")
+        ok = ok and not problems
+
+        try:
+            legacy_us = f"{per_call_us(legacy_extract, payload, args.repeat):10.1f}"
+        except UnicodeDecodeError:
+            legacy_us = f"{'error':>10}"
+        new_us = per_call_us(extract_reply_text, payload, args.repeat)
+        totals["legacy"] += len(legacy)
+        totals["extract"] += len(text)
+        print(f"{name:38} {len(legacy):12d} {len(text):10d} {legacy_us} {new_us:8.1f}  {'; '.join(problems) or 'ok'}")
+        if args.show:
+            print("    " + text.replace("\n", "\n    "))
+
+    print(f"{'total classifier input':38} {totals['legacy']:12d} {totals['extract']:10d}")
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,100 @@
+"""
+Fair scheduling under a bulk import: one campaign queues a large outreach backlog, then a
+small campaign submits its leads and replies keep arriving while the backlog drains.
+Tasks sleep for a fixed "LLM call" so the numbers only reflect queueing.
+
+- fifo: one shared queue (a ThreadPoolExecutor, what request background tasks amount to)
+- fair: FairScheduler, reply > outreach, deficit round-robin across campaigns
+
+Reported: queue wait p50 / p99 per class and when the small campaign's last lead finished.
+
+    python -m benchmarks.scheduler_bench --bulk 2000 --small 50 --replies 40 --task-ms 20
+"""
+import argparse
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from backend.services.campaigns.registry import CampaignRegistry
+from backend.services.pipeline.scheduler import FairScheduler, OUTREACH, REPLY
+from backend.storage.db import LeadStore
+
+
+def workload(args):
+    # (delay after start, campaign, class); bulk first, then the small campaign and replies interleaved
+    items = [(0.0, "bulk", OUTREACH)] * args.bulk
+    items += [(0.05, "small", OUTREACH)] * args.small
+    items += [(0.05 + i * args.reply_every_ms / 1e3, "bulk" if i % 2 else "small", REPLY) for i in range(args.replies)]
+    return sorted(items, key=lambda item: item[0])
+
+
+def drive(args, submit):
+    task_seconds = args.task_ms / 1e3
+    waits = {}
+    small_done = []
+    lock = threading.Lock()
+
+    def task(campaign_id, work_class, submitted_at):
+        started = time.perf_counter()
+        time.sleep(task_seconds)
+        with lock:
+            waits.setdefault(work_class, []).append(started - submitted_at)
+            if campaign_id == "small" and work_class == OUTREACH:
+                small_done.append(time.perf_counter())
+
+    begin = time.perf_counter()
+    futures = []
+    for delay, campaign_id, work_class in workload(args):
+        pause = begin + delay - time.perf_counter()
+        if pause > 0:
+            time.sleep(pause)
+        futures.append(submit(campaign_id, work_class, task, campaign_id, work_class, time.perf_counter()))
+    for future in futures:
+        future.result()
+    return waits, max(small_done) - begin, time.perf_counter() - begin
+
+
+def report(name, waits, small_done, wall):
+    for work_class, samples in sorted(waits.items()):
+        samples = np.array(samples) * 1e3
+        print(f"{name:5} {work_class:9} n={len(samples):6}  wait p50 {np.percentile(samples, 50):9.1f} ms"
+              f"  p99 {np.percentile(samples, 99):9.1f} ms")
+    print(f"{name:5} small campaign done after {small_done:.2f}s (all work {wall:.2f}s)")
+
+
+def main(args):
+    workdir = tempfile.mkdtemp(prefix="gtm-scheduler-")
+    try:
+        db = LeadStore(os.path.join(workdir, "bench.db"))
+        campaigns = CampaignRegistry(db)
+        for campaign_id in ("bulk", "small"):
+            campaigns.create({"id": campaign_id, "name": campaign_id})
+
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            report("fifo", *drive(args, lambda campaign_id, work_class, fn, *a: pool.submit(fn, *a)))
+
+        scheduler = FairScheduler(campaigns, workers=args.workers)
+        report("fair", *drive(args, scheduler.submit))
+        scheduler.stop()
+        db.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bulk", type=int, default=2000, help="outreach tasks of the big campaign")
+    parser.add_argument("--small", type=int, default=50, help="outreach tasks of the small campaign")
+    parser.add_argument("--replies", type=int, default=40)
+    parser.add_argument("--reply-every-ms", type=float, default=100)
+    parser.add_argument("--task-ms", type=float, default=20, help="simulated LLM call per task")
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    main(args)
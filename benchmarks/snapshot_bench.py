@@ -0,0 +1,166 @@
+"""
+Analytics snapshot export and funnel queries on a synthetic sqlite store.
+
+- export:  SnapshotExporter.export() end to end (backup API copy + chunked column writes),
+           with a writer thread updating leads meanwhile: writer p50/p99 during the export vs idle
+- queries: funnel, funnel by campaign, funnel for one source since a date, daily event counts,
+           on the memory-mapped snapshot; against the same funnel from get_lead_summaries()
+- check:   the snapshot funnel equals a COUNT(*) per stage on the live store
+
+    python -m benchmarks.snapshot_bench --leads 1000000
+"""
+import argparse
+import logging
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from backend.services.analytics.export import SnapshotExporter
+from backend.services.analytics.snapshot import STAGES
+from backend.storage.db import LeadStore
+from backend.storage.models import Lead
+
+SOURCES = ["LinkedIn", "Web Simulation", "CSV Import", "CRM Sync", "Referral"]
+CAMPAIGNS = [f"campaign-{i}" for i in range(20)]
+# (status, has summary, has draft, send_count) by funnel depth
+PROFILES = [
+    ("new", False, False, 0), ("enriched", True, False, 0), ("processed", True, True, 0),
+    ("sent_step0", True, True, 1), ("sent_step1", True, True, 2), ("replied_not_interested", True, True, 1),
+    ("replied_interested", True, True, 2), ("stopped_bounce", True, True, 1),
+]
+WEIGHTS = [20, 15, 25, 20, 8, 6, 3, 3]
+EVENTS = {0: ["INGEST"], 1: ["INGEST", "ENRICH_OK"], 2: ["INGEST", "ENRICH_OK", "GEN_OK"]}
+
+
+def populate(db: LeadStore, count: int, seed: int):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    for offset in range(0, count, 50_000):
+        leads, events = [], []
+        for i in range(offset, min(count, offset + 50_000)):
+            status, summary, draft, sends = rng.choices(PROFILES, WEIGHTS)[0]
+            created = start + timedelta(minutes=rng.randrange(0, 60 * 24 * 180))
+            lead = Lead(
+                id=str(uuid.UUID(int=rng.getrandbits(128))), source=rng.choice(SOURCES), name=f"Lead {i}",
+                company_name=f"Company {i % 7000}", email=f"p{i}@example.com", campaign_id=rng.choice(CAMPAIGNS),
+                status=status, send_count=sends, created_at=created, account_id=f"acct_{i % 7000}",
+                company_summary="Summary" if summary else None, generated_email_subject="Hi" if draft else None,
+                fit_score=rng.uniform(0, 100), priority=rng.uniform(0, 100),
+            )
+            leads.append(lead)
+            for step, event_type in enumerate(EVENTS[min(2, (summary + draft) if summary else 0)]):
+                events.append((lead.id, event_type, "", (created + timedelta(hours=step)).isoformat()))
+        db.bulk_add_leads(leads)
+        with db._lock:
+            db.conn.executemany("INSERT INTO event_logs (lead_id, event_type, details, timestamp) VALUES (?, ?, ?, ?)", events)
+            db.conn.commit()
+
+
+def percentiles(samples):
+    arr = np.array(samples) * 1e3
+    return f"p50 {np.percentile(arr, 50):8.2f} ms  p99 {np.percentile(arr, 99):8.2f} ms"
+
+
+def timed_runs(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+class Writer(threading.Thread):
+    # Status updates through the store, as the pipeline would do while an export runs
+    def __init__(self, db: LeadStore, ids):
+        super().__init__(daemon=True)
+        self.db, self.ids = db, ids
+        self.stop = threading.Event()
+        self.samples = []
+
+    def run(self):
+        rng = random.Random(1)
+        while not self.stop.is_set():
+            start = time.perf_counter()
+            self.db.update_lead_status(rng.choice(self.ids), "new")
+            self.samples.append(time.perf_counter() - start)
+            time.sleep(0.001)
+
+
+def measure_writer(db, ids, fn):
+    writer = Writer(db, ids)
+    writer.start()
+    try:
+        result = fn()
+    finally:
+        writer.stop.set()
+        writer.join()
+    return result, writer.samples
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--leads", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    workdir = tempfile.mkdtemp(prefix="gtm-snapshot-")
+
+    try:
+        db = LeadStore(os.path.join(workdir, "bench.db"))
+        start = time.perf_counter()
+        populate(db, args.leads, args.seed)
+        size = os.path.getsize(os.path.join(workdir, "bench.db"))
+        print(f"setup    {args.leads:,} leads in {time.perf_counter() - start:.1f}s ({size / 1e6:.0f} MB)")
+        # The writer rewrites 'new' leads in place, so live counts stay comparable with the snapshot
+        ids = [row[0] for row in db.conn.execute("SELECT id FROM leads WHERE status = 'new' LIMIT 10000")]
+
+        _, idle = measure_writer(db, ids, lambda: time.sleep(2))
+        exporter = SnapshotExporter(db, directory=os.path.join(workdir, "snapshots"))
+        start = time.perf_counter()
+        snapshot, during = measure_writer(db, ids, exporter.export)
+        elapsed = time.perf_counter() - start
+        on_disk = sum(os.path.getsize(os.path.join(root, name))
+                      for root, _, names in os.walk(snapshot.path) for name in names)
+        print(f"export   {elapsed:.2f}s for {len(snapshot.leads):,} leads + {len(snapshot.events):,} events "
+              f"({(len(snapshot.leads) + len(snapshot.events)) / elapsed:,.0f} rows/s), {on_disk / 1e6:.0f} MB")
+        print(f"writer   idle   {percentiles(idle)}  ({len(idle)} updates)")
+        print(f"writer   export {percentiles(during)}  ({len(during)} updates while exporting)")
+
+        # Consistency: the snapshot funnel matches COUNT(*) on the live store
+        funnel = snapshot.funnel()
+        live_sent = db.conn.execute("SELECT COUNT(*) FROM leads WHERE send_count > 0 OR status LIKE 'replied_%'").fetchone()[0]
+        live_positive = db.conn.execute("SELECT COUNT(*) FROM leads WHERE status = 'replied_interested'").fetchone()[0]
+        assert funnel["ingested"] == args.leads and funnel["positive"] == live_positive, funnel
+        assert funnel["sent"] == live_sent, (funnel, live_sent)
+        print(f"funnel   {funnel}")
+
+        since = (datetime(2024, 1, 1) + timedelta(days=90)).isoformat()
+        queries = [
+            ("funnel", lambda: snapshot.funnel()),
+            ("by campaign", lambda: snapshot.funnel_by("campaign_id")),
+            ("source+since", lambda: snapshot.funnel(source="Referral", since=since)),
+            ("daily events", lambda: snapshot.daily_events(["INGEST", "GEN_OK"])),
+            ("events/campaign", lambda: snapshot.daily_events(campaign_id="campaign-3")),
+        ]
+        for label, query in queries:
+            query()
+            print(f"query    {label:15} {percentiles(timed_runs(query, 20))}")
+
+        def summaries_funnel():
+            reached = dict.fromkeys(STAGES, 0)
+            for lead in db.get_lead_summaries():
+                reached["ingested"] += 1
+                if lead.status.startswith("replied_"):
+                    reached["replied"] += 1
+            return reached
+        print(f"baseline funnel from get_lead_summaries {percentiles(timed_runs(summaries_funnel, 3))}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
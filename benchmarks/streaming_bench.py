@@ -0,0 +1,135 @@
+"""
+GET /leads and GET /leads/ids on a synthetic sqlite store: the streamed responses (keyset pages,
+JSON array / NDJSON, optional gzip) against the previous handler, which loaded every summary,
+built a LeadResponse per row and let FastAPI validate and serialize the whole list.
+
+The app is driven through ASGI directly (no HTTP client buffering), so time to first byte is
+the moment the first body chunk leaves the app. Peak memory is tracemalloc's, per request, on a
+pass that counts body bytes without keeping them; a second pass keeps them for the checks.
+
+    python -m benchmarks.streaming_bench --leads 200000
+"""
+import argparse
+import asyncio
+import gc
+import gzip
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+import uuid
+
+WORKDIR = tempfile.mkdtemp(prefix="gtm-stream-")
+os.environ["DB_PATH"] = os.path.join(WORKDIR, "bench.db")
+
+from typing import List  # noqa: E402
+
+from fastapi import Depends  # noqa: E402
+
+from backend.api.server import LeadResponse, _summary_dict, app  # noqa: E402
+from backend.core.container import AppContainer, get_container  # noqa: E402
+from backend.storage.models import Lead  # noqa: E402
+
+
+@app.get("/bench/legacy-leads", response_model=List[LeadResponse])
+async def legacy_leads(container: AppContainer = Depends(get_container)):
+    leads = await container.async_db.get_lead_summaries()
+    return [LeadResponse(**_summary_dict(l)) for l in leads]
+
+
+def populate(db, count: int):
+    for offset in range(0, count, 50_000):
+        db.bulk_add_leads([
+            Lead(id=str(uuid.uuid4()), source="bench", name=f"Lead {i}", company_name=f"Company {i % 5000}",
+                 email=f"p{i}@example.com", status="processed", generated_email_subject=f"Quick question {i}",
+                 generated_email_body="Hi there,\n\nSaw what your team is building and wanted to reach out. " * 3,
+                 fit_score=float(i % 100), priority=float(i % 97))
+            for i in range(offset, min(count, offset + 50_000))
+        ])
+
+
+async def request(path: str, headers=(), keep: bool = False):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers], "client": ("bench", 1), "server": ("bench", 80),
+    }
+    received = False
+
+    async def receive():
+        nonlocal received
+        if received:
+            await asyncio.sleep(3600)
+            return {"type": "http.disconnect"}
+        received = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    first, chunks, wire, response_headers = None, [], 0, {}
+    gc.collect()  # garbage from the previous request would otherwise be collected during this one
+    start = time.perf_counter()
+
+    async def send(message):
+        nonlocal first, wire
+        if message["type"] == "http.response.start":
+            response_headers.update((k.decode(), v.decode()) for k, v in message["headers"])
+        elif message["type"] == "http.response.body" and message.get("body"):
+            if first is None:
+                first = time.perf_counter() - start
+            wire += len(message["body"])
+            chunks.append(message["body"] if keep else None)
+
+    tracemalloc.start()
+    await app(scope, receive, send)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    body = b"".join(chunks) if keep else None
+    if keep and response_headers.get("content-encoding") == "gzip":
+        body = gzip.decompress(body)
+    return {"ttfb": first, "total": elapsed, "peak": peak, "wire": wire, "chunks": len(chunks), "body": body,
+            "type": response_headers.get("content-type")}
+
+
+def report(label: str, result: dict):
+    print(f"{label:24} ttfb {result['ttfb'] * 1e3:8.1f} ms  total {result['total'] * 1e3:8.1f} ms  "
+          f"peak {result['peak'] / 1e6:7.1f} MB  wire {result['wire'] / 1e6:6.1f} MB  ({result['chunks']} chunks)")
+
+
+async def main(args):
+    async with app.router.lifespan_context(app):
+        db = get_container().db
+        start = time.perf_counter()
+        populate(db, args.leads)
+        print(f"setup    {args.leads:,} leads in {time.perf_counter() - start:.1f}s")
+        await request("/leads")  # warm-up: executor, imports
+
+        report("stream /leads", await request("/leads"))
+        report("stream /leads ndjson", await request("/leads", [("Accept", "application/x-ndjson")]))
+        report("stream /leads gzip", await request("/leads", [("Accept-Encoding", "gzip")]))
+        report("stream /leads/ids", await request("/leads/ids"))
+        # Last: the 400+ MB it allocates slows down whichever request follows it
+        report("legacy /leads", await request("/bench/legacy-leads"))
+
+        # Same documents whichever way they are encoded (the streamed ones come in id order)
+        expected = sorted(json.loads((await request("/bench/legacy-leads", keep=True))["body"]), key=lambda lead: lead["id"])
+        assert json.loads((await request("/leads", keep=True))["body"]) == expected
+        gzipped = await request("/leads", [("Accept-Encoding", "gzip")], keep=True)
+        assert json.loads(gzipped["body"]) == expected
+        ndjson = await request("/leads", [("Accept", "application/x-ndjson")], keep=True)
+        assert [json.loads(line) for line in ndjson["body"].splitlines()] == expected
+        assert ndjson["type"] == "application/x-ndjson" and len(expected) == args.leads
+        print(f"check    {len(expected):,} leads identical across legacy / array / ndjson / gzip")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--leads", type=int, default=200_000)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    try:
+        asyncio.run(main(args))
+    finally:
+        shutil.rmtree(WORKDIR, ignore_errors=True)
@@ -1,4 +1,5 @@
 const API_URL = "";
+const QUEUE_LIMIT = 50;
 
 let currentLeads = [];
 let selectedLeadIds = new Set();
@@ -97,17 +98,20 @@ async function injectTestLead() {
 
 async function fetchLeads() {
     try {
-        const [leadsRes, metricsRes] = await Promise.all([
+        // The queue comes back ranked by priority (highest-value prospects first)
+        const [leadsRes, queueRes, metricsRes] = await Promise.all([
             fetch(`${API_URL}/leads`),
+            fetch(`${API_URL}/leads/queue?status=processed&limit=${QUEUE_LIMIT}`),
             fetch(`${API_URL}/metrics`)
         ]);
 
         const leads = await leadsRes.json();
+        const queue = await queueRes.json();
         const metrics = await metricsRes.json();
 
         currentLeads = leads;
         updateMetrics(leads, metrics);
-        renderReviewQueue(leads.filter(l => l.status === 'processed'));
+        renderReviewQueue(queue);
     } catch (error) {
         console.error("Failed to fetch data:", error);
     }
@@ -155,7 +159,7 @@ function createLeadElement(lead) {
             <input type="checkbox" class="lead-checkbox" data-id="${lead.id}" ${isSelected ? 'checked' : ''}>
         </div>
         <div class="lead-info">
-            <h4>${lead.name}</h4>
+            <h4>${lead.name}${priorityBadge(lead)}</h4>
             <span class="company">${lead.company}</span>
             <span class="view-logs" onclick="viewLogs('${lead.id}')">View Logs</span>
         </div>
@@ -188,6 +192,13 @@ function createLeadElement(lead) {
     return div;
 }
 
+function priorityBadge(lead) {
+    if (lead.priority === null || lead.priority === undefined) return '';
+    const level = lead.priority >= 70 ? 'high' : lead.priority >= 45 ? 'medium' : 'low';
+    const fit = lead.fit_score === null || lead.fit_score === undefined ? 'not scored' : Math.round(lead.fit_score);
+    return ` <span class="priority priority-${level}" title="ICP fit: ${fit}">${Math.round(lead.priority)}</span>`;
+}
+
 function updateBatchUI() {
     const bar = document.querySelector('.batch-actions');
     const countSpan = document.getElementById('selected-count');
@@ -23,8 +23,17 @@ def pilot_onboarding():
     product = input("Enter your Product One-Liner: ")
     icp_desc = input("Describe your Ideal Customer Profile (e.g., CTOs at FinTech): ")
     
-    # In a real app, we'd POST this to /campaigns. For MVP, we pass it or just simulate usage.
-    # We will simulate that the Agent knows this context (in reality we'd update a config or Campaign obj).
+    # The campaign carries the product and ICP into the enrichment and drafting prompts
+    try:
+        res = requests.post(f"{API_URL}/campaigns", json={
+            "name": f"{company} Pilot", "product_description": f"{company}: {product}", "icp_description": icp_desc
+        })
+        res.raise_for_status()
+        campaign_id = res.json()["id"]
+        print(f"  -> Campaign {campaign_id} created")
+    except Exception:
+        print("  [Error] Could not create the campaign. Is server running?")
+        return
     
     # 2. Lead Generation / Import
     type_writer(f"\n[2] Generating 5 Test Leads for {icp_desc}...")
@@ -41,6 +50,7 @@ def pilot_onboarding():
     lead_ids = []
     for lead in mock_leads:
         lead["email"] = f"{lead['name'].split()[0].lower()}@{lead['company'].lower().replace(' ', '')}.com"
+        lead["campaign_id"] = campaign_id
         # Ingest
         try:
             res = requests.post(f"{API_URL}/leads", json=lead)
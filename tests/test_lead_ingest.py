@@ -0,0 +1,18 @@
+import os
+
+os.environ.setdefault("LOG_ASYNC", "False")
+os.environ.setdefault("LOG_LEVEL", "CRITICAL")
+
+from backend.services.lead_ingest.ingest import LeadIngestionService  # noqa: E402
+from backend.storage.db import LeadStore  # noqa: E402
+
+
+def test_bulk_ingest_keeps_each_lead_source(tmp_path):
+    db = LeadStore(str(tmp_path / "leads.db"))
+    ingestor = LeadIngestionService(db)
+    ids = ingestor.ingest_leads([
+        {"name": "Ann Lee", "company": "Acme", "source": "csv"},
+        {"name": "Bo Chen", "company": "Initech", "source": "hubspot"},
+        {"name": "Cy Diaz", "company": "Globex"},
+    ], source="API")
+    assert [db.get_lead(lead_id).source for lead_id in ids] == ["csv", "hubspot", "API"]
@@ -0,0 +1,104 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+os.environ.setdefault("LOG_ASYNC", "False")
+os.environ.setdefault("LOG_LEVEL", "CRITICAL")
+
+import pytest  # noqa: E402
+
+from backend.api.server import batch_approve  # noqa: E402
+from backend.services.sender.orchestrator import FollowUpNotDue, SendOrchestrator  # noqa: E402
+from backend.storage.async_db import AsyncLeadStore  # noqa: E402
+from backend.services.sender.risk_control import RiskController  # noqa: E402
+from backend.storage.db import LeadStore  # noqa: E402
+from backend.storage.lead_state import LeadState  # noqa: E402
+from backend.storage.models import Lead  # noqa: E402
+
+
+class FakeProvider:
+    def __init__(self):
+        self.sent = []
+
+    def send_email(self, to_email, subject, content, idempotency_key=None):
+        self.sent.append(idempotency_key)
+        return f"msg-{len(self.sent)}"
+
+    async def send_email_async(self, to_email, subject, content, idempotency_key=None):
+        return self.send_email(to_email, subject, content, idempotency_key)
+
+
+def make_orchestrator(tmp_path):
+    db = LeadStore(str(tmp_path / "leads.db"))
+    risk_control = RiskController(db)
+    risk_control.MIN_SECONDS_BETWEEN_SENDS = 0
+    provider = FakeProvider()
+    db.save_lead(Lead(id="lead-1", source="test", name="Ann Lee", company_name="Acme", email="ann@acme.com",
+                      status="processed", generated_email_subject="Hello", generated_email_body="First touch"))
+    return db, provider, SendOrchestrator(db, risk_control=risk_control, provider=provider)
+
+
+def test_follow_up_to_sent_lead_is_sent(tmp_path):
+    db, provider, orchestrator = make_orchestrator(tmp_path)
+    orchestrator.approve_and_send("lead-1")
+    lead = db.get_lead("lead-1")
+    assert lead.state == LeadState.SENT and lead.send_count == 1
+
+    orchestrator.send_follow_up("lead-1", body_override="Following up")
+    lead = db.get_lead("lead-1")
+    assert provider.sent == ["lead-1:step0", "lead-1:step1"]
+    assert lead.status == "sent_step1" and lead.send_count == 2
+    assert db.get_outbox_message("lead-1:step1").body == "Following up"
+
+
+def test_approving_twice_sends_once(tmp_path):
+    db, provider, orchestrator = make_orchestrator(tmp_path)
+    first = orchestrator.approve_and_send("lead-1")
+    # A retried request or a double click returns the send on record
+    again = orchestrator.approve_and_send("lead-1")
+    assert provider.sent == ["lead-1:step0"]
+    assert again.message_id == first.message_id == "msg-1"
+    assert db.get_lead("lead-1").send_count == 1
+
+
+def test_follow_up_needs_new_content_or_schedule(tmp_path):
+    db, provider, orchestrator = make_orchestrator(tmp_path)
+    orchestrator.approve_and_send("lead-1")
+    with pytest.raises(FollowUpNotDue):
+        orchestrator.send_follow_up("lead-1")
+    db.modify_lead("lead-1", lambda lead: setattr(lead, "next_scheduled_at", datetime.now() - timedelta(minutes=1)))
+    orchestrator.send_follow_up("lead-1")
+    assert provider.sent == ["lead-1:step0", "lead-1:step1"]
+
+
+def test_step_already_sent_is_not_resent(tmp_path):
+    db, provider, orchestrator = make_orchestrator(tmp_path)
+    orchestrator.approve_and_send("lead-1")
+    # A stale copy of the lead (send_count still 0) must not queue step 0 again
+    db.modify_lead("lead-1", lambda lead: setattr(lead, "send_count", 0))
+    assert orchestrator.approve_and_send("lead-1") is None
+    assert provider.sent == ["lead-1:step0"]
+    assert db.get_lead("lead-1").state == LeadState.SENT
+
+
+def test_batch_approve_within_send_interval_queues(tmp_path):
+    db, provider, orchestrator = make_orchestrator(tmp_path)
+    db.save_lead(Lead(id="lead-2", source="test", name="Bo Chen", company_name="Initech", email="bo@initech.com",
+                      status="processed", generated_email_subject="Hello", generated_email_body="First touch"))
+    orchestrator.risk_control.MIN_SECONDS_BETWEEN_SENDS = 60
+    orchestrator.async_db = AsyncLeadStore(db)
+    container = SimpleNamespace(async_db=orchestrator.async_db, sender=orchestrator)
+
+    results = asyncio.run(batch_approve({"lead_ids": ["lead-1", "lead-2"]}, container))
+    # The second lead waits in the outbox instead of failing the throttle
+    assert results == {"success": ["lead-1"], "queued": ["lead-2"], "failed": []}
+    assert provider.sent == ["lead-1:step0"]
+    assert db.get_outbox_message("lead-2:step0").status == "pending"
+
+    # The relay sends it once the interval is over
+    assert orchestrator.relay.drain() == 0
+    orchestrator.risk_control.last_send_time -= 60
+    assert orchestrator.relay.drain() == 1
+    assert provider.sent == ["lead-1:step0", "lead-2:step0"]
+    assert db.get_lead("lead-2").status == "sent_step0"